@@ -56,6 +56,7 @@ echo 📋 收集设备信息...
     echo Collection Time: %date% %time%
     for /f "tokens=*" %%i in ('adb shell getprop ro.product.model 2^>nul') do echo Device Model: %%i
     for /f "tokens=*" %%i in ('adb shell getprop ro.build.version.release 2^>nul') do echo Android Version: %%i
+    for /f "tokens=*" %%i in ('adb shell getprop ro.build.fingerprint 2^>nul') do echo Build Fingerprint: %%i
     for /f "tokens=*" %%i in ('adb shell uname -r 2^>nul') do echo Kernel Version: %%i
     for /f "tokens=*" %%i in ('adb shell dumpsys battery 2^>nul ^| findstr level') do echo Battery Level: %%i
     for /f "tokens=*" %%i in ('adb shell whoami 2^>nul') do echo ADB User: %%i
@@ -36,6 +36,7 @@ echo "📋 收集设备信息..."
     echo "Collection Time: $(date)"
     echo "Device Model: $(adb shell getprop ro.product.model 2>/dev/null || echo 'Unknown')"
     echo "Android Version: $(adb shell getprop ro.build.version.release 2>/dev/null || echo 'Unknown')"
+    echo "Build Fingerprint: $(adb shell getprop ro.build.fingerprint 2>/dev/null || echo 'Unknown')"
     echo "Kernel Version: $(adb shell uname -r 2>/dev/null || echo 'Unknown')"
     echo "Battery Level: $(adb shell dumpsys battery 2>/dev/null | grep level || echo 'Unknown')"
     echo "ADB User: $(adb shell whoami 2>/dev/null || echo 'Unknown')"
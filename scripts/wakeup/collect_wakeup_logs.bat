@@ -57,11 +57,16 @@ echo 📋 收集设备信息...
     echo Collection Type: Wakeup Analysis
     for /f "tokens=*" %%i in ('adb shell getprop ro.product.model 2^>nul') do echo Device Model: %%i
     for /f "tokens=*" %%i in ('adb shell getprop ro.build.version.release 2^>nul') do echo Android Version: %%i
+    for /f "tokens=*" %%i in ('adb shell getprop ro.build.fingerprint 2^>nul') do echo Build Fingerprint: %%i
     for /f "tokens=*" %%i in ('adb shell uname -r 2^>nul') do echo Kernel Version: %%i
     for /f "tokens=*" %%i in ('adb shell dumpsys battery 2^>nul ^| findstr level') do echo Battery Level: %%i
     for /f "tokens=*" %%i in ('adb shell whoami 2^>nul') do echo ADB User: %%i
 ) > "%OUTPUT_DIR%\collection_info.txt"
 
+REM 0. 中断快照 (测试区间开始; uptime 用于计算区间长度)
+echo ⏱️  记录 /proc/interrupts 初始快照...
+adb shell "cat /proc/uptime; cat /proc/interrupts" > "%OUTPUT_DIR%\interrupts_before.txt" 2>nul || type nul > "%OUTPUT_DIR%\interrupts_before.txt"
+
 REM 1. 收集 wakeup_sources
 echo 🌟 收集 wakeup sources 信息...
 adb shell "cat /sys/kernel/debug/wakeup_sources" > "%OUTPUT_DIR%\wakeup_sources.txt" 2>nul
@@ -148,7 +153,7 @@ REM 唤醒统计
 adb shell "cat /sys/power/wakeup_count" > "%OUTPUT_DIR%\wakeup_count.txt" 2>nul || type nul > "%OUTPUT_DIR%\wakeup_count.txt"
 
 REM 中断统计
-adb shell "cat /proc/interrupts" > "%OUTPUT_DIR%\interrupts.txt" 2>nul || type nul > "%OUTPUT_DIR%\interrupts.txt"
+adb shell "cat /proc/uptime; cat /proc/interrupts" > "%OUTPUT_DIR%\interrupts_after.txt" 2>nul || type nul > "%OUTPUT_DIR%\interrupts_after.txt"
 
 REM AlarmManager信息
 adb shell dumpsys alarm > "%OUTPUT_DIR%\dumpsys_alarm.txt" 2>nul || type nul > "%OUTPUT_DIR%\dumpsys_alarm.txt"
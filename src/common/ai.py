@@ -3,68 +3,320 @@
 AI Analysis Module for Android Suspend Diagnosis
 
 This module provides AI-powered analysis of Android logs using the QGenie LLM service.
+
+Logs that fit in one request are sent as a single prompt. Larger captures are
+analyzed map-reduce style: each log is split into chunks aligned to suspend
+cycles or dumpsys sections, chunks are analyzed concurrently (bounded
+parallelism, retried with backoff), and the per-chunk findings are reduced
+into the final report. Latency then follows the chunk size instead of the
+total log size. Findings that together exceed one request are first merged in
+groups, stage by stage, until the final reduce prompt fits.
 """
 import json
-from typing import Optional
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
-from qgenie import ChatMessage, QGenieClient
+from common.trace import span
 from common.types import LogMap
 
+SUSPEND_INSTRUCTIONS = (
+    "You are an Android power management and kernel expert. Analyze the following logs in this specific order:\n\n"
+    "**Analysis Steps:**\n"
+    "1. First, check `/d/suspend_stats` to determine if suspend succeeded or failed\n"
+    "   - Look for: success count, fail count, failed_suspend, failed_resume, etc.\n"
+    "   - Report: Whether suspend is working or failing\n\n"
+    "2. Second, check `dumpsys suspend_control_internal` for wakelocks\n"
+    "   - Look for: active wakelocks, last_failed_suspend counter, blocking components\n"
+    "   - Report: If any wakelocks are preventing suspend\n\n"
+    "3. Third, only if suspend failed AND no wakelocks found, analyze `dmesg` for root cause\n"
+    "   - Look for: suspend entry failures, driver errors, kernel messages\n"
+    "   - Report: Specific error messages and failing components\n\n"
+    "**Output Format:**\n"
+    "## Suspend Status\n"
+    "[Based on suspend_stats: success/failure counts and status]\n\n"
+    "## Wakelock Analysis\n"
+    "[Based on dumpsys: any blocking wakelocks or components]\n\n"
+    "## Root Cause (if applicable)\n"
+    "[Based on dmesg: only if suspend failed without wakelocks]\n\n"
+    "## Recommendations\n"
+    "[Specific, actionable steps to fix the issue]\n\n"
+)
+
+WAKEUP_INSTRUCTIONS = (
+    "You are an Android power management and kernel expert. Analyze the following logs "
+    "for excessive or inappropriate device wakeups:\n\n"
+    "**Analysis Steps:**\n"
+    "1. Check `wakeup_sources` for the sources with the highest wakeup counts\n"
+    "2. Check `dmesg` for kernel wakeup events and their intervals\n"
+    "3. Check `dumpsys power` for held wake locks\n"
+    "4. Check `logcat` for alarms, jobs and wake locks attributed to apps\n"
+    "5. Check `interrupts` (/proc/interrupts) for the interrupts firing most often\n\n"
+    "**Output Format:**\n"
+    "## Wakeup Sources\n"
+    "[Top offenders and whether their counts are abnormal]\n\n"
+    "## Wakeup Pattern\n"
+    "[Frequency and regularity of kernel wakeups]\n\n"
+    "## App Attribution\n"
+    "[Apps or services responsible for wakeups]\n\n"
+    "## Recommendations\n"
+    "[Specific, actionable steps to reduce wakeups]\n\n"
+)
+
+MAP_INSTRUCTIONS = (
+    "You are an Android power management and kernel expert. Below is chunk {index} of {total} "
+    "of the `{label}` log of one device (chunks are cut at suspend cycle or section boundaries). "
+    "The full analysis task is:\n\n{task}\n"
+    "For this chunk only, list the concrete findings relevant to that task as short bullets: "
+    "suspend/resume results, wakelocks or wakeup sources with counts, failing drivers and the "
+    "exact error lines (with timestamps). Reply \"No findings\" if nothing is relevant.\n\n"
+    "**Chunk:**\n"
+)
+
+REDUCE_INSTRUCTIONS = (
+    "The logs were too large for one request and were analyzed in chunks. "
+    "Combine the per-chunk findings below (and any small logs included verbatim) "
+    "into one answer in the required output format, merging duplicates and "
+    "keeping the most specific evidence.\n\n"
+)
+
+MERGE_INSTRUCTIONS = (
+    "Below are findings from consecutive chunks of large Android logs. Merge them into one "
+    "list of short bullets, dropping duplicates and keeping the most specific evidence "
+    "(counts, exact error lines with timestamps).\n\n"
+    "**Findings:**\n"
+)
+
+# Boundaries to cut chunks at: start of a suspend cycle or a dumpsys section
+_CHUNK_BOUNDARY = re.compile(
+    r"PM: suspend entry|PM: Syncing filesystems|Freezing user space processes"
+    r"|^DUMP OF SERVICE|^-{5,}|^={5,}"
+)
+
+
+# Shared dispatcher (see ``common.ai_dispatch``) used instead of a per-reporter client
+_dispatcher = None
+
+
+def set_dispatcher(dispatcher) -> None:
+    """
+    Route every ``QGenieReporter`` request through a shared ``AIDispatcher``.
+
+    Args:
+        dispatcher: Dispatcher to use, or None to go back to direct client calls
+    """
+    global _dispatcher
+    _dispatcher = dispatcher
+
+
+def split_chunks(text: str, max_bytes: int) -> List[str]:
+    """
+    Split a log into chunks of at most ``max_bytes``, cut at cycle/section boundaries.
+
+    Consecutive segments (from one boundary line to the next) are packed into a
+    chunk while they fit; a single segment larger than ``max_bytes`` is cut at
+    line boundaries.
+
+    Args:
+        text: Log content
+        max_bytes: Target maximum chunk size in characters
+
+    Returns:
+        List[str]: Chunks in log order
+    """
+    segments: List[List[str]] = [[]]
+    for line in text.splitlines(keepends=True):
+        if segments[-1] and _CHUNK_BOUNDARY.search(line):
+            segments.append([])
+        segments[-1].append(line)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for segment in segments:
+        seg_size = sum(len(line) for line in segment)
+        if current and size + seg_size > max_bytes:
+            chunks.append("".join(current))
+            current, size = [], 0
+        for line in segment:
+            if current and size + len(line) > max_bytes:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
 
 class QGenieReporter:
     """
     Calls the QGenie LLM service and returns text analysis results.
-    
-    Uses the default QGenie configuration for analysis.
+
+    Uses the default QGenie configuration for analysis. When a shared
+    dispatcher is installed with ``set_dispatcher``, requests go through it
+    (shared client, rate limiting, retries and de-duplication) instead.
     """
 
+    # Prompts with more log text than this are analyzed in chunks
+    CHUNK_BYTES = 60_000
+    # Concurrent chunk requests
+    MAX_WORKERS = 4
+    # Attempts per request (exponential backoff between attempts)
+    ATTEMPTS = 3
+    BACKOFF_SECONDS = 1.0
+
     def __init__(self):
         """
-        Initialize the QGenie reporter with default configuration.
+        Initialize the QGenie reporter; the client is created on first direct use.
         """
-        self.client = QGenieClient(max_retries=1, debug=True)
+        self.client = None
 
     def generate(self, logs: LogMap) -> Optional[str]:
         """
         Send logs to the model and return the generated text analysis.
-        
+
+        Args:
+            logs: Dictionary mapping log types to their content
+
+        Returns:
+            Optional[str]: AI-generated analysis text, or None if an error occurred
+        """
+        return self._analyze(SUSPEND_INSTRUCTIONS, logs)
+
+    def generate_wakeup(self, logs: LogMap) -> Optional[str]:
+        """
+        Send wakeup-related logs to the model and return the generated analysis.
+
         Args:
             logs: Dictionary mapping log types to their content
-            
+
         Returns:
             Optional[str]: AI-generated analysis text, or None if an error occurred
         """
-        # Construct structured prompt for focused analysis
+        return self._analyze(WAKEUP_INSTRUCTIONS, logs)
+
+    def _analyze(self, instructions: str, logs: LogMap) -> Optional[str]:
+        """
+        Analyze logs in one request, or map-reduce over chunks if they are too large.
+
+        Args:
+            instructions: Task description and output format
+            logs: Dictionary mapping log types to their content
+
+        Returns:
+            Optional[str]: Model output, or None if an error occurred
+        """
+        if sum(len(text) for text in logs.values()) <= self.CHUNK_BYTES:
+            return self._chat(instructions + "**Logs:**\n" + json.dumps(logs, ensure_ascii=False))
+
+        # Small logs go to the reduce step verbatim (up to a quarter of a request), the others are mapped in chunks
+        small = {}
+        small_size = 0
+        for label, text in sorted(logs.items(), key=lambda item: len(item[1])):
+            if small_size + len(text) > self.CHUNK_BYTES // 4:
+                break
+            small[label] = text
+            small_size += len(text)
+        jobs: List[Tuple[str, int, int, str]] = []
+        for label, text in logs.items():
+            if label in small:
+                continue
+            chunks = split_chunks(text, self.CHUNK_BYTES)
+            jobs.extend((label, i + 1, len(chunks), chunk) for i, chunk in enumerate(chunks))
+
+        with span("ai:map", cat="ai", chunks=len(jobs)):
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+                findings = list(pool.map(lambda job: self._map_chunk(instructions, *job), jobs))
+
+        if not any(findings):
+            print("[AI ERROR] all chunk requests failed")
+            return None
+        parts = [
+            f"### {label} (chunk {index}/{total})\n{result or '(chunk analysis failed)'}"
+            for (label, index, total, _), result in zip(jobs, findings)
+        ]
+        parts = self._merge_findings(parts, self.CHUNK_BYTES - small_size)
         prompt = (
-            "You are an Android power management and kernel expert. Analyze the following logs in this specific order:\n\n"
-            "**Analysis Steps:**\n"
-            "1. First, check `/d/suspend_stats` to determine if suspend succeeded or failed\n"
-            "   - Look for: success count, fail count, failed_suspend, failed_resume, etc.\n"
-            "   - Report: Whether suspend is working or failing\n\n"
-            "2. Second, check `dumpsys suspend_control_internal` for wakelocks\n"
-            "   - Look for: active wakelocks, last_failed_suspend counter, blocking components\n"
-            "   - Report: If any wakelocks are preventing suspend\n\n"
-            "3. Third, only if suspend failed AND no wakelocks found, analyze `dmesg` for root cause\n"
-            "   - Look for: suspend entry failures, driver errors, kernel messages\n"
-            "   - Report: Specific error messages and failing components\n\n"
-            "**Output Format:**\n"
-            "## Suspend Status\n"
-            "[Based on suspend_stats: success/failure counts and status]\n\n"
-            "## Wakelock Analysis\n"
-            "[Based on dumpsys: any blocking wakelocks or components]\n\n"
-            "## Root Cause (if applicable)\n"
-            "[Based on dmesg: only if suspend failed without wakelocks]\n\n"
-            "## Recommendations\n"
-            "[Specific, actionable steps to fix the issue]\n\n"
-            "**Logs:**\n"
-            + json.dumps(logs, ensure_ascii=False)
+            instructions + REDUCE_INSTRUCTIONS
+            + "**Per-chunk findings:**\n" + "\n\n".join(parts)
+            + "\n\n**Logs:**\n" + json.dumps(small, ensure_ascii=False)
         )
+        with span("ai:reduce", cat="ai"):
+            return self._chat(prompt)
 
-        try:
-            response = self.client.chat(
-                messages=[ChatMessage(role="user", content=prompt)]
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            print("[AI ERROR]", e)
-            return None
+    def _merge_findings(self, parts: List[str], budget: int) -> List[str]:
+        """
+        Merge chunk findings in stages until they fit ``budget`` characters.
+
+        Each stage caps every part at half the budget, packs consecutive parts
+        into groups that fit one request and merges each group with the model
+        (a failed merge keeps the group text, cut to the cap). Groups hold at
+        least two parts, so every stage shrinks the list.
+
+        Args:
+            parts: Findings in log order
+            budget: Maximum total size for the final reduce prompt
+
+        Returns:
+            List[str]: Findings whose total size fits ``budget``
+        """
+        cap = max(budget // 2, 1)
+        stage = 0
+        while len(parts) > 1 and sum(len(part) for part in parts) > budget:
+            stage += 1
+            parts = [part if len(part) <= cap else part[:cap] + "\n(truncated)" for part in parts]
+            groups: List[List[str]] = [[]]
+            size = 0
+            for part in parts:
+                if groups[-1] and size + len(part) > budget:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(part)
+                size += len(part)
+            with span("ai:merge", cat="ai", stage=stage, groups=len(groups)):
+                with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+                    merged = list(pool.map(lambda group: self._chat(MERGE_INSTRUCTIONS + "\n\n".join(group)), groups))
+            parts = [
+                result[:cap] if result else "\n\n".join(group)[:cap]
+                for group, result in zip(groups, merged)
+            ]
+        if len(parts) == 1 and len(parts[0]) > budget:
+            parts = [parts[0][:budget] + "\n(truncated)"]
+        return parts
+
+    def _map_chunk(self, instructions: str, label: str, index: int, total: int, chunk: str) -> Optional[str]:
+        """Return the findings for one chunk (None if every attempt failed)."""
+        prompt = MAP_INSTRUCTIONS.format(index=index, total=total, label=label, task=instructions) + chunk
+        return self._chat(prompt)
+
+    def _chat(self, prompt: str) -> Optional[str]:
+        """
+        Send a single-message chat request, retrying with exponential backoff.
+
+        Args:
+            prompt: Full prompt text
+
+        Returns:
+            Optional[str]: Model output, or None if an error occurred
+        """
+        if _dispatcher is not None:
+            return _dispatcher.chat(prompt)
+
+        from qgenie import ChatMessage, QGenieClient
+        if self.client is None:
+            self.client = QGenieClient(max_retries=1, debug=True)
+        for attempt in range(self.ATTEMPTS):
+            try:
+                with span("ai:qgenie", cat="ai", bytes=len(prompt), attempt=attempt + 1):
+                    response = self.client.chat(
+                        messages=[ChatMessage(role="user", content=prompt)]
+                    )
+                return response.choices[0].message.content
+            except Exception as e:
+                if attempt + 1 == self.ATTEMPTS:
+                    print("[AI ERROR]", e)
+                    return None
+                time.sleep(self.BACKOFF_SECONDS * 2 ** attempt)
+        return None
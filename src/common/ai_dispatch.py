@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Concurrent AI Request Dispatcher
+
+Batch triage sends many AI requests (one or more per case, more when large
+logs are analyzed in chunks). Instead of one fresh client per case and serial
+round trips, a single ``AIDispatcher`` runs an asyncio event loop in a
+background thread and shares one backend client between all callers:
+
+- at most ``max_in_flight`` requests are outstanding at any time,
+- requests are started no faster than a token bucket allows (``rate`` per
+  second with bursts of ``burst``),
+- failures are retried with exponential backoff and jitter,
+- identical prompts are sent once and every caller receives the same result,
+- ``stream()`` yields results as they finish rather than in submission order.
+
+Backends are small objects with a blocking ``chat(prompt) -> str`` method:
+``QGenieBackend`` for the QGenie service and ``HttpChatBackend`` for any
+OpenAI-style ``/chat/completions`` endpoint, such as the local stub server
+started with ``python -m common.ai_dispatch --stub 127.0.0.1:9000``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from common.trace import span
+
+
+class QGenieBackend:
+    """
+    Blocking chat backend using the QGenie client.
+    """
+
+    def __init__(self):
+        from qgenie import ChatMessage, QGenieClient
+        self._message = ChatMessage
+        self.client = QGenieClient(max_retries=1, debug=True)
+
+    def chat(self, prompt: str) -> str:
+        """Send one user message and return the model output."""
+        response = self.client.chat(messages=[self._message(role="user", content=prompt)])
+        return response.choices[0].message.content
+
+
+class HttpChatBackend:
+    """
+    Blocking chat backend for an OpenAI-style ``/chat/completions`` endpoint.
+    """
+
+    def __init__(self, url: str, model: str = "", timeout: float = 300.0):
+        """
+        Initialize the backend.
+
+        Args:
+            url: Endpoint URL (e.g. ``http://127.0.0.1:9000/v1/chat/completions``)
+            model: Model name sent with each request (omitted when empty)
+            timeout: Socket timeout per request in seconds
+        """
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+
+    def chat(self, prompt: str) -> str:
+        """Send one user message and return the model output."""
+        body = {"messages": [{"role": "user", "content": prompt}]}
+        if self.model:
+            body["model"] = self.model
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+        return payload["choices"][0]["message"]["content"]
+
+
+def make_backend(endpoint: str = ""):
+    """Return an ``HttpChatBackend`` for ``endpoint`` or the QGenie backend when empty."""
+    return HttpChatBackend(endpoint) if endpoint else QGenieBackend()
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket: ``rate`` tokens per second, at most ``burst`` stored.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AIDispatcher:
+    """
+    Shares one backend between callers with bounded concurrency, rate limiting,
+    retries and de-duplication of identical prompts.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_in_flight: int = 4,
+        rate: float = 2.0,
+        burst: int = 4,
+        attempts: int = 4,
+        backoff: float = 1.0,
+        cache_size: int = 1024,
+    ):
+        """
+        Initialize the dispatcher and start its event loop thread.
+
+        Args:
+            backend: Object with a blocking ``chat(prompt) -> str`` method
+            max_in_flight: Maximum concurrent requests
+            rate: Request starts per second (0 disables rate limiting)
+            burst: Requests that may start back to back after an idle period
+            attempts: Attempts per prompt before giving up
+            backoff: Base delay in seconds, doubled after every failed attempt
+            cache_size: Completed prompts whose results are reused
+        """
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.attempts = attempts
+        self.backoff = backoff
+        self.cache_size = cache_size
+        self.stats = {"requests": 0, "deduplicated": 0, "retries": 0, "failed": 0}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._done: "OrderedDict[str, str]" = OrderedDict()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ai-dispatch", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    async def _setup(self) -> None:
+        # Synchronization primitives must be created on the dispatcher loop
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._bucket = TokenBucket(self.rate, self.burst)
+
+    async def request(self, prompt: str) -> Optional[str]:
+        """
+        Send a prompt (or join an identical one already sent) and return the result.
+
+        Must be awaited on the dispatcher loop; use ``chat`` from other threads.
+
+        Args:
+            prompt: Full prompt text
+
+        Returns:
+            Optional[str]: Model output, or None if every attempt failed
+        """
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        if key in self._done:
+            self.stats["deduplicated"] += 1
+            return self._done[key]
+        if key in self._pending:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(self._pending[key])
+
+        future = self._loop.create_future()
+        self._pending[key] = future
+        try:
+            result = await self._send(prompt)
+            future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise it; without waiters it must not be logged as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+        # Failures are not cached: an identical prompt later is sent again
+        if result is not None:
+            self._done[key] = result
+            if len(self._done) > self.cache_size:
+                self._done.popitem(last=False)
+        return result
+
+    async def _send(self, prompt: str) -> Optional[str]:
+        """Send one prompt with rate limiting, bounded concurrency and backoff."""
+        for attempt in range(self.attempts):
+            await self._bucket.acquire()
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    with span("ai:request", cat="ai", bytes=len(prompt), attempt=attempt + 1):
+                        return await asyncio.to_thread(self.backend.chat, prompt)
+                except Exception as e:
+                    error = e
+            if attempt + 1 < self.attempts:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+        self.stats["failed"] += 1
+        print("[AI ERROR]", error)
+        return None
+
+    async def stream(self, prompts: Iterable[Tuple[str, str]]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Send ``(key, prompt)`` pairs concurrently and yield ``(key, result)`` as they finish.
+
+        Args:
+            prompts: Iterable of caller-chosen keys and prompts
+
+        Yields:
+            Tuple[str, Optional[str]]: Key and model output (None on failure)
+        """
+        async def keyed(key: str, prompt: str) -> Tuple[str, Optional[str]]:
+            return key, await self.request(prompt)
+
+        tasks = [asyncio.ensure_future(keyed(key, prompt)) for key, prompt in prompts]
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+
+    def chat(self, prompt: str) -> Optional[str]:
+        """
+        Blocking helper for worker threads: send a prompt through the dispatcher.
+
+        Args:
+            prompt: Full prompt text
+
+        Returns:
+            Optional[str]: Model output, or None if every attempt failed
+        """
+        return asyncio.run_coroutine_threadsafe(self.request(prompt), self._loop).result()
+
+    def close(self) -> None:
+        """Stop the event loop thread."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class _StubChatHandler(BaseHTTPRequestHandler):
+    """OpenAI-style chat endpoint that answers after a fixed latency."""
+
+    latency = 0.5
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self.send_error(503, "stub failure")
+            return
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        content = f"## Stub Analysis\nReceived {len(prompt)} characters of prompt.\n"
+        data = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run_stub_server(host: str, port: int, latency: float = 0.5, fail_rate: float = 0.0) -> None:
+    """
+    Serve a local stub chat endpoint (any path) for testing AI batch throughput.
+
+    Args:
+        host: Interface to bind
+        port: Port to listen on
+        latency: Seconds each response is delayed
+        fail_rate: Fraction of requests answered with HTTP 503
+    """
+    handler = type("StubChatHandler", (_StubChatHandler,), {"latency": latency, "fail_rate": fail_rate})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"[STUB] Chat endpoint on http://{host}:{port}/v1/chat/completions "
+          f"(latency {latency}s, fail rate {fail_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub chat endpoint for AI dispatcher testing")
+    parser.add_argument("--stub", default="127.0.0.1:9000", metavar="HOST:PORT", help="Address to listen on")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per response (default: 0.5)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    args = parser.parse_args()
+    host, _, port = args.stub.rpartition(":")
+    run_stub_server(host or "127.0.0.1", int(port), args.latency, args.fail_rate)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Artifact Access for Android Power Diagnosis
+
+Evidence files are addressed by the paths stored in an ``ArtifactMap``. They
+are plain files, files compressed with gzip (``dmesg.txt.gz``) or zstd
+(``dmesg.txt.zst``), or members of a container addressed as
+``<container path>!<artifact name>``: sections of a bugreport zip (see
+``common.bugreport``) or artifacts of a case archive (see
+``common.case_archive``). Every reader and
+writer of evidence goes through these helpers so all kinds are handled alike
+and compressed files are decoded as streams.
+"""
+import gzip
+import io
+from pathlib import Path
+from typing import BinaryIO, Optional, TextIO, Tuple
+
+from common.bugreport import bugreport_index
+from common.case_archive import case_archive, is_case_archive
+
+# Separates a container (bugreport zip or case archive) path from the artifact it provides
+MEMBER_SEP = "!"
+
+# Suffix added to an artifact name for each supported compression
+COMPRESSIONS = {"none": "", "gz": ".gz", "zst": ".zst"}
+
+# gzip level used when writing: close to the ratio of level 9 at a fraction of the time
+_GZIP_LEVEL = 6
+
+
+def _zstd():
+    """
+    Return a module providing ``open`` for zstd files.
+
+    Uses ``compression.zstd`` (Python 3.14+) or the ``zstandard`` package.
+    """
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError(".zst artifacts require Python 3.14+ or the zstandard package (pip install zstandard)") from None
+
+
+def artifact_name(path: str) -> str:
+    """Return the artifact name of a file name, without its compression suffix."""
+    for suffix in COMPRESSIONS.values():
+        if suffix and path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def find_artifact(directory: Path, name: str) -> Optional[Path]:
+    """
+    Find evidence file ``name`` in a case directory, plain or compressed.
+
+    Returns:
+        Optional[Path]: The first of ``name``, ``name.gz`` and ``name.zst`` that
+        exists (None if none does)
+    """
+    for suffix in COMPRESSIONS.values():
+        path = directory / f"{name}{suffix}"
+        if path.is_file():
+            return path
+    return None
+
+
+def member_path(container: str, name: str) -> str:
+    """Return the artifact path of evidence file ``name`` inside a bugreport zip or case archive."""
+    return f"{container}{MEMBER_SEP}{name}"
+
+
+def split_member(path: str) -> Tuple[str, Optional[str]]:
+    """
+    Split an artifact path into its container and member.
+
+    Returns:
+        Tuple[str, Optional[str]]: ``(container path, artifact name)`` for
+        bugreport and case archive artifacts, ``(path, None)`` for plain files
+    """
+    container, sep, name = path.rpartition(MEMBER_SEP)
+    if sep and (container.lower().endswith(".zip") or is_case_archive(container)):
+        return container, name
+    return path, None
+
+
+def _container(path: str):
+    """Return the index of a container: a case archive or a bugreport zip."""
+    return case_archive(path) if is_case_archive(path) else bugreport_index(path)
+
+
+def source_file(path: str) -> str:
+    """Return the file on disk holding an artifact (the container for bugreport and archive artifacts)."""
+    return split_member(path)[0]
+
+
+def artifact_exists(path: str) -> bool:
+    """Return True if the artifact can be read."""
+    container, name = split_member(path)
+    if name is None:
+        return Path(path).is_file()
+    return Path(container).is_file() and name in _container(container).artifacts
+
+
+def open_binary(path: str) -> BinaryIO:
+    """
+    Open an artifact as a binary stream of its raw (decompressed) bytes.
+
+    Compressed files are decoded while reading and bugreport and archive
+    artifacts are streamed out of their container, so nothing is decompressed
+    to disk.
+    """
+    container, name = split_member(path)
+    if name is not None:
+        return _container(container).open(name)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        return _zstd().open(path, "rb")
+    return open(path, "rb")
+
+
+def open_artifact(path: str) -> TextIO:
+    """Open an artifact as a text stream (UTF-8, undecodable bytes ignored)."""
+    return io.TextIOWrapper(open_binary(path), encoding="utf-8", errors="ignore")
+
+
+def read_artifact(path: str) -> str:
+    """Return the whole content of an artifact."""
+    with open_artifact(path) as f:
+        return f.read()
+
+
+def write_artifact(directory: Path, name: str, content: str, compression: str = "none") -> str:
+    """
+    Write evidence file ``name`` to a case directory.
+
+    Args:
+        directory: Case directory
+        name: Artifact name (e.g. ``dmesg.txt``)
+        content: Text to store
+        compression: A key of ``COMPRESSIONS``
+
+    Returns:
+        str: Path of the written file (with its compression suffix)
+    """
+    path = str(directory / f"{name}{COMPRESSIONS[compression]}")
+    if compression == "gz":
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=_GZIP_LEVEL) as f:
+            f.write(content)
+    elif compression == "zst":
+        with _zstd().open(path, "wt", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        Path(path).write_text(content, encoding="utf-8")
+    return path
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Fleet Baseline and Regression Detection
+
+This module keeps streaming, mergeable per-build and per-device-model
+statistics of the diagnosis metrics (suspend failure ratio, wakeup counts,
+active wakelocks, top wakeup sources). New cases are scored against the
+baseline without re-reading any raw log, and whole builds can be compared
+with each other to flag regressions.
+
+All summaries are mergeable: running moments (Chan et al.), a bounded
+log-bucket quantile sketch and bounded top-k counters, so baselines built on
+different hosts can be combined.
+"""
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from common.types import ResultBase
+
+# Minimum number of cases before a group is used for scoring
+MIN_SAMPLES = 5
+
+# Z-score above which a case (or build) is flagged
+Z_THRESHOLD = 3.0
+
+# Percentile above which a case is flagged
+PERCENTILE_THRESHOLD = 0.99
+
+
+class RunningStats:
+    """Count, mean, variance, min and max with O(1) update and merge."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        """Add one observation."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Merge another summary into this one."""
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (0 for fewer than two observations)."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.min = data["min"] if data.get("min") is not None else math.inf
+        stats.max = data["max"] if data.get("max") is not None else -math.inf
+        return stats
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with bounded relative error (DDSketch style).
+
+    Values are non-negative counts; zero gets its own bucket. The number of
+    buckets is capped, collapsing the lowest ones, so queries are O(1) in the
+    number of observations.
+    """
+
+    __slots__ = ("alpha", "gamma", "log_gamma", "max_buckets", "zero", "buckets", "count")
+
+    def __init__(self, alpha: float = 0.02, max_buckets: int = 256):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.zero = 0
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+
+    def _index(self, x: float) -> int:
+        return math.ceil(math.log(x) / self.log_gamma)
+
+    def add(self, x: float) -> None:
+        """Add one observation."""
+        self.count += 1
+        if x <= 0:
+            self.zero += 1
+            return
+        idx = self._index(x)
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Merge another sketch with the same accuracy into this one."""
+        self.count += other.count
+        self.zero += other.zero
+        for idx, n in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self._collapse()
+
+    def _collapse(self) -> None:
+        while len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q: float) -> float:
+        """Return the approximate ``q`` quantile (0 <= q <= 1)."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if rank < seen:
+                return 2 * self.gamma ** idx / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def rank(self, x: float) -> float:
+        """Return the approximate fraction of observations <= ``x``."""
+        if not self.count:
+            return 0.0
+        below = self.zero if x >= 0 else 0
+        if x > 0:
+            limit = self._index(x)
+            below += sum(n for idx, n in self.buckets.items() if idx <= limit)
+        return below / self.count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "zero": self.zero, "count": self.count,
+                "buckets": {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(alpha=data["alpha"])
+        sketch.zero = data["zero"]
+        sketch.count = data["count"]
+        sketch.buckets = {int(k): v for k, v in data["buckets"].items()}
+        return sketch
+
+
+class TopCounter:
+    """Bounded name → count table keeping the heaviest ``capacity`` entries."""
+
+    __slots__ = ("capacity", "counts")
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+        if len(self.counts) > 2 * self.capacity:
+            self._trim()
+
+    def merge(self, other: "TopCounter") -> None:
+        for name, n in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + n
+        self._trim()
+
+    def _trim(self) -> None:
+        self.counts = dict(self.top(self.capacity))
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda x: (-x[1], x[0]))[:k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "counts": dict(self.top(self.capacity))}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopCounter":
+        counter = cls(data["capacity"])
+        counter.counts = dict(data["counts"])
+        return counter
+
+
+class MetricGroup:
+    """All summaries kept for one build or one device model."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Tuple[RunningStats, QuantileSketch]] = {}
+        self.counters: Dict[str, TopCounter] = {}
+
+    def add(self, metrics: Dict[str, float], names: Dict[str, Dict[str, int]]) -> None:
+        for metric, value in metrics.items():
+            stats, sketch = self.metrics.setdefault(metric, (RunningStats(), QuantileSketch()))
+            stats.add(value)
+            sketch.add(value)
+        for counter, values in names.items():
+            top = self.counters.setdefault(counter, TopCounter())
+            for name, n in values.items():
+                top.add(name, n)
+
+    def merge(self, other: "MetricGroup") -> None:
+        for metric, (stats, sketch) in other.metrics.items():
+            mine = self.metrics.setdefault(metric, (RunningStats(), QuantileSketch(sketch.alpha)))
+            mine[0].merge(stats)
+            mine[1].merge(sketch)
+        for counter, top in other.counters.items():
+            self.counters.setdefault(counter, TopCounter(top.capacity)).merge(top)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "metrics": {m: {"stats": s.to_dict(), "sketch": k.to_dict()} for m, (s, k) in self.metrics.items()},
+            "counters": {c: t.to_dict() for c, t in self.counters.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MetricGroup":
+        group = cls()
+        for metric, entry in data.get("metrics", {}).items():
+            group.metrics[metric] = (RunningStats.from_dict(entry["stats"]),
+                                     QuantileSketch.from_dict(entry["sketch"]))
+        for counter, entry in data.get("counters", {}).items():
+            group.counters[counter] = TopCounter.from_dict(entry)
+        return group
+
+
+def case_metrics(
+    module: str, failed: bool, detailed: ResultBase
+) -> Tuple[Dict[str, float], Dict[str, Dict[str, int]]]:
+    """
+    Extract the baseline metrics and name counters from one module's result.
+
+    For every metric, higher values are worse.
+
+    Returns:
+        Tuple: (metrics, counters) where counters map a counter name to
+        ``{item_name: count}``
+    """
+    metrics: Dict[str, float] = {}
+    counters: Dict[str, Dict[str, int]] = {}
+    if module == "suspend":
+        wakelocks = detailed.step2_wakelocks.wakelocks
+        metrics["suspend_failed"] = 1.0 if failed else 0.0
+        metrics["active_wakelocks"] = float(len(wakelocks))
+        step1 = detailed.step1_suspend_stats
+        stats = step1.delta or step1.stats
+        if stats is not None:
+            metrics["suspend_fail_count"] = float(stats.fail)
+        counters["active_wakelocks"] = {name: 1 for name in wakelocks}
+        cycles = detailed.cycles
+        if cycles.cycle_count:
+            metrics["suspend_p95_ms"] = cycles.suspend_p95_ms
+            metrics["resume_p95_ms"] = cycles.resume_p95_ms
+            counters["resume_drivers_ms"] = {
+                d.driver: int(d.total_ms) for d in cycles.drivers if d.phase == "resume"
+            }
+    elif module == "wakeup":
+        sources = detailed.wakeup_sources
+        metrics["total_wakeups"] = float(sources.total_wakeups)
+        metrics["wakeup_events"] = float(detailed.dmesg_wakeups.event_count)
+        metrics["active_sources"] = float(len(sources.active_sources))
+        counters["wakeup_sources"] = {s.name: s.wakeup_count for s in sources.top_wakeup_sources}
+        irqs = [irq for irq in detailed.irq_wakeups.irqs if irq.wakeups]
+        if irqs:
+            counters["wakeup_irqs"] = {f"{irq.irq} {irq.name}".strip(): irq.wakeups for irq in irqs}
+    return metrics, counters
+
+
+class Baseline:
+    """
+    Streaming per-build and per-device-model baseline, persisted as JSON.
+    """
+
+    def __init__(self):
+        self.groups: Dict[str, MetricGroup] = {}
+        # Batch mode may score and update from several worker threads
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def group_key(kind: str, value: str) -> str:
+        """Key of a group, e.g. ``build:UKQ1.231003`` or ``model:Pixel 8``."""
+        return f"{kind}:{value or 'unknown'}"
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        """Load a baseline file (an empty baseline if it does not exist)."""
+        baseline = cls()
+        if Path(path).is_file():
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            baseline.groups = {k: MetricGroup.from_dict(v) for k, v in data.get("groups", {}).items()}
+        return baseline
+
+    def save(self, path: str) -> None:
+        """Write the baseline as JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": 1, "groups": {k: g.to_dict() for k, g in self.groups.items()}}
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    def update(self, module: str, failed: bool, detailed: ResultBase,
+               build: str = "", model: str = "") -> None:
+        """Add one case's result to its build and device-model groups."""
+        metrics, counters = case_metrics(module, failed, detailed)
+        with self._lock:
+            for key in (self.group_key("build", build), self.group_key("model", model)):
+                self.groups.setdefault(key, MetricGroup()).add(metrics, counters)
+
+    def merge(self, other: "Baseline") -> None:
+        """Merge another baseline (e.g. built on another host) into this one."""
+        with self._lock:
+            for key, group in other.groups.items():
+                self.groups.setdefault(key, MetricGroup()).merge(group)
+
+    def score(
+        self,
+        module: str,
+        failed: bool,
+        detailed: ResultBase,
+        model: str = "",
+        reference_build: str = "",
+    ) -> List[Dict[str, Any]]:
+        """
+        Score one case against the baseline and return its outliers.
+
+        The case is compared with ``reference_build`` when given, otherwise
+        with its device model. Only metrics worse than the baseline are flagged.
+
+        Returns:
+            List[Dict]: One entry per flagged metric or unusual top source with
+            ``metric``, ``value``, ``mean``, ``p95``, ``z`` and ``percentile``
+        """
+        with self._lock:
+            return self._score(module, failed, detailed, model, reference_build)
+
+    def _score(self, module: str, failed: bool, detailed: ResultBase,
+               model: str, reference_build: str) -> List[Dict[str, Any]]:
+        key = (self.group_key("build", reference_build) if reference_build
+               else self.group_key("model", model))
+        group = self.groups.get(key)
+        if group is None:
+            return []
+        metrics, counters = case_metrics(module, failed, detailed)
+        outliers = []
+        for metric, value in metrics.items():
+            if metric not in group.metrics:
+                continue
+            stats, sketch = group.metrics[metric]
+            if stats.count < MIN_SAMPLES or value <= stats.mean:
+                continue
+            z = (value - stats.mean) / stats.std if stats.std else math.inf
+            percentile = sketch.rank(value)
+            if z >= Z_THRESHOLD or percentile >= PERCENTILE_THRESHOLD:
+                outliers.append({
+                    "group": key, "metric": metric, "value": value,
+                    "mean": round(stats.mean, 3), "p95": round(sketch.quantile(0.95), 3),
+                    "z": round(z, 2) if z != math.inf else None,
+                    "percentile": round(percentile, 3),
+                })
+        for counter, values in counters.items():
+            known = {name for name, _ in group.counters.get(counter, TopCounter()).top(20)}
+            top = sorted(values.items(), key=lambda x: -x[1])[:3]
+            for name, n in top:
+                if n and known and name not in known:
+                    outliers.append({"group": key, "metric": f"new_top:{counter}", "value": n, "name": name})
+        return outliers
+
+    def compare_builds(self, new_build: str, old_build: str) -> List[Dict[str, Any]]:
+        """
+        Flag metrics whose mean in ``new_build`` is significantly worse than in ``old_build``.
+
+        Uses Welch's t statistic on the stored moments; no raw logs are read.
+        """
+        new = self.groups.get(self.group_key("build", new_build))
+        old = self.groups.get(self.group_key("build", old_build))
+        if new is None or old is None:
+            return []
+        regressions = []
+        for metric, (new_stats, _) in new.metrics.items():
+            if metric not in old.metrics:
+                continue
+            old_stats = old.metrics[metric][0]
+            if min(new_stats.count, old_stats.count) < 2 or new_stats.mean <= old_stats.mean:
+                continue
+            stderr = math.sqrt(new_stats.std ** 2 / new_stats.count + old_stats.std ** 2 / old_stats.count)
+            t = (new_stats.mean - old_stats.mean) / stderr if stderr else math.inf
+            if t >= Z_THRESHOLD:
+                regressions.append({
+                    "metric": metric,
+                    "new_mean": round(new_stats.mean, 3), "new_cases": new_stats.count,
+                    "old_mean": round(old_stats.mean, 3), "old_cases": old_stats.count,
+                    "t": round(t, 2) if t != math.inf else None,
+                })
+        return regressions
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Bugreport Zip Loader for Android Power Diagnosis
+
+This module lets the analyzers read the evidence of an ``adb bugreport`` zip
+without unpacking it. The main ``bugreport-*.txt`` entry is scanned once as a
+stream of compressed chunks and a section index of byte offsets is built:
+
+- ``------ TITLE ------`` sections written by dumpstate (kernel log, system
+  log, ``/d/suspend_stats``, wakeup sources, ``/proc/interrupts`` ...),
+- ``DUMP OF SERVICE <name>:`` sections, indexed as ``dumpsys <name>``.
+
+The index is saved next to the reports of the case, so later runs skip the
+scan. Individual sections are then streamed straight out of the zip entry:
+stored entries seek directly, deflated ones are decompressed up to the end of
+the section and discarded as they go, never written to disk.
+"""
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Section title (see ``BugreportIndex.sections``) providing each known evidence file
+SECTION_PATTERNS = {
+    "dmesg.txt": re.compile(r"KERNEL LOG\b"),
+    "logcat.txt": re.compile(r"SYSTEM LOG\b"),
+    "suspend_stats.txt": re.compile(r"SUSPEND STATS\b|.*/suspend_stats\b"),
+    "wakeup_sources.txt": re.compile(r"KERNEL WAKE SOURCES\b|.*/wakeup_sources\b"),
+    "interrupts_before.txt": re.compile(r"INTERRUPTS \(1\)"),
+    "interrupts_after.txt": re.compile(r"INTERRUPTS \(2\)"),
+    "dumpsys_power.txt": re.compile(r"dumpsys power$"),
+    "dumpsys_suspend.txt": re.compile(r"dumpsys suspend_control_internal$"),
+    "batterystats.txt": re.compile(r"CHECKIN BATTERYSTATS\b"),
+}
+
+# Name of the saved section index inside the case directory
+INDEX_NAME = "bugreport_index.json"
+
+# Bytes decompressed per read while scanning
+_CHUNK = 1 << 20
+
+# Section boundaries: dumpstate headers, dumpsys headers and end-of-section lines
+_MARKER = re.compile(
+    rb"^(?:------ (?P<title>.+?) ------"
+    rb"|DUMP OF SERVICE (?:(?:CRITICAL|HIGH|NORMAL) )?(?P<service>[^\s:]+):"
+    rb"|(?P<end>-{9,}(?: [\d.]+s was the duration of .*)?))\r?$",
+    re.M,
+)
+_DURATION = re.compile(r"^[\d.]+s was the duration of ")
+
+# Device metadata, mapped to the ``collection_info.txt`` keys
+_INFO_PATTERNS = {
+    "Collection Time": re.compile(rb"^== dumpstate: (.+?)\r?$", re.M),
+    "Build Fingerprint": re.compile(rb"^Build fingerprint: '?(.+?)'?\r?$", re.M),
+    "Device Model": re.compile(rb"^\[ro\.product\.model\]: \[(.*?)\]", re.M),
+}
+
+
+def is_bugreport(path: str) -> bool:
+    """Return True if ``path`` names a bugreport zip (``bugreport*.zip``)."""
+    name = os.path.basename(path).lower()
+    return name.startswith("bugreport") and name.endswith(".zip")
+
+
+def case_dir_for(zip_path: str) -> Path:
+    """Return the directory holding the reports of a bugreport zip (its name without ``.zip``)."""
+    path = Path(zip_path).resolve()
+    return path.with_name(path.stem)
+
+
+def _main_entry(archive: zipfile.ZipFile) -> str:
+    """
+    Find the dumpstate text entry of a bugreport zip.
+
+    ``main_entry.txt`` names it in current bugreports; otherwise the largest
+    ``bugreport*.txt`` (or, failing that, the largest ``.txt``) is used.
+    """
+    names = archive.namelist()
+    if "main_entry.txt" in names:
+        entry = archive.read("main_entry.txt").decode("utf-8", errors="ignore").strip()
+        if entry in names:
+            return entry
+    texts = [i for i in archive.infolist() if i.filename.endswith(".txt") and "/" not in i.filename]
+    reports = [i for i in texts if i.filename.startswith("bugreport")] or texts
+    if not reports:
+        raise ValueError(f"{archive.filename}: no bugreport text entry found")
+    return max(reports, key=lambda i: i.file_size).filename
+
+
+class _SectionReader(io.RawIOBase):
+    """Raw stream over ``[start, end)`` of a zip entry."""
+
+    def __init__(self, zip_path: str, member: str, start: int, end: int):
+        self._archive = zipfile.ZipFile(zip_path)
+        self._entry = self._archive.open(member)
+        self._entry.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._entry.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._entry.close()
+            self._archive.close()
+        super().close()
+
+
+class BugreportIndex:
+    """
+    Byte-offset index of the sections of a bugreport zip.
+
+    Attributes:
+        zip_path: Absolute path of the zip
+        member: Name of the dumpstate text entry
+        sections: ``(title, start, end)`` body offsets in entry order
+        info: Device metadata found while scanning (``collection_info.txt`` keys)
+    """
+
+    def __init__(self, zip_path: str, member: str, sections: List[Tuple[str, int, int]],
+                 info: Dict[str, str]):
+        self.zip_path = zip_path
+        self.member = member
+        self.sections = sections
+        self.info = info
+        self.artifacts = self._match_artifacts()
+
+    @classmethod
+    def scan(cls, zip_path: str) -> "BugreportIndex":
+        """
+        Build the index with one streaming pass over the dumpstate entry.
+
+        Args:
+            zip_path: Path of the bugreport zip
+
+        Returns:
+            BugreportIndex: The section index
+        """
+        sections: List[Tuple[str, int, int]] = []
+        info: Dict[str, str] = {}
+        title: Optional[str] = None
+        start = 0
+        with zipfile.ZipFile(zip_path) as archive:
+            member = _main_entry(archive)
+            with archive.open(member) as entry:
+                base = 0
+                carry = b""
+                while True:
+                    chunk = entry.read(_CHUNK)
+                    buffer = carry + chunk
+                    # Only complete lines are matched; the tail waits for the next chunk
+                    cut = len(buffer) if not chunk else buffer.rfind(b"\n") + 1
+                    block, carry = buffer[:cut], buffer[cut:]
+                    for key, pattern in _INFO_PATTERNS.items():
+                        if key not in info:
+                            found = pattern.search(block)
+                            if found:
+                                info[key] = found.group(1).decode("utf-8", errors="ignore").strip()
+                    for match in _MARKER.finditer(block):
+                        if title is not None:
+                            sections.append((title, start, base + match.start()))
+                            title = None
+                        if match.group("service"):
+                            title = "dumpsys " + match.group("service").decode("utf-8", errors="ignore")
+                        elif match.group("title"):
+                            name = match.group("title").decode("utf-8", errors="ignore")
+                            if not _DURATION.match(name):
+                                title = name
+                        if title is not None:
+                            nl = block.find(b"\n", match.end())
+                            start = base + (nl + 1 if nl != -1 else len(block))
+                    base += len(block)
+                    if not chunk:
+                        break
+                if title is not None:
+                    sections.append((title, start, base))
+        return cls(str(Path(zip_path).resolve()), member, sections, info)
+
+    @classmethod
+    def load(cls, zip_path: str, index_path: Path) -> "BugreportIndex":
+        """
+        Load a saved index, or scan the zip (and save the index) when it is stale.
+
+        The saved index is keyed by the size and modification time of the zip.
+        """
+        stat = os.stat(zip_path)
+        key = [stat.st_size, int(stat.st_mtime)]
+        if index_path.is_file():
+            try:
+                data = json.loads(index_path.read_text(encoding="utf-8"))
+                if data.get("zip") == key:
+                    return cls(str(Path(zip_path).resolve()), data["member"],
+                               [tuple(s) for s in data["sections"]], data["info"])
+            except (ValueError, KeyError):
+                pass
+        index = cls.scan(zip_path)
+        index_path.write_text(json.dumps({
+            "zip": key,
+            "member": index.member,
+            "sections": index.sections,
+            "info": index.info,
+        }), encoding="utf-8")
+        return index
+
+    def _match_artifacts(self) -> Dict[str, Tuple[int, int]]:
+        """Map each known evidence file to its section (the last non-empty match)."""
+        found: Dict[str, Tuple[int, int]] = {}
+        for title, start, end in self.sections:
+            if end <= start:
+                continue
+            for name, pattern in SECTION_PATTERNS.items():
+                if pattern.match(title):
+                    found[name] = (start, end)
+        return found
+
+    def open(self, name: str) -> BinaryIO:
+        """
+        Open the section providing evidence file ``name`` as a binary stream.
+
+        Raises:
+            KeyError: If the bugreport has no such section
+        """
+        start, end = self.artifacts[name]
+        return io.BufferedReader(_SectionReader(self.zip_path, self.member, start, end), _CHUNK)
+
+
+_indexes: Dict[str, BugreportIndex] = {}
+_lock = threading.Lock()
+
+
+def bugreport_index(zip_path: str) -> BugreportIndex:
+    """
+    Return the section index of a bugreport zip, building it at most once per process.
+
+    The index is saved as ``INDEX_NAME`` in the case directory of the zip
+    (see ``case_dir_for``), which is created if needed.
+    """
+    key = str(Path(zip_path).resolve())
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            case_dir = case_dir_for(key)
+            case_dir.mkdir(parents=True, exist_ok=True)
+            index = _indexes[key] = BugreportIndex.load(key, case_dir / INDEX_NAME)
+        return index
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Single-file Case Archives for Android Power Diagnosis
+
+A case archive (``<case>.pcase``) holds a whole case in one file, so moving
+thousands of cases between hosts costs one transfer each instead of one per
+evidence file:
+
+    header      b"PCASE\\x00\\x01\\n"
+    blocks      each artifact as zlib blocks of about 256 KiB, cut at line ends
+    results     zlib-compressed JSON result blobs, one per diagnosis module
+    index       JSON: metadata, per-artifact block table, result blob offsets
+    trailer     index offset and length (little-endian u64) + b"PCASEIDX"
+
+The index is read from the end of the file. Each block entry records its file
+offset, compressed size, first line number and byte offset in the artifact,
+so an artifact is streamed block by block and any line range is served by
+decompressing only the blocks covering it; nothing is unpacked to disk.
+
+Artifacts are addressed like bugreport sections, as ``<archive>!<name>``
+paths (see ``common.artifacts``), and the reports of an archive go to the
+directory named after it without the suffix (see ``case_dir_for``).
+"""
+import bisect
+import datetime
+import io
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+ARCHIVE_SUFFIX = ".pcase"
+
+_MAGIC = b"PCASE\x00\x01\n"
+_TRAILER = struct.Struct("<QQ8s")
+_TRAILER_MAGIC = b"PCASEIDX"
+FORMAT_VERSION = 1
+
+# Uncompressed size from which a block is cut (after its last complete line)
+_BLOCK_BYTES = 256 << 10
+_ZLIB_LEVEL = 6
+
+
+def is_case_archive(path: str) -> bool:
+    """Return True if ``path`` names a case archive (by its suffix)."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIX)
+
+
+class _BlockReader(io.RawIOBase):
+    """Raw stream decompressing the blocks of one artifact in order."""
+
+    def __init__(self, path: str, blocks: List[List[int]]):
+        self._file = open(path, "rb")
+        self._blocks = iter(blocks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._file.seek(block[0])
+            self._buffer = zlib.decompress(self._file.read(block[1]))
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class CaseArchive:
+    """
+    Index of a case archive.
+
+    Attributes:
+        path: Absolute path of the archive
+        info: Case metadata (``collection_info.txt`` keys: device, build, collection time ...)
+        artifacts: Per artifact: ``size`` and ``lines`` (uncompressed) and its
+            ``blocks`` as ``[offset, compressed size, first line, start byte]``
+        results: Per diagnosis module: ``[offset, compressed size]`` of its result blob
+        created: ISO time the archive was packed
+        source: Case directory or bugreport the archive was packed from
+    """
+
+    def __init__(self, path: str, index: Dict[str, Any], index_offset: int):
+        self.path = path
+        self.info: Dict[str, str] = index.get("info", {})
+        self.artifacts: Dict[str, Dict[str, Any]] = index.get("artifacts", {})
+        self.results: Dict[str, List[int]] = index.get("results", {})
+        self.created: str = index.get("created", "")
+        self.source: str = index.get("source", "")
+        self._index_offset = index_offset
+
+    @classmethod
+    def load(cls, path: str) -> "CaseArchive":
+        """
+        Read the index of an archive.
+
+        Raises:
+            ValueError: If the file is not a case archive or is truncated
+        """
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path}: not a case archive")
+            f.seek(0, os.SEEK_END)
+            if f.tell() < len(_MAGIC) + _TRAILER.size:
+                raise ValueError(f"{path}: truncated case archive")
+            f.seek(-_TRAILER.size, os.SEEK_END)
+            offset, length, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != _TRAILER_MAGIC:
+                raise ValueError(f"{path}: truncated case archive (no index)")
+            f.seek(offset)
+            index = json.loads(f.read(length).decode("utf-8"))
+        if index.get("format", 0) > FORMAT_VERSION:
+            raise ValueError(f"{path}: case archive format {index['format']} is newer than supported")
+        return cls(str(Path(path).resolve()), index, offset)
+
+    def _index(self) -> Dict[str, Any]:
+        return {
+            "format": FORMAT_VERSION,
+            "created": self.created,
+            "source": self.source,
+            "info": self.info,
+            "artifacts": self.artifacts,
+            "results": self.results,
+        }
+
+    def open(self, name: str) -> BinaryIO:
+        """
+        Open artifact ``name`` as a binary stream.
+
+        Raises:
+            KeyError: If the archive has no such artifact
+        """
+        return io.BufferedReader(_BlockReader(self.path, self.artifacts[name]["blocks"]), _BLOCK_BYTES)
+
+    def lines(self, name: str, first: int = 1, count: Optional[int] = None) -> List[str]:
+        """
+        Return lines ``first`` .. ``first + count - 1`` (1-based) of an artifact.
+
+        Only the blocks covering the range are read and decompressed.
+
+        Raises:
+            KeyError: If the archive has no such artifact
+        """
+        blocks = self.artifacts[name]["blocks"]
+        last = first + count - 1 if count is not None else None
+        start = max(bisect.bisect_right([b[2] for b in blocks], first) - 1, 0)
+        lines: List[str] = []
+        with open(self.path, "rb") as f:
+            for offset, size, block_first, _ in blocks[start:]:
+                if last is not None and block_first > last:
+                    break
+                f.seek(offset)
+                text = zlib.decompress(f.read(size)).decode("utf-8", errors="ignore")
+                block_lines = text.split("\n")
+                if text.endswith("\n"):
+                    block_lines.pop()
+                for number, line in enumerate(block_lines, block_first):
+                    if number >= first and (last is None or number <= last):
+                        lines.append(line.rstrip("\r"))
+        return lines
+
+    def result(self, module: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result of a diagnosis module (None if not stored)."""
+        if module not in self.results:
+            return None
+        offset, size = self.results[module]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(size)).decode("utf-8"))
+
+    def add_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Store (or replace) result blobs.
+
+        The archive is rewritten next to itself and renamed into place, like
+        ``write_case_archive``: a crash leaves the old archive intact, readers
+        that already opened it keep reading the old file, and replaced blobs
+        are dropped instead of piling up. Blocks are copied compressed.
+
+        The archive keeps its modification time, which stands for the
+        collection time of the case when it has no ``Collection Time``
+        (see ``common.store``).
+
+        Args:
+            results: Mapping of module name to a JSON-serializable result
+                (e.g. ``common.output.module_result`` output)
+        """
+        stat = os.stat(self.path)
+        artifacts: Dict[str, Dict[str, Any]] = {}
+        kept: Dict[str, List[int]] = {}
+        partial = f"{self.path}.partial"
+        try:
+            with open(self.path, "rb") as src, open(partial, "wb") as f:
+                f.write(_MAGIC)
+                for name, entry in self.artifacts.items():
+                    blocks = []
+                    for offset, size, first, start in entry["blocks"]:
+                        src.seek(offset)
+                        blocks.append([f.tell(), size, first, start])
+                        f.write(src.read(size))
+                    artifacts[name] = dict(entry, blocks=blocks)
+                for module, (offset, size) in self.results.items():
+                    if module in results:
+                        continue
+                    src.seek(offset)
+                    kept[module] = [f.tell(), size]
+                    f.write(src.read(size))
+                for module, result in results.items():
+                    blob = zlib.compress(json.dumps(result).encode("utf-8"), _ZLIB_LEVEL)
+                    kept[module] = [f.tell(), len(blob)]
+                    f.write(blob)
+                index = dict(self._index(), artifacts=artifacts, results=kept)
+                index_offset = _write_index(f, index)
+            # Both files are closed: the rename also works where open files cannot be replaced
+            os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(partial, self.path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        # Offsets of the new file, only once it is in place
+        self.artifacts, self.results, self._index_offset = artifacts, kept, index_offset
+
+
+def _write_index(f: BinaryIO, index: Dict[str, Any]) -> int:
+    """Write the index and trailer at the current position and return the index offset."""
+    offset = f.tell()
+    data = json.dumps(index).encode("utf-8")
+    f.write(data)
+    f.write(_TRAILER.pack(offset, len(data), _TRAILER_MAGIC))
+    return offset
+
+
+def _write_blocks(f: BinaryIO, stream: BinaryIO) -> Dict[str, Any]:
+    """Compress a stream into line-aligned blocks and return its index entry."""
+    blocks = []
+    size = 0
+    lines = 0
+    pending = b""
+
+    def flush(block: bytes) -> None:
+        nonlocal size, lines
+        data = zlib.compress(block, _ZLIB_LEVEL)
+        blocks.append([f.tell(), len(data), lines + 1, size])
+        f.write(data)
+        size += len(block)
+        lines += block.count(b"\n")
+
+    while True:
+        chunk = stream.read(_BLOCK_BYTES)
+        if not chunk:
+            break
+        pending += chunk
+        if len(pending) >= _BLOCK_BYTES:
+            # Cut after the last complete line (a line longer than a block waits for its end)
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                flush(pending[:cut])
+                pending = pending[cut:]
+    if pending:
+        flush(pending)
+        if not pending.endswith(b"\n"):
+            lines += 1
+    return {"size": size, "lines": lines, "blocks": blocks}
+
+
+def write_case_archive(path: str, artifacts: Iterable[Tuple[str, BinaryIO]], info: Dict[str, str],
+                       source: str = "") -> CaseArchive:
+    """
+    Write a case archive.
+
+    The archive is written next to its final path and renamed into place, so
+    readers never see a partial archive.
+
+    Args:
+        path: Archive path (``ARCHIVE_SUFFIX`` is expected)
+        artifacts: ``(name, binary stream)`` of each evidence file; streams are
+            read to the end and closed
+        info: Case metadata (``collection_info.txt`` keys)
+        source: Case directory or bugreport being packed
+
+    Returns:
+        CaseArchive: Index of the written archive
+    """
+    index: Dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "info": dict(info),
+        "artifacts": {},
+        "results": {},
+    }
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        f.write(_MAGIC)
+        for name, stream in artifacts:
+            with stream:
+                index["artifacts"][name] = _write_blocks(f, stream)
+        offset = _write_index(f, index)
+    os.replace(partial, path)
+    return CaseArchive(str(Path(path).resolve()), index, offset)
+
+
+_archives: Dict[str, Tuple[Tuple[int, int, int], CaseArchive]] = {}
+_lock = threading.Lock()
+
+
+def case_archive(path: str) -> CaseArchive:
+    """
+    Return the index of a case archive, read at most once per process
+    (again if the file changed since).
+    """
+    key = str(Path(path).resolve())
+    stat = os.stat(key)
+    # Rewrites keep the modification time but replace the file (new inode)
+    version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        cached = _archives.get(key)
+        if cached is None or cached[0] != version:
+            cached = _archives[key] = (version, CaseArchive.load(key))
+        return cached[1]
@@ -6,12 +6,117 @@ This module handles collecting log files and system state information from Andro
 using ADB commands.
 """
 import datetime
+import os
+import tempfile
+import time
+import zipfile
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from suspend_diagnosis.core.utils import adb_shell
+from suspend_diagnosis.core.utils import adb_command, adb_shell
+from common.artifacts import (
+    COMPRESSIONS, artifact_name, find_artifact, member_path, open_binary, source_file, write_artifact,
+)
+from common.bugreport import bugreport_index, case_dir_for, is_bugreport
+from common.case_archive import ARCHIVE_SUFFIX, case_archive, is_case_archive, write_case_archive
+from common.sampler import REMOTE_OUTPUT, REMOTE_SCRIPT, decode_samples, derived_artifacts, sampler_script
+from common.trace import span
 from common.types import ArtifactMap
 
+# ADB shell command producing each known evidence file
+ARTIFACT_COMMANDS = {
+    "dmesg.txt": "dmesg -T",
+    "dumpsys_suspend.txt": "dumpsys suspend_control_internal",
+    "suspend_stats.txt": "cat /d/suspend_stats",
+    # Taken at the start of the test interval so step 1 judges only the interval
+    "suspend_stats_before.txt": "cat /d/suspend_stats",
+    "wakeup_sources.txt": "cat /sys/kernel/debug/wakeup_sources",
+    "dumpsys_power.txt": "dumpsys power",
+    "logcat.txt": "logcat -d -v time",
+    # Installed packages and their UIDs, to attribute log lines to apps
+    "packages.txt": "pm list packages -U",
+    # Battery drain, wakelock and wakeup alarm totals since the last charge (CSV)
+    "batterystats.txt": "dumpsys batterystats --checkin",
+    # Snapshots bracketing the test interval; uptime first so the interval is exact
+    "interrupts_before.txt": "cat /proc/uptime; cat /proc/interrupts",
+    "interrupts_after.txt": "cat /proc/uptime; cat /proc/interrupts",
+}
+
+# Artifacts captured at the start of the test interval (the rest at its end)
+BEFORE_INTERVAL = ["interrupts_before.txt", "suspend_stats_before.txt"]
+
+# "Before" snapshots that are meaningless without an interval (no suspend can
+# happen between back-to-back snapshots), so they are only taken with one
+INTERVAL_ONLY = ["suspend_stats_before.txt"]
+
+# Raw on-device sampler output (only produced when sampling, see ``common.sampler``)
+SAMPLES_ARTIFACT = "samples.txt"
+
+# Evidence files used by the suspend diagnosis (the historical default set)
+SUSPEND_ARTIFACTS = ["suspend_stats.txt", "dumpsys_suspend.txt", "dmesg.txt"]
+
+
+def union_artifacts(*groups: Iterable[str]) -> List[str]:
+    """
+    Merge several artifact lists into one, keeping first-seen order.
+
+    Used when multiple diagnosis modules run together so that shared files such
+    as ``dmesg.txt`` are only collected once.
+    """
+    merged: List[str] = []
+    for group in groups:
+        for name in group:
+            if name not in merged:
+                merged.append(name)
+    return merged
+
+
+def find_case_dirs(root: str) -> List[str]:
+    """
+    Find every case directory below ``root`` (including ``root`` itself).
+    
+    A directory is a case if it directly contains at least one known evidence
+    file from ``ARTIFACT_COMMANDS`` (plain or compressed); every bugreport zip
+    and case archive is a case of its own.
+    
+    Args:
+        root: Directory to scan recursively (a bugreport zip or case archive
+            is returned as the only case)
+        
+    Returns:
+        List[str]: Sorted absolute paths of the case directories, bugreport zips
+        and case archives
+    """
+    if Path(root).is_file():
+        return [str(Path(root).resolve())]
+    known = set(ARTIFACT_COMMANDS)
+    cases = []
+    for dirpath, _, filenames in os.walk(Path(root).resolve()):
+        if any(artifact_name(f) in known for f in filenames):
+            cases.append(dirpath)
+        cases.extend(os.path.join(dirpath, f) for f in filenames if is_bugreport(f) or is_case_archive(f))
+    return sorted(cases)
+
+
+def read_case_info(case_dir: str) -> Dict[str, str]:
+    """
+    Read ``collection_info.txt`` ("Key: Value" lines) from a case directory.
+    
+    The file is written by the collection scripts and by ``collect``; keys
+    include ``Device Model`` and ``Build Fingerprint``.
+    
+    Returns:
+        Dict[str, str]: Parsed fields (empty if the file is missing)
+    """
+    info: Dict[str, str] = {}
+    path = Path(case_dir) / "collection_info.txt"
+    if path.is_file():
+        for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            if ":" in line:
+                key, value = line.split(":", 1)
+                info[key.strip()] = value.strip()
+    return info
+
 
 class AdbEvidenceCollector:
     """
@@ -27,6 +132,10 @@ class AdbEvidenceCollector:
         adb: str = "adb",
         device: str = "",
         out_dir: str = "./reports",
+        interval: float = 0,
+        compression: str = "none",
+        sample_duration: int = 0,
+        sample_period: float = 10,
     ):
         """
         Initialize the evidence collector.
@@ -35,15 +144,40 @@ class AdbEvidenceCollector:
             adb: Path to ADB executable (default: 'adb')
             device: Target device serial number (empty for default device)
             out_dir: Output directory for collected files (default: './reports')
+            interval: Seconds to wait between the ``BEFORE_INTERVAL`` snapshots
+                and the rest of the collection (default: 0)
+            compression: Storage of the collected files, a key of ``COMPRESSIONS``
+                (``none``, ``gz`` or ``zst``; default: none)
+            sample_duration: Whole seconds to run the on-device sampler before the
+                rest of the collection; 0 disables sampling (default: 0)
+            sample_period: Seconds between on-device samples (default: 10)
         """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}")
+        # The device-side script does integer shell arithmetic on the duration
+        if sample_duration != int(sample_duration):
+            raise ValueError(f"Sample duration must be whole seconds, got {sample_duration:g}")
         self.adb = adb
         self.device = device
         self.out_dir = out_dir
+        self.interval = interval
+        self.compression = compression
+        self.sample_duration = int(sample_duration)
+        self.sample_period = sample_period
 
-    def collect(self) -> Tuple[str, ArtifactMap]:
+    def collect(
+        self,
+        names: Optional[Iterable[str]] = None,
+        prefix: str = "suspend_diag",
+    ) -> Tuple[str, ArtifactMap]:
         """
         Collect evidence files from the device.
         
+        Args:
+            names: Evidence files to collect, keys of ``ARTIFACT_COMMANDS``
+                (default: the suspend diagnosis set)
+            prefix: Prefix of the timestamped case directory name
+        
         Returns:
             Tuple[str, Dict[str, str]]: A tuple containing:
                 - case_dir: Path to the directory containing collected files
@@ -51,7 +185,7 @@ class AdbEvidenceCollector:
         """
         # Create timestamped directory for this collection
         ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        case_dir = Path(self.out_dir) / f"suspend_diag_{ts}"
+        case_dir = Path(self.out_dir) / f"{prefix}_{ts}"
         case_dir.mkdir(parents=True, exist_ok=True)
 
         artifacts: ArtifactMap = {}
@@ -65,41 +199,225 @@ class AdbEvidenceCollector:
                 name: Output filename
                 cmd: ADB shell command to execute
             """
-            path = str(case_dir / name)
-            artifacts[name] = path
-            content = adb_shell(self.adb, self.device, cmd)
-            Path(path).write_text(content, encoding="utf-8")
+            with span(f"adb:{name}", cat="collect") as sp:
+                content = adb_shell(self.adb, self.device, cmd)
+                artifacts[name] = write_artifact(case_dir, name, content, self.compression)
+                sp.set(bytes=len(content))
 
-        # Collect only three essential evidence files
-        _write("dmesg.txt", "dmesg -T")
-        _write("dumpsys_suspend.txt", "dumpsys suspend_control_internal")
-        _write("suspend_stats.txt", "cat /d/suspend_stats")
+        # Device metadata used to group results by build and device model
+        info = {
+            "Collection Time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "Device Model": adb_shell(self.adb, self.device, "getprop ro.product.model").strip(),
+            "Build Fingerprint": adb_shell(self.adb, self.device, "getprop ro.build.fingerprint").strip(),
+        }
+        (case_dir / "collection_info.txt").write_text(
+            "".join(f"{k}: {v}\n" for k, v in info.items()), encoding="utf-8"
+        )
+        
+        # Each requested file is collected exactly once, even when several
+        # diagnosis modules asked for it; "before" snapshots open the test interval
+        wanted = union_artifacts(names or SUSPEND_ARTIFACTS)
+        if self.sample_duration > 0:
+            # The samples replace the files they cover, including the interval snapshots
+            samples_text = self._sample()
+            if samples_text:
+                samples = decode_samples(samples_text)
+                print(f"[SAMPLE] Pulled {len(samples)} sample(s)")
+                artifacts[SAMPLES_ARTIFACT] = write_artifact(
+                    case_dir, SAMPLES_ARTIFACT, samples_text, self.compression
+                )
+                for name, content in derived_artifacts(samples).items():
+                    if name in wanted:
+                        artifacts[name] = write_artifact(case_dir, name, content, self.compression)
+            before = []
+        else:
+            if self.interval <= 0:
+                wanted = [name for name in wanted if name not in INTERVAL_ONLY]
+            before = [name for name in wanted if name in BEFORE_INTERVAL]
+        for name in before:
+            _write(name, ARTIFACT_COMMANDS[name])
+        if before and self.interval > 0:
+            print(f"[COLLECT] Waiting {self.interval:g}s test interval...")
+            with span("collect:interval", cat="collect", seconds=self.interval):
+                time.sleep(self.interval)
+        for name in wanted:
+            if name not in before and name not in artifacts and name in ARTIFACT_COMMANDS:
+                _write(name, ARTIFACT_COMMANDS[name])
 
         return str(case_dir), artifacts
 
-    def load_existing(self, directory: str) -> Tuple[str, ArtifactMap]:
+    def _sample(self) -> str:
+        """
+        Run the on-device sampler and pull its output in one transfer.
+        
+        The sampler script is pushed and started detached (``nohup``), so the
+        USB cable may even be unplugged; the host then sleeps for the whole
+        measurement without any ADB traffic before pulling the sample file.
+        
+        Returns:
+            str: Sample file content (empty if the sampler did not complete)
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            script = Path(tmp) / "sampler.sh"
+            script.write_text(sampler_script(), encoding="utf-8", newline="\n")
+            adb_command(self.adb, self.device, f'push "{script}" {REMOTE_SCRIPT}')
+            adb_shell(self.adb, self.device,
+                      f"nohup sh {REMOTE_SCRIPT} {self.sample_duration:d} {self.sample_period:g} "
+                      f"{REMOTE_OUTPUT} > /dev/null 2>&1 &")
+            print(f"[SAMPLE] Sampling on device for {self.sample_duration}s "
+                  f"every {self.sample_period:g}s (no ADB traffic until done)...")
+            with span("collect:sample", cat="collect", seconds=self.sample_duration):
+                time.sleep(self.sample_duration)
+                # The device may have been suspended through a sleep; allow a few periods more
+                deadline = time.time() + 3 * self.sample_period + 60
+                while "No such file" in adb_shell(self.adb, self.device, f"ls {REMOTE_OUTPUT} 2>&1"):
+                    if time.time() > deadline:
+                        print("[SAMPLE] Sampler did not finish; collecting the files directly")
+                        return ""
+                    time.sleep(self.sample_period)
+            pulled = Path(tmp) / "samples.txt"
+            with span("adb:samples.txt", cat="collect") as sp:
+                adb_command(self.adb, self.device, f'pull {REMOTE_OUTPUT} "{pulled}"')
+                adb_shell(self.adb, self.device, f"rm -f {REMOTE_SCRIPT} {REMOTE_OUTPUT}")
+                text = pulled.read_text(encoding="utf-8", errors="ignore") if pulled.is_file() else ""
+                sp.set(bytes=len(text))
+        return text
+
+    def load_existing(
+        self,
+        directory: str,
+        names: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, ArtifactMap]:
         """
         Load pre‑collected log files from a specified directory.
         
         The method scans the given directory for the expected evidence files
-        (``suspend_stats.txt``, ``dumpsys_suspend.txt`` and ``dmesg.txt``) and
-        builds an ``ArtifactMap`` that maps each filename to its absolute path.
-        Files that are missing are simply omitted from the map – the downstream
-        analysis code already handles absent artifacts gracefully.
+        (by default ``suspend_stats.txt``, ``dumpsys_suspend.txt`` and
+        ``dmesg.txt``, each possibly stored as ``.gz`` or ``.zst``) and builds
+        an ``ArtifactMap`` that maps each filename to its absolute path. Files that are missing are simply omitted from the
+        map – the downstream analysis code already handles absent artifacts
+        gracefully.
+        
+        ``directory`` may also be an ``adb bugreport`` zip or a case archive:
+        the evidence files are then served from its sections (see
+        ``_load_bugreport`` and ``_load_archive``).
         
         Args:
             directory: Path to the directory containing the log files.
+            names: Evidence files to look for (default: the suspend diagnosis set)
         
         Returns:
             Tuple[str, ArtifactMap]: ``case_dir`` (the absolute path of the
             provided directory) and ``artifacts`` (a mapping of found filenames
             to their absolute paths).
         """
+        if Path(directory).is_file() and is_case_archive(directory):
+            return self._load_archive(directory, names)
+        if Path(directory).is_file() and zipfile.is_zipfile(directory):
+            return self._load_bugreport(directory, names)
         case_dir = Path(directory).resolve()
         artifacts: ArtifactMap = {}
-        expected_files = ["suspend_stats.txt", "dumpsys_suspend.txt", "dmesg.txt"]
-        for name in expected_files:
-            file_path = case_dir / name
-            if file_path.is_file():
+        for name in union_artifacts(names or SUSPEND_ARTIFACTS):
+            file_path = find_artifact(case_dir, name)
+            if file_path is not None:
                 artifacts[name] = str(file_path)
         return str(case_dir), artifacts
+
+    def _load_bugreport(
+        self,
+        zip_path: str,
+        names: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, ArtifactMap]:
+        """
+        Load the evidence files of an ``adb bugreport`` zip without unpacking it.
+        
+        The case directory is the zip path without ``.zip``; it only receives the
+        section index, ``collection_info.txt`` (from the bugreport header and
+        system properties) and the reports. Artifacts are ``<zip>!<name>``
+        paths, readable through ``common.artifacts``.
+        
+        Returns:
+            Tuple[str, ArtifactMap]: ``case_dir`` and the artifacts found in the zip
+        """
+        with span("bugreport:index", cat="io", zip=os.path.basename(zip_path)) as sp:
+            index = bugreport_index(zip_path)
+            sp.set(sections=len(index.sections))
+        case_dir = case_dir_for(zip_path)
+        info_path = case_dir / "collection_info.txt"
+        if not info_path.is_file():
+            info_path.write_text(
+                "".join(f"{k}: {v}\n" for k, v in index.info.items()), encoding="utf-8"
+            )
+        artifacts: ArtifactMap = {
+            name: member_path(index.zip_path, name)
+            for name in union_artifacts(names or SUSPEND_ARTIFACTS)
+            if name in index.artifacts
+        }
+        return str(case_dir), artifacts
+
+    def _load_archive(
+        self,
+        archive_path: str,
+        names: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, ArtifactMap]:
+        """
+        Load the evidence files of a case archive without unpacking it.
+        
+        Like a bugreport, the archive gets a case directory named after it
+        (without the suffix) that only receives ``collection_info.txt`` (from
+        the archive metadata) and the reports. Artifacts are ``<archive>!<name>``
+        paths, readable through ``common.artifacts``.
+        
+        Returns:
+            Tuple[str, ArtifactMap]: ``case_dir`` and the artifacts found in the archive
+        """
+        with span("archive:index", cat="io", archive=os.path.basename(archive_path)) as sp:
+            archive = case_archive(archive_path)
+            sp.set(artifacts=len(archive.artifacts))
+        case_dir = case_dir_for(archive_path)
+        case_dir.mkdir(parents=True, exist_ok=True)
+        info_path = case_dir / "collection_info.txt"
+        if not info_path.is_file():
+            info_path.write_text(
+                "".join(f"{k}: {v}\n" for k, v in archive.info.items()), encoding="utf-8"
+            )
+        artifacts: ArtifactMap = {
+            name: member_path(archive.path, name)
+            for name in union_artifacts(names or SUSPEND_ARTIFACTS)
+            if name in archive.artifacts
+        }
+        return str(case_dir), artifacts
+
+
+def pack_case(case: str, out_path: Optional[str] = None) -> str:
+    """
+    Pack a case directory (or bugreport zip) into a single case archive.
+    
+    Every known evidence file (``ARTIFACT_COMMANDS`` plus ``samples.txt``) is
+    stored, decompressed from ``.gz``/``.zst`` or streamed out of the
+    bugreport, together with the case metadata from ``collection_info.txt``.
+    
+    Args:
+        case: Case directory or bugreport zip
+        out_path: Archive path (default: the case path with ``ARCHIVE_SUFFIX``)
+        
+    Returns:
+        str: Path of the written archive
+    """
+    names = union_artifacts(ARTIFACT_COMMANDS, [SAMPLES_ARTIFACT])
+    case_dir, artifacts = AdbEvidenceCollector().load_existing(case, names)
+    if out_path is None:
+        source = Path(case).resolve()
+        target = source.with_suffix(ARCHIVE_SUFFIX) if source.is_file() else source.with_name(source.name + ARCHIVE_SUFFIX)
+        out_path = str(target)
+    info = read_case_info(case_dir)
+    with span("archive:pack", cat="io", case=os.path.basename(case)) as sp:
+        archive = write_case_archive(
+            out_path, ((name, open_binary(path)) for name, path in artifacts.items()), info, source=case_dir
+        )
+        sp.set(artifacts=len(archive.artifacts))
+    # The archive stands for the case: keep the newest evidence time as its modification time
+    mtimes = [Path(p).stat().st_mtime for p in {source_file(p) for p in artifacts.values()} if Path(p).is_file()]
+    if mtimes:
+        os.utime(out_path, (max(mtimes), max(mtimes)))
+    return out_path
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared Log Store for Android Power Diagnosis
+
+This module provides a read-once view over the evidence files of a case so that
+several diagnosis modules can run in one process without re-reading or
+re-tokenizing the same logs (dmesg in particular).
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from common.artifacts import artifact_exists, read_artifact
+from common.timestamps import TIMESTAMPED_LOGS, timestamp_index
+from common.trace import span
+from common.types import ArtifactMap
+
+
+class LogStore:
+    """
+    Lazily reads artifacts and caches their text, line split and derived parses.
+
+    Every analyzer of a run receives the same store, so ``dmesg.txt`` is read and
+    split into lines once no matter how many diagnosis modules consume it.
+    """
+
+    def __init__(self, artifacts: ArtifactMap):
+        """
+        Initialize the store.
+
+        Args:
+            artifacts: Dictionary mapping filenames to their absolute paths
+        """
+        self.artifacts: ArtifactMap = dict(artifacts)
+        self._text: Dict[str, str] = {}
+        self._lines: Dict[str, List[str]] = {}
+        self._derived: Dict[tuple, Any] = {}
+
+    def has(self, name: str) -> bool:
+        """Return True if the artifact was collected and can be read."""
+        path = self.artifacts.get(name)
+        return bool(path) and artifact_exists(path)
+
+    def text(self, name: str) -> str:
+        """
+        Return the content of an artifact, reading it at most once.
+
+        Missing artifacts yield an empty string, mirroring how the analyzers
+        treat absent files.
+        """
+        if name not in self._text:
+            if self.has(name):
+                with span(f"read:{name}", cat="io") as sp:
+                    self._text[name] = read_artifact(self.artifacts[name])
+                    sp.set(bytes=len(self._text[name]))
+            else:
+                self._text[name] = ""
+        return self._text[name]
+
+    def lines(self, name: str) -> List[str]:
+        """Return the artifact split into lines, tokenizing it at most once."""
+        if name not in self._lines:
+            text = self.text(name)
+            with span(f"split:{name}", cat="io") as sp:
+                self._lines[name] = text.splitlines()
+                sp.set(bytes=len(text), lines=len(self._lines[name]))
+        return self._lines[name]
+
+    def cached(self, name: str, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Memoize a parse derived from an artifact.
+
+        Args:
+            name: Artifact the parse is derived from
+            key: Identifier of the derived view (e.g. ``"wakeup_events"``)
+            factory: Zero-argument callable computing the view on first use
+
+        Returns:
+            The cached (or freshly computed) derived view
+        """
+        cache_key = (name, key)
+        if cache_key not in self._derived:
+            self._derived[cache_key] = factory()
+        return self._derived[cache_key]
+
+    def windowed(self, start: Optional[float] = None, end: Optional[float] = None) -> "LogStore":
+        """
+        Return a store whose timestamped logs are restricted to ``[start, end]``.
+
+        The window is cut from each log's ``TimestampIndex`` with a binary
+        search; logs without timestamps are passed through unchanged. Analyzers
+        given the returned store see only the window.
+
+        Args:
+            start: Window start (None for the beginning of each log)
+            end: Window end, inclusive (None for the end of each log)
+
+        Returns:
+            LogStore: New store over the same artifacts
+        """
+        view = LogStore(self.artifacts)
+        for name in TIMESTAMPED_LOGS:
+            if self.has(name):
+                lines = timestamp_index(self, name).window(start, end)
+                view._lines[name] = lines
+                view._text[name] = "\n".join(lines)
+        return view
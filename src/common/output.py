@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Machine-readable Output for Android Power Diagnosis
+
+Automated pipelines only need the verdict. With ``--format json`` or
+``--format jsonl`` the tools skip Markdown/HTML generation (the report modules
+are never imported) and write one record per case under a versioned schema::
+
+    {
+      "schema": "android-power-diagnosis/result",
+      "schema_version": 1,
+      "case_dir": "...",
+      "case_info": {"Device Model": "...", "Build Fingerprint": "..."},
+      "results": {
+        "suspend": {"failed": true, "reasons": [...], "detailed_analysis": {...}}
+      }
+    }
+
+``json`` writes one indented document; ``jsonl`` (and batch mode) writes one
+compact line per case as soon as it is analyzed. While JSON is written, the
+tools' progress messages go to stderr so stdout stays parseable.
+"""
+import contextlib
+import json
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+SCHEMA = "android-power-diagnosis/result"
+SCHEMA_VERSION = 1
+
+FORMATS = ("report", "json", "jsonl")
+
+
+def _default(obj: Any) -> Any:
+    """Serialize values the json module does not know (result objects, sets, paths)."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def module_result(failed: bool, reasons: List[str], detailed_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the serializable result of one diagnosis module."""
+    return {"failed": bool(failed), "reasons": list(reasons), "detailed_analysis": detailed_analysis}
+
+
+def case_record(
+    case_dir: str,
+    results: Dict[str, Dict[str, Any]],
+    case_info: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the versioned record of one case.
+
+    Args:
+        case_dir: Case directory
+        results: Mapping of module name to ``module_result`` output
+        case_info: Case metadata from ``collection_info.txt``
+
+    Returns:
+        Dict[str, Any]: Record ready to be written by ``JsonWriter``
+    """
+    return {
+        "schema": SCHEMA,
+        "schema_version": SCHEMA_VERSION,
+        "case_dir": case_dir,
+        "case_info": case_info or {},
+        "results": results,
+    }
+
+
+class JsonWriter:
+    """
+    Thread-safe writer of case records, one per line or one indented document.
+    """
+
+    def __init__(self, stream: TextIO, pretty: bool = False):
+        """
+        Initialize the writer.
+
+        Args:
+            stream: Output stream (the real stdout)
+            pretty: Write indented JSON instead of one line per record
+        """
+        self.stream = stream
+        self.pretty = pretty
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write one record and flush it so consumers see it immediately."""
+        text = json.dumps(record, ensure_ascii=False, default=_default,
+                          indent=2 if self.pretty else None)
+        with self._lock:
+            self.stream.write(text + "\n")
+            self.stream.flush()
+
+
+@contextlib.contextmanager
+def json_output(fmt: str, batch: bool = False) -> Iterator[Optional[JsonWriter]]:
+    """
+    Set up JSON output for a run.
+
+    Yields None for ``report`` format. Otherwise yields a ``JsonWriter`` on the
+    real stdout and redirects every other print to stderr for the duration.
+
+    Args:
+        fmt: ``report``, ``json`` or ``jsonl``
+        batch: Whether several cases are written (always one line per case)
+    """
+    if fmt == "report":
+        yield None
+        return
+    writer = JsonWriter(sys.stdout, pretty=(fmt == "json" and not batch))
+    with contextlib.redirect_stdout(sys.stderr):
+        yield writer
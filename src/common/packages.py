@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Package Index for Android Power Diagnosis
+
+This module attributes log lines to installed packages. The package list is
+captured once with ``pm list packages -U`` (``packages.txt``)::
+
+    package:com.google.android.gms uid:10146
+    package:com.android.shell uid:2000
+
+and loaded into a character trie of package names plus a UID → packages
+dictionary. A line is attributed by walking the trie from the start of each
+name-like token (``[A-Za-z0-9_.]`` runs), so the cost is linear in the line
+length whatever the number of packages. Names such as ``com.foo.bar:remote``,
+``com.foo.bar/.SyncService`` or ``*job*/com.foo.bar_2.app`` resolve to the
+longest installed package they start with, and the longest such name in a
+line wins; lines naming only a UID (``uid=10146``) resolve through the
+dictionary.
+"""
+import re
+from typing import Dict, List, Optional
+
+from common.logs import LogStore
+
+# Evidence file holding the ``pm list packages -U`` output
+PACKAGES_ARTIFACT = "packages.txt"
+
+# package:com.foo.bar uid:10084 (shared user ids may list several: uid:10084,10085)
+_PACKAGE_LINE = re.compile(r"^package:(\S+)\s+uid:([\d,]+)")
+_UID = re.compile(r"\buid[=: ](\d+)")
+
+# App alarms, jobs and wake locks in logcat (the lines attributed to apps)
+APP_WAKEUP = re.compile(
+    r"AlarmManager.*wakeup|JobScheduler.*wakeup|WakeLock.*acquired|PowerManager.*wakeUp",
+    re.IGNORECASE,
+)
+
+# Characters a package name can contain
+_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.")
+
+# Trie node key marking the end of a package name
+_END = ""
+
+
+class PackageIndex:
+    """
+    Trie and UID dictionary of installed packages.
+
+    Attributes:
+        uids: Packages by UID (several when the UID is shared)
+        count: Number of packages indexed
+    """
+
+    def __init__(self):
+        self._trie: Dict[str, dict] = {}
+        self.uids: Dict[str, List[str]] = {}
+        self.count = 0
+
+    @classmethod
+    def parse(cls, text: str) -> "PackageIndex":
+        """
+        Build the index from ``pm list packages -U`` output.
+
+        Args:
+            text: Content of ``packages.txt``
+
+        Returns:
+            PackageIndex: The index (empty for empty input)
+        """
+        index = cls()
+        for line in text.splitlines():
+            match = _PACKAGE_LINE.match(line.strip())
+            if match:
+                index.add(match.group(1), match.group(2).split(","))
+        return index
+
+    def add(self, package: str, uids: List[str]) -> None:
+        """Index ``package`` under each of its UIDs."""
+        node = self._trie
+        for char in package:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            node[_END] = package
+            self.count += 1
+        for uid in uids:
+            self.uids.setdefault(uid, []).append(package)
+
+    def package_for_uid(self, uid: str) -> Optional[str]:
+        """Return the package of ``uid`` (the first one for shared UIDs)."""
+        packages = self.uids.get(uid)
+        return packages[0] if packages else None
+
+    def _match_at(self, line: str, start: int) -> Optional[str]:
+        """Return the longest package starting at ``start`` that ends on a name boundary."""
+        node = self._trie
+        found = None
+        i = start
+        while i < len(line):
+            node = node.get(line[i])
+            if node is None:
+                break
+            i += 1
+            # A package matches only where the name ends or a new segment starts
+            if _END in node and (i == len(line) or line[i] not in _NAME_CHARS or line[i] == "."):
+                found = node[_END]
+        return found
+
+    def find(self, line: str) -> Optional[str]:
+        """
+        Attribute a log line to a package.
+
+        The longest dotted package name found in the line wins, so
+        ``com.google.android.gms.persistent`` beats ``android`` wherever they
+        appear. Bare names such as ``android`` (also the prefix of every
+        ``android.*`` action or permission) are weak evidence: a ``uid=N``
+        resolving to a package is preferred to them.
+
+        Args:
+            line: Log line
+
+        Returns:
+            Optional[str]: The package, or None if the line names none
+        """
+        if not self.count:
+            return None
+        trie = self._trie
+        best = bare = None
+        previous = ""
+        for i, char in enumerate(line):
+            # Only try token starts: the first name character after a non-name one
+            if char in trie and previous not in _NAME_CHARS:
+                package = self._match_at(line, i)
+                if package and "." in package:
+                    if best is None or len(package) > len(best):
+                        best = package
+                elif package and bare is None:
+                    bare = package
+            previous = char
+        if best:
+            return best
+        for match in _UID.finditer(line):
+            package = self.package_for_uid(match.group(1))
+            if package:
+                return package
+        return bare
+
+
+def package_index(logs: LogStore) -> PackageIndex:
+    """
+    Return the package index of a case, built at most once per ``LogStore``.
+
+    Args:
+        logs: Shared read-once view of the case artifacts
+
+    Returns:
+        PackageIndex: The index of ``PACKAGES_ARTIFACT`` (empty when it was not collected)
+    """
+    if not logs.has(PACKAGES_ARTIFACT):
+        return PackageIndex()
+    return logs.cached(PACKAGES_ARTIFACT, "package_index",
+                       lambda: PackageIndex.parse(logs.text(PACKAGES_ARTIFACT)))
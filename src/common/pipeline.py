@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Diagnosis Pipeline
+
+Runs a registered diagnosis module on one case: analysis on the shared
+``LogStore``, optional AI analysis, Markdown report and HTML rendering.
+Every module goes through the same steps, so a new module only has to provide
+an analyzer and a report builder.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from common.logs import LogStore
+from common.registry import DiagnosisModule
+from common.templates import log_templates
+from common.trace import span
+from common.types import ArtifactMap, LogMap, ResultBase
+
+
+def run_module(
+    module: DiagnosisModule,
+    case_dir: str,
+    artifacts: ArtifactMap,
+    logs: Optional[LogStore] = None,
+    enable_ai: Optional[bool] = None,
+    render: bool = True,
+    baseline=None,
+    case_info: Optional[Dict[str, str]] = None,
+) -> Tuple[bool, List[str], ResultBase, str]:
+    """
+    Analyze one case with a diagnosis module and write its reports.
+    
+    Args:
+        module: Registered diagnosis module
+        case_dir: Directory containing collected evidence
+        artifacts: Dictionary mapping filenames to their paths
+        logs: Shared log store (created from ``artifacts`` when omitted)
+        enable_ai: Whether to request AI analysis (module default when None);
+            ignored when ``render`` is False
+        render: Whether to write the Markdown/HTML reports
+        baseline: Optional ``common.baseline.Baseline`` to score the case against;
+            outliers are stored in ``detailed_analysis.baseline_outliers``
+        case_info: Case metadata (``Device Model``, ``Build Fingerprint``) used
+            to pick the baseline group
+        
+    Returns:
+        Tuple[bool, List[str], ResultBase, str]: (failed, reasons, detailed_analysis, html_path);
+        ``html_path`` is empty when ``render`` is False
+    """
+    if logs is None:
+        logs = LogStore(artifacts)
+    module_artifacts = {k: v for k, v in artifacts.items() if k in module.artifacts}
+    
+    # Analyze on the shared store
+    with span(f"analyze:{module.name}", cat="analyzer"):
+        failed, reasons, detailed_analysis = module.analyzer(logs)
+    
+    # Fleet baseline comparison (optional, from stored aggregates only)
+    if baseline is not None:
+        info = case_info or {}
+        detailed_analysis.baseline_outliers = baseline.score(
+            module.name, failed, detailed_analysis,
+            model=info.get("Device Model", ""),
+            reference_build=info.get("Reference Build", ""),
+        )
+    
+    # AI analysis (optional)
+    ai_md = None
+    if enable_ai is None:
+        enable_ai = module.ai_default
+    if enable_ai and not render:
+        # The AI text only goes into the reports
+        print(f"[WARN] AI analysis skipped for {module.name}: no report is rendered")
+        enable_ai = False
+    if enable_ai and module_artifacts:
+        try:
+            ai_logs: LogMap = {
+                label: log_templates(logs, name).render() if label in module.ai_templates else logs.text(name)
+                for label, name in module.ai_logs.items()
+            }
+            ai_md = module.ai(ai_logs) if module.ai_logs else None
+            
+            if ai_md:
+                print(f"\n[AI RESPONSE] {module.name}: {case_dir}\n{ai_md}")
+        except Exception as e:
+            print(f"\n[WARN] AI analysis skipped: {e}")
+    
+    if not render:
+        return failed, reasons, detailed_analysis, ""
+    
+    # Generate Markdown report
+    with span(f"report:markdown:{module.name}", cat="report"):
+        if module.sections:
+            md_path = module.reporter(case_dir, failed, reasons, ai_md, module_artifacts, detailed_analysis,
+                                      sections=module.sections)
+        else:
+            md_path = module.reporter(case_dir, failed, reasons, ai_md, module_artifacts, detailed_analysis)
+    
+    # Generate HTML report
+    with span(f"report:html:{module.name}", cat="report"):
+        from common.report.html_renderer import HtmlRenderer
+        html_path = HtmlRenderer().render(md_path, title=module.title)
+    return failed, reasons, detailed_analysis, html_path
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Diagnosis Module Registry
+
+Diagnosis modules are described by small ``diagnosis.json`` manifests that
+declare the evidence files they need, their analyzer, report builder and the
+report sections (in order) the builder is asked to render. Manifests are
+discovered without importing any module code; the referenced callables are
+imported only when a module is actually selected, so CLI start-up cost does
+not grow with the number of installed modules.
+"""
+import importlib
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+MANIFEST_NAME = "diagnosis.json"
+
+# Extra manifest files or directories (os.pathsep separated) for out-of-tree modules
+MANIFEST_PATH_ENV = "POWER_DIAGNOSIS_MODULES"
+
+
+def resolve(target: str) -> Callable:
+    """
+    Import and return the callable named by ``"package.module:Attr.attr"``.
+    
+    If the path goes through a class to a regular (non-static) method, the
+    class is instantiated with no arguments and the bound method is returned.
+    
+    Args:
+        target: Import path of the callable
+        
+    Returns:
+        Callable: The resolved function or bound method
+    """
+    module_name, _, qualname = target.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        if inspect.isclass(obj):
+            raw = inspect.getattr_static(obj, attr)
+            if inspect.isfunction(raw):
+                obj = getattr(obj(), attr)
+                continue
+        obj = getattr(obj, attr)
+    return obj
+
+
+class DiagnosisModule:
+    """
+    Declarative description of one diagnosis module.
+    
+    Only plain data is held until one of the ``analyzer``/``reporter``/``ai``
+    properties is accessed, which imports the referenced code on demand.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], source: str = ""):
+        """
+        Initialize the module description from a parsed manifest.
+        
+        Args:
+            manifest: Manifest dictionary (see ``diagnosis.json``)
+            source: Path the manifest was loaded from (for error messages)
+        """
+        self.name: str = manifest["name"]
+        self.description: str = manifest.get("description", "")
+        self.artifacts: List[str] = list(manifest.get("artifacts", []))
+        self.title: str = manifest.get("title", f"{self.name.title()} Diagnosis Report")
+        self.sections: List[str] = list(manifest.get("sections", []))
+        self.ai_logs: Dict[str, str] = dict(manifest.get("ai_logs", {}))
+        self.ai_templates: List[str] = list(manifest.get("ai_templates", []))
+        self.ai_default: bool = bool(manifest.get("ai_default", False))
+        self.source = source
+        self._targets = {
+            "analyzer": manifest["analyzer"],
+            "report": manifest["report"],
+            "ai": manifest.get("ai", ""),
+        }
+        self._loaded: Dict[str, Callable] = {}
+
+    def _load(self, key: str) -> Optional[Callable]:
+        """Resolve (once) the callable declared under ``key``."""
+        target = self._targets[key]
+        if not target:
+            return None
+        if key not in self._loaded:
+            self._loaded[key] = resolve(target)
+        return self._loaded[key]
+
+    @property
+    def analyzer(self) -> Callable:
+        """Analyzer callable: ``(logs: LogStore) -> (failed, reasons, detailed_analysis)``."""
+        return self._load("analyzer")
+
+    @property
+    def reporter(self) -> Callable:
+        """Report builder: ``(case_dir, failed, reasons, ai_md, artifacts, detailed) -> md_path``."""
+        return self._load("report")
+
+    @property
+    def ai(self) -> Optional[Callable]:
+        """Optional AI callable: ``(logs: LogMap) -> Optional[str]``."""
+        return self._load("ai")
+
+    @property
+    def loaded(self) -> bool:
+        """Whether any of the module's code has been imported yet."""
+        return bool(self._loaded)
+
+
+class ModuleRegistry:
+    """
+    Discovers diagnosis modules from manifests and hands them out by name.
+    """
+
+    def __init__(self, search_paths: Optional[List[str]] = None):
+        """
+        Initialize the registry.
+        
+        Args:
+            search_paths: Manifest files or directories to scan. Defaults to the
+                package directories under ``src`` plus ``$POWER_DIAGNOSIS_MODULES``.
+        """
+        if search_paths is None:
+            search_paths = [str(Path(__file__).resolve().parent.parent)]
+            extra = os.environ.get(MANIFEST_PATH_ENV, "")
+            search_paths.extend(p for p in extra.split(os.pathsep) if p)
+        self.search_paths = search_paths
+        self._modules: Optional[Dict[str, DiagnosisModule]] = None
+
+    def _discover(self) -> Dict[str, DiagnosisModule]:
+        """Read every manifest found on the search paths."""
+        modules: Dict[str, DiagnosisModule] = {}
+        for entry in self.search_paths:
+            path = Path(entry)
+            if path.is_file():
+                manifests = [path]
+            elif (path / MANIFEST_NAME).is_file():
+                manifests = [path / MANIFEST_NAME]
+            else:
+                manifests = sorted(path.glob(f"*/{MANIFEST_NAME}"))
+            for manifest_path in manifests:
+                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+                module = DiagnosisModule(manifest, str(manifest_path))
+                modules.setdefault(module.name, module)
+        return modules
+
+    @property
+    def modules(self) -> Dict[str, DiagnosisModule]:
+        """All discovered modules keyed by name (discovered once, lazily)."""
+        if self._modules is None:
+            self._modules = self._discover()
+        return self._modules
+
+    def names(self) -> List[str]:
+        """Return the names of all discovered modules."""
+        return list(self.modules)
+
+    def get(self, name: str) -> DiagnosisModule:
+        """
+        Return a module by name.
+        
+        Raises:
+            ValueError: If no manifest declares a module with this name
+        """
+        if name not in self.modules:
+            raise ValueError(
+                f"Unknown diagnosis module: {name} (available: {', '.join(self.names())})"
+            )
+        return self.modules[name]
+
+    def select(self, names: Optional[List[str]] = None) -> List[DiagnosisModule]:
+        """Return the requested modules, or all of them when ``names`` is empty."""
+        return [self.get(n) for n in (names or self.names())]
+
+
+# Process-wide default registry
+registry = ModuleRegistry()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Inline SVG Charts for Diagnosis Reports
+
+This module draws the report charts as plain SVG markup, with no plotting
+dependency: horizontal bar charts (top wakeup sources, battery offenders),
+histograms (wakeup intervals) and stacked columns (suspend/resume phase times
+per cycle). Each chart is returned as a ``<div class="chart">`` block that the
+Markdown report embeds as raw HTML; the HTML report shows it inline and
+Markdown viewers that do not render HTML simply skip it.
+"""
+import math
+from html import escape
+from typing import Dict, List, Optional, Sequence, Tuple
+
+WIDTH = 720
+_LABEL_WIDTH = 230
+_VALUE_WIDTH = 70
+_ROW = 22
+_TOP = 34
+_FONT = "font-family=\"-apple-system, 'Segoe UI', Roboto, Arial, sans-serif\" font-size=\"12\""
+
+_BAR = "#3182ce"
+_ALERT = "#e53e3e"
+_PALETTE = ["#3182ce", "#805ad5", "#38a169", "#dd6b20", "#d53f8c", "#319795", "#718096"]
+
+# Wakeup interval buckets in seconds (intervals under 30 s count as frequent wakeups)
+INTERVAL_EDGES = [0, 5, 10, 30, 60, 300, 900, 3600]
+
+
+def _number(value: float) -> str:
+    """Short value label: 12, 3.4, 1.2k, 5.6M."""
+    for limit, suffix in ((1e6, "M"), (1e3, "k")):
+        if abs(value) >= limit:
+            return f"{value / limit:.1f}{suffix}"
+    return f"{value:.0f}" if value == int(value) else f"{value:.1f}"
+
+
+def _seconds(value: float) -> str:
+    """Short duration label: 30s, 5m, 1h."""
+    if value >= 3600:
+        return f"{value / 3600:g}h"
+    if value >= 60:
+        return f"{value / 60:g}m"
+    return f"{value:g}s"
+
+
+def _clip(text: str, limit: int = 34) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _svg(height: int, title: str, body: List[str]) -> str:
+    """Wrap chart elements into a titled SVG figure block."""
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {height}" width="{WIDTH}" '
+        f'role="img" aria-label="{escape(title)}" {_FONT}>'
+        f'<text x="0" y="16" font-size="14" font-weight="600" fill="#2d3748">{escape(title)}</text>'
+        + "".join(body) + "</svg>"
+    )
+    return f'\n<div class="chart">{svg}</div>\n\n'
+
+
+def bar_chart(title: str, items: Sequence[Tuple[str, float]], unit: str = "",
+              marked: Sequence[int] = ()) -> str:
+    """
+    Draw a horizontal bar chart.
+
+    Args:
+        title: Chart title
+        items: ``(label, value)`` pairs, drawn in the given order
+        unit: Suffix of the value labels (e.g. `` mAh``)
+        marked: Indexes of the bars drawn in the alert colour
+
+    Returns:
+        str: The chart block, or ``""`` when there is nothing to draw
+    """
+    rows = [(label, value, i in marked) for i, (label, value) in enumerate(items) if value > 0]
+    if not rows:
+        return ""
+    peak = max(value for _, value, _ in rows)
+    span = WIDTH - _LABEL_WIDTH - _VALUE_WIDTH
+    body = []
+    for i, (label, value, alert) in enumerate(rows):
+        y = _TOP + i * _ROW
+        width = max(1.0, span * value / peak)
+        color = _ALERT if alert else _BAR
+        body.append(
+            f'<g><title>{escape(label)}: {_number(value)}{escape(unit)}</title>'
+            f'<text x="{_LABEL_WIDTH - 8}" y="{y + 14}" text-anchor="end" fill="#4a5568">{escape(_clip(label))}</text>'
+            f'<rect x="{_LABEL_WIDTH}" y="{y + 3}" width="{width:.1f}" height="{_ROW - 6}" rx="2" fill="{color}"/>'
+            f'<text x="{_LABEL_WIDTH + width + 6:.1f}" y="{y + 14}" fill="#2d3748">{_number(value)}{escape(unit)}</text></g>'
+        )
+    return _svg(_TOP + len(rows) * _ROW + 6, title, body)
+
+
+def histogram(title: str, values: Sequence[float], edges: Sequence[float] = INTERVAL_EDGES,
+              alert_below: Optional[float] = None) -> str:
+    """
+    Draw a histogram of durations in seconds over fixed bucket edges.
+
+    Args:
+        title: Chart title
+        values: Durations in seconds
+        edges: Ascending bucket edges; the last bucket is open-ended
+        alert_below: Buckets ending at or below this are drawn in the alert colour
+
+    Returns:
+        str: The chart block, or ``""`` without values
+    """
+    if not values:
+        return ""
+    counts = [0] * len(edges)
+    for value in values:
+        # Last edge not above the value (values below the first edge go to the first bucket)
+        lo, hi = 0, len(edges) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if edges[mid] <= value:
+                lo = mid
+            else:
+                hi = mid - 1
+        counts[lo] += 1
+    labels = [f"{_seconds(edges[i])}–{_seconds(edges[i + 1])}" for i in range(len(edges) - 1)]
+    labels.append(f"≥{_seconds(edges[-1])}")
+
+    plot_height, left, bottom = 140, 40, _TOP + 140
+    slot = (WIDTH - left) / len(counts)
+    peak = max(counts)
+    body = [f'<line x1="{left}" y1="{bottom}" x2="{WIDTH}" y2="{bottom}" stroke="#a0aec0"/>']
+    for i, count in enumerate(counts):
+        x = left + i * slot
+        height = plot_height * count / peak
+        end = edges[i + 1] if i + 1 < len(edges) else math.inf
+        color = _ALERT if alert_below is not None and end <= alert_below else _BAR
+        body.append(
+            f'<g><title>{labels[i]}: {count}</title>'
+            f'<rect x="{x + 4:.1f}" y="{bottom - height:.1f}" width="{slot - 8:.1f}" height="{height:.1f}" '
+            f'rx="2" fill="{color}"/>'
+            f'<text x="{x + slot / 2:.1f}" y="{bottom - height - 4:.1f}" text-anchor="middle" fill="#2d3748">'
+            f'{count or ""}</text>'
+            f'<text x="{x + slot / 2:.1f}" y="{bottom + 16}" text-anchor="middle" fill="#4a5568">{labels[i]}</text></g>'
+        )
+    return _svg(bottom + 24, title, body)
+
+
+def stacked_columns(title: str, columns: Sequence[Tuple[str, Dict[str, float]]], series: Sequence[str],
+                    unit: str = " ms", marked: Sequence[int] = ()) -> str:
+    """
+    Draw one column per entry, stacked by series (e.g. the phase times of each cycle).
+
+    Args:
+        title: Chart title
+        columns: ``(label, {series: value})`` pairs, drawn left to right
+        series: Stacking order, bottom first; also the legend
+        unit: Suffix of the tooltips
+        marked: Indexes of the columns underlined in the alert colour
+
+    Returns:
+        str: The chart block, or ``""`` when every column is empty
+    """
+    totals = [sum(values.get(name, 0.0) for name in series) for _, values in columns]
+    if not any(totals):
+        return ""
+    plot_height, left = 160, 56
+    legend_y = _TOP
+    bottom = _TOP + 16 + plot_height
+    slot = (WIDTH - left) / len(columns)
+    peak = max(totals)
+    body = [
+        f'<line x1="{left}" y1="{bottom}" x2="{WIDTH}" y2="{bottom}" stroke="#a0aec0"/>',
+        f'<text x="{left - 6}" y="{bottom - plot_height + 4}" text-anchor="end" fill="#718096">'
+        f'{_number(peak)}{escape(unit)}</text>',
+    ]
+    for k, name in enumerate(series):
+        x = left + k * 90
+        body.append(f'<rect x="{x}" y="{legend_y - 9}" width="10" height="10" fill="{_PALETTE[k % len(_PALETTE)]}"/>'
+                    f'<text x="{x + 14}" y="{legend_y}" fill="#4a5568">{escape(name)}</text>')
+    # At most about 20 column labels
+    step = math.ceil(len(columns) / 20)
+    for i, (label, values) in enumerate(columns):
+        x = left + i * slot
+        y = float(bottom)
+        tooltip = ", ".join(f"{name} {values[name]:.1f}{unit}" for name in series if values.get(name))
+        body.append(f'<g><title>{escape(label)}: {escape(tooltip) or "no data"}</title>')
+        for k, name in enumerate(series):
+            height = plot_height * values.get(name, 0.0) / peak
+            if height <= 0:
+                continue
+            y -= height
+            body.append(f'<rect x="{x + 2:.1f}" y="{y:.1f}" width="{max(slot - 4, 1):.1f}" height="{height:.1f}" '
+                        f'fill="{_PALETTE[k % len(_PALETTE)]}"/>')
+        if i in marked:
+            body.append(f'<rect x="{x + 2:.1f}" y="{bottom + 2}" width="{max(slot - 4, 1):.1f}" height="4" '
+                        f'fill="{_ALERT}"/>')
+        if i % step == 0:
+            body.append(f'<text x="{x + slot / 2:.1f}" y="{bottom + 18}" text-anchor="middle" font-size="10" '
+                        f'fill="#4a5568">{escape(label)}</text>')
+        body.append("</g>")
+    return _svg(bottom + 24, title, body)
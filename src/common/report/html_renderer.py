@@ -2,31 +2,28 @@
 """
 HTML Report Generator for Android Suspend Diagnosis
 
-This module converts Markdown reports to HTML and adds interactive charts.
+This module converts Markdown reports to HTML. Charts are inline SVG blocks
+already embedded in the Markdown (see ``common.report.charts``), so no plotting
+library is needed.
 """
-import base64
-import io
 from pathlib import Path
-from typing import List
 
 import markdown
-import matplotlib.pyplot as plt
-
-from common.types import WakeupSource
 
 
 class HtmlRenderer:
     """
-    Converts Markdown files to HTML and embeds a bar chart of Top-5 Wakeup Sources.
+    Converts Markdown files (with their inline SVG charts) to styled HTML.
     Returns the path to the generated HTML file.
     """
 
-    def render(self, md_path: str) -> str:
+    def render(self, md_path: str, title: str = "Suspend Diagnosis Report") -> str:
         """
         Convert a Markdown report to HTML.
         
         Args:
             md_path: Path to the Markdown file
+            title: Document title of the HTML page
             
         Returns:
             str: Path to the generated HTML file
@@ -44,7 +41,7 @@ class HtmlRenderer:
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Suspend Diagnosis Report</title>
+    <title>{title}</title>
     <style>
         * {{
             margin: 0;
@@ -176,6 +173,16 @@ class HtmlRenderer:
             font-weight: bold;
         }}
         
+        .chart {{
+            margin-bottom: 1.5rem;
+            overflow-x: auto;
+        }}
+        
+        .chart svg {{
+            max-width: 100%;
+            height: auto;
+        }}
+        
         .section-card {{
             background: #f7fafc;
             border-left: 4px solid #3182ce;
@@ -6,9 +6,16 @@ This module generates a Markdown report based on the analysis results.
 """
 import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from common.types import WakeupSource, ArtifactMap
+from common.artifacts import open_artifact, read_artifact
+from common.report.charts import bar_chart, histogram, stacked_columns
+from common.report.raw_logs import export_raw_logs, locate_lines, viewer_link
+from common.templates import mine_lines
+from common.timestamps import format_time
+from common.trace import span
+from common.types import ArtifactMap, CycleResult, SuspendAnalysis, WakeupAnalysis
+from wakeup_diagnosis.wakelocks import describe_holder
 
 
 class MarkdownBuilder:
@@ -17,6 +24,634 @@ class MarkdownBuilder:
     Returns the absolute path to the generated Markdown file.
     """
 
+    # Device PM phases in the order they run, and the cycles charted per report
+    PHASES = ["suspend", "late suspend", "noirq suspend", "noirq resume", "early resume", "resume"]
+    CHART_CYCLES = 40
+
+    # Report sections by manifest title (``sections`` in ``diagnosis.json``) → rendering method
+    SUSPEND_SECTIONS = {
+        "Step 1: Suspend Statistics Check": "_step1_section",
+        "Step 2: Wakelock Analysis": "_step2_section",
+        "Step 3: Kernel Log Analysis": "_step3_section",
+        "Suspend/Resume Cycles": "_suspend_cycles_section",
+    }
+    WAKEUP_SECTIONS = {
+        "Wakeup Sources": "_wakeup_sources_section",
+        "Kernel Wakeup Events": "_kernel_wakeups_section",
+        "Power Management": "_power_section",
+        "App Wakeups": "_app_wakeups_section",
+        "Wakeup IRQs": "_irq_section",
+        "Sampled Window": "_sampled_section",
+        "Wakelock Correlation": "_wakelocks_section",
+        "Battery Cost": "_battery_section",
+    }
+
+    @staticmethod
+    def _baseline_section(detailed_analysis) -> List[str]:
+        """
+        Render the fleet baseline comparison stored by the pipeline.
+        
+        Args:
+            detailed_analysis: Analysis results, possibly holding ``baseline_outliers``
+            
+        Returns:
+            List[str]: Markdown fragments (empty if the case was not scored)
+        """
+        if detailed_analysis is None or detailed_analysis.baseline_outliers is None:
+            return []
+        outliers = detailed_analysis.baseline_outliers
+        md = ["## 📈 Fleet Baseline Comparison\n\n"]
+        metrics = [o for o in outliers if not o["metric"].startswith("new_top:")]
+        new_top = [o for o in outliers if o["metric"].startswith("new_top:")]
+        if not outliers:
+            md.append("✅ All metrics are within the fleet baseline\n\n")
+        if metrics:
+            md.append(f"❌ **Outliers** (baseline group `{metrics[0]['group']}`):\n\n")
+            md.append("| Metric | Value | Baseline Mean | Baseline P95 | Z-score | Percentile |\n")
+            md.append("|--------|-------|---------------|--------------|---------|------------|\n")
+            for o in metrics:
+                z = "∞" if o["z"] is None else o["z"]
+                md.append(
+                    f"| {o['metric']} | {o['value']:g} | {o['mean']} | {o['p95']} | {z} | {o['percentile']:.1%} |\n"
+                )
+            md.append("\n")
+        for o in new_top:
+            counter = o["metric"].split(":", 1)[1]
+            md.append(f"- ⚠️ `{o['name']}` ({o['value']}) is a top {counter} entry not seen in the baseline\n")
+        if new_top:
+            md.append("\n")
+        md.append("---\n\n")
+        return md
+
+    @staticmethod
+    def _suspend_stats_table(step1) -> List[str]:
+        """
+        Render the parsed suspend_stats counters (with the test interval change, if known).
+        
+        Args:
+            step1: Step 1 result holding ``stats`` and ``delta``
+            
+        Returns:
+            List[str]: Markdown lines (empty without parsed counters)
+        """
+        stats, delta = step1.stats, step1.delta
+        if stats is None:
+            return []
+        md = []
+        header = "| Counter | Total |" + (" During interval |" if delta is not None else "")
+        md.append(header + "\n")
+        md.append("|---------|-------|" + ("-----------------|" if delta is not None else "") + "\n")
+        for name in stats.COUNTERS:
+            value = getattr(stats, name)
+            change = getattr(delta, name) if delta is not None else 0
+            # success/fail always, failure reasons only when they ever occurred
+            if name in ("success", "fail") or value:
+                md.append(f"| `{name}` | {value} |" + (f" +{change} |" if delta is not None else "") + "\n")
+        md.append("\n")
+        recent = delta if delta is not None else stats
+        if recent.last_failed_dev or recent.last_failed_step:
+            md.append("**Recent failures** (most recent first):\n")
+            for dev, errno, step in zip(recent.last_failed_dev, recent.last_failed_errno, recent.last_failed_step):
+                md.append(f"- step `{step or '?'}`, device `{dev or '?'}`, errno {errno}\n")
+            md.append("\n")
+        return md
+
+    @staticmethod
+    def _evidence_section(case_dir: str, artifacts: ArtifactMap) -> List[str]:
+        """
+        List the evidence files with links to their paged raw-log view.
+        
+        Args:
+            case_dir: Directory the report is written to (the logs are exported below it)
+            artifacts: Dictionary mapping filenames to their paths
+            
+        Returns:
+            List[str]: Markdown fragments
+        """
+        with span("report:raw_logs", cat="report"):
+            counts = export_raw_logs(case_dir, artifacts)
+        md = ["## 📁 Evidence Files\n\n"]
+        for k, v in artifacts.items():
+            view = f" — [view all {counts[k]} lines]({viewer_link(k)})" if k in counts else ""
+            md.append(f"- **{k}**: `{v}`{view}\n")
+        return md
+
+    @staticmethod
+    def _flagged_lines(artifacts: ArtifactMap, name: str, texts: List[str]) -> List[str]:
+        """
+        Link flagged lines of a log to their place in the paged raw-log view.
+        
+        Args:
+            artifacts: Dictionary mapping filenames to their paths
+            name: Artifact the lines come from
+            texts: Flagged lines
+            
+        Returns:
+            List[str]: Markdown fragments (empty if none was found)
+        """
+        if name not in artifacts or not texts:
+            return []
+        try:
+            found = locate_lines(artifacts[name], texts)
+        except (OSError, ValueError):
+            return []
+        if not found:
+            return []
+        numbers = sorted(set(found.values()))
+        links = ", ".join(f"[{n}]({viewer_link(name, n)})" for n in numbers)
+        return [f"**Flagged lines in `{name}`** (full log): {links}\n\n"]
+
+    @staticmethod
+    def _cycles_section(cycles: CycleResult, recent: int = 10) -> List[str]:
+        """
+        Render the suspend/resume cycles segmented from dmesg.
+        
+        Args:
+            cycles: Cycle segmentation result
+            recent: Number of most recent cycles listed
+            
+        Returns:
+            List[str]: Markdown fragments (empty if no cycle was found)
+        """
+        if not cycles.cycle_count:
+            return []
+        md = ["## ⏱️ Suspend/Resume Cycles\n\n"]
+        md.append(f"**Cycles**: {cycles.cycle_count} ({cycles.failed_count} failed)  \n")
+        md.append(
+            f"**Suspend of devices**: p50 {cycles.suspend_p50_ms:.1f} ms, p95 {cycles.suspend_p95_ms:.1f} ms  \n"
+            f"**Resume of devices**: p50 {cycles.resume_p50_ms:.1f} ms, p95 {cycles.resume_p95_ms:.1f} ms\n\n"
+        )
+        recent_cycles = cycles.cycles[-MarkdownBuilder.CHART_CYCLES:]
+        first = cycles.cycle_count - len(recent_cycles) + 1
+        md.append(stacked_columns(
+            f"Device suspend/resume phase times, last {len(recent_cycles)} cycles (red: failed)",
+            [(f"#{first + i}", c.phases) for i, c in enumerate(recent_cycles)],
+            MarkdownBuilder.PHASES,
+            marked=[i for i, c in enumerate(recent_cycles) if c.failed],
+        ))
+        if cycles.drivers:
+            md.append("**Slowest drivers** (device PM callbacks across all cycles):\n\n")
+            md.append("| Driver | Phase | Calls | Total (ms) | P50 (ms) | P95 (ms) | P99 (ms) | Max (ms) |\n")
+            md.append("|--------|-------|-------|------------|----------|----------|----------|----------|\n")
+            for d in cycles.drivers[:10]:
+                md.append(
+                    f"| `{d.driver}` | {d.phase} | {d.count} | {d.total_ms:.1f} | {d.p50_ms:.1f} | "
+                    f"{d.p95_ms:.1f} | {d.p99_ms:.1f} | {d.max_ms:.1f} |\n"
+                )
+            md.append("\n")
+        md.append(f"**Recent cycles** (last {min(recent, cycles.cycle_count)}):\n\n")
+        md.append("| Entry | Exit | Suspend (ms) | Resume (ms) | Result | Slow callbacks |\n")
+        md.append("|-------|------|--------------|-------------|--------|----------------|\n")
+        for c in cycles.cycles[-recent:]:
+            exit_time = format_time(c.exit, cycles.clock) if c.exit is not None else "-"
+            suspend_ms = f"{c.suspend_ms:.1f}" if c.suspend_ms is not None else "-"
+            resume_ms = f"{c.resume_ms:.1f}" if c.resume_ms is not None else "-"
+            status = f"❌ {c.error}" if c.failed else "✅"
+            slow = ", ".join(f"`{cb.driver}` {cb.ms:.0f} ms" for cb in c.slow_callbacks[:3]) or "-"
+            md.append(
+                f"| {format_time(c.entry, cycles.clock)} | {exit_time} | {suspend_ms} | {resume_ms} | {status} | {slow} |\n"
+            )
+        md.append("\n---\n\n")
+        return md
+
+    def _render_sections(self, renderers: Dict[str, str], sections: Optional[List[str]],
+                         artifacts: ArtifactMap, reasons: List[str], detailed_analysis) -> List[str]:
+        """
+        Render report sections in the order the module manifest declares them.
+        
+        Args:
+            renderers: Section title → name of the method rendering it
+            sections: Titles from the manifest (every section of ``renderers`` when empty)
+            artifacts: Dictionary mapping filenames to their paths
+            reasons: Reasons returned by the analyzer
+            detailed_analysis: Structured analyzer output
+            
+        Returns:
+            List[str]: Markdown fragments of the sections, in order
+            
+        Raises:
+            ValueError: If a section title has no renderer
+        """
+        md: List[str] = []
+        for title in sections or renderers:
+            if title not in renderers:
+                raise ValueError(f"Unknown report section: {title} (available: {', '.join(renderers)})")
+            md.extend(getattr(self, renderers[title])(artifacts, reasons, detailed_analysis))
+        return md
+
+    def _step1_section(self, artifacts: ArtifactMap, reasons: List[str],
+                       detailed_analysis: Optional[SuspendAnalysis]) -> List[str]:
+        """Step 1: suspend_stats verdict, counters and key raw lines."""
+        if "suspend_stats.txt" not in artifacts or (
+                detailed_analysis is not None and not detailed_analysis.step1_suspend_stats.performed):
+            return []
+        md: List[str] = []
+        md.append("## Step 1️⃣: Suspend Statistics Check\n")
+        md.append("**Purpose**: Check if suspend succeeded or failed  \n")
+        md.append("**File**: `/d/suspend_stats` → `suspend_stats.txt`\n\n")
+        
+        step1_reasons = []
+        if detailed_analysis is not None:
+            step1 = detailed_analysis.step1_suspend_stats
+            if step1.success:
+                md.append("✅ **Result**: Suspend is working normally\n")
+                md.append(f"- {step1.message or 'No details available'}\n")
+                md.append("- **Analysis stops here** - No further investigation needed\n\n")
+            else:
+                md.append("❌ **Result**: Suspend has failures\n")
+                md.append(f"- {step1.message or 'No details available'}\n")
+                md.append("- **Continue to Step 2** - Check for wakelocks\n\n")
+            md.extend(self._suspend_stats_table(step1))
+        else:
+            step1_reasons = [r for r in reasons if "Step 1" in r]
+            if step1_reasons:
+                md.append("❌ **Result**: Suspend has failures\n")
+                for reason in step1_reasons:
+                    md.append(f"- {reason}\n")
+            else:
+                md.append("⚠️ **Result**: Unable to determine suspend status\n")
+        
+        # 原始 Suspend Stats 日志（仅在 suspend 失败时展示） 
+        if ( (detailed_analysis is not None and not detailed_analysis.step1_suspend_stats.success) 
+                 or (step1_reasons) ):
+            try:
+                raw = read_artifact(artifacts["suspend_stats.txt"])
+                lines = raw.splitlines()
+                # Filter lines containing key terms
+                keywords = ["fail", "error", "suspend", "warning", "critical"]
+                filtered = [line for line in lines if any(k in line.lower() for k in keywords)]
+                # Use filtered lines if any, else fallback to first 20 lines
+                selected = filtered[:20] if filtered else lines[:20]
+                truncated = "\n".join(selected)
+                if len(selected) < len(lines):
+                    truncated += "\n... (truncated)"
+                md.append("### 原始 Suspend Stats (关键片段)\n")
+                md.append("```text\n")
+                md.append(truncated)
+                md.append("\n```\n\n")
+            except Exception:
+                pass
+        md.append("---\n\n")
+        return md
+
+    def _step2_section(self, artifacts: ArtifactMap, reasons: List[str],
+                       detailed_analysis: Optional[SuspendAnalysis]) -> List[str]:
+        """Step 2: active wakelocks from ``dumpsys suspend_control_internal``."""
+        if "dumpsys_suspend.txt" not in artifacts or (
+                detailed_analysis is not None and not detailed_analysis.step2_wakelocks.performed):
+            return []
+        md: List[str] = []
+        md.append("## Step 2️⃣: Wakelock Analysis\n")
+        md.append("**Purpose**: Check for active wakelocks preventing suspend  \n")
+        md.append("**File**: `dumpsys suspend_control_internal` → `dumpsys_suspend.txt`\n\n")
+        
+        if detailed_analysis is not None:
+            step2 = detailed_analysis.step2_wakelocks
+            if step2.has_active:
+                wakelocks = step2.wakelocks
+                md.append("❌ **Result**: Active wakelocks found (ROOT CAUSE)\n")
+                md.append("**Active Wakelocks**:\n")
+                for wakelock in wakelocks:
+                    md.append(f"- `{wakelock}`\n")
+                md.append("\n**Analysis stops here** - Root cause identified\n\n")
+            else:
+                md.append("✅ **Result**: No active wakelocks found\n")
+                md.append("- All wakelocks are in 'Inactive' state\n")
+                md.append("- **Continue to Step 3** - Check kernel logs\n\n")
+        else:
+            step2_reasons = [r for r in reasons if "Step 2" in r and "not available" not in r]
+            if any("Active wakelocks found" in r for r in step2_reasons):
+                md.append("❌ **Result**: Active wakelocks found (ROOT CAUSE)\n")
+                for reason in step2_reasons:
+                    if "Active wakelocks found" in reason:
+                        md.append(f"- {reason}\n")
+            elif step2_reasons:
+                md.append("✅ **Result**: No active wakelocks found\n")
+                for reason in step2_reasons:
+                    md.append(f"- {reason}\n")
+            else:
+                md.append("⚠️ **Result**: Wakelock analysis not performed\n")
+        
+        # 原始 Wakelock Dump 日志（仅在检测到活跃 wakelock 时展示）
+        if detailed_analysis is not None and detailed_analysis.step2_wakelocks.has_active:
+            try:
+                raw = read_artifact(artifacts["dumpsys_suspend.txt"])
+                lines = raw.splitlines()
+                # Filter lines containing key terms relevant to wakelocks
+                keywords = ["wakelock", "active", "error", "fail", "warning", "blocked"]
+                filtered = [line for line in lines if any(k in line.lower() for k in keywords)]
+                selected = filtered[:20] if filtered else lines[:20]
+                truncated = "\n".join(selected)
+                if len(selected) < len(lines):
+                    truncated += "\n... (truncated)"
+                md.append("### 原始 Wakelock Dump (关键片段)\n")
+                md.append("```text\n")
+                md.append(truncated)
+                md.append("\n```\n\n")
+            except Exception:
+                pass
+        md.append("---\n\n")
+        return md
+
+    def _step3_section(self, artifacts: ArtifactMap, reasons: List[str],
+                       detailed_analysis: Optional[SuspendAnalysis]) -> List[str]:
+        """Step 3: suspend entry and failures in the kernel log."""
+        if "dmesg.txt" not in artifacts or (
+                detailed_analysis is not None and not detailed_analysis.step3_dmesg.performed):
+            return []
+        md: List[str] = []
+        md.append("## Step 3️⃣: Kernel Log Analysis\n")
+        md.append("**Purpose**: Check for suspend entry and failure details  \n")
+        md.append("**File**: `dmesg -T` → `dmesg.txt`\n\n")
+        
+        if detailed_analysis is not None:
+            step3 = detailed_analysis.step3_dmesg
+            if not step3.has_suspend_entry:
+                md.append("❌ **Result**: No suspend entry found\n")
+                md.append("- System did not attempt to enter suspend\n")
+                md.append("- Check if suspend is triggered properly\n\n")
+            elif step3.has_suspend_failure:
+                md.append("❌ **Result**: Suspend entry failed in kernel\n")
+                md.append("**Failure Messages**:\n")
+                for msg in step3.failure_messages[:3]:
+                    md.append(f"- `{msg}`\n")
+                md.append("\n")
+                md.extend(self._flagged_lines(artifacts, "dmesg.txt", step3.failure_messages))
+            else:
+                md.append("✅ **Result**: Suspend entry found, no clear failures\n")
+                md.append("- Suspend process appears normal in kernel logs\n")
+                md.append("- Root cause may be elsewhere\n\n")
+        else:
+            step3_reasons = [r for r in reasons if "Step 3" in r and "not available" not in r]
+            if step3_reasons:
+                if any("No suspend entry found" in r for r in step3_reasons):
+                    md.append("❌ **Result**: No suspend entry found\n")
+                elif any("Suspend entry failed" in r for r in step3_reasons):
+                    md.append("❌ **Result**: Suspend entry failed in kernel\n")
+                else:
+                    md.append("✅ **Result**: Kernel log analyzed\n")
+                for reason in step3_reasons:
+                    md.append(f"- {reason}\n")
+            else:
+                md.append("⚠️ **Result**: Kernel log analysis not performed\n")
+        
+        # 原始 dmesg 日志（仅在 suspend 入口缺失或失败时展示）
+        if detailed_analysis is not None:
+            step3 = detailed_analysis.step3_dmesg
+            if not step3.has_suspend_entry or step3.has_suspend_failure:
+                try:
+                    # Collapse repeated lines into templates, then keep the
+                    # ones with key terms relevant to suspend/kernel issues
+                    with open_artifact(artifacts["dmesg.txt"]) as f:
+                        miner = mine_lines(f)
+                    keywords = ["suspend", "error", "fail", "warning", "critical", "blocked"]
+                    truncated = miner.render(limit=20, keywords=keywords)
+                    if truncated.count("\n") == 0:
+                        truncated = miner.render(limit=20)
+                    md.append("### 原始 dmesg 日志 (关键片段)\n")
+                    md.append("```text\n")
+                    md.append(truncated)
+                    md.append("\n```\n\n")
+                except Exception:
+                    pass
+        md.append("---\n\n")
+        return md
+
+    def _suspend_cycles_section(self, artifacts: ArtifactMap, reasons: List[str],
+                                detailed_analysis: Optional[SuspendAnalysis]) -> List[str]:
+        """Suspend/resume cycles (independent of the 3-step verdict)."""
+        if detailed_analysis is None:
+            return []
+        return self._cycles_section(detailed_analysis.cycles)
+
+    def _wakeup_sources_section(self, artifacts: ArtifactMap, reasons: List[str],
+                                detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Wakeup source counters with the top sources charted."""
+        md: List[str] = []
+        sources = detailed_analysis.wakeup_sources
+        if "wakeup_sources.txt" in artifacts:
+            md.append("## Wakeup Sources\n")
+            md.append("**File**: `/sys/kernel/debug/wakeup_sources` → `wakeup_sources.txt`\n\n")
+            top = sources.top_wakeup_sources
+            if top:
+                md.append("| Name | Active Count | Event Count | Wakeup Count |\n")
+                md.append("|------|--------------|-------------|--------------|\n")
+                for item in top:
+                    md.append(
+                        f"| `{item.name}` | {item.active_count} | "
+                        f"{item.event_count} | {item.wakeup_count} |\n"
+                    )
+                md.append("\n")
+                md.append(bar_chart("Top wakeup sources (wakeup count)",
+                                    [(item.name, item.wakeup_count) for item in top]))
+            else:
+                md.append("⚠️ **Result**: No wakeup sources parsed\n\n")
+            md.append("---\n\n")
+        return md
+
+    def _kernel_wakeups_section(self, artifacts: ArtifactMap, reasons: List[str],
+                                detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Kernel wakeup rate, interval histogram and recent events."""
+        md: List[str] = []
+        dmesg = detailed_analysis.dmesg_wakeups
+        if "dmesg.txt" in artifacts:
+            md.append("## Kernel Wakeup Events\n")
+            md.append("**File**: `dmesg -T` → `dmesg.txt`\n\n")
+            events = dmesg.wakeup_events
+            if dmesg.window_seconds:
+                md.append(
+                    f"**Kernel wakeup rate**: {dmesg.wakeup_rate:.1f}/min "
+                    f"({dmesg.event_count} resumes in the last {dmesg.window_seconds / 60:.0f} min of dmesg; "
+                    f"the other sections cover their whole capture)\n\n"
+                )
+            md.append(histogram("Intervals between wakeup events (red: under 30 s)",
+                                dmesg.wakeup_intervals, alert_below=30))
+            if events:
+                md.append(f"**Recent wakeup events** ({len(events)} shown):\n")
+                md.append("```text\n")
+                md.append("\n".join(e.message for e in events))
+                md.append("\n```\n\n")
+                md.extend(self._flagged_lines(artifacts, "dmesg.txt", [e.message for e in events]))
+            else:
+                md.append("✅ **Result**: No wakeup events with timestamps found\n\n")
+            md.append("---\n\n")
+        return md
+
+    def _power_section(self, artifacts: ArtifactMap, reasons: List[str],
+                       detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Wake locks held according to ``dumpsys power``."""
+        md: List[str] = []
+        power = detailed_analysis.power_management
+        if "dumpsys_power.txt" in artifacts:
+            md.append("## Power Management\n")
+            md.append("**File**: `dumpsys power` → `dumpsys_power.txt`\n\n")
+            if power.power_events:
+                md.append("❌ **Result**: Held wake locks found\n")
+                for event in power.power_events:
+                    md.append(f"- `{event}`\n")
+                md.append("\n")
+            else:
+                md.append("✅ **Result**: No held partial wake locks found\n\n")
+            md.append("---\n\n")
+        return md
+
+    def _app_wakeups_section(self, artifacts: ArtifactMap, reasons: List[str],
+                             detailed_analysis: WakeupAnalysis) -> List[str]:
+        """App wakeup events from logcat, counted per package."""
+        md: List[str] = []
+        logcat = detailed_analysis.logcat_wakeups
+        if "logcat.txt" in artifacts:
+            md.append("## App Wakeups\n")
+            md.append("**File**: `logcat` → `logcat.txt`\n\n")
+            if logcat.app_wakeups:
+                md.append("**Recent app wakeup events**:\n")
+                md.append("```text\n")
+                md.append("\n".join(logcat.app_wakeups))
+                md.append("\n```\n\n")
+                md.extend(self._flagged_lines(artifacts, "logcat.txt", logcat.app_wakeups))
+                if logcat.app_counts:
+                    md.append("| Package | Events |\n")
+                    md.append("|---------|--------|\n")
+                    for app, count in list(logcat.app_counts.items())[:10]:
+                        md.append(f"| `{app}` | {count} |\n")
+                    md.append("\n")
+            else:
+                md.append("✅ **Result**: No app wakeup events found\n\n")
+            md.append("---\n\n")
+        return md
+
+    def _irq_section(self, artifacts: ArtifactMap, reasons: List[str],
+                     detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Resumes and interrupt rates per IRQ."""
+        md: List[str] = []
+        irqs = detailed_analysis.irq_wakeups
+        if irqs.performed and (irqs.irqs or irqs.resume_count):
+            md.append("## Wakeup IRQs\n")
+            md.append("**Files**: `Resume caused by IRQ` lines in `dmesg.txt`, "
+                      "`/proc/interrupts` → `interrupts_before.txt` / `interrupts_after.txt`\n\n")
+            if irqs.elapsed_seconds:
+                md.append(f"**Snapshot interval**: {irqs.elapsed_seconds:.0f} s  \n")
+            md.append(f"**Resumes attributed to an IRQ**: {irqs.resume_count}\n\n")
+            if irqs.excessive_irq_wakeups:
+                md.append("❌ **Result**: Interrupts waking the device too often\n")
+                for issue in irqs.issues:
+                    md.append(f"- {issue}\n")
+                md.append("\n")
+            md.append("| IRQ | Name | Resumes | Resumes/hour | Interrupts | Interrupts/s |\n")
+            md.append("|-----|------|---------|--------------|------------|--------------|\n")
+            for irq in irqs.irqs[:15]:
+                md.append(
+                    f"| {irq.irq} | `{irq.name or '?'}` | {irq.wakeups} | {irq.wakeups_per_hour:.1f} | "
+                    f"{irq.interrupts} | {irq.interrupts_per_second:.2f} |\n"
+                )
+            md.append("\n---\n\n")
+        return md
+
+    def _sampled_section(self, artifacts: ArtifactMap, reasons: List[str],
+                         detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Counter deltas over the on-device sampling window."""
+        md: List[str] = []
+        sampled = detailed_analysis.sampled
+        if sampled.performed:
+            md.append("## Sampled Window\n")
+            md.append("**File**: on-device sampler output → `samples.txt`\n\n")
+            md.append(f"**Samples**: {sampled.sample_count} over {sampled.window_seconds:.0f} s  \n")
+            md.append(f"**Suspends**: {sampled.suspend_success} succeeded, {sampled.suspend_fail} failed\n\n")
+            if sampled.issues:
+                md.append("❌ **Result**: Issues during the sampling window\n" if sampled.excessive_wakeups
+                          else "⚠️ **Result**: Suspend failures during the sampling window\n")
+                for issue in sampled.issues:
+                    md.append(f"- {issue}\n")
+                md.append("\n")
+            if sampled.sources:
+                md.append("| Wakeup Source | Wakeups | Wakeups/hour | Active (ms) |\n")
+                md.append("|---------------|---------|--------------|-------------|\n")
+                for source in sampled.sources[:15]:
+                    md.append(
+                        f"| `{source.name}` | {source.wakeups} | {source.wakeups_per_hour:.1f} | {source.active_ms} |\n"
+                    )
+            md.append("\n---\n\n")
+        return md
+
+    def _wakelocks_section(self, artifacts: ArtifactMap, reasons: List[str],
+                           detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Wakelocks joined across every source."""
+        md: List[str] = []
+        wakelocks = detailed_analysis.wakelocks
+        if wakelocks.performed:
+            md.append("## Wakelock Correlation\n")
+            md.append(f"**Sources**: {', '.join(wakelocks.sources)}  \n")
+            md.append(f"**Wakelocks**: {wakelocks.wakelock_count} "
+                      f"({wakelocks.multi_source_count} found in more than one source)\n\n")
+            if wakelocks.long_held:
+                md.append("❌ **Result**: Long-held active wakelocks\n")
+                for issue in wakelocks.issues:
+                    md.append(f"- {issue}\n")
+                md.append("\n")
+            else:
+                md.append("✅ **Result**: No long-held active wakelock\n\n")
+            if wakelocks.records:
+                md.append("| Wakelock | Holder | Active | Current Hold (ms) | Total (ms) | Kernel Wakeups | App Events | Sources |\n")
+                md.append("|----------|--------|--------|-------------------|------------|----------------|------------|---------|\n")
+                for record in wakelocks.records[:20]:
+                    holder = describe_holder(record) or "-"
+                    md.append(
+                        f"| `{record.name}` | {holder} | {'yes' if record.active else 'no'} | {record.hold_ms} | {record.total_ms} | "
+                        f"{record.kernel_wakeups} | {record.app_events} | {', '.join(record.sources)} |\n"
+                    )
+            md.append("\n---\n\n")
+        return md
+
+    def _battery_section(self, artifacts: ArtifactMap, reasons: List[str],
+                         detailed_analysis: WakeupAnalysis) -> List[str]:
+        """Battery cost since the last charge."""
+        md: List[str] = []
+        battery = detailed_analysis.battery
+        if battery.performed:
+            md.append("## Battery Cost\n")
+            md.append("**File**: `dumpsys batterystats --checkin` → `batterystats.txt`\n\n")
+            if battery.computed_mah:
+                md.append(f"**Estimated drain since the last charge**: {battery.computed_mah:.0f} mAh "
+                          f"(capacity {battery.capacity_mah:.0f} mAh)\n\n")
+            if battery.issues:
+                md.append("⚠️ **Flagged offenders by battery cost**:\n")
+                for issue in battery.issues:
+                    md.append(f"- {issue}\n")
+                md.append("\n")
+            if battery.offenders:
+                md.append("| App | Drain (mAh) | Wakelock time (ms) | Wakelocks | Wakeup alarms | Findings |\n")
+                md.append("|-----|-------------|--------------------|-----------|---------------|----------|\n")
+                for entry in battery.offenders:
+                    md.append(
+                        f"| `{entry.package or 'uid ' + entry.uid}` | {entry.power_mah:.1f} | {entry.wakelock_ms} | "
+                        f"{entry.wakelock_count} | {entry.alarm_wakeups} | {len(entry.findings)} |\n"
+                    )
+                md.append("\n")
+                md.append(bar_chart("Drain since the last charge (red: flagged by a wakeup finding)",
+                                    [(e.package or "uid " + e.uid, e.power_mah) for e in battery.offenders],
+                                    unit=" mAh", marked=[i for i, e in enumerate(battery.offenders) if e.findings]))
+            if battery.wakelocks:
+                md.append("| Wakelock | App | Time (ms) | Count |\n")
+                md.append("|----------|-----|-----------|-------|\n")
+                for wakelock in battery.wakelocks[:10]:
+                    md.append(f"| `{wakelock.name}` | {wakelock.package or 'uid ' + wakelock.uid} | "
+                              f"{wakelock.time_ms} | {wakelock.count} |\n")
+                md.append("\n")
+            if battery.kernel_wakelocks:
+                md.append("| Kernel Wakelock | Time (ms) | Count |\n")
+                md.append("|-----------------|-----------|-------|\n")
+                for wakelock in battery.kernel_wakelocks[:10]:
+                    md.append(f"| `{wakelock.name}` | {wakelock.time_ms} | {wakelock.count} |\n")
+                md.append("\n")
+            if battery.wakeup_reasons:
+                md.append("| Wakeup Reason | Time (ms) | Count |\n")
+                md.append("|---------------|-----------|-------|\n")
+                for reason in battery.wakeup_reasons[:10]:
+                    md.append(f"| `{reason.name}` | {reason.time_ms} | {reason.count} |\n")
+                md.append("\n")
+            md.append("---\n\n")
+        return md
+
     def build(
         self,
         case_dir: str,
@@ -24,7 +659,8 @@ class MarkdownBuilder:
         reasons: List[str],
         ai_md: Optional[str],
         artifacts: ArtifactMap,
-        detailed_analysis: Optional[dict] = None,
+        detailed_analysis: Optional[SuspendAnalysis] = None,
+        sections: Optional[List[str]] = None,
     ) -> str:
         """
         Build a Markdown report based on analysis results following strict 3-step process.
@@ -36,6 +672,7 @@ class MarkdownBuilder:
             ai_md: AI-generated analysis text (if available)
             artifacts: Dictionary mapping filenames to their paths
             detailed_analysis: Detailed step-by-step analysis results
+            sections: Report sections to render, in order (all of ``SUSPEND_SECTIONS`` by default)
             
         Returns:
             str: Path to the generated Markdown file
@@ -53,191 +690,24 @@ class MarkdownBuilder:
         else:
             md.append("## 🟢 CONCLUSION: Suspend Working Normally\n\n")
         
-        if detailed_analysis and detailed_analysis.get("conclusion"):
-            md.append(f"**Root Cause**: {detailed_analysis['conclusion']}\n\n")
+        if detailed_analysis is not None and detailed_analysis.conclusion:
+            md.append(f"**Root Cause**: {detailed_analysis.conclusion}\n\n")
         
         md.append("---\n\n")
         
-        # Determine which files are available based on artifacts and detailed_analysis
-        has_suspend_stats = "suspend_stats.txt" in artifacts
-        has_dumpsys = "dumpsys_suspend.txt" in artifacts  
-        has_dmesg = "dmesg.txt" in artifacts
+        md.extend(self._render_sections(self.SUSPEND_SECTIONS, sections, artifacts, reasons, detailed_analysis))
         
-        # Also check if the analysis was actually performed (file had content)
-        if detailed_analysis:
-            step1_performed = (detailed_analysis.get("step1_suspend_stats", {}).get("message", "") != "suspend_stats file not available")
-            step2_performed = not any("dumpsys_suspend.txt not available" in r for r in reasons)
-            step3_performed = not any("dmesg.txt not available" in r for r in reasons)
-        else:
-            step1_performed = has_suspend_stats
-            step2_performed = has_dumpsys
-            step3_performed = has_dmesg
-        
-        # Step 1: Suspend Stats Analysis (only if file is available)
-        if has_suspend_stats and step1_performed:
-            md.append("## Step 1️⃣: Suspend Statistics Check\n")
-            md.append("**Purpose**: Check if suspend succeeded or failed  \n")
-            md.append("**File**: `/d/suspend_stats` → `suspend_stats.txt`\n\n")
-            
-            if detailed_analysis and "step1_suspend_stats" in detailed_analysis:
-                step1 = detailed_analysis["step1_suspend_stats"]
-                if step1.get("success"):
-                    md.append("✅ **Result**: Suspend is working normally\n")
-                    md.append(f"- {step1.get('message', 'No details available')}\n")
-                    md.append("- **Analysis stops here** - No further investigation needed\n\n")
-                else:
-                    md.append("❌ **Result**: Suspend has failures\n")
-                    md.append(f"- {step1.get('message', 'No details available')}\n")
-                    md.append("- **Continue to Step 2** - Check for wakelocks\n\n")
-            else:
-                step1_reasons = [r for r in reasons if "Step 1" in r]
-                if step1_reasons:
-                    md.append("❌ **Result**: Suspend has failures\n")
-                    for reason in step1_reasons:
-                        md.append(f"- {reason}\n")
-                else:
-                    md.append("⚠️ **Result**: Unable to determine suspend status\n")
-            
-            # 原始 Suspend Stats 日志（仅在 suspend 失败时展示） 
-            if ( (detailed_analysis and "step1_suspend_stats" in detailed_analysis and not detailed_analysis["step1_suspend_stats"].get("success")) 
-                     or (step1_reasons) ):
-                try:
-                    raw = Path(artifacts["suspend_stats.txt"]).read_text(encoding="utf-8", errors="ignore")
-                    lines = raw.splitlines()
-                    # Filter lines containing key terms
-                    keywords = ["fail", "error", "suspend", "warning", "critical"]
-                    filtered = [line for line in lines if any(k in line.lower() for k in keywords)]
-                    # Use filtered lines if any, else fallback to first 20 lines
-                    selected = filtered[:20] if filtered else lines[:20]
-                    truncated = "\n".join(selected)
-                    if len(selected) < len(lines):
-                        truncated += "\n... (truncated)"
-                    md.append("### 原始 Suspend Stats (关键片段)\n")
-                    md.append("```text\n")
-                    md.append(truncated)
-                    md.append("\n```\n\n")
-                except Exception:
-                    pass
-            md.append("---\n\n")
-        
-        # Step 2: Wakelock Analysis (only if file is available)
-        if has_dumpsys and step2_performed:
-            md.append("## Step 2️⃣: Wakelock Analysis\n")
-            md.append("**Purpose**: Check for active wakelocks preventing suspend  \n")
-            md.append("**File**: `dumpsys suspend_control_internal` → `dumpsys_suspend.txt`\n\n")
-            
-            if detailed_analysis and "step2_wakelocks" in detailed_analysis:
-                step2 = detailed_analysis["step2_wakelocks"]
-                if step2.get("has_active"):
-                    wakelocks = step2.get("wakelocks", [])
-                    md.append("❌ **Result**: Active wakelocks found (ROOT CAUSE)\n")
-                    md.append("**Active Wakelocks**:\n")
-                    for wakelock in wakelocks:
-                        md.append(f"- `{wakelock}`\n")
-                    md.append("\n**Analysis stops here** - Root cause identified\n\n")
-                else:
-                    md.append("✅ **Result**: No active wakelocks found\n")
-                    md.append("- All wakelocks are in 'Inactive' state\n")
-                    md.append("- **Continue to Step 3** - Check kernel logs\n\n")
-            else:
-                step2_reasons = [r for r in reasons if "Step 2" in r and "not available" not in r]
-                if any("Active wakelocks found" in r for r in step2_reasons):
-                    md.append("❌ **Result**: Active wakelocks found (ROOT CAUSE)\n")
-                    for reason in step2_reasons:
-                        if "Active wakelocks found" in reason:
-                            md.append(f"- {reason}\n")
-                elif step2_reasons:
-                    md.append("✅ **Result**: No active wakelocks found\n")
-                    for reason in step2_reasons:
-                        md.append(f"- {reason}\n")
-                else:
-                    md.append("⚠️ **Result**: Wakelock analysis not performed\n")
-            
-            # 原始 Wakelock Dump 日志（仅在检测到活跃 wakelock 时展示）
-            if detailed_analysis and "step2_wakelocks" in detailed_analysis and detailed_analysis["step2_wakelocks"].get("has_active"):
-                try:
-                    raw = Path(artifacts["dumpsys_suspend.txt"]).read_text(encoding="utf-8", errors="ignore")
-                    lines = raw.splitlines()
-                    # Filter lines containing key terms relevant to wakelocks
-                    keywords = ["wakelock", "active", "error", "fail", "warning", "blocked"]
-                    filtered = [line for line in lines if any(k in line.lower() for k in keywords)]
-                    selected = filtered[:20] if filtered else lines[:20]
-                    truncated = "\n".join(selected)
-                    if len(selected) < len(lines):
-                        truncated += "\n... (truncated)"
-                    md.append("### 原始 Wakelock Dump (关键片段)\n")
-                    md.append("```text\n")
-                    md.append(truncated)
-                    md.append("\n```\n\n")
-                except Exception:
-                    pass
-            md.append("---\n\n")
-        
-        # Step 3: Kernel Log Analysis (only if file is available)
-        if has_dmesg and step3_performed:
-            md.append("## Step 3️⃣: Kernel Log Analysis\n")
-            md.append("**Purpose**: Check for suspend entry and failure details  \n")
-            md.append("**File**: `dmesg -T` → `dmesg.txt`\n\n")
-            
-            if detailed_analysis and "step3_dmesg" in detailed_analysis:
-                step3 = detailed_analysis["step3_dmesg"]
-                if not step3.get("has_suspend_entry"):
-                    md.append("❌ **Result**: No suspend entry found\n")
-                    md.append("- System did not attempt to enter suspend\n")
-                    md.append("- Check if suspend is triggered properly\n\n")
-                elif step3.get("has_suspend_failure"):
-                    md.append("❌ **Result**: Suspend entry failed in kernel\n")
-                    md.append("**Failure Messages**:\n")
-                    for msg in step3.get("failure_messages", [])[:3]:
-                        md.append(f"- `{msg}`\n")
-                    md.append("\n")
-                else:
-                    md.append("✅ **Result**: Suspend entry found, no clear failures\n")
-                    md.append("- Suspend process appears normal in kernel logs\n")
-                    md.append("- Root cause may be elsewhere\n\n")
-            else:
-                step3_reasons = [r for r in reasons if "Step 3" in r and "not available" not in r]
-                if step3_reasons:
-                    if any("No suspend entry found" in r for r in step3_reasons):
-                        md.append("❌ **Result**: No suspend entry found\n")
-                    elif any("Suspend entry failed" in r for r in step3_reasons):
-                        md.append("❌ **Result**: Suspend entry failed in kernel\n")
-                    else:
-                        md.append("✅ **Result**: Kernel log analyzed\n")
-                    for reason in step3_reasons:
-                        md.append(f"- {reason}\n")
-                else:
-                    md.append("⚠️ **Result**: Kernel log analysis not performed\n")
-            
-            # 原始 dmesg 日志（仅在 suspend 入口缺失或失败时展示）
-            if detailed_analysis and "step3_dmesg" in detailed_analysis:
-                step3 = detailed_analysis["step3_dmesg"]
-                if not step3.get("has_suspend_entry") or step3.get("has_suspend_failure"):
-                    try:
-                        raw = Path(artifacts["dmesg.txt"]).read_text(encoding="utf-8", errors="ignore")
-                        lines = raw.splitlines()
-                        # Filter lines containing key terms relevant to suspend/kernel issues
-                        keywords = ["suspend", "error", "fail", "warning", "critical", "blocked"]
-                        filtered = [line for line in lines if any(k in line.lower() for k in keywords)]
-                        selected = filtered[:20] if filtered else lines[:20]
-                        truncated = "\n".join(selected)
-                        if len(selected) < len(lines):
-                            truncated += "\n... (truncated)"
-                        md.append("### 原始 dmesg 日志 (关键片段)\n")
-                        md.append("```text\n")
-                        md.append(truncated)
-                        md.append("\n```\n\n")
-                    except Exception:
-                        pass
-            md.append("---\n\n")
         # 总结
         md.append("## 📋 总结\n")
-        if detailed_analysis and detailed_analysis.get("conclusion"):
-            md.append(f"**结论**: {detailed_analysis['conclusion']}\n\n")
+        if detailed_analysis is not None and detailed_analysis.conclusion:
+            md.append(f"**结论**: {detailed_analysis.conclusion}\n\n")
         else:
             md.append("**结论**: 未检测到明确的根因，请参考上述分析。\n\n")
         md.append("---\n\n")
 
+        # Fleet baseline outliers (only when the case was scored)
+        md.extend(self._baseline_section(detailed_analysis))
+
         # Add AI comprehensive analysis section if available
         if ai_md:
             md.append("## 🤖 AI Comprehensive Analysis\n\n")
@@ -245,9 +715,7 @@ class MarkdownBuilder:
             md.append("\n\n---\n\n")
 
         # Add evidence files section
-        md.append("## 📁 Evidence Files\n\n")
-        for k, v in artifacts.items():
-            md.append(f"- **{k}**: `{v}`\n")
+        md.extend(self._evidence_section(case_dir, artifacts))
 
         # Add verification checklist
         md.append("\n---\n\n")
@@ -272,3 +740,67 @@ class MarkdownBuilder:
         md_path = Path(case_dir) / "suspend_diagnosis_report.md"
         Path(md_path).write_text("".join(md), encoding="utf-8")
         return str(md_path)
+
+    def build_wakeup_report(
+        self,
+        case_dir: str,
+        failed: bool,
+        reasons: List[str],
+        ai_md: Optional[str],
+        artifacts: ArtifactMap,
+        detailed_analysis: Optional[WakeupAnalysis] = None,
+        sections: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Build a Markdown report for the wakeup diagnosis.
+        
+        Args:
+            case_dir: Directory containing collected evidence
+            failed: Whether wakeup issues were detected
+            reasons: List of detected wakeup issues
+            ai_md: AI-generated analysis text (if available)
+            artifacts: Dictionary mapping filenames to their paths
+            detailed_analysis: Per-source analysis results from ``WakeupAnalyzer``
+            sections: Report sections to render, in order (all of ``WAKEUP_SECTIONS`` by default)
+            
+        Returns:
+            str: Path to the generated Markdown file
+        """
+        detailed_analysis = detailed_analysis if detailed_analysis is not None else WakeupAnalysis()
+        md = [
+            "# Wakeup Diagnosis Report\n\n",
+            f"**Collection Directory**: `{case_dir}`  \n",
+            f"**Time**: {datetime.datetime.now().isoformat()}\n\n",
+            "---\n\n",
+        ]
+        
+        # Overall conclusion
+        if failed:
+            md.append("## 🔴 CONCLUSION: Wakeup Issues Detected\n\n")
+            for reason in reasons:
+                md.append(f"- {reason}\n")
+            md.append("\n")
+        else:
+            md.append("## 🟢 CONCLUSION: Wakeup Behavior Normal\n\n")
+        if detailed_analysis.conclusion:
+            md.append(f"**Summary**: {detailed_analysis.conclusion}\n\n")
+        md.append("---\n\n")
+        
+        md.extend(self._render_sections(self.WAKEUP_SECTIONS, sections, artifacts, reasons, detailed_analysis))
+
+        # Fleet baseline outliers (only when the case was scored)
+        md.extend(self._baseline_section(detailed_analysis))
+
+        # Add AI comprehensive analysis section if available
+        if ai_md:
+            md.append("## 🤖 AI Comprehensive Analysis\n\n")
+            md.append(ai_md)
+            md.append("\n\n---\n\n")
+
+        # Add evidence files section
+        md.extend(self._evidence_section(case_dir, artifacts))
+
+        # Write the report to a file
+        md_path = Path(case_dir) / "wakeup_diagnosis_report.md"
+        Path(md_path).write_text("".join(md), encoding="utf-8")
+        return str(md_path)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Paged Raw-log Export for Android Power Diagnosis Reports
+
+Reports only quote a few lines of each log. This module ships the complete
+logs next to the reports, in a form a browser can open page by page straight
+from disk (``file://``, where ``fetch`` is not allowed):
+
+    raw_logs/
+        viewer.html              # pager, line jump and search
+        dmesg.txt/index.js       # line-offset index of the pages
+        dmesg.txt/page_00000.js  # gzip + base64 page of PAGE_LINES lines
+        ...
+
+Pages are JavaScript files calling ``rawLogPage(name, n, data)``, loaded with
+``<script>`` tags only when shown or searched, and decompressed in the browser
+with ``DecompressionStream``. The export streams each log once; the index
+records the source size and modification time so later reports of the same
+case reuse the pages.
+"""
+import base64
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote
+
+from common.artifacts import open_artifact, source_file
+from common.trace import span
+
+# Directory of the exported logs, relative to the case directory
+RAW_LOG_DIR = "raw_logs"
+VIEWER_NAME = "viewer.html"
+
+# Lines per page, and the uncompressed size at which a page is cut earlier
+PAGE_LINES = 2000
+_PAGE_BYTES = 1 << 20
+
+_INDEX_PREFIX = "rawLogIndex("
+_INDEX_SUFFIX = ");\n"
+
+
+def viewer_link(name: str, line: Optional[int] = None) -> str:
+    """Return the link (relative to the case directory) showing ``name``, at ``line`` if given."""
+    target = quote(name) + (f":{line}" if line is not None else "")
+    return f"{RAW_LOG_DIR}/{VIEWER_NAME}#{target}"
+
+
+def _source_key(path: str) -> list:
+    """Identify the content of an artifact by its source file size and modification time."""
+    stat = os.stat(source_file(path))
+    return [path, stat.st_size, int(stat.st_mtime)]
+
+
+def _load_index(index_path: Path) -> Optional[dict]:
+    """Read a saved index back (None if missing or unreadable)."""
+    try:
+        text = index_path.read_text(encoding="utf-8")
+        return json.loads(text[len(_INDEX_PREFIX):-len(_INDEX_SUFFIX)])
+    except (OSError, ValueError):
+        return None
+
+
+def _write_page(log_dir: Path, name: str, number: int, lines: list) -> dict:
+    """Compress one page into its script file and return its index entry."""
+    data = "\n".join(lines).encode("utf-8")
+    encoded = base64.b64encode(gzip.compress(data, 6)).decode("ascii")
+    file_name = f"page_{number:05d}.js"
+    (log_dir / file_name).write_text(f"rawLogPage({json.dumps(name)}, {number}, \"{encoded}\");\n",
+                                     encoding="utf-8")
+    return {"file": file_name, "count": len(lines), "bytes": len(data)}
+
+
+def export_raw_log(path: str, name: str, out_dir: Path) -> dict:
+    """
+    Export one log as compressed pages with a line-offset index.
+
+    Args:
+        path: Artifact path (plain, compressed or bugreport section)
+        name: Artifact name (e.g. ``dmesg.txt``)
+        out_dir: The ``RAW_LOG_DIR`` of the case
+
+    Returns:
+        dict: The index: ``lines`` and, per page, its first line, byte offset
+        in the log, line count, size and file
+    """
+    log_dir = out_dir / name
+    index_path = log_dir / "index.js"
+    key = _source_key(path)
+    index = _load_index(index_path)
+    if index is not None and index.get("source") == key:
+        return index
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    for stale in log_dir.glob("page_*.js"):
+        stale.unlink()
+    pages = []
+    lines: list = []
+    size = 0
+    first, offset = 1, 0
+    with span(f"export:raw:{name}", cat="report") as sp, open_artifact(path) as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            lines.append(line)
+            size += len(line) + 1
+            if len(lines) >= PAGE_LINES or size >= _PAGE_BYTES:
+                page = _write_page(log_dir, name, len(pages), lines)
+                pages.append(dict(page, first=first, offset=offset))
+                first, offset = first + len(lines), offset + page["bytes"] + 1
+                lines, size = [], 0
+        if lines or not pages:
+            page = _write_page(log_dir, name, len(pages), lines)
+            pages.append(dict(page, first=first, offset=offset))
+        sp.set(lines=first - 1 + len(lines), pages=len(pages))
+    index = {"name": name, "source": key, "lines": first - 1 + len(lines), "pages": pages}
+    # Written last: a partial export is never taken for a complete one
+    index_path.write_text(_INDEX_PREFIX + json.dumps(index) + _INDEX_SUFFIX, encoding="utf-8")
+    return index
+
+
+def export_raw_logs(case_dir: str, artifacts: Dict[str, str]) -> Dict[str, int]:
+    """
+    Export every artifact of a report and install the viewer.
+
+    Args:
+        case_dir: Case directory holding the reports
+        artifacts: Artifacts of the report, by name
+
+    Returns:
+        Dict[str, int]: Line count of each exported log (unreadable ones are skipped)
+    """
+    out_dir = Path(case_dir) / RAW_LOG_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / VIEWER_NAME).write_text(_VIEWER_HTML, encoding="utf-8")
+    counts = {}
+    for name, path in artifacts.items():
+        try:
+            counts[name] = export_raw_log(path, name, out_dir)["lines"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Raw log export skipped for {name}: {e}")
+    return counts
+
+
+def locate_lines(path: str, texts: Iterable[str]) -> Dict[str, int]:
+    """
+    Find the line numbers of flagged lines.
+
+    Args:
+        path: Artifact path
+        texts: Flagged lines (or fragments of them)
+
+    Returns:
+        Dict[str, int]: 1-based number of the first line containing each text
+        that was found; the scan stops once all are found
+    """
+    wanted = {t.strip() for t in texts if t.strip()}
+    found: Dict[str, int] = {}
+    if not wanted:
+        return found
+    with open_artifact(path) as f:
+        for number, line in enumerate(f, 1):
+            for text in [t for t in wanted if t in line]:
+                found[text] = number
+                wanted.discard(text)
+            if not wanted:
+                break
+    return found
+
+
+_VIEWER_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Raw log viewer</title>
+<style>
+  body { margin: 0; font-family: -apple-system, 'Segoe UI', Roboto, Arial, sans-serif; background: #f5f7fa; }
+  #bar { position: sticky; top: 0; background: #2d3748; color: #e2e8f0; padding: 0.5rem 1rem;
+         display: flex; gap: 0.5rem; align-items: center; flex-wrap: wrap; }
+  #bar input { padding: 0.2rem 0.4rem; }
+  #status { color: #fbd38d; }
+  #log { font-family: 'Courier New', Courier, monospace; font-size: 0.85em; padding: 0.5rem 0; }
+  .line { white-space: pre-wrap; word-break: break-all; padding: 0 1rem; }
+  .line:hover { background: #edf2f7; }
+  .no { display: inline-block; min-width: 6em; color: #a0aec0; user-select: none; }
+  .target { background: #fefcbf; }
+  .match { background: #c6f6d5; }
+</style>
+</head>
+<body>
+<div id="bar">
+  <strong id="title">Raw log viewer</strong>
+  <button id="prev">&#9664;</button><span id="pos"></span><button id="next">&#9654;</button>
+  <label>Line <input id="goto" size="9"></label>
+  <input id="query" size="30" placeholder="Search (Enter: next match)">
+  <span id="status"></span>
+</div>
+<div id="log"></div>
+<script>
+const logs = {};
+let log = null, page = 0, lastMatch = 0;
+
+function status(text) { document.getElementById("status").textContent = text || ""; }
+
+function load(src) {
+  const script = document.createElement("script");
+  script.src = src;
+  script.onerror = () => status("Cannot load " + src);
+  document.head.appendChild(script);
+}
+
+function rawLogIndex(index) {
+  const entry = logs[index.name];
+  entry.index = index;
+  entry.ready(entry);
+}
+
+async function rawLogPage(name, number, data) {
+  const bytes = Uint8Array.from(atob(data), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  const entry = logs[name];
+  entry.pages[number] = (await new Response(stream).text()).split("\\n");
+  (entry.waiting[number] || []).forEach(resolve => resolve(entry.pages[number]));
+  delete entry.waiting[number];
+}
+
+function openLog(name) {
+  if (logs[name] && logs[name].index) return Promise.resolve(logs[name]);
+  return new Promise(resolve => {
+    logs[name] = { pages: {}, waiting: {}, ready: resolve };
+    load(encodeURIComponent(name) + "/index.js");
+  });
+}
+
+function getPage(entry, number) {
+  if (entry.pages[number]) return Promise.resolve(entry.pages[number]);
+  return new Promise(resolve => {
+    const first = !entry.waiting[number];
+    (entry.waiting[number] = entry.waiting[number] || []).push(resolve);
+    if (first) load(encodeURIComponent(entry.index.name) + "/" + entry.index.pages[number].file);
+  });
+}
+
+function pageOf(line) {
+  const pages = log.index.pages;
+  let lo = 0, hi = pages.length - 1;
+  while (lo < hi) {
+    const mid = (lo + hi + 1) >> 1;
+    if (pages[mid].first <= line) lo = mid; else hi = mid - 1;
+  }
+  return lo;
+}
+
+async function show(number, target, query) {
+  page = Math.max(0, Math.min(number, log.index.pages.length - 1));
+  const info = log.index.pages[page];
+  status("Loading page " + (page + 1) + "...");
+  const lines = await getPage(log, page);
+  const container = document.getElementById("log");
+  const fragment = document.createDocumentFragment();
+  lines.forEach((text, i) => {
+    const no = info.first + i;
+    const div = document.createElement("div");
+    div.className = "line" + (no === target ? (query ? " match" : " target") : "");
+    div.id = "L" + no;
+    const span = document.createElement("span");
+    span.className = "no";
+    span.textContent = no;
+    div.appendChild(span);
+    div.appendChild(document.createTextNode(text));
+    fragment.appendChild(div);
+  });
+  container.replaceChildren(fragment);
+  document.getElementById("pos").textContent =
+    " Page " + (page + 1) + "/" + log.index.pages.length + " (lines " + info.first + "-" +
+    (info.first + info.count - 1) + " of " + log.index.lines + ") ";
+  status("");
+  if (target) {
+    const row = document.getElementById("L" + target);
+    if (row) row.scrollIntoView({ block: "center" });
+  } else {
+    window.scrollTo(0, 0);
+  }
+}
+
+async function search(query) {
+  const needle = query.toLowerCase();
+  const pages = log.index.pages;
+  const start = lastMatch ? lastMatch + 1 : pages[page].first;
+  for (let n = pageOf(start); n < pages.length; n++) {
+    status("Searching page " + (n + 1) + "/" + pages.length + "...");
+    const lines = await getPage(log, n);
+    for (let i = Math.max(0, start - pages[n].first); i < lines.length; i++) {
+      if (lines[i].toLowerCase().includes(needle)) {
+        lastMatch = pages[n].first + i;
+        await show(n, lastMatch, true);
+        return;
+      }
+    }
+  }
+  lastMatch = 0;
+  status("No further match for \\"" + query + "\\"");
+}
+
+async function route() {
+  const hash = decodeURIComponent(location.hash.slice(1));
+  const sep = hash.lastIndexOf(":");
+  const name = sep > 0 && /^\\d+$/.test(hash.slice(sep + 1)) ? hash.slice(0, sep) : hash;
+  const line = name !== hash ? parseInt(hash.slice(sep + 1), 10) : 0;
+  if (!name) { status("Open this viewer from a report link (viewer.html#dmesg.txt)"); return; }
+  log = await openLog(name);
+  document.getElementById("title").textContent = name;
+  document.title = name + " - Raw log viewer";
+  lastMatch = 0;
+  await show(line ? pageOf(line) : 0, line, false);
+}
+
+document.getElementById("prev").onclick = () => show(page - 1);
+document.getElementById("next").onclick = () => show(page + 1);
+document.getElementById("goto").onkeydown = e => {
+  const line = parseInt(e.target.value, 10);
+  if (e.key === "Enter" && line > 0) show(pageOf(line), line, false);
+};
+document.getElementById("query").onkeydown = e => {
+  if (e.key === "Enter" && e.target.value) search(e.target.value);
+};
+document.getElementById("query").oninput = () => { lastMatch = 0; };
+window.onhashchange = route;
+route();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+On-device Sampler for Android Power Diagnosis
+
+Polling kernel statistics from the host costs one ``adb shell`` round trip per
+sample and keeps USB busy, which perturbs the suspend behaviour being measured.
+This module instead pushes a small shell script to the device that appends
+timestamped snapshots of ``SAMPLED_FILES`` to a local file for a given
+duration. The host waits without talking to the device, then pulls the one
+file and decodes it into per-sample tables.
+
+The script holds no wakelock: while the device is suspended no sample is taken,
+and each sample records ``/proc/uptime`` (which includes time spent suspended),
+so rates are computed over the real elapsed time. The device wall clock
+(``date +%s.%N``) is read right after the uptime, so the pair places the
+samples on the wall clock of the device logs.
+
+Sample file format::
+
+    ### sample <n> <uptime> <epoch seconds>
+    ### file <name>
+    <content of the file>
+    ...
+    ### end <sample count>
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Kernel files captured in every sample, by name
+SAMPLED_FILES = {
+    "suspend_stats": "/d/suspend_stats",
+    "wakeup_sources": "/sys/kernel/debug/wakeup_sources",
+    "interrupts": "/proc/interrupts",
+}
+
+# Evidence files derived from the samples (see ``derived_artifacts``)
+SAMPLE_ARTIFACTS = ["suspend_stats.txt", "suspend_stats_before.txt", "wakeup_sources.txt",
+                    "interrupts_before.txt", "interrupts_after.txt"]
+
+# Device-side locations
+REMOTE_SCRIPT = "/data/local/tmp/power_diag_sampler.sh"
+REMOTE_OUTPUT = "/data/local/tmp/power_diag_samples.txt"
+
+_SAMPLE = re.compile(r"^### sample (\d+) ([\d.]+)(?: (\S+))?$")
+_FILE = re.compile(r"^### file (\S+)$")
+_STAT = re.compile(r"^\s*([a-z_]+):\s*(-?\d+)\s*$")
+
+
+def sampler_script() -> str:
+    """
+    Return the device-side sampler (``sh sampler DURATION PERIOD OUTPUT``).
+
+    DURATION must be whole seconds (it goes through shell arithmetic); PERIOD
+    is passed to ``sleep`` and may be fractional.
+
+    Samples are written to ``OUTPUT.tmp`` and renamed to ``OUTPUT`` when the
+    run is complete, so the host can tell a finished run from a running one.
+    """
+    files = "\n".join(
+        f'    echo "### file {name}"; cat {path} 2>/dev/null'
+        for name, path in SAMPLED_FILES.items()
+    )
+    return f"""#!/system/bin/sh
+# Power diagnosis sampler: DURATION PERIOD OUTPUT
+duration=$1
+period=$2
+out=$3
+up_secs() {{ read up idle < /proc/uptime; echo $up; }}
+now=$(up_secs)
+end=$(( ${{now%.*}} + duration ))
+n=0
+rm -f "$out"
+: > "$out.tmp"
+while :; do
+  {{
+    echo "### sample $n $(up_secs) $(date +%s.%N)"
+{files}
+  }} >> "$out.tmp"
+  n=$((n + 1))
+  now=$(up_secs)
+  [ ${{now%.*}} -ge $end ] && break
+  sleep $period
+done
+echo "### end $n" >> "$out.tmp"
+mv "$out.tmp" "$out"
+"""
+
+
+class Sample:
+    """One snapshot of ``SAMPLED_FILES``."""
+
+    __slots__ = ("index", "uptime", "wall", "files")
+
+    def __init__(self, index: int, uptime: float, wall: Optional[float] = None):
+        self.index = index
+        self.uptime = uptime
+        # Device epoch seconds at ``uptime`` (None for samples taken before it
+        # was recorded, or when ``date`` cannot print it)
+        self.wall = wall
+        self.files: Dict[str, str] = {}
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    """Parse the ``date +%s.%N`` field of a sample line (shells without ``%N`` print it verbatim)."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        head = value.split(".", 1)[0]
+        return float(head) if head.isdigit() else None
+
+
+def decode_samples(text: str) -> List[Sample]:
+    """
+    Decode a sample file pulled from the device.
+
+    Args:
+        text: Sample file content
+
+    Returns:
+        List[Sample]: Samples in the order they were taken (an incomplete last
+        sample is kept as far as it was written)
+    """
+    samples: List[Sample] = []
+    sample: Optional[Sample] = None
+    name: Optional[str] = None
+    body: List[str] = []
+
+    def flush() -> None:
+        if sample is not None and name is not None:
+            sample.files[name] = "\n".join(body) + "\n" if body else ""
+
+    for line in text.splitlines():
+        if line.startswith("### "):
+            match = _SAMPLE.match(line)
+            if match:
+                flush()
+                sample = Sample(int(match.group(1)), float(match.group(2)), _epoch(match.group(3)))
+                name, body = None, []
+                samples.append(sample)
+                continue
+            match = _FILE.match(line)
+            if match and sample is not None:
+                flush()
+                name, body = match.group(1), []
+                continue
+            if line.startswith("### end"):
+                flush()
+                name = None
+                continue
+        if name is not None:
+            body.append(line)
+    flush()
+    return samples
+
+
+def suspend_stats_table(samples: List[Sample]) -> List[Tuple[float, Dict[str, int]]]:
+    """
+    Tabulate the numeric ``key: value`` counters of ``/d/suspend_stats``.
+
+    Returns:
+        List[Tuple[float, Dict[str, int]]]: ``(uptime, counters)`` per sample
+    """
+    table = []
+    for sample in samples:
+        counters = {}
+        for line in sample.files.get("suspend_stats", "").splitlines():
+            match = _STAT.match(line)
+            if match:
+                counters.setdefault(match.group(1), int(match.group(2)))
+        table.append((sample.uptime, counters))
+    return table
+
+
+def wakeup_sources_table(samples: List[Sample]) -> List[Tuple[float, Dict[str, Tuple[int, int]]]]:
+    """
+    Tabulate ``wakeup_sources`` per sample.
+
+    Returns:
+        List[Tuple[float, Dict[str, Tuple[int, int]]]]: ``(uptime, {name:
+        (wakeup_count, total_time_ms)})`` per sample
+    """
+    table = []
+    for sample in samples:
+        sources = {}
+        for line in sample.files.get("wakeup_sources", "").splitlines()[1:]:
+            parts = line.split()
+            # name active_count event_count wakeup_count expire_count active_since total_time ...
+            if len(parts) >= 7 and parts[3].isdigit():
+                total = int(parts[6]) if parts[6].isdigit() else 0
+                sources[parts[0]] = (int(parts[3]), total)
+        table.append((sample.uptime, sources))
+    return table
+
+
+def derived_artifacts(samples: List[Sample]) -> Dict[str, str]:
+    """
+    Build the usual evidence files from the samples so every analyzer can use them.
+
+    ``suspend_stats.txt`` and ``wakeup_sources.txt`` come from the last sample;
+    the first ``/d/suspend_stats`` becomes ``suspend_stats_before.txt`` and the
+    first and last ``/proc/interrupts`` become ``interrupts_before.txt`` and
+    ``interrupts_after.txt`` (prefixed with the sample uptime).
+
+    Returns:
+        Dict[str, str]: Content of each derived file, by artifact name
+    """
+    if not samples:
+        return {}
+    first, last = samples[0], samples[-1]
+    files = {}
+    if "suspend_stats" in last.files:
+        files["suspend_stats.txt"] = last.files["suspend_stats"]
+        if len(samples) > 1:
+            files["suspend_stats_before.txt"] = first.files.get("suspend_stats", "")
+    if "wakeup_sources" in last.files:
+        files["wakeup_sources.txt"] = last.files["wakeup_sources"]
+    if "interrupts" in last.files:
+        files["interrupts_before.txt"] = f"{first.uptime:.2f} 0.00\n" + first.files.get("interrupts", "")
+        files["interrupts_after.txt"] = f"{last.uptime:.2f} 0.00\n" + last.files["interrupts"]
+    return files
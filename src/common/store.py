@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Results Store for Android Power Diagnosis
+
+This module writes the structured output of the diagnosis modules into an
+indexed SQLite database so that fleet-wide questions ("which wakelock blocked
+suspend most often last month?") are answered by aggregate queries instead of
+re-parsing every case.
+"""
+import datetime
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from common.artifacts import source_file
+from common.timestamps import parse_collection_time
+from common.types import ArtifactMap, ResultBase
+from wakeup_diagnosis.wakelocks import wakelock_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    id           INTEGER PRIMARY KEY,
+    case_dir     TEXT NOT NULL UNIQUE,
+    collected_at TEXT,
+    indexed_at   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    case_id    INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    module     TEXT NOT NULL,
+    failed     INTEGER NOT NULL,
+    conclusion TEXT,
+    PRIMARY KEY (case_id, module)
+);
+CREATE TABLE IF NOT EXISTS wakelocks (
+    case_id      INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    source       TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    display_name TEXT
+);
+CREATE TABLE IF NOT EXISTS failure_messages (
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wakeup_sources (
+    case_id      INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    name         TEXT NOT NULL,
+    active_count INTEGER,
+    event_count  INTEGER,
+    wakeup_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_cases_collected ON cases(collected_at);
+CREATE INDEX IF NOT EXISTS idx_results_module ON results(module, failed);
+CREATE INDEX IF NOT EXISTS idx_wakelocks_name ON wakelocks(name, case_id);
+CREATE INDEX IF NOT EXISTS idx_wakelocks_case ON wakelocks(case_id);
+CREATE INDEX IF NOT EXISTS idx_failures_message ON failure_messages(message, case_id);
+CREATE INDEX IF NOT EXISTS idx_failures_case ON failure_messages(case_id);
+CREATE INDEX IF NOT EXISTS idx_sources_name ON wakeup_sources(name, case_id);
+CREATE INDEX IF NOT EXISTS idx_sources_case ON wakeup_sources(case_id);
+"""
+
+# Columns added after the first release: table → [(column, declaration)]
+MIGRATIONS = {
+    "wakelocks": [("display_name", "TEXT")],
+}
+
+# Leading "[...]" dmesg timestamp, stripped so identical failures aggregate
+_TIMESTAMP_PREFIX = re.compile(r"^\[[^\]]*\]\s*")
+
+
+def _collected_at(artifacts: ArtifactMap, case_info: Dict[str, str]) -> Optional[str]:
+    """
+    Collection time of a case: ``Collection Time`` from ``collection_info.txt``,
+    else the newest artifact modification time.
+    """
+    collected = parse_collection_time(case_info.get("Collection Time", ""))
+    if collected is not None:
+        return collected.isoformat(timespec="seconds")
+    files = {source_file(p) for p in artifacts.values()}
+    mtimes = [Path(p).stat().st_mtime for p in files if Path(p).is_file()]
+    if not mtimes:
+        return None
+    return datetime.datetime.fromtimestamp(max(mtimes)).isoformat(timespec="seconds")
+
+
+class ResultStore:
+    """
+    SQLite-backed index of analysis results across cases.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the results database.
+
+        Args:
+            db_path: Path of the SQLite file
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        # Serializes writers when cases are analyzed on several threads
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def _migrate(self) -> None:
+        """Add the ``MIGRATIONS`` columns missing from a database created by an older version."""
+        with self.conn:
+            for table, columns in MIGRATIONS.items():
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                for column, declaration in columns:
+                    if column not in existing:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    def _case_id(self, case_dir: str, artifacts: ArtifactMap, case_info: Dict[str, str]) -> int:
+        """Insert or refresh a case row and return its id."""
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            "INSERT INTO cases (case_dir, collected_at, indexed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(case_dir) DO UPDATE SET "
+            "collected_at = COALESCE(excluded.collected_at, cases.collected_at), "
+            "indexed_at = excluded.indexed_at",
+            (case_dir, _collected_at(artifacts, case_info), now),
+        )
+        row = self.conn.execute("SELECT id FROM cases WHERE case_dir = ?", (case_dir,)).fetchone()
+        return row[0]
+
+    def record(
+        self,
+        case_dir: str,
+        module: str,
+        failed: bool,
+        detailed_analysis: Union[ResultBase, Dict[str, Any]],
+        artifacts: Optional[ArtifactMap] = None,
+        case_info: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Store (or replace) one module's result for a case.
+
+        Args:
+            case_dir: Case directory the result belongs to
+            module: Diagnosis module name (``suspend`` or ``wakeup``)
+            failed: Verdict returned by the analyzer
+            detailed_analysis: Structured analyzer output, or its ``to_dict``
+                form (a result stored in a case archive)
+            artifacts: Artifacts of the case (collection time fallback)
+            case_info: ``collection_info.txt`` fields (``Collection Time``)
+        """
+        detailed = detailed_analysis.to_dict() if isinstance(detailed_analysis, ResultBase) else detailed_analysis
+        with self._lock, self.conn:
+            case_id = self._case_id(case_dir, artifacts or {}, case_info or {})
+            self.conn.execute(
+                "DELETE FROM wakelocks WHERE case_id = ? AND source = ?", (case_id, module)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (case_id, module, failed, conclusion) VALUES (?, ?, ?, ?)",
+                (case_id, module, int(bool(failed)), detailed.get("conclusion", "")),
+            )
+            if module == "suspend":
+                self._record_suspend(case_id, detailed)
+            elif module == "wakeup":
+                self._record_wakeup(case_id, detailed)
+
+    def _record_suspend(self, case_id: int, detailed: Dict[str, Any]) -> None:
+        self.conn.execute("DELETE FROM failure_messages WHERE case_id = ?", (case_id,))
+        wakelocks = detailed.get("step2_wakelocks", {}).get("wakelocks", [])
+        self.conn.executemany(
+            "INSERT INTO wakelocks (case_id, source, name, display_name) VALUES (?, 'suspend', ?, ?)",
+            [(case_id, wakelock_key(name), name) for name in wakelocks],
+        )
+        messages = detailed.get("step3_dmesg", {}).get("failure_messages", [])
+        self.conn.executemany(
+            "INSERT INTO failure_messages (case_id, message) VALUES (?, ?)",
+            [(case_id, _TIMESTAMP_PREFIX.sub("", msg)) for msg in messages],
+        )
+
+    def _record_wakeup(self, case_id: int, detailed: Dict[str, Any]) -> None:
+        self.conn.execute("DELETE FROM wakeup_sources WHERE case_id = ?", (case_id,))
+        sources = detailed.get("wakeup_sources", {}).get("sources", [])
+        self.conn.executemany(
+            "INSERT INTO wakeup_sources (case_id, name, active_count, event_count, wakeup_count) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (case_id, s["name"], s["active_count"], s["event_count"], s["wakeup_count"])
+                for s in sources
+            ],
+        )
+        # Only wakelocks held at collection time; released ones merely have history
+        records = [record for record in detailed.get("wakelocks", {}).get("records", []) if record["active"]]
+        self.conn.executemany(
+            "INSERT INTO wakelocks (case_id, source, name, display_name) VALUES (?, 'wakeup', ?, ?)",
+            [(case_id, wakelock_key(record["name"]), record["name"]) for record in records],
+        )
+
+    def _since_clause(self, since: Optional[str]) -> Tuple[str, list]:
+        if not since:
+            return "", []
+        return " AND c.collected_at >= ?", [since]
+
+    def top_wakelocks(self, limit: int = 10, since: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Wakelocks that blocked suspend in the most cases (grouped by ``wakelock_key``)."""
+        clause, params = self._since_clause(since)
+        return self.conn.execute(
+            "SELECT COALESCE(MIN(w.display_name), w.name), COUNT(DISTINCT w.case_id) AS cases FROM wakelocks w "
+            "JOIN cases c ON c.id = w.case_id WHERE w.source = 'suspend'" + clause +
+            " GROUP BY w.name ORDER BY cases DESC, w.name LIMIT ?",
+            params + [limit],
+        ).fetchall()
+
+    def top_failures(self, limit: int = 10, since: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Kernel suspend failure messages seen in the most cases."""
+        clause, params = self._since_clause(since)
+        return self.conn.execute(
+            "SELECT f.message, COUNT(DISTINCT f.case_id) AS cases FROM failure_messages f "
+            "JOIN cases c ON c.id = f.case_id WHERE 1 = 1" + clause +
+            " GROUP BY f.message ORDER BY cases DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+
+    def top_wakeup_sources(self, limit: int = 10, since: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """Wakeup sources ranked by total wakeup count (with number of cases)."""
+        clause, params = self._since_clause(since)
+        return self.conn.execute(
+            "SELECT s.name, SUM(s.wakeup_count) AS wakeups, COUNT(DISTINCT s.case_id) AS cases "
+            "FROM wakeup_sources s JOIN cases c ON c.id = s.case_id WHERE 1 = 1" + clause +
+            " GROUP BY s.name ORDER BY wakeups DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+
+    def summary(self, since: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """Per-module case counts: (module, cases, failed)."""
+        clause, params = self._since_clause(since)
+        return self.conn.execute(
+            "SELECT r.module, COUNT(*), SUM(r.failed) FROM results r "
+            "JOIN cases c ON c.id = r.case_id WHERE 1 = 1" + clause +
+            " GROUP BY r.module ORDER BY r.module",
+            params,
+        ).fetchall()
+
+    def query(self, sql: str, params: tuple = ()) -> Tuple[List[str], List[tuple]]:
+        """Run an arbitrary read-only query and return (column_names, rows)."""
+        self.conn.execute("PRAGMA query_only = ON")
+        try:
+            cur = self.conn.execute(sql, params)
+            columns = [d[0] for d in cur.description or []]
+            return columns, cur.fetchall()
+        finally:
+            self.conn.execute("PRAGMA query_only = OFF")
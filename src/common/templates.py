@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Log Template Mining for Android Power Diagnosis
+
+Kernel logs are dominated by near-identical lines (e.g. hundreds of
+``rpmh-regulator ... sync_state() pending due to ...`` messages). This module
+groups lines into templates with a Drain-style fixed-depth parse tree: lines are
+routed by token count and their first tokens to a small leaf of candidate
+templates and merged with the most similar one, turning differing tokens into
+``<*>`` parameters. Mining is streaming (one pass, one line at a time) and the
+number of templates is bounded, so the compressed view of a log stays at a few
+hundred entries regardless of its size.
+"""
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from common.trace import span
+
+WILDCARD = "<*>"
+
+# Leading "[...]" timestamp of dmesg (both ``-T`` and ``[sec.usec]``) lines
+_TIMESTAMP_PREFIX = re.compile(r"^\[[^\]]*\]\s*")
+
+# Tokens that are obviously variable: numbers, hex values, times, sizes
+_VARIABLE = re.compile(r"^[(\[<]?([-+]?\d+([.:,/-]\d+)*[a-z%]*|0x[0-9a-f]+|[0-9a-f]{8,})[)\]>,:;]?$", re.I)
+
+
+class LogTemplate:
+    """
+    One mined template with its occurrence count and example parameters.
+    """
+
+    __slots__ = ("id", "tokens", "count", "first_line", "example", "params")
+
+    def __init__(self, template_id: int, tokens: List[str], line_no: int, example: str):
+        self.id = template_id
+        self.tokens = tokens
+        self.count = 1
+        self.first_line = line_no
+        self.example = example
+        self.params: List[List[str]] = []
+
+    @property
+    def text(self) -> str:
+        """Template text with ``<*>`` for parameters."""
+        return " ".join(self.tokens)
+
+    def to_dict(self) -> Dict:
+        """Return a JSON-serializable view of the template."""
+        return {
+            "template": self.text,
+            "count": self.count,
+            "first_line": self.first_line,
+            "example": self.example,
+            "params": self.params,
+        }
+
+
+class TemplateMiner:
+    """
+    Streaming Drain-style template miner with a bounded template set.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity: float = 0.5,
+        max_children: int = 100,
+        max_templates: int = 1000,
+        max_examples: int = 3,
+    ):
+        """
+        Initialize the miner.
+
+        Args:
+            depth: Depth of the parse tree (token-count level plus ``depth - 2``
+                leading-token levels)
+            similarity: Minimum fraction of equal tokens to join a template
+            max_children: Maximum children of an internal node; further tokens
+                share a wildcard branch
+            max_templates: Maximum number of templates kept; the least recently
+                matched template is evicted beyond that
+            max_examples: Number of parameter examples kept per template
+        """
+        self.prefix_depth = max(depth - 2, 1)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.max_examples = max_examples
+        self.root: Dict = {}
+        self.templates: "OrderedDict[int, LogTemplate]" = OrderedDict()
+        self.lines = 0
+        self.evicted = 0
+        self._next_id = 0
+
+    @staticmethod
+    def tokenize(line: str) -> List[str]:
+        """Strip the timestamp prefix, split on whitespace and mask obvious variables."""
+        line = _TIMESTAMP_PREFIX.sub("", line.strip())
+        return [WILDCARD if _VARIABLE.match(tok) else tok for tok in line.split()]
+
+    def _leaf(self, tokens: List[str]) -> List[int]:
+        """Walk (and grow) the parse tree to the leaf holding candidate template ids."""
+        node = self.root.setdefault(len(tokens), {})
+        for tok in tokens[: self.prefix_depth]:
+            key = WILDCARD if any(c.isdigit() for c in tok) else tok
+            if key not in node:
+                key = key if len(node) < self.max_children else WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault(None, [])
+
+    def _similarity(self, template: List[str], tokens: List[str]) -> float:
+        """Fraction of positions where the template has a parameter or the same token."""
+        same = sum(1 for a, b in zip(template, tokens) if a == WILDCARD or a == b)
+        return same / len(tokens) if tokens else 1.0
+
+    def add(self, line: str) -> Optional[LogTemplate]:
+        """
+        Add one log line and return the template it was merged into.
+
+        Args:
+            line: Raw log line
+
+        Returns:
+            Optional[LogTemplate]: Matched or newly created template (None for blank lines)
+        """
+        self.lines += 1
+        tokens = self.tokenize(line)
+        if not tokens:
+            return None
+        leaf = self._leaf(tokens)
+
+        best, best_sim = None, -1.0
+        for template_id in leaf:
+            template = self.templates.get(template_id)
+            if template is None:
+                continue
+            sim = self._similarity(template.tokens, tokens)
+            if sim > best_sim:
+                best, best_sim = template, sim
+
+        if best is not None and best_sim >= self.similarity:
+            best.count += 1
+            params = []
+            for i, (a, b) in enumerate(zip(best.tokens, tokens)):
+                if a != b:
+                    best.tokens[i] = WILDCARD
+                if best.tokens[i] == WILDCARD:
+                    params.append(b)
+            if params and len(best.params) < self.max_examples and params not in best.params:
+                best.params.append(params)
+            self.templates.move_to_end(best.id)
+            return best
+
+        template = LogTemplate(self._next_id, tokens, self.lines, line.strip())
+        self._next_id += 1
+        leaf[:] = [t for t in leaf if t in self.templates]
+        leaf.append(template.id)
+        self.templates[template.id] = template
+        if len(self.templates) > self.max_templates:
+            self.templates.popitem(last=False)
+            self.evicted += 1
+        return template
+
+    def feed(self, lines: Iterable[str]) -> "TemplateMiner":
+        """Add every line of an iterable (e.g. an open file) and return the miner."""
+        for line in lines:
+            self.add(line)
+        return self
+
+    def ranked(self) -> List[LogTemplate]:
+        """Templates ordered by descending count."""
+        return sorted(self.templates.values(), key=lambda t: (-t.count, t.first_line))
+
+    def chronological(self) -> List[LogTemplate]:
+        """Templates ordered by first occurrence."""
+        return sorted(self.templates.values(), key=lambda t: t.first_line)
+
+    def render(self, limit: Optional[int] = None, keywords: Optional[List[str]] = None) -> str:
+        """
+        Render the compressed log as text, in order of first occurrence.
+
+        Templates seen once keep their original line (timestamp included);
+        repeated ones are written as ``[xN] template`` followed by an example
+        when the template has parameters.
+
+        Args:
+            limit: Maximum number of templates to include
+            keywords: Keep only templates whose text contains one of these
+                (case-insensitive)
+
+        Returns:
+            str: Compressed log text
+        """
+        selected = self.chronological()
+        if keywords:
+            selected = [t for t in selected if any(k in t.text.lower() for k in keywords)]
+        truncated = limit is not None and len(selected) > limit
+        if truncated:
+            keep = {t.id for t in sorted(selected, key=lambda t: -t.count)[:limit]}
+            selected = [t for t in selected if t.id in keep]
+        out = [f"# {self.lines} lines -> {len(self.templates)} templates"]
+        for t in selected:
+            if t.count == 1:
+                out.append(t.example)
+            else:
+                out.append(f"[x{t.count}] {t.text}")
+                if WILDCARD in t.tokens:
+                    out.append(f"    e.g. {t.example}")
+        if truncated:
+            out.append("... (truncated)")
+        return "\n".join(out)
+
+
+def mine_lines(lines: Iterable[str], **options) -> TemplateMiner:
+    """
+    Mine templates from an iterable of lines.
+
+    Args:
+        lines: Log lines (a list or an open file)
+        **options: ``TemplateMiner`` options
+
+    Returns:
+        TemplateMiner: The populated miner
+    """
+    with span("templates:mine", cat="parse") as sp:
+        miner = TemplateMiner(**options).feed(lines)
+        sp.set(lines=miner.lines, templates=len(miner.templates))
+    return miner
+
+
+def log_templates(logs, name: str) -> TemplateMiner:
+    """
+    Return the templates of an artifact from a ``LogStore``, mined at most once.
+
+    Args:
+        logs: Shared ``LogStore`` of the case
+        name: Artifact name (e.g. ``"dmesg.txt"``)
+
+    Returns:
+        TemplateMiner: The populated miner
+    """
+    return logs.cached(name, "templates", lambda: mine_lines(logs.lines(name)))
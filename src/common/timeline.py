@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Power Event Timeline Exporter
+
+This module exports the power events of a case as Chrome trace-event JSON, so
+day-long captures can be browsed in a trace viewer (ui.perfetto.dev or
+chrome://tracing) instead of scrolled as text. Each log becomes a process and
+each event source a track of it:
+
+- Kernel (``dmesg.txt``): a ``suspend`` track of suspend entry → exit slices
+  (failed attempts carry the error), one track per wakeup IRQ
+  (``Resume caused by IRQ N``) and per kernel wakeup source blocking suspend,
+- Android (``logcat.txt``): one track per wakelock tag (acquire → release
+  slices from PowerManagerService debug logs) and one per app with wakeup
+  alarms, jobs or wakelock events,
+- Sampler (``samples.txt``): one counter track per wakeup source with the
+  wakeups between consecutive samples, plus the suspend counters.
+
+Logs are streamed line by line into a ``TraceEventWriter``, so memory only
+holds the open slices and the track table, never the events themselves.
+
+Tracks are on the wall clock where the logs allow it. Logcat and ``dmesg -T``
+lines carry wall times. Sampler uptimes are shifted by the boot time, the
+device epoch minus ``/proc/uptime`` read together in the last sample.
+``[sec.usec]`` kernel times come from a clock that stops while suspended, so
+no single boot time fits them: they are anchored to the last line carrying
+a UTC time (``PM: suspend entry/exit <date> <time> UTC`` on Android kernels),
+which re-anchors them after every suspend. Tracks left on the since-boot
+clock (a kernel log without such lines, samples without a device epoch) go
+to a separate trace, ``power_timeline_uptime.json``, rather than next to
+tracks they cannot be lined up with. Logcat lines have no year: it is taken
+from the collection time, else a wall-clock kernel log, else the current year.
+"""
+import contextlib
+import datetime
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from common.artifacts import open_artifact, read_artifact
+from common.packages import APP_WAKEUP, PackageIndex, PACKAGES_ARTIFACT
+from common.sampler import Sample, decode_samples, suspend_stats_table, wakeup_sources_table
+from common.timestamps import WALL, KernelClock, parse_collection_time
+from common.trace import TraceEventWriter, span
+from common.types import ArtifactMap
+
+# File name of the timeline written into the case directory
+TIMELINE_NAME = "power_timeline.json"
+
+# Trace processes, one per log
+KERNEL_PID = 1
+ANDROID_PID = 2
+SAMPLER_PID = 3
+
+_SUSPEND_ENTRY = re.compile(r"PM: suspend entry")
+_SUSPEND_EXIT = re.compile(r"PM: suspend exit")
+_SUSPEND_FAILURE = re.compile(
+    r"PM: Some devices failed to suspend.*|Freezing of tasks failed.*|"
+    r"PM: Device \S+ failed to suspend.*|Abort: .*|PM: suspend of devices aborted.*"
+)
+_RESUME_IRQ = re.compile(r"Resume caused by IRQ (\d+)(?:,\s*(\S+))?")
+_WAKEUP_SOURCES = re.compile(r"(?:active wakeup source|Pending Wakeup Sources?):\s*(.+)", re.IGNORECASE)
+# Wall time printed by Android kernels on suspend entry and exit
+_UTC_TIME = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(\.\d+)? UTC")
+
+# 10-01 10:00:00.123 (logcat -v time / threadtime)
+_LOGCAT_TIME = re.compile(r"^(\d\d-\d\d \d\d:\d\d:\d\d)\.(\d{3})")
+_WAKELOCK_ACQUIRE = re.compile(r"acquireWakeLockInternal: lock=([^,\s]+).*?tag=\"?([^\",]+)")
+_WAKELOCK_RELEASE = re.compile(r"releaseWakeLockInternal: lock=([^,\s\]]+)")
+
+
+class _LogcatClock:
+    """Parser of logcat ``MM-DD HH:MM:SS.mmm`` prefixes (the year is not logged)."""
+
+    def __init__(self, year: int):
+        self.year = year
+        self._cache: Dict[str, float] = {}
+
+    def parse(self, line: str) -> Optional[float]:
+        match = _LOGCAT_TIME.match(line)
+        if not match:
+            return None
+        stamp = match.group(1)
+        value = self._cache.get(stamp)
+        if value is None:
+            try:
+                value = datetime.datetime.strptime(f"{self.year}-{stamp}", "%Y-%m-%d %H:%M:%S").timestamp()
+            except ValueError:
+                # 02-29 outside a leap year, or a corrupted prefix
+                return None
+            self._cache[stamp] = value
+        return value + int(match.group(2)) / 1000
+
+
+def _us(seconds: float) -> float:
+    """Trace-event timestamps are microseconds."""
+    return round(seconds * 1e6, 3)
+
+
+def _instant(writer: TraceEventWriter, pid: int, track: str, name: str, t: float, **args) -> None:
+    writer.write({"name": name, "ph": "i", "s": "t", "ts": _us(t), "pid": pid,
+                  "tid": writer.track(pid, track), "args": args})
+
+
+def _boot_time(samples: List[Sample]) -> Optional[float]:
+    """
+    Wall-clock time of boot: device epoch minus the uptime read with it.
+
+    ``/proc/uptime`` includes time spent suspended, so one pair holds for the
+    whole capture; the last sample carrying both is used.
+
+    Returns:
+        Optional[float]: Epoch seconds, or None without a sample carrying the
+        device epoch
+    """
+    for sample in reversed(samples):
+        if sample.wall is not None:
+            return sample.wall - sample.uptime
+    return None
+
+
+def _utc_offset(line: str, t: float) -> Optional[float]:
+    """Return wall minus kernel time for a line carrying a UTC time (None otherwise)."""
+    match = _UTC_TIME.search(line)
+    if not match:
+        return None
+    try:
+        wall = datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    fraction = float(match.group(2)) if match.group(2) else 0.0
+    return wall.replace(tzinfo=datetime.timezone.utc).timestamp() + fraction - t
+
+
+def _kernel_clock(path: str) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Return the clock of a kernel log and, for ``[sec.usec]`` logs, its first anchor.
+
+    Returns:
+        Tuple[Optional[str], Optional[float]]: Clock of the first timestamped
+        line, and wall minus kernel time at the first line carrying a UTC time
+        (None for wall-clock logs or when no line carries one)
+    """
+    clock = KernelClock()
+    with open_artifact(path) as f:
+        for line in f:
+            t = clock.parse(line)
+            if t is None:
+                continue
+            if clock.kind == WALL:
+                break
+            if "UTC" in line:
+                offset = _utc_offset(line, t)
+                if offset is not None:
+                    return clock.kind, offset
+    return clock.kind, None
+
+
+def _export_kernel(writer: TraceEventWriter, path: str, offset: Optional[float]) -> Optional[int]:
+    """
+    Stream suspend slices, wakeup IRQs and blocking wakeup sources out of dmesg.
+
+    Args:
+        writer: Trace being written
+        path: ``dmesg.txt`` artifact
+        offset: Wall minus kernel time at the first UTC line of a ``[sec.usec]``
+            log, used until that line (ignored for ``dmesg -T`` logs; None keeps
+            the times since boot)
+
+    Returns:
+        Optional[int]: Year of the last line (None for a log left on the
+        since-boot clock or an empty log)
+    """
+    writer.process(KERNEL_PID, "Kernel (dmesg)" if offset is not None else "Kernel (dmesg, since boot)", 0)
+    clock = KernelClock()
+    entry: Optional[float] = None
+    error = ""
+    last: Optional[float] = None
+    with open_artifact(path) as f:
+        for line in f:
+            t = clock.parse(line)
+            if t is None:
+                continue
+            if offset is not None and clock.kind != WALL:
+                anchor = _utc_offset(line, t) if "UTC" in line else None
+                if anchor is not None:
+                    # The kernel clock stopped during the last suspend: re-anchor
+                    offset = anchor
+                t += offset
+            last = t
+            if _SUSPEND_ENTRY.search(line):
+                entry, error = t, ""
+            elif _SUSPEND_EXIT.search(line):
+                if entry is not None:
+                    writer.write({"name": "suspend failed" if error else "suspend", "ph": "X",
+                                  "ts": _us(entry), "dur": _us(t - entry), "pid": KERNEL_PID,
+                                  "tid": writer.track(KERNEL_PID, "suspend"),
+                                  "args": {"error": error} if error else {}})
+                entry = None
+            elif "Resume caused by" in line:
+                match = _RESUME_IRQ.search(line)
+                if match:
+                    irq, name = match.group(1), match.group(2) or ""
+                    _instant(writer, KERNEL_PID, f"IRQ {irq} {name}".strip(), "resume", t)
+            else:
+                failure = _SUSPEND_FAILURE.search(line)
+                if failure and entry is not None and not error:
+                    error = failure.group(0).strip()
+                match = _WAKEUP_SOURCES.search(line)
+                if match:
+                    for source in match.group(1).split():
+                        _instant(writer, KERNEL_PID, f"wakeup source {source}", "blocked suspend", t)
+    if entry is not None and last is not None:
+        # The log ended inside a suspend attempt
+        writer.write({"name": "suspend (no exit)", "ph": "X", "ts": _us(entry), "dur": _us(last - entry),
+                      "pid": KERNEL_PID, "tid": writer.track(KERNEL_PID, "suspend"), "args": {}})
+    if (clock.kind == WALL or offset is not None) and last is not None:
+        return datetime.datetime.fromtimestamp(last).year
+    return None
+
+
+def _export_logcat(writer: TraceEventWriter, path: str, year: int, packages: PackageIndex) -> None:
+    """Stream wakelock holds and app wakeups out of logcat."""
+    writer.process(ANDROID_PID, "Android (logcat)", 1)
+    clock = _LogcatClock(year)
+    # Wakelocks acquired and not yet released: lock id -> tag
+    held: Dict[str, str] = {}
+    last: Optional[float] = None
+    with open_artifact(path) as f:
+        for line in f:
+            # Every wakelock and app wakeup pattern mentions "wake"
+            if "ake" not in line and "AKE" not in line:
+                continue
+            t = clock.parse(line)
+            if t is None:
+                continue
+            last = t
+            match = _WAKELOCK_ACQUIRE.search(line)
+            if match:
+                lock, tag = match.group(1), match.group(2)
+                if lock not in held:
+                    held[lock] = tag
+                    writer.write({"name": tag, "cat": "wakelock", "ph": "b", "id": lock, "ts": _us(t),
+                                  "pid": ANDROID_PID, "args": {"line": line.strip()}})
+                continue
+            match = _WAKELOCK_RELEASE.search(line)
+            if match:
+                tag = held.pop(match.group(1), None)
+                if tag is not None:
+                    writer.write({"name": tag, "cat": "wakelock", "ph": "e", "id": match.group(1),
+                                  "ts": _us(t), "pid": ANDROID_PID})
+                continue
+            if APP_WAKEUP.search(line):
+                package = packages.find(line) if packages.count else None
+                _instant(writer, ANDROID_PID, f"app {package or '(unattributed)'}", "wakeup", t,
+                         line=line.strip())
+    if last is not None:
+        # Still held at the end of the log
+        for lock, tag in held.items():
+            writer.write({"name": tag, "cat": "wakelock", "ph": "e", "id": lock, "ts": _us(last),
+                          "pid": ANDROID_PID, "args": {"held_at_end": True}})
+
+
+def _export_samples(writer: TraceEventWriter, samples: List[Sample], boot: Optional[float]) -> None:
+    """
+    Write per-sample wakeup source and suspend counter deltas as counter tracks.
+
+    Args:
+        writer: Trace being written
+        samples: Decoded ``samples.txt``
+        boot: Boot time added to the sample uptimes (None keeps them since boot)
+    """
+    if len(samples) < 2:
+        return
+    writer.process(SAMPLER_PID, "Sampler" if boot is not None else "Sampler (uptime)", 2)
+    stats = suspend_stats_table(samples)
+    sources = wakeup_sources_table(samples)
+    for i in range(1, len(samples)):
+        ts = _us(samples[i].uptime + (boot or 0.0))
+        before, after = stats[i - 1][1], stats[i][1]
+        writer.write({"name": "suspend", "ph": "C", "ts": ts, "pid": SAMPLER_PID,
+                      "args": {key: after.get(key, 0) - before.get(key, 0) for key in ("success", "fail")}})
+        previous = sources[i - 1][1]
+        for name, (wakeups, _) in sources[i][1].items():
+            delta = wakeups - previous.get(name, (0, 0))[0]
+            if delta > 0:
+                writer.write({"name": name, "ph": "C", "ts": ts, "pid": SAMPLER_PID, "args": {"wakeups": delta}})
+
+
+def export_timeline(artifacts: ArtifactMap, path: str,
+                    case_info: Optional[Dict[str, str]] = None) -> Tuple[List[str], int]:
+    """
+    Write the power events of a case as Chrome trace-event JSON.
+
+    Args:
+        artifacts: Evidence files of the case (``dmesg.txt``, ``logcat.txt``,
+            ``samples.txt`` and ``packages.txt`` are used when present)
+        path: Output file path
+        case_info: ``collection_info.txt`` fields (``Collection Time`` gives
+            the year of logcat lines)
+
+    Returns:
+        Tuple[List[str], int]: The paths written (a second one for the tracks
+        left on the since-boot clock next to wall-clock ones) and the number
+        of trace events
+    """
+    collected = parse_collection_time((case_info or {}).get("Collection Time", ""))
+    samples = decode_samples(read_artifact(artifacts["samples.txt"])) if "samples.txt" in artifacts else []
+    boot = _boot_time(samples)
+    kind, offset = _kernel_clock(artifacts["dmesg.txt"]) if "dmesg.txt" in artifacts else (None, None)
+    if kind == WALL:
+        offset = 0.0
+    # Logs on each clock; _export_samples skips fewer than two samples
+    wall, since_boot = [], []
+    if "dmesg.txt" in artifacts:
+        (wall if offset is not None else since_boot).append("dmesg")
+    if len(samples) > 1:
+        (wall if boot is not None else since_boot).append("samples")
+    if "logcat.txt" in artifacts:
+        wall.append("logcat")
+    split = bool(wall and since_boot)
+    uptime_path = str(Path(path).with_name(f"{Path(path).stem}_uptime.json"))
+    paths = [path, uptime_path] if split else [path]
+    with span("export:timeline", cat="report") as sp:
+        with contextlib.ExitStack() as stack:
+            writer = stack.enter_context(TraceEventWriter(path))
+            uptime_writer = stack.enter_context(TraceEventWriter(uptime_path)) if split else writer
+            if split:
+                print(f"[TIMELINE] No wall-clock anchor for {' and '.join(since_boot)}; "
+                      f"their since-boot tracks go to {uptime_path}")
+            year = None
+            if "dmesg.txt" in artifacts:
+                year = _export_kernel(writer if offset is not None else uptime_writer,
+                                      artifacts["dmesg.txt"], offset)
+            if samples:
+                _export_samples(writer if boot is not None else uptime_writer, samples, boot)
+            if "logcat.txt" in artifacts:
+                packages = PackageIndex()
+                if PACKAGES_ARTIFACT in artifacts:
+                    packages = PackageIndex.parse(read_artifact(artifacts[PACKAGES_ARTIFACT]))
+                year = collected.year if collected is not None else year or datetime.date.today().year
+                _export_logcat(writer, artifacts["logcat.txt"], year, packages)
+        count = writer.count + (uptime_writer.count if split else 0)
+        sp.set(events=count)
+    if not split and Path(uptime_path).is_file():
+        # Left by an earlier export of a case that could not be fully aligned
+        Path(uptime_path).unlink()
+    return paths, count
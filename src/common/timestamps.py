@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Timestamp Index for Android Power Diagnosis
+
+Kernel logs come in two timestamp formats: ``dmesg -T`` wall-clock prefixes
+(``[Sat Nov 15 08:22:58 2025]``) and raw ``[  123.456789]`` seconds since boot.
+``TimestampIndex`` parses either format once per log into a sorted column of
+(time, line number), so any time window ("the last hour", "ten minutes around
+this failure") is a ``bisect`` slice instead of a rescan of the log.
+``LogStore.windowed`` uses the index to give the existing analyzers a store
+restricted to a window.
+"""
+import bisect
+import datetime
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from common.trace import span
+
+# [Sat Nov 15 08:22:58 2025] (dmesg -T, local wall-clock time)
+_WALL_PREFIX = re.compile(r"^\[([A-Z][a-z]{2} [A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2} \d{4})\]")
+_WALL_FORMAT = "%a %b %d %H:%M:%S %Y"
+
+# [  123.456789] (seconds since boot)
+_MONOTONIC_PREFIX = re.compile(r"^\[\s*(\d+\.\d+)\]")
+
+# Collection Time formats besides ISO (see ``parse_collection_time``)
+_COLLECTION_FORMATS = ("%a %b %d %H:%M:%S %Y", "%m/%d/%Y %H:%M:%S", "%d.%m.%Y %H:%M:%S")
+_ZONE_NAME = re.compile(r" [A-Z]{2,5}(?= \d{4}$)")
+_WEEKDAY = re.compile(r"^[A-Za-z]{2,3}\.? (?=\d)")
+_FRACTION = re.compile(r"[.,]\d+$")
+
+WALL = "wall"
+MONOTONIC = "monotonic"
+
+# Artifacts whose lines carry a kernel timestamp prefix
+TIMESTAMPED_LOGS = ("dmesg.txt",)
+
+
+def parse_time(value: str, kind: Optional[str] = None) -> float:
+    """
+    Parse a command-line time: seconds since boot or an ISO date/time.
+
+    Args:
+        value: ``"1234.5"`` (``[sec.usec]`` logs) or ``"2025-11-15 08:30:00"``
+            (``dmesg -T`` logs, local time)
+        kind: Clock of the log the time applies to (``TimestampIndex.kind``);
+            a value on the other clock is rejected
+
+    Returns:
+        float: Time on the scale used by ``TimestampIndex``
+
+    Raises:
+        ValueError: If the value is neither format or does not match ``kind``
+    """
+    try:
+        parsed, value_kind = float(value), MONOTONIC
+    except ValueError:
+        try:
+            parsed, value_kind = datetime.datetime.fromisoformat(value).timestamp(), WALL
+        except ValueError:
+            raise ValueError(f"invalid time {value!r}: expected seconds since boot or YYYY-MM-DD HH:MM:SS") from None
+    if kind is not None and value_kind != kind:
+        if kind == WALL:
+            raise ValueError(f"time {value!r} is in seconds since boot but the log has dmesg -T "
+                             f"wall-clock timestamps: give a date/time (YYYY-MM-DD HH:MM:SS)")
+        raise ValueError(f"time {value!r} is a date/time but the log has [sec.usec] timestamps "
+                         f"(seconds since boot): give seconds")
+    return parsed
+
+
+def parse_collection_time(value: str) -> Optional[datetime.datetime]:
+    """
+    Parse the ``Collection Time`` of ``collection_info.txt``.
+
+    The collection scripts write it with ``date`` (``Sat Nov 15 08:22:58 UTC 2025``)
+    or ``%date% %time%`` on Windows (``Sat 11/15/2025  8:22:58.12``); ``collect``
+    and bugreports write an ISO date/time.
+
+    Returns:
+        datetime.datetime: Local (naive) time, or None if the value is not understood
+    """
+    value = " ".join(value.split())
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        parsed = None
+        # Time zone names (UTC, CST ...) are not portable to strptime: read as local time
+        text = _ZONE_NAME.sub("", value)
+        text = _FRACTION.sub("", _WEEKDAY.sub("", text))
+        for fmt in _COLLECTION_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is not None and parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def format_time(value: float, kind: Optional[str]) -> str:
+    """Render an index time for messages and reports."""
+    if kind == WALL:
+        return datetime.datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{value:.3f}s"
+
+
+class KernelClock:
+    """
+    Parser of kernel line timestamps for logs read line by line.
+
+    The format is fixed by the first timestamped line (see ``kind``); wall-clock
+    prefixes are parsed once per distinct second.
+    """
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self._wall_cache: Dict[str, float] = {}
+
+    def parse(self, line: str) -> Optional[float]:
+        """Return the timestamp of ``line`` (None if it has none of the log's format)."""
+        if not line.startswith("["):
+            return None
+        if self.kind != MONOTONIC:
+            match = _WALL_PREFIX.match(line)
+            if match:
+                # Most lines share their second with a neighbour: parse each prefix once
+                stamp = match.group(1)
+                value = self._wall_cache.get(stamp)
+                if value is None:
+                    value = datetime.datetime.strptime(stamp, _WALL_FORMAT).timestamp()
+                    self._wall_cache[stamp] = value
+                self.kind = WALL
+                return value
+        if self.kind != WALL:
+            match = _MONOTONIC_PREFIX.match(line)
+            if match:
+                self.kind = MONOTONIC
+                return float(match.group(1))
+        return None
+
+
+class TimestampIndex:
+    """
+    Sorted timestamp column of one log with binary-search window slicing.
+    """
+
+    def __init__(self, lines: List[str]):
+        """
+        Build the index.
+
+        The format is detected from the first timestamped line. Lines without a
+        timestamp of that format (continuations, banners) are not indexed but
+        stay inside the windows surrounding them.
+
+        Args:
+            lines: Log lines (shared with the ``LogStore``, not copied)
+        """
+        self.lines = lines
+        self.kind: Optional[str] = None
+
+        with span("timestamps:index", cat="parse", lines=len(lines)):
+            pairs = self._parse(lines)
+            # Kernel logs are nearly always in order; only sort when they are not
+            self.in_order = all(pairs[i][0] <= pairs[i + 1][0] for i in range(len(pairs) - 1))
+            if not self.in_order:
+                pairs.sort()
+        self.times: List[float] = [t for t, _ in pairs]
+        self.line_nos: List[int] = [n for _, n in pairs]
+
+    def _parse(self, lines: List[str]) -> List[Tuple[float, int]]:
+        pairs: List[Tuple[float, int]] = []
+        clock = KernelClock()
+        for no, line in enumerate(lines):
+            value = clock.parse(line)
+            if value is not None:
+                pairs.append((value, no))
+        self.kind = clock.kind
+        return pairs
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def start(self) -> Optional[float]:
+        """Earliest timestamp of the log."""
+        return self.times[0] if self.times else None
+
+    @property
+    def end(self) -> Optional[float]:
+        """Latest timestamp of the log."""
+        return self.times[-1] if self.times else None
+
+    def _bounds(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        lo = 0 if start is None else bisect.bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect.bisect_right(self.times, end)
+        return lo, max(lo, hi)
+
+    def entries(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[float, str]]:
+        """
+        Yield ``(time, line)`` for every timestamped line in ``[start, end]``.
+
+        Args:
+            start: Window start (None for the beginning of the log)
+            end: Window end, inclusive (None for the end of the log)
+        """
+        lo, hi = self._bounds(start, end)
+        for i in range(lo, hi):
+            yield self.times[i], self.lines[self.line_nos[i]]
+
+    def span_of(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Return the ``[first, last)`` line range covering ``[start, end]``.
+
+        Args:
+            start: Window start (None for the beginning of the log)
+            end: Window end, inclusive (None for the end of the log)
+
+        Returns:
+            Tuple[int, int]: Line number range, empty if no line falls in the window
+        """
+        if not self.times:
+            return (0, len(self.lines)) if start is None and end is None else (0, 0)
+        lo, hi = self._bounds(start, end)
+        if lo == hi:
+            return 0, 0
+        if self.in_order:
+            first, last = self.line_nos[lo], self.line_nos[hi - 1]
+            following = self.line_nos[hi] if hi < len(self.line_nos) else len(self.lines)
+        else:
+            matched = self.line_nos[lo:hi]
+            first, last = min(matched), max(matched)
+            following = min((n for n in self.line_nos if n > last), default=len(self.lines))
+        if start is None:
+            first = 0
+        # Untimestamped continuation lines of the last entry stay in the window
+        return first, max(following, last + 1)
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Lines of the window ``[start, end]`` (see ``span_of``)."""
+        first, last = self.span_of(start, end)
+        return self.lines[first:last]
+
+    def last(self, seconds: float) -> Tuple[Optional[float], Optional[float]]:
+        """Bounds of the final ``seconds`` of the log."""
+        return (None if self.end is None else self.end - seconds), None
+
+    @staticmethod
+    def around(t: float, before: float, after: Optional[float] = None) -> Tuple[float, float]:
+        """Bounds from ``before`` seconds before ``t`` to ``after`` (default ``before``) seconds after it."""
+        return t - before, t + (before if after is None else after)
+
+
+def timestamp_index(logs, name: str) -> TimestampIndex:
+    """
+    Return the timestamp index of an artifact from a ``LogStore``, built at most once.
+
+    Args:
+        logs: Shared ``LogStore`` of the case
+        name: Artifact name (e.g. ``"dmesg.txt"``)
+
+    Returns:
+        TimestampIndex: Index over ``logs.lines(name)``
+    """
+    return logs.cached(name, "timestamps", lambda: TimestampIndex(logs.lines(name)))
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Stage-level Tracing for Android Power Diagnosis
+
+This module records a span for each pipeline stage (collection, file reads,
+analyzer steps, AI call, report generation) with wall time, bytes processed,
+line counts and peak Python memory. Spans can be exported as Chrome
+trace-event JSON (chrome://tracing, Perfetto) and as a plain summary table;
+``TraceEventWriter`` streams such JSON for other event sources as well.
+
+Tracing is off by default: ``span()`` then returns a shared no-op object, so
+instrumented code pays only a function call and a global lookup.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _NullSpan:
+    """No-op span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **args: Any) -> None:
+        """Ignore span attributes."""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    One timed stage. Use as a context manager; attach counters with ``set``.
+    """
+
+    __slots__ = ("tracer", "name", "cat", "args", "start", "end", "peak", "tid")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+        self.end = 0.0
+        self.peak = 0
+        self.tid = threading.get_ident()
+
+    def set(self, **args: Any) -> None:
+        """Attach attributes such as ``bytes`` or ``lines`` to the span."""
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        self.tracer._push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.end = time.perf_counter()
+        self.tracer._pop(self)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans for one run and exports them.
+    """
+
+    def __init__(self, track_memory: bool = True):
+        """
+        Initialize the tracer.
+
+        Args:
+            track_memory: Record peak Python heap per span via ``tracemalloc``
+        """
+        self.track_memory = track_memory
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _push(self, span: Span) -> None:
+        stack = self._stack()
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            span.peak = current
+        stack.append(span)
+
+    def _pop(self, span: Span) -> None:
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        if self.track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            span.peak = max(span.peak, peak)
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, span.peak)
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Span:
+        """Create a span (enter it with ``with``)."""
+        return Span(self, name, cat, dict(args))
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """
+        Return the spans as Chrome trace-event "complete" (``ph: X``) events.
+        """
+        pid = os.getpid()
+        events = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            args = dict(s.args)
+            if self.track_memory:
+                args["peak_mem_kb"] = round(s.peak / 1024, 1)
+            events.append({
+                "name": s.name,
+                "cat": s.cat,
+                "ph": "X",
+                "ts": round((s.start - self.origin) * 1e6, 3),
+                "dur": round((s.end - s.start) * 1e6, 3),
+                "pid": pid,
+                "tid": s.tid,
+                "args": args,
+            })
+        return events
+
+    def write_chrome_trace(self, path: str) -> str:
+        """
+        Write the spans as Chrome trace-event JSON.
+
+        Args:
+            path: Output file path
+
+        Returns:
+            str: The path written
+        """
+        with TraceEventWriter(path) as writer:
+            for event in self.chrome_events():
+                writer.write(event)
+        return path
+
+    def summary(self) -> str:
+        """
+        Aggregate spans by name into a plain-text table.
+
+        Returns:
+            str: Table with calls, total/average time, bytes, lines and peak memory
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        order: List[str] = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            if s.name not in rows:
+                order.append(s.name)
+                rows[s.name] = {"calls": 0, "total": 0.0, "bytes": 0, "lines": 0, "peak": 0}
+            row = rows[s.name]
+            row["calls"] += 1
+            row["total"] += s.end - s.start
+            row["bytes"] += int(s.args.get("bytes", 0) or 0)
+            row["lines"] += int(s.args.get("lines", 0) or 0)
+            row["peak"] = max(row["peak"], s.peak)
+        header = f"{'stage':<40} {'calls':>5} {'total ms':>10} {'avg ms':>9} {'bytes':>12} {'lines':>9} {'peak KB':>9}"
+        out = [header, "-" * len(header)]
+        for name in order:
+            row = rows[name]
+            out.append(
+                f"{name:<40} {row['calls']:>5} {row['total'] * 1e3:>10.2f} "
+                f"{row['total'] * 1e3 / row['calls']:>9.2f} {row['bytes']:>12} "
+                f"{row['lines']:>9} {row['peak'] / 1024:>9.1f}"
+            )
+        return "\n".join(out)
+
+    def close(self) -> None:
+        """Stop memory tracking started by this tracer."""
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class TraceEventWriter:
+    """
+    Incremental Chrome trace-event JSON writer.
+
+    Events are serialized to the file as they are written, so traces of
+    millions of events never sit in memory. Tracks are threads of a process:
+    ``track`` allocates their ids and writes the naming metadata on first use.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the trace file and write the header.
+
+        Args:
+            path: Output file path
+        """
+        self.path = path
+        self.count = 0
+        self._tracks: Dict[Tuple[int, str], int] = {}
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+
+    def write(self, event: Dict[str, Any]) -> None:
+        """Append one trace event."""
+        if self.count:
+            self._f.write(",\n")
+        self._f.write(json.dumps(event, separators=(",", ":")))
+        self.count += 1
+
+    def process(self, pid: int, name: str, sort_index: Optional[int] = None) -> None:
+        """Name a process (a group of tracks)."""
+        self.write({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}})
+        if sort_index is not None:
+            self.write({"name": "process_sort_index", "ph": "M", "pid": pid, "args": {"sort_index": sort_index}})
+
+    def track(self, pid: int, name: str) -> int:
+        """Return the thread id of track ``name`` in process ``pid``, naming it on first use."""
+        key = (pid, name)
+        tid = self._tracks.get(key)
+        if tid is None:
+            tid = self._tracks[key] = len(self._tracks) + 1
+            self.write({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return tid
+
+    def close(self) -> None:
+        """Terminate the JSON document and close the file."""
+        if not self._f.closed:
+            self._f.write("\n]}\n")
+            self._f.close()
+
+    def __enter__(self) -> "TraceEventWriter":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+
+# Active tracer, or None while tracing is disabled
+_tracer: Optional[Tracer] = None
+
+
+def enable(track_memory: bool = True) -> Tracer:
+    """Start tracing for this process and return the active tracer."""
+    global _tracer
+    _tracer = Tracer(track_memory=track_memory)
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Stop tracing and return the tracer that was active (if any)."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def span(name: str, cat: str = "stage", **args: Any):
+    """
+    Return a span for ``name`` or a shared no-op object when tracing is off.
+
+    Usage::
+
+        with span("read:dmesg.txt", cat="io") as sp:
+            data = ...
+            sp.set(bytes=len(data))
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, cat, **args)
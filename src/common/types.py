@@ -2,7 +2,8 @@
 """
 Type Definitions for Android Suspend Diagnosis
 
-This module defines common types used throughout the project.
+This module defines common types used throughout the project: type aliases
+for the data passed between modules and the typed analysis result objects.
 """
 from typing import Dict, List, Tuple, Optional, Mapping, Any, Union
 
@@ -28,3 +29,446 @@ else:
     WakeupSource = Tuple[str, int, float]  # (name, active_count, total_time)
     LogMap = Mapping[str, str]  # {log_type: content}
     SuspendAnalysisResult = Tuple[bool, List[str]]  # (failed, reasons)
+
+
+def _plain(value: Any) -> Any:
+    """Convert result objects (and lists of them) to plain JSON-serializable values."""
+    if isinstance(value, ResultBase):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+class ResultBase:
+    """
+    Base of the typed analysis results.
+    
+    Results use ``__slots__`` (no per-instance ``__dict__``) so thousands of
+    them can be held in batch or service mode, and report builders read fields
+    directly instead of probing nested dictionaries.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as plain dictionaries and lists (JSON-serializable)."""
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class SuspendStats(ResultBase):
+    """
+    Parsed ``/d/suspend_stats``.
+
+    The ``last_failed_*`` lists hold the kernel's ring of recent failures,
+    most recent first.
+    """
+
+    # Counters, in the order the kernel prints them
+    COUNTERS = ("success", "fail", "failed_freeze", "failed_prepare", "failed_suspend",
+                "failed_suspend_late", "failed_suspend_noirq", "failed_resume_noirq",
+                "failed_resume_early", "failed_resume")
+
+    __slots__ = COUNTERS + ("last_failed_dev", "last_failed_errno", "last_failed_step")
+
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.last_failed_dev: List[str] = []
+        self.last_failed_errno: List[int] = []
+        self.last_failed_step: List[str] = []
+
+
+class SuspendStatsResult(ResultBase):
+    """Step 1: suspend success/failure counters from ``/d/suspend_stats``."""
+
+    __slots__ = ("performed", "success", "message", "stats", "delta")
+
+    def __init__(self, performed: bool = False, success: bool = False, message: str = ""):
+        self.performed = performed
+        self.success = success
+        self.message = message
+        # Latest snapshot, and its change since the snapshot taken at the start
+        # of the test interval (None without a ``suspend_stats_before.txt``)
+        self.stats: Optional[SuspendStats] = None
+        self.delta: Optional[SuspendStats] = None
+
+
+class WakelockResult(ResultBase):
+    """Step 2: active wakelocks from ``dumpsys suspend_control_internal``."""
+
+    __slots__ = ("performed", "has_active", "wakelocks")
+
+    def __init__(self, performed: bool = False, has_active: bool = False,
+                 wakelocks: Optional[List[str]] = None):
+        self.performed = performed
+        self.has_active = has_active
+        self.wakelocks: List[str] = wakelocks if wakelocks is not None else []
+
+
+class DmesgResult(ResultBase):
+    """Step 3: suspend entry and failure messages from dmesg."""
+
+    __slots__ = ("performed", "has_suspend_entry", "has_suspend_failure", "failure_messages")
+
+    def __init__(self, performed: bool = False, has_suspend_entry: bool = False,
+                 has_suspend_failure: bool = False, failure_messages: Optional[List[str]] = None):
+        self.performed = performed
+        self.has_suspend_entry = has_suspend_entry
+        self.has_suspend_failure = has_suspend_failure
+        self.failure_messages: List[str] = failure_messages if failure_messages is not None else []
+
+
+class DriverCallback(ResultBase):
+    """One device PM callback reported by ``initcall_debug``/``pm_print_times``."""
+
+    __slots__ = ("driver", "device", "callback", "phase", "ms")
+
+    def __init__(self, driver: str, device: str, callback: str, phase: str, ms: float):
+        self.driver = driver
+        self.device = device
+        self.callback = callback
+        self.phase = phase  # "suspend" or "resume"
+        self.ms = ms
+
+
+class SuspendCycle(ResultBase):
+    """One suspend/resume cycle segmented from dmesg."""
+
+    __slots__ = ("entry", "exit", "suspend_ms", "resume_ms", "phases", "failed", "error", "slow_callbacks")
+
+    def __init__(self, entry: float):
+        self.entry = entry
+        self.exit: Optional[float] = None
+        # "suspend of devices complete" / "resume of devices complete" timings
+        self.suspend_ms: Optional[float] = None
+        self.resume_ms: Optional[float] = None
+        # Every reported phase, e.g. {"late suspend": 3.1, "noirq resume": 0.8}
+        self.phases: Dict[str, float] = {}
+        self.failed = False
+        self.error = ""
+        self.slow_callbacks: List[DriverCallback] = []
+
+
+class DriverLatency(ResultBase):
+    """Latency distribution of one driver's callbacks in one direction, over all cycles."""
+
+    __slots__ = ("driver", "phase", "count", "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+    def __init__(self, driver: str, phase: str, count: int = 0, total_ms: float = 0.0,
+                 p50_ms: float = 0.0, p95_ms: float = 0.0, p99_ms: float = 0.0, max_ms: float = 0.0):
+        self.driver = driver
+        self.phase = phase
+        self.count = count
+        self.total_ms = total_ms
+        self.p50_ms = p50_ms
+        self.p95_ms = p95_ms
+        self.p99_ms = p99_ms
+        self.max_ms = max_ms
+
+
+class CycleResult(ResultBase):
+    """Suspend/resume cycles of a dmesg log with per-driver latency percentiles."""
+
+    __slots__ = ("performed", "clock", "cycle_count", "failed_count", "suspend_p50_ms", "suspend_p95_ms",
+                 "resume_p50_ms", "resume_p95_ms", "cycles", "drivers")
+
+    def __init__(self):
+        self.performed = False
+        # Timestamp scale of entry/exit: "wall" (dmesg -T) or "monotonic" ([sec.usec])
+        self.clock: Optional[str] = None
+        self.cycle_count = 0
+        self.failed_count = 0
+        self.suspend_p50_ms = 0.0
+        self.suspend_p95_ms = 0.0
+        self.resume_p50_ms = 0.0
+        self.resume_p95_ms = 0.0
+        self.cycles: List[SuspendCycle] = []
+        # Slowest drivers first (by total time across cycles)
+        self.drivers: List[DriverLatency] = []
+
+
+class SuspendAnalysis(ResultBase):
+    """Detailed result of the 3-step suspend analysis."""
+
+    __slots__ = ("step1_suspend_stats", "step2_wakelocks", "step3_dmesg", "cycles", "conclusion",
+                 "baseline_outliers")
+
+    def __init__(self):
+        self.step1_suspend_stats = SuspendStatsResult()
+        self.step2_wakelocks = WakelockResult()
+        self.step3_dmesg = DmesgResult()
+        # Filled from dmesg independently of the 3-step flow
+        self.cycles = CycleResult()
+        self.conclusion = ""
+        # Filled by the pipeline when the case is scored against a fleet baseline
+        self.baseline_outliers: Optional[List[Dict[str, Any]]] = None
+
+
+class WakeupSourceStats(ResultBase):
+    """One row of ``/sys/kernel/debug/wakeup_sources``."""
+
+    __slots__ = ("name", "active_count", "event_count", "wakeup_count")
+
+    def __init__(self, name: str, active_count: int = 0, event_count: int = 0, wakeup_count: int = 0):
+        self.name = name
+        self.active_count = active_count
+        self.event_count = event_count
+        self.wakeup_count = wakeup_count
+
+
+class WakeupSourcesResult(ResultBase):
+    """Wakeup source counters and the issues found in them."""
+
+    __slots__ = ("performed", "excessive_wakeups", "active_sources", "top_wakeup_sources",
+                 "sources", "total_wakeups", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.excessive_wakeups = False
+        self.active_sources: List[WakeupSourceStats] = []
+        self.top_wakeup_sources: List[WakeupSourceStats] = []
+        # Every wakeup source, by wakeup count (top_wakeup_sources is its head)
+        self.sources: List[WakeupSourceStats] = []
+        self.total_wakeups = 0
+        self.issues: List[str] = []
+
+
+class WakeupEvent(ResultBase):
+    """A kernel wakeup/resume message with its dmesg timestamp (seconds)."""
+
+    __slots__ = ("timestamp", "message")
+
+    def __init__(self, timestamp: float, message: str):
+        self.timestamp = timestamp
+        self.message = message
+
+
+class DmesgWakeupsResult(ResultBase):
+    """Kernel wakeup events (one per resume) and their intervals."""
+
+    __slots__ = ("performed", "frequent_wakeups", "wakeup_events", "event_count",
+                 "wakeup_intervals", "window_seconds", "wakeup_rate", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.frequent_wakeups = False
+        self.wakeup_events: List[WakeupEvent] = []
+        self.event_count = 0
+        self.wakeup_intervals: List[float] = []
+        # Span of dmesg analyzed (at most the analyzer's window) and resumes per minute in it;
+        # only dmesg is windowed, the other wakeup sources cover their whole capture
+        self.window_seconds = 0.0
+        self.wakeup_rate = 0.0
+        self.issues: List[str] = []
+
+
+class PowerResult(ResultBase):
+    """Wake locks held according to ``dumpsys power``."""
+
+    __slots__ = ("performed", "power_issues", "power_events", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.power_issues = False
+        self.power_events: List[str] = []
+        self.issues: List[str] = []
+
+
+class LogcatWakeupsResult(ResultBase):
+    """App alarms, jobs and wake locks found in logcat."""
+
+    __slots__ = ("performed", "app_wakeup_issues", "app_wakeups", "app_counts", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.app_wakeup_issues = False
+        self.app_wakeups: List[str] = []
+        # Wakeup events per package, most frequent first
+        self.app_counts: Dict[str, int] = {}
+        self.issues: List[str] = []
+
+
+class IrqWakeup(ResultBase):
+    """Wakeups attributed to one interrupt."""
+
+    __slots__ = ("irq", "name", "wakeups", "interrupts", "wakeups_per_hour", "interrupts_per_second")
+
+    def __init__(self, irq: str, name: str = "", wakeups: int = 0, interrupts: int = 0):
+        self.irq = irq
+        self.name = name
+        # Resumes caused by this IRQ according to dmesg
+        self.wakeups = wakeups
+        # Times it fired between the /proc/interrupts snapshots
+        self.interrupts = interrupts
+        self.wakeups_per_hour = 0.0
+        self.interrupts_per_second = 0.0
+
+
+class IrqResult(ResultBase):
+    """Resume-causing IRQs joined with ``/proc/interrupts`` deltas."""
+
+    __slots__ = ("performed", "excessive_irq_wakeups", "resume_count", "elapsed_seconds", "irqs", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.excessive_irq_wakeups = False
+        self.resume_count = 0
+        # Interval between the before/after snapshots (0 if unknown)
+        self.elapsed_seconds = 0.0
+        self.irqs: List[IrqWakeup] = []
+        self.issues: List[str] = []
+
+
+class SampledSource(ResultBase):
+    """Wakeups of one wakeup source over the on-device sampling window."""
+
+    __slots__ = ("name", "wakeups", "active_ms", "wakeups_per_hour")
+
+    def __init__(self, name: str, wakeups: int = 0, active_ms: int = 0):
+        self.name = name
+        # wakeup_count and total_time increase between the first and last sample
+        self.wakeups = wakeups
+        self.active_ms = active_ms
+        self.wakeups_per_hour = 0.0
+
+
+class SampledResult(ResultBase):
+    """Counter deltas over the samples taken by the on-device sampler."""
+
+    __slots__ = ("performed", "excessive_wakeups", "sample_count", "window_seconds",
+                 "suspend_success", "suspend_fail", "sources", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.excessive_wakeups = False
+        self.sample_count = 0
+        # Uptime between the first and last sample (includes time suspended)
+        self.window_seconds = 0.0
+        self.suspend_success = 0
+        self.suspend_fail = 0
+        self.sources: List[SampledSource] = []
+        self.issues: List[str] = []
+
+
+class WakelockRecord(ResultBase):
+    """One wakelock joined across every source that mentions it."""
+
+    __slots__ = ("name", "sources", "lock_type", "uid", "pid", "package", "active", "hold_ms",
+                 "total_ms", "kernel_wakeups", "app_events")
+
+    def __init__(self, name: str):
+        self.name = name
+        # Sources the wakelock was found in (suspend_control, power, wakeup_sources, logcat)
+        self.sources: List[str] = []
+        self.lock_type = ""
+        self.uid = ""
+        self.pid = ""
+        # Holding package, from the UID or the wakelock tag (needs packages.txt)
+        self.package = ""
+        self.active = False
+        # Current hold of an active wakelock: acquire age (power), active_since
+        # (wakeup_sources) or, lacking those, MAX TIME (suspend_control); 0 when released
+        self.hold_ms = 0
+        # Cumulative hold time since boot (largest TOTAL TIME / total_time of any source)
+        self.total_ms = 0
+        self.kernel_wakeups = 0
+        # Acquisitions logged in logcat
+        self.app_events = 0
+
+
+class WakelockCorrelationResult(ResultBase):
+    """Wakelocks correlated across dumpsys, wakeup_sources and logcat."""
+
+    __slots__ = ("performed", "long_held", "sources", "wakelock_count", "multi_source_count",
+                 "records", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.long_held = False
+        self.sources: List[str] = []
+        self.wakelock_count = 0
+        # Wakelocks found in more than one source
+        self.multi_source_count = 0
+        self.records: List[WakelockRecord] = []
+        self.issues: List[str] = []
+
+
+class BatteryUid(ResultBase):
+    """Battery cost of one UID since the last charge (``dumpsys batterystats --checkin``)."""
+
+    __slots__ = ("uid", "package", "power_mah", "wakelock_ms", "wakelock_count", "alarm_wakeups", "findings")
+
+    def __init__(self, uid: str):
+        self.uid = uid
+        self.package = ""
+        # Estimated drain attributed to the UID (pwi rows)
+        self.power_mah = 0.0
+        # Partial wakelock time and acquisitions over all its wakelocks
+        self.wakelock_ms = 0
+        self.wakelock_count = 0
+        self.alarm_wakeups = 0
+        # Wakeup findings pointing at this UID
+        self.findings: List[str] = []
+
+
+class BatteryWakelock(ResultBase):
+    """One wakelock, kernel wakelock or wakeup reason total from batterystats."""
+
+    __slots__ = ("name", "uid", "package", "time_ms", "count")
+
+    def __init__(self, name: str, uid: str = "", time_ms: int = 0, count: int = 0):
+        self.name = name
+        self.uid = uid
+        self.package = ""
+        self.time_ms = time_ms
+        self.count = count
+
+
+class BatteryStatsResult(ResultBase):
+    """Battery cost tables from batterystats, with offenders ranked by drain."""
+
+    __slots__ = ("performed", "capacity_mah", "computed_mah", "offenders", "wakelocks",
+                 "kernel_wakelocks", "wakeup_reasons", "issues")
+
+    def __init__(self):
+        self.performed = False
+        self.capacity_mah = 0.0
+        # Total drain estimated since the last charge
+        self.computed_mah = 0.0
+        # UIDs by power_mah; those linked to a finding come first
+        self.offenders: List[BatteryUid] = []
+        self.wakelocks: List[BatteryWakelock] = []
+        self.kernel_wakelocks: List[BatteryWakelock] = []
+        self.wakeup_reasons: List[BatteryWakelock] = []
+        self.issues: List[str] = []
+
+
+class WakeupAnalysis(ResultBase):
+    """Detailed result of the wakeup analysis."""
+
+    __slots__ = ("wakeup_sources", "dmesg_wakeups", "power_management", "logcat_wakeups",
+                 "irq_wakeups", "sampled", "wakelocks", "battery", "conclusion",
+                 "baseline_outliers")
+
+    def __init__(self):
+        self.wakeup_sources = WakeupSourcesResult()
+        self.dmesg_wakeups = DmesgWakeupsResult()
+        self.power_management = PowerResult()
+        self.logcat_wakeups = LogcatWakeupsResult()
+        self.irq_wakeups = IrqResult()
+        self.sampled = SampledResult()
+        self.wakelocks = WakelockCorrelationResult()
+        self.battery = BatteryStatsResult()
+        self.conclusion = ""
+        # Filled by the pipeline when the case is scored against a fleet baseline
+        self.baseline_outliers: Optional[List[Dict[str, Any]]] = None
@@ -0,0 +1,8 @@
+"""
+Android Power Diagnosis Runner
+
+Runs any set of diagnosis modules in one process, sharing evidence collection
+and log parsing between them.
+"""
+
+__version__ = "0.1.0"
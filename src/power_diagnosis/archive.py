@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Case Archive Tool
+
+Packs case directories and bugreport zips into single-file case archives
+(see ``common.case_archive``) and inspects them. Archives are read directly
+by every diagnosis tool: ``--case-dir case.pcase`` and ``--batch`` both accept
+them.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+from common.case_archive import ARCHIVE_SUFFIX, case_archive
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build and configure the command-line argument parser.
+
+    Returns:
+        argparse.ArgumentParser: Configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        description="Pack and inspect single-file power diagnosis case archives",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Pack every case below ./cases into ./archives, storing the analysis results too
+  python bin/power_archive pack ./cases --out-dir ./archives --analyze
+
+  # Metadata, artifacts and stored results of an archive
+  python bin/power_archive info ./archives/case1.pcase
+
+  # Lines 5000-5100 of the kernel log (only the blocks holding them are read)
+  python bin/power_archive cat ./archives/case1.pcase dmesg.txt --first 5000 --count 101
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack = sub.add_parser("pack", help="Pack case directories and bugreport zips into archives")
+    pack.add_argument("roots", nargs="+", help="Case directories, bugreport zips or directories containing cases")
+    pack.add_argument("--out-dir", default="", help="Directory of the archives (default: next to each case)")
+    pack.add_argument("--analyze", action="store_true", help="Also run the analyzers and store their results")
+    pack.add_argument("--modules", default="", help="Comma-separated modules for --analyze (default: all)")
+
+    info = sub.add_parser("info", help="Show the metadata, artifacts and stored results of an archive")
+    info.add_argument("archive", help="Case archive")
+
+    cat = sub.add_parser("cat", help="Print an artifact (or a line range of it)")
+    cat.add_argument("archive", help="Case archive")
+    cat.add_argument("name", help="Artifact name (e.g. dmesg.txt)")
+    cat.add_argument("--first", type=int, default=1, help="First line (1-based, default: 1)")
+    cat.add_argument("--count", type=int, default=None, help="Number of lines (default: to the end)")
+
+    results = sub.add_parser("results", help="Print the stored results as JSON")
+    results.add_argument("archive", help="Case archive")
+    results.add_argument("--module", default="", help="Only this module")
+    return parser
+
+
+def analyze_archive(path: str, modules: str = "") -> None:
+    """
+    Run the selected analyzers on an archive (no reports) and store their results in it.
+
+    Args:
+        path: Case archive
+        modules: Comma-separated module names (default: all)
+    """
+    from common.collector import AdbEvidenceCollector, union_artifacts
+    from common.logs import LogStore
+    from common.output import module_result
+    from common.pipeline import run_module
+    from common.registry import registry
+
+    selected = registry.select([m for m in modules.split(",") if m])
+    wanted = union_artifacts(*(m.artifacts for m in selected))
+    case_dir, artifacts = AdbEvidenceCollector().load_existing(path, wanted)
+    logs = LogStore(artifacts)
+    results = {}
+    for module in selected:
+        failed, reasons, detailed, _ = run_module(
+            module, case_dir, artifacts, logs, enable_ai=False, render=False
+        )
+        results[module.name] = module_result(failed, reasons, detailed.to_dict())
+    case_archive(path).add_results(results)
+
+
+def pack_cases(roots, out_dir: str = "", analyze: bool = False, modules: str = "") -> int:
+    """
+    Pack every case below ``roots`` into an archive.
+
+    Returns:
+        int: Number of archives written
+    """
+    from common.collector import find_case_dirs, pack_case
+
+    count = 0
+    for root in roots:
+        for case in find_case_dirs(root):
+            if case.endswith(ARCHIVE_SUFFIX):
+                continue
+            out_path = None
+            if out_dir:
+                Path(out_dir).mkdir(parents=True, exist_ok=True)
+                name = Path(case).stem if os.path.isfile(case) else Path(case).name
+                out_path = str(Path(out_dir) / f"{name}{ARCHIVE_SUFFIX}")
+            path = pack_case(case, out_path)
+            if analyze:
+                analyze_archive(path, modules)
+            print(f"[PACK] {case} → {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+            count += 1
+    return count
+
+
+def show_info(path: str) -> None:
+    """Print the metadata, artifact table and stored results of an archive."""
+    archive = case_archive(path)
+    print(f"{'Archive':<18}: {archive.path}")
+    print(f"{'Packed':<18}: {archive.created} from {archive.source}")
+    for key, value in archive.info.items():
+        print(f"{key:<18}: {value}")
+    print(f"\n{'artifact':<26} {'lines':>10} {'bytes':>12} {'stored':>12} {'blocks':>7}")
+    for name, entry in archive.artifacts.items():
+        stored = sum(block[1] for block in entry["blocks"])
+        print(f"{name:<26} {entry['lines']:>10} {entry['size']:>12} {stored:>12} {len(entry['blocks']):>7}")
+    if archive.results:
+        print(f"\n{'Results':<18}: {', '.join(archive.results)}")
+
+
+def main(args) -> None:
+    """
+    Run one archive-tool command.
+
+    Args:
+        args: Command line arguments parsed by argparse
+    """
+    if args.command == "pack":
+        count = pack_cases(args.roots, args.out_dir, args.analyze, args.modules)
+        print(f"[PACK] {count} case(s) archived")
+    elif args.command == "info":
+        show_info(args.archive)
+    elif args.command == "cat":
+        archive = case_archive(args.archive)
+        if args.name not in archive.artifacts:
+            raise SystemExit(f"[ERROR] {args.archive}: no artifact {args.name} "
+                             f"(artifacts: {', '.join(archive.artifacts) or 'none'})")
+        for line in archive.lines(args.name, args.first, args.count):
+            print(line)
+    elif args.command == "results":
+        archive = case_archive(args.archive)
+        if args.module and args.module not in archive.results:
+            raise SystemExit(f"[ERROR] {args.archive}: no stored result for module {args.module} "
+                             f"(results: {', '.join(archive.results) or 'none'})")
+        names = [args.module] if args.module else list(archive.results)
+        print(json.dumps({name: archive.result(name) for name in names}, indent=2))
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Command Line Interface for the Android Power Diagnosis Runner
+
+This module defines the command-line arguments for running several diagnosis
+modules together.
+"""
+import argparse
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build and configure the command-line argument parser.
+    
+    Returns:
+        argparse.ArgumentParser: Configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        description="Android Power Diagnosis Tool (runs several diagnoses in one pass)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Collect once and run every diagnosis
+  python bin/power_diagnosis
+
+  # Run suspend and wakeup diagnosis on existing logs
+  python bin/power_diagnosis --modules suspend,wakeup --case-dir ./cases/suspend/test_case1
+
+  # Analyze every case below a directory and index the results
+  python bin/power_diagnosis --batch ./cases --index-db ./reports/results.db
+
+  # Sample kernel counters on the device for 30 minutes (USB may be unplugged meanwhile)
+  python bin/power_diagnosis --modules wakeup --sample 1800 --sample-period 30
+
+  # Analyze an adb bugreport zip in place (sections are streamed, nothing is unpacked)
+  python bin/power_diagnosis --case-dir ./bugreport-oriole-2025-11-15.zip
+
+  # Only the ten minutes around a suspend failure seen at 08:42 (dmesg -T log)
+  python bin/power_diagnosis --case-dir ./cases/suspend/test_case1 --around "2025-11-15 08:42:00" --radius 300
+
+  # Verdicts only, one JSON line per case (no Markdown/HTML)
+  python bin/power_diagnosis --batch ./cases --format jsonl
+
+  # AI triage of a batch: 8 requests in flight, at most 4 started per second
+  python bin/power_diagnosis --batch ./cases --enable-ai --ai-concurrency 8 --ai-rate 4
+        """
+    )
+    
+    parser.add_argument(
+        "--modules",
+        default="",
+        help="Comma-separated diagnosis modules to run (default: every registered module)"
+    )
+    
+    parser.add_argument(
+        "--list-modules",
+        action="store_true",
+        help="List registered diagnosis modules and exit"
+    )
+    
+    parser.add_argument(
+        "--adb", 
+        default="adb",
+        help="Path to ADB executable (default: 'adb')"
+    )
+    
+    parser.add_argument(
+        "--device", 
+        default="",
+        help="Target device serial number (empty for default device)"
+    )
+    
+    parser.add_argument(
+        "--out", 
+        default="./reports",
+        help="Output directory for reports (default: './reports')"
+    )
+    
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="When collecting: wait SECONDS between the first /proc/interrupts and /d/suspend_stats "
+             "snapshots and the rest of the collection, so IRQ and suspend counts cover a test "
+             "interval (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="When collecting: run an on-device sampler of suspend_stats, wakeup_sources and "
+             "/proc/interrupts for SECONDS (whole seconds), with no ADB traffic until it finishes "
+             "(default: off)"
+    )
+    
+    parser.add_argument(
+        "--sample-period",
+        type=float,
+        default=10,
+        metavar="SECONDS",
+        help="Seconds between on-device samples (default: 10)"
+    )
+    
+    parser.add_argument(
+        "--compress",
+        choices=["gz", "zst", "none"],
+        default="gz",
+        help="When collecting: store the log files compressed (.gz, or .zst with Python 3.14+ or "
+             "the zstandard package); analysis reads them transparently (default: gz)"
+    )
+    
+    parser.add_argument(
+        "--case-dir",
+        default="",
+        help="Path to a directory containing pre-collected log files, an adb bugreport zip or a .pcase case archive. Each module analyzes whatever logs are available and skips missing ones."
+    )
+    
+    parser.add_argument(
+        "--batch",
+        default="",
+        metavar="ROOT",
+        help="Analyze every case found below ROOT (each directory holding known log files, each bugreport*.zip and each .pcase case archive)"
+    )
+    
+    parser.add_argument(
+        "--index-db",
+        default="",
+        metavar="PATH",
+        help="Also record structured results in this SQLite results index (see bin/power_query)"
+    )
+    
+    parser.add_argument(
+        "--baseline",
+        default="",
+        metavar="PATH",
+        help="Score each case against this fleet baseline file and flag outliers in the report"
+    )
+    
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Merge the analyzed case(s) into the --baseline file after scoring"
+    )
+    
+    parser.add_argument(
+        "--reference-build",
+        default="",
+        help="Baseline build to compare against (default: all builds of the same device model)"
+    )
+    
+    parser.add_argument(
+        "--since",
+        default="",
+        metavar="TIME",
+        help="Analyze kernel logs from TIME on: seconds since boot for [sec.usec] logs, "
+             "or a date/time such as '2025-11-15 08:30:00' for dmesg -T logs"
+    )
+    
+    parser.add_argument(
+        "--until",
+        default="",
+        metavar="TIME",
+        help="Analyze kernel logs up to TIME (same formats as --since)"
+    )
+    
+    parser.add_argument(
+        "--last",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Analyze only the final SECONDS of the kernel logs"
+    )
+    
+    parser.add_argument(
+        "--around",
+        default="",
+        metavar="TIME",
+        help="Analyze the kernel logs within --radius seconds of TIME (e.g. a suspend failure)"
+    )
+    
+    parser.add_argument(
+        "--radius",
+        type=float,
+        default=300,
+        help="Half-width in seconds of the --around window (default: 300)"
+    )
+    
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help="Also export the power events of the case (suspend slices, wakeup IRQs and sources, "
+             "wakelock holds, app wakeups, sampler counters) as Chrome trace-event JSON to "
+             "power_timeline.json in the case directory, for ui.perfetto.dev or chrome://tracing"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        default="",
+        metavar="PATH",
+        help="Record per-stage timing spans and write them as Chrome trace-event JSON to PATH (a summary table is printed too)"
+    )
+    
+    parser.add_argument(
+        "--enable-ai",
+        action="store_true",
+        help="Enable AI-powered analysis in the reports (requires QGenie configuration; ignored with --format json/jsonl)"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["report", "json", "jsonl"],
+        default="report",
+        help="Output: Markdown/HTML reports (default), or the verdict and analysis as JSON on stdout "
+             "without generating reports (jsonl: one line per case)"
+    )
+    
+    parser.add_argument(
+        "--ai-concurrency",
+        type=int,
+        default=4,
+        help="AI requests kept in flight; batch mode also analyzes this many cases at once (default: 4)"
+    )
+    
+    parser.add_argument(
+        "--ai-rate",
+        type=float,
+        default=2.0,
+        help="Maximum AI requests started per second, 0 for unlimited (default: 2)"
+    )
+    
+    parser.add_argument(
+        "--ai-endpoint",
+        default="",
+        metavar="URL",
+        help="Send AI requests to this OpenAI-style chat completions URL instead of QGenie "
+             "(e.g. the local stub: python -m common.ai_dispatch --stub 127.0.0.1:9000)"
+    )
+    
+    parser.add_argument(
+        "--serve",
+        default="",
+        metavar="HOST:PORT",
+        help="Run as a long-lived local HTTP service instead of a single diagnosis (e.g. 127.0.0.1:8765)"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Service mode: number of concurrent analyses (default: 4)"
+    )
+    
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Service mode: requests allowed to wait for a worker before answering 503 (default: 16)"
+    )
+    
+    parser.add_argument(
+        "--max-upload",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="Service mode: largest request body accepted, in MiB, before answering 413 (default: 256)"
+    )
+    
+    return parser
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Android Power Diagnosis Runner
+
+Runs several diagnosis modules against one case. Evidence files are collected
+once as the union of what the selected modules need, and every module is fed
+from the same ``LogStore`` so shared logs such as ``dmesg.txt`` are read and
+tokenized a single time. Modules come from the manifest registry and are only
+imported when selected.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from common.collector import AdbEvidenceCollector, find_case_dirs, read_case_info, union_artifacts
+from common.logs import LogStore
+from common.output import case_record, json_output, module_result
+from common.registry import registry
+from common.timestamps import format_time, parse_time, timestamp_index
+from common import trace
+from power_diagnosis.cli import build_parser
+
+
+def list_modules() -> None:
+    """Print every registered diagnosis module without importing any of them."""
+    for module in registry.modules.values():
+        print(f"{module.name:<12} {module.description}")
+        print(f"{'':<12} artifacts: {', '.join(module.artifacts)}")
+        if module.sections:
+            print(f"{'':<12} sections : {', '.join(module.sections)}")
+
+
+def main(args):
+    """
+    Main function that runs the selected diagnosis modules on one case.
+    
+    Args:
+        args: Command line arguments parsed by argparse
+        
+    Returns:
+        Dict: Mapping of module name to generated HTML report path (per case
+        directory in batch mode)
+    """
+    if args.list_modules:
+        list_modules()
+        return {}
+    
+    if args.serve:
+        from power_diagnosis.service import serve
+        host, _, port = args.serve.rpartition(":")
+        serve(host or "127.0.0.1", int(port), work_dir=f"{args.out}/service",
+              workers=args.workers, queue_size=args.queue_size,
+              max_upload=args.max_upload * 1024 * 1024)
+        return {}
+    
+    if args.trace:
+        trace.enable()
+    try:
+        with json_output(args.format, batch=bool(args.batch)) as writer:
+            return _run(args, writer)
+    finally:
+        if args.trace:
+            tracer = trace.disable()
+            tracer.write_chrome_trace(args.trace)
+            print("\n[TRACE] Stage summary")
+            print(tracer.summary())
+            print(f"[TRACE] Chrome trace: {args.trace}")
+
+
+def _run(args, writer=None):
+    """Collect or load the case(s) once and run every selected module on them."""
+    names = [m.strip() for m in args.modules.split(",") if m.strip()]
+    modules = registry.select(names)
+    
+    # Collect the union of the artifacts every selected module needs, once
+    wanted = union_artifacts(*(m.artifacts for m in modules))
+    collector = AdbEvidenceCollector(
+        adb=args.adb,
+        device=args.device,
+        out_dir=args.out,
+        interval=args.interval,
+        compression=args.compress,
+        sample_duration=args.sample,
+        sample_period=args.sample_period,
+    )
+    store = None
+    if args.index_db:
+        from common.store import ResultStore
+        store = ResultStore(args.index_db)
+    baseline = None
+    if args.baseline:
+        from common.baseline import Baseline
+        baseline = Baseline.load(args.baseline)
+    
+    if args.enable_ai and writer is not None:
+        # JSON records carry no AI text: do not spend requests on it
+        print(f"[WARN] --enable-ai ignored with --format {args.format}")
+        args.enable_ai = False
+    dispatcher = None
+    if args.enable_ai:
+        # One shared client for every AI request of the run
+        from common import ai
+        from common.ai_dispatch import AIDispatcher, make_backend
+        dispatcher = AIDispatcher(make_backend(args.ai_endpoint),
+                                  max_in_flight=args.ai_concurrency, rate=args.ai_rate)
+        ai.set_dispatcher(dispatcher)
+    
+    reports = {}
+    try:
+        if args.batch:
+            # With AI enabled, cases run concurrently so requests overlap and
+            # throughput is bounded by the dispatcher, not serial round trips
+            workers = args.ai_concurrency if dispatcher is not None else 1
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+                futures = {}
+                for case in find_case_dirs(args.batch):
+                    case_dir, artifacts = collector.load_existing(case, wanted)
+                    futures[pool.submit(_run_case, case_dir, artifacts, modules, args, store, baseline, writer)] = case_dir
+                for future in as_completed(futures):
+                    reports[futures[future]] = future.result()
+            print(f"[BATCH] {len(reports)} case(s) analyzed")
+            return reports
+        
+        with trace.span("collect", cat="collect"):
+            if args.case_dir:
+                case_dir, artifacts = collector.load_existing(args.case_dir, wanted)
+            else:
+                case_dir, artifacts = collector.collect(wanted, prefix="power_diag")
+        return _run_case(case_dir, artifacts, modules, args, store, baseline, writer)
+    finally:
+        if dispatcher is not None:
+            ai.set_dispatcher(None)
+            dispatcher.close()
+            print(f"[AI] {dispatcher.stats}")
+        if store is not None:
+            store.close()
+        if baseline is not None and args.update_baseline:
+            baseline.save(args.baseline)
+
+
+def _run_case(case_dir, artifacts, modules, args, store=None, baseline=None, writer=None):
+    """
+    Run the selected modules on one case sharing a single ``LogStore``.
+    
+    With a JSON ``writer`` no reports are rendered; the case record is written
+    instead and module names map to empty report paths.
+    
+    Returns:
+        Dict[str, str]: Mapping of module name to generated HTML report path
+    """
+    from common.pipeline import run_module
+    
+    # One shared store: each file is read and split at most once for all modules
+    logs = LogStore(artifacts)
+    info = read_case_info(case_dir)
+    if args.reference_build:
+        info["Reference Build"] = args.reference_build
+    logs = _apply_window(logs, args, info, case_dir)
+    reports = {}
+    results = {}
+    for module in modules:
+        failed, reasons, detailed, html_path = run_module(
+            module, case_dir, artifacts, logs, enable_ai=args.enable_ai,
+            render=writer is None, baseline=baseline, case_info=info,
+        )
+        results[module.name] = module_result(failed, reasons, detailed)
+        if store is not None:
+            store.record(case_dir, module.name, failed, detailed, artifacts, info)
+        if baseline is not None and args.update_baseline:
+            baseline.update(module.name, failed, detailed,
+                            build=info.get("Build Fingerprint", ""),
+                            model=info.get("Device Model", ""))
+        status = "ISSUES DETECTED" if failed else "OK"
+        print(f"[{module.name.upper()}] {status} → {html_path or case_dir}")
+        reports[module.name] = html_path
+    if args.timeline:
+        _write_timeline(case_dir, artifacts, info)
+    if writer is not None:
+        writer.write(case_record(case_dir, results, info))
+    return reports
+
+
+def _write_timeline(case_dir, artifacts, info):
+    """Export the power events of one case as a trace-event timeline next to its reports."""
+    from common.timeline import TIMELINE_NAME, export_timeline
+    
+    paths, count = export_timeline(artifacts, str(Path(case_dir) / TIMELINE_NAME), info)
+    print(f"[TIMELINE] {count} events → {', '.join(paths)}")
+
+
+def _apply_window(logs, args, info, case_dir):
+    """
+    Restrict the kernel logs to the --since/--until/--last/--around window, if any.
+    
+    The window is resolved against the timestamp index of ``dmesg.txt`` and
+    recorded in the case info so result records state what was analyzed.
+    A time on the other clock than the log's (seconds since boot for a
+    ``dmesg -T`` log, or a date for a ``[sec.usec]`` log) ends the run with an error.
+    
+    Returns:
+        LogStore: ``logs`` itself, or a windowed view of it
+    """
+    if not (args.since or args.until or args.last or args.around):
+        return logs
+    index = timestamp_index(logs, "dmesg.txt")
+    try:
+        if args.around:
+            start, end = index.around(parse_time(args.around, index.kind), args.radius)
+        elif args.last:
+            start, end = index.last(args.last)
+        else:
+            start = parse_time(args.since, index.kind) if args.since else None
+            end = parse_time(args.until, index.kind) if args.until else None
+    except ValueError as e:
+        raise SystemExit(f"[ERROR] {case_dir}: {e}")
+    bounds = [format_time(t, index.kind) if t is not None else "…" for t in (start, end)]
+    info["Analysis Window"] = f"{bounds[0]} to {bounds[1]}"
+    print(f"[WINDOW] {info['Analysis Window']}")
+    return logs.windowed(start, end)
+
+
+def main_cli():
+    """
+    Entry point for the command-line interface.
+    """
+    parser = build_parser()
+    args = parser.parse_args()
+    main(args)
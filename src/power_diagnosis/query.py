@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Results Index Query Tool
+
+Builds and queries the SQLite results index written by ``common.store``.
+Aggregate questions are answered from indexed tables without touching the
+original logs.
+"""
+import argparse
+import time
+
+from common.store import ResultStore
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build and configure the command-line argument parser.
+    
+    Returns:
+        argparse.ArgumentParser: Configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        description="Query the power diagnosis results index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Index every case below ./cases (analysis only, no reports)
+  python bin/power_query index ./cases
+
+  # Which wakelocks blocked suspend most often since October?
+  python bin/power_query top-wakelocks --since 2025-10-01
+
+  # Is the new build worse than the previous one?
+  python bin/power_query regressions --baseline ./reports/baseline.json --build NEW --against OLD
+
+  # Arbitrary SQL
+  python bin/power_query sql "SELECT module, COUNT(*) FROM results GROUP BY module"
+        """
+    )
+    parser.add_argument(
+        "--db",
+        default="./reports/results.db",
+        help="Path of the SQLite results index (default: './reports/results.db')"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    index = sub.add_parser("index", help="Analyze case directories and record their results")
+    index.add_argument("roots", nargs="+", help="Case directories or directories containing cases")
+    index.add_argument("--modules", default="", help="Comma-separated modules (default: all)")
+    index.add_argument(
+        "--reanalyze",
+        action="store_true",
+        help="Run the analyzers even on case archives holding stored results (power_archive pack --analyze)"
+    )
+    
+    for name, help_text in (
+        ("top-wakelocks", "Wakelocks that blocked suspend in the most cases"),
+        ("top-failures", "Kernel suspend failure messages seen in the most cases"),
+        ("top-sources", "Wakeup sources with the highest total wakeup count"),
+        ("summary", "Per-module case and failure counts"),
+    ):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--since", default="", help="Only cases collected at or after this ISO date")
+        cmd.add_argument("--limit", type=int, default=10, help="Maximum number of rows (default: 10)")
+    
+    regressions = sub.add_parser("regressions", help="Compare two builds in a fleet baseline file")
+    regressions.add_argument("--baseline", required=True, help="Baseline file written by power_diagnosis --update-baseline")
+    regressions.add_argument("--build", required=True, help="New build fingerprint")
+    regressions.add_argument("--against", required=True, help="Previous build fingerprint")
+    
+    sql = sub.add_parser("sql", help="Run a read-only SQL query")
+    sql.add_argument("query", help="SQL statement")
+    return parser
+
+
+def _print_table(columns, rows) -> None:
+    """Print rows as an aligned plain-text table."""
+    widths = [len(c) for c in columns]
+    for row in rows:
+        widths = [max(w, len(str(v))) for w, v in zip(widths, row)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def index_cases(store: ResultStore, roots, modules: str = "", reanalyze: bool = False) -> int:
+    """
+    Analyze every case below ``roots`` (without rendering reports) and record it.
+    
+    Case archives holding a stored result for a module (see
+    ``power_archive pack --analyze``) are recorded from it instead of being
+    analyzed again.
+    
+    Args:
+        store: Results index
+        roots: Case directories, bugreport zips, case archives or directories containing cases
+        modules: Comma-separated module names (default: all)
+        reanalyze: Ignore the stored results of case archives
+    
+    Returns:
+        int: Number of cases indexed
+    """
+    from common.case_archive import case_archive, is_case_archive
+    from common.collector import AdbEvidenceCollector, find_case_dirs, read_case_info, union_artifacts
+    from common.logs import LogStore
+    from common.pipeline import run_module
+    from common.registry import registry
+    
+    selected = registry.select([m for m in modules.split(",") if m])
+    wanted = union_artifacts(*(m.artifacts for m in selected))
+    collector = AdbEvidenceCollector()
+    count = 0
+    for root in roots:
+        for case_dir in find_case_dirs(root):
+            loaded_dir, artifacts = collector.load_existing(case_dir, wanted)
+            info = read_case_info(loaded_dir)
+            logs = LogStore(artifacts)
+            archive = case_archive(case_dir) if is_case_archive(case_dir) and not reanalyze else None
+            for module in selected:
+                stored = archive.result(module.name) if archive is not None else None
+                if stored is not None:
+                    failed, detailed = stored["failed"], stored["detailed_analysis"]
+                else:
+                    failed, _, detailed, _ = run_module(
+                        module, loaded_dir, artifacts, logs, enable_ai=False, render=False
+                    )
+                store.record(loaded_dir, module.name, failed, detailed, artifacts, info)
+            count += 1
+    return count
+
+
+def main(args) -> None:
+    """
+    Run one query-tool command.
+    
+    Args:
+        args: Command line arguments parsed by argparse
+    """
+    if args.command == "regressions":
+        from common.baseline import Baseline
+        found = Baseline.load(args.baseline).compare_builds(args.build, args.against)
+        columns = ["metric", "new_mean", "new_cases", "old_mean", "old_cases", "t"]
+        _print_table(columns, [[r[c] for c in columns] for r in found])
+        return
+    
+    store = ResultStore(args.db)
+    try:
+        start = time.perf_counter()
+        if args.command == "index":
+            count = index_cases(store, args.roots, args.modules, args.reanalyze)
+            print(f"[INDEX] {count} case(s) recorded in {args.db}")
+        elif args.command == "top-wakelocks":
+            _print_table(["wakelock", "cases"], store.top_wakelocks(args.limit, args.since))
+        elif args.command == "top-failures":
+            _print_table(["message", "cases"], store.top_failures(args.limit, args.since))
+        elif args.command == "top-sources":
+            _print_table(["source", "wakeups", "cases"], store.top_wakeup_sources(args.limit, args.since))
+        elif args.command == "summary":
+            _print_table(["module", "cases", "failed"], store.summary(args.since))
+        elif args.command == "sql":
+            _print_table(*store.query(args.query))
+        print(f"\n({(time.perf_counter() - start) * 1e3:.1f} ms)")
+    finally:
+        store.close()
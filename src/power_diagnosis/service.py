@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local Diagnosis Service
+
+Long-running HTTP daemon that keeps imports, analyzers and report machinery
+warm between requests. It accepts either a case directory on the local disk or
+an uploaded tarball of artifacts, runs the requested diagnosis modules on a
+bounded worker pool and returns the analysis plus report paths as JSON.
+
+Endpoints:
+    GET  /health                  Service status, queue depth and modules
+    POST /analyze                 JSON body {"case_dir": ..., "modules": [...],
+                                  "enable_ai": false, "render": true}
+    POST /analyze?modules=a,b     Tarball body (application/x-tar or
+                                  application/gzip); extracted to a temporary
+                                  case under the work dir, which is removed
+                                  before answering unless ``keep=1``
+
+Requests are admitted only while a worker or queue slot is free (503
+otherwise), before any upload is read; bodies larger than ``max_upload`` bytes
+are refused with 413 and other content types with 415.
+"""
+import io
+import json
+import shutil
+import tarfile
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from common.collector import AdbEvidenceCollector, union_artifacts
+from common.logs import LogStore
+from common.pipeline import run_module
+from common.registry import registry
+
+
+class QueueFullError(Exception):
+    """Raised when the service already holds its maximum number of requests."""
+
+
+class CaseNotFoundError(Exception):
+    """Raised when the requested case directory (or bugreport/archive) does not exist."""
+
+
+# Media types accepted for tarball uploads
+UPLOAD_TYPES = ("application/x-tar", "application/gzip", "application/x-gzip", "application/x-compressed-tar")
+
+
+class DiagnosisService:
+    """
+    Runs diagnosis requests on a bounded worker pool with a bounded queue.
+    """
+
+    def __init__(self, work_dir: str = "./reports/service", workers: int = 4, queue_size: int = 16,
+                 max_upload: int = 256 * 1024 * 1024):
+        """
+        Initialize the service and warm up every registered module.
+        
+        Args:
+            work_dir: Directory where uploaded tarballs are extracted
+            workers: Number of requests analyzed concurrently
+            queue_size: Maximum number of requests waiting for a worker
+            max_upload: Largest request body accepted, in bytes
+        """
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_upload = max_upload
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="diag")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """Import every module's analyzer and report code once, up front."""
+        for module in registry.modules.values():
+            _ = module.analyzer, module.reporter
+        from common.report.html_renderer import HtmlRenderer  # noqa: F401
+
+    @property
+    def pending(self) -> int:
+        """Number of requests queued or running."""
+        return self._pending
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one of the ``workers + queue_size`` request slots for the block.
+        
+        Raises:
+            QueueFullError: If every slot is taken
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(f"queue full ({self.workers} running, {self.queue_size} queued)")
+        with self._lock:
+            self._pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def run(self, case_dir: str, modules: Optional[List[str]] = None,
+            enable_ai: bool = False, render: bool = True) -> Dict[str, Any]:
+        """
+        Analyze a case on the worker pool and wait for the result (the caller holds a ``slot``).
+        
+        Raises:
+            CaseNotFoundError: If ``case_dir`` does not exist
+        """
+        if not Path(case_dir).exists():
+            raise CaseNotFoundError(f"case not found: {case_dir}")
+        return self._pool.submit(self.analyze, case_dir, modules, enable_ai, render).result()
+
+    def submit(self, case_dir: str, modules: Optional[List[str]] = None,
+               enable_ai: bool = False, render: bool = True) -> Dict[str, Any]:
+        """
+        Analyze a case on the worker pool and wait for the result.
+        
+        Raises:
+            CaseNotFoundError: If ``case_dir`` does not exist
+            QueueFullError: If ``workers + queue_size`` requests are already pending
+        """
+        if not Path(case_dir).exists():
+            raise CaseNotFoundError(f"case not found: {case_dir}")
+        with self.slot():
+            return self.run(case_dir, modules, enable_ai, render)
+
+    def analyze(self, case_dir: str, modules: Optional[List[str]] = None,
+                enable_ai: bool = False, render: bool = True) -> Dict[str, Any]:
+        """
+        Run the selected modules on one case directory.
+        
+        Returns:
+            Dict: ``{"case_dir": ..., "results": {module: {failed, reasons,
+            detailed_analysis, report}}}``
+            
+        Raises:
+            CaseNotFoundError: If ``case_dir`` does not exist
+        """
+        if not Path(case_dir).exists():
+            raise CaseNotFoundError(f"case not found: {case_dir}")
+        selected = registry.select(modules)
+        wanted = union_artifacts(*(m.artifacts for m in selected))
+        case_dir, artifacts = AdbEvidenceCollector().load_existing(case_dir, wanted)
+        logs = LogStore(artifacts)
+        results = {}
+        for module in selected:
+            failed, reasons, detailed, html_path = run_module(
+                module, case_dir, artifacts, logs, enable_ai=enable_ai, render=render
+            )
+            results[module.name] = {
+                "failed": failed,
+                "reasons": reasons,
+                "detailed_analysis": detailed.to_dict(),
+                "report": html_path,
+            }
+        return {"case_dir": case_dir, "results": results}
+
+    def extract_upload(self, data: bytes) -> str:
+        """
+        Extract an uploaded (optionally gzip-compressed) tarball into a new case directory.
+        
+        Only regular files are extracted and only by their base name, so archive
+        members cannot escape the case directory. The directory is removed again
+        if the tarball cannot be read; callers remove it when they are done.
+        
+        Returns:
+            str: Path of the new case directory
+            
+        Raises:
+            tarfile.TarError: If the body is not a (gzip-compressed) tarball
+        """
+        case_dir = Path(tempfile.mkdtemp(prefix="upload_", dir=self.work_dir))
+        try:
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+                for member in tar.getmembers():
+                    if not member.isfile():
+                        continue
+                    src = tar.extractfile(member)
+                    if src is not None:
+                        (case_dir / Path(member.name).name).write_bytes(src.read())
+        except BaseException:
+            shutil.rmtree(case_dir, ignore_errors=True)
+            raise
+        return str(case_dir)
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running requests."""
+        self._pool.shutdown(wait=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP front-end for ``DiagnosisService``."""
+
+    service: DiagnosisService = None
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {
+            "status": "ok",
+            "pending": self.service.pending,
+            "workers": self.service.workers,
+            "queue_size": self.service.queue_size,
+            "modules": registry.names(),
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/analyze":
+            self._reply(404, {"error": "not found"})
+            return
+        query = parse_qs(url.query)
+        content_type = self.headers.get("Content-Type", "application/json").split(";")[0].strip().lower()
+        upload = content_type in UPLOAD_TYPES
+        if not upload and content_type != "application/json":
+            self._reply(415, {"error": f"unsupported content type: {content_type} "
+                                       f"(expected application/json or {', '.join(UPLOAD_TYPES)})"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reply(411, {"error": "Content-Length required"})
+            return
+        if length > self.service.max_upload:
+            self._reply(413, {"error": f"body of {length} bytes exceeds the {self.service.max_upload} byte limit"})
+            return
+        keep = query.get("keep", ["0"])[0] in ("1", "true")
+        try:
+            with self.service.slot():
+                body = self.rfile.read(length)
+                if upload:
+                    case_dir = self.service.extract_upload(body)
+                    modules = [m for m in query.get("modules", [""])[0].split(",") if m] or None
+                    enable_ai = query.get("enable_ai", ["0"])[0] in ("1", "true")
+                    # Reports of an upload only outlive the request when it is kept
+                    render = query.get("render", ["1" if keep else "0"])[0] in ("1", "true")
+                    try:
+                        result = self.service.run(case_dir, modules, enable_ai, render)
+                    finally:
+                        # Removed before answering (and while holding the slot)
+                        if not keep:
+                            shutil.rmtree(case_dir, ignore_errors=True)
+                else:
+                    request = json.loads(body or b"{}")
+                    modules = request.get("modules") or None
+                    enable_ai = bool(request.get("enable_ai", False))
+                    render = bool(request.get("render", True))
+                    result = self.service.run(request["case_dir"], modules, enable_ai, render)
+        except QueueFullError as e:
+            self._reply(503, {"error": str(e)})
+            return
+        except CaseNotFoundError as e:
+            self._reply(404, {"error": str(e)})
+            return
+        except (KeyError, ValueError, tarfile.TarError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, result)
+
+    def log_message(self, format, *args):
+        print(f"[SERVICE] {self.address_string()} {format % args}")
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, work_dir: str = "./reports/service",
+          workers: int = 4, queue_size: int = 16, max_upload: int = 256 * 1024 * 1024) -> None:
+    """
+    Run the diagnosis service until interrupted.
+    
+    Args:
+        host: Interface to bind (loopback by default)
+        port: TCP port to listen on
+        work_dir: Directory for extracted uploads
+        workers: Number of concurrent analyses
+        queue_size: Maximum number of waiting requests before answering 503
+        max_upload: Largest request body accepted, in bytes (413 above it)
+    """
+    service = DiagnosisService(work_dir=work_dir, workers=workers, queue_size=queue_size,
+                               max_upload=max_upload)
+    handler = type("DiagnosisHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"[SERVICE] Listening on http://{host}:{port} "
+          f"({workers} workers, queue {queue_size}, modules: {', '.join(registry.names())})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
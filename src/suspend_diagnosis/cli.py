@@ -34,10 +34,35 @@ def build_parser() -> argparse.ArgumentParser:
         help="Output directory for reports (default: './reports')"
     )
     
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="When collecting: snapshot /d/suspend_stats, wait SECONDS, then collect the rest, "
+             "so step 1 judges only the suspends attempted during that test interval (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--compress",
+        choices=["gz", "zst", "none"],
+        default="gz",
+        help="When collecting: store the log files compressed (.gz, or .zst with Python 3.14+ or "
+             "the zstandard package); analysis reads them transparently (default: gz)"
+    )
+    
     parser.add_argument(
         "--case-dir",
         default="",
-        help="Path to a directory containing pre-collected log files (dmesg.txt, dumpsys_suspend.txt, suspend_stats.txt). Files can be partial - the tool will analyze whatever logs are available and skip missing ones."
+        help="Path to a directory containing pre-collected log files (dmesg.txt, dumpsys_suspend.txt, suspend_stats.txt), an adb bugreport zip or a .pcase case archive. Files can be partial - the tool will analyze whatever logs are available and skip missing ones."
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["report", "json", "jsonl"],
+        default="report",
+        help="Output: Markdown/HTML reports (default), or the verdict and analysis as JSON on stdout "
+             "without generating reports (jsonl: one line per case)"
     )
     
     return parser
@@ -6,9 +6,18 @@ This module provides functionality to analyze Android logs for suspend failures
 and extract information about wakeup sources.
 """
 import re
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Optional
 
-from common.types import WakeupSource, SuspendAnalysisResult
+from common.logs import LogStore
+from common.trace import span
+from common.types import (
+    DmesgResult,
+    SuspendAnalysis,
+    SuspendStatsResult,
+    WakelockResult,
+)
+from suspend_diagnosis.core.cycles import analyze_cycles
+from suspend_diagnosis.core.suspend_stats import failure_breakdown, parse_suspend_stats, stats_delta
 
 
 class SimpleAnalyzer:
@@ -17,34 +26,56 @@ class SimpleAnalyzer:
     """
 
     @staticmethod
-    def analyze_suspend_stats(suspend_stats_txt: str) -> Tuple[bool, str]:
+    def analyze_suspend_stats(suspend_stats_txt: str, before_txt: str = "") -> SuspendStatsResult:
         """
         Step 1: Check suspend_stats to see if suspend succeeded or failed.
         
+        With a snapshot taken at the start of the test interval, only the
+        suspends attempted during the interval are judged, so failures left
+        over from earlier (e.g. from boot) do not fail the case.
+        
         Args:
             suspend_stats_txt: Content of /d/suspend_stats
+            before_txt: Content of /d/suspend_stats at the start of the test
+                interval (empty for a single snapshot)
             
         Returns:
-            Tuple[bool, str]: (is_successful, analysis_message)
+            SuspendStatsResult: verdict, message and the parsed counters
         """
+        result = SuspendStatsResult(True)
         if not suspend_stats_txt.strip():
-            return False, "suspend_stats file is empty or not available"
+            result.message = "suspend_stats file is empty or not available"
+            return result
         
-        # Parse the stats
-        stats = {}
-        for line in suspend_stats_txt.splitlines():
-            if ":" in line:
-                key, value = line.split(":", 1)
-                stats[key.strip()] = value.strip()
+        stats = result.stats = parse_suspend_stats(suspend_stats_txt)
+        note = ""
+        if before_txt.strip():
+            result.delta = stats_delta(stats, parse_suspend_stats(before_txt))
+            if result.delta is None:
+                note = " (counters reset during the test interval, judging the last snapshot)"
         
-        # Check success count
-        success_count = int(stats.get("success", "0"))
-        fail_count = int(stats.get("fail", "0"))
+        delta = result.delta
+        if delta is not None:
+            counts = f"success: +{delta.success}, fail: +{delta.fail}"
+            if delta.fail > 0:
+                breakdown = failure_breakdown(delta)
+                result.message = (f"Suspend failed {delta.fail} time(s) during the test interval ({counts})"
+                                  + (f" - {breakdown}" if breakdown else ""))
+            elif delta.success > 0:
+                result.success = True
+                result.message = f"Suspend is working normally during the test interval ({counts})"
+            else:
+                result.message = f"No suspend attempted during the test interval ({counts})"
+            return result
         
-        if success_count > 0 and fail_count == 0:
-            return True, f"Suspend is working normally (success: {success_count}, fail: {fail_count})"
+        counts = f"success: {stats.success}, fail: {stats.fail}"
+        if stats.success > 0 and stats.fail == 0:
+            result.success = True
+            result.message = f"Suspend is working normally ({counts}){note}"
         else:
-            return False, f"Suspend has failures (success: {success_count}, fail: {fail_count})"
+            breakdown = failure_breakdown(stats)
+            result.message = f"Suspend has failures ({counts}){note}" + (f" - {breakdown}" if breakdown else "")
+        return result
     
     @staticmethod
     def analyze_wakelocks(dumpsys_suspend_txt: str) -> Tuple[bool, List[str]]:
@@ -86,29 +117,24 @@ class SimpleAnalyzer:
         return len(active_wakelocks) > 0, active_wakelocks
     
     @staticmethod
-    def analyze_dmesg(dmesg_txt: str) -> Dict[str, any]:
+    def analyze_dmesg(dmesg_txt: str, lines: Optional[List[str]] = None) -> DmesgResult:
         """
         Step 3: Analyze dmesg for suspend entry and failure details.
         Only called if Step 1 shows failure AND Step 2 shows no active wakelocks.
         
         Args:
             dmesg_txt: Content of dmesg log
+            lines: Already tokenized dmesg lines (shared parse); split from
+                ``dmesg_txt`` when omitted
             
         Returns:
-            Dict with keys:
-                - has_suspend_entry: bool
-                - has_suspend_failure: bool
-                - failure_messages: List[str]
+            DmesgResult: suspend entry/failure flags and the failure messages
         """
-        result = {
-            "has_suspend_entry": False,
-            "has_suspend_failure": False,
-            "failure_messages": []
-        }
+        result = DmesgResult(performed=True)
         
         # Check for suspend entry
         if "PM: suspend entry" in dmesg_txt or "PM: Syncing filesystems" in dmesg_txt:
-            result["has_suspend_entry"] = True
+            result.has_suspend_entry = True
         
         # Check for suspend failures
         failure_patterns = [
@@ -118,16 +144,24 @@ class SimpleAnalyzer:
             "PM: Device .* failed to suspend",
         ]
         
-        for line in dmesg_txt.splitlines():
+        if lines is None:
+            lines = dmesg_txt.splitlines()
+        for line in lines:
             for pattern in failure_patterns:
                 if pattern in line:
-                    result["has_suspend_failure"] = True
-                    result["failure_messages"].append(line.strip())
+                    result.has_suspend_failure = True
+                    result.failure_messages.append(line.strip())
         
         return result
     
     @staticmethod
-    def parse_suspend_failed(dmesg_txt: str, dumpsys_suspend_txt: str, suspend_stats_txt: str = "") -> Tuple[bool, List[str], Dict[str, any]]:
+    def parse_suspend_failed(
+        dmesg_txt: str,
+        dumpsys_suspend_txt: str,
+        suspend_stats_txt: str = "",
+        dmesg_lines: Optional[List[str]] = None,
+        suspend_stats_before_txt: str = "",
+    ) -> Tuple[bool, List[str], SuspendAnalysis]:
         """
         Main analysis function following strict 3‑step process.
         Handles missing log files gracefully – if a file is empty or not provided,
@@ -137,18 +171,17 @@ class SimpleAnalyzer:
             dmesg_txt: Content of dmesg log (may be empty)
             dumpsys_suspend_txt: Content of dumpsys suspend_control_internal (may be empty)
             suspend_stats_txt: Content of /d/suspend_stats (may be empty)
+            dmesg_lines: Already tokenized dmesg lines, if shared with other analyzers
+            suspend_stats_before_txt: /d/suspend_stats at the start of the test
+                interval; step 1 then judges only the interval (may be empty)
             
         Returns:
-            Tuple[bool, List[str], Dict]: (failed, reasons, detailed_analysis)
+            Tuple[bool, List[str], SuspendAnalysis]: (failed, reasons, detailed_analysis);
+            steps that were skipped keep ``performed=False``
         """
         failed = False
         reasons = []
-        detailed_analysis = {
-            "step1_suspend_stats": {},
-            "step2_wakelocks": {},
-            "step3_dmesg": {},
-            "conclusion": ""
-        }
+        detailed_analysis = SuspendAnalysis()
         
         # Check which files are available
         has_suspend_stats = bool(suspend_stats_txt.strip())
@@ -157,87 +190,102 @@ class SimpleAnalyzer:
         
         # If no files are available, return early
         if not (has_suspend_stats or has_dumpsys or has_dmesg):
-            detailed_analysis["conclusion"] = "No log files available for analysis"
+            detailed_analysis.conclusion = "No log files available for analysis"
             return False, ["No log files available for analysis"], detailed_analysis
         
         # Step 1: Check suspend_stats (if available)
         if has_suspend_stats:
-            stats_success, stats_msg = SimpleAnalyzer.analyze_suspend_stats(suspend_stats_txt)
-            detailed_analysis["step1_suspend_stats"] = {
-                "success": stats_success,
-                "message": stats_msg
-            }
-            if stats_success:
+            with span("suspend:step1_suspend_stats", cat="analyzer", bytes=len(suspend_stats_txt)):
+                step1 = SimpleAnalyzer.analyze_suspend_stats(suspend_stats_txt, suspend_stats_before_txt)
+            detailed_analysis.step1_suspend_stats = step1
+            stats_msg = step1.message
+            if step1.success:
                 # Suspend is working, no need to check further
-                detailed_analysis["conclusion"] = "Suspend is working normally. No further analysis needed."
+                detailed_analysis.conclusion = "Suspend is working normally. No further analysis needed."
                 return False, ["Suspend is working normally"], detailed_analysis
             # Suspend failed, continue
             failed = True
             reasons.append(f"Step 1: {stats_msg}")
         else:
             # No suspend_stats file – cannot determine step 1, skip but note
-            detailed_analysis["step1_suspend_stats"] = {
-                "success": False,
-                "message": "suspend_stats file not available"
-            }
+            detailed_analysis.step1_suspend_stats.message = "suspend_stats file not available"
             reasons.append("Step 1: suspend_stats file not available, skipping step 1 analysis")
         
         # Step 2: Check for active wakelocks (if file provided and step 1 failed)
         if has_dumpsys:
-            has_wakelocks, wakelock_list = SimpleAnalyzer.analyze_wakelocks(dumpsys_suspend_txt)
-            detailed_analysis["step2_wakelocks"] = {
-                "has_active": has_wakelocks,
-                "wakelocks": wakelock_list
-            }
+            with span("suspend:step2_wakelocks", cat="analyzer", bytes=len(dumpsys_suspend_txt)):
+                has_wakelocks, wakelock_list = SimpleAnalyzer.analyze_wakelocks(dumpsys_suspend_txt)
+            detailed_analysis.step2_wakelocks = WakelockResult(True, has_wakelocks, wakelock_list)
             if has_wakelocks:
                 failed = True
                 reasons.append(f"Step 2: Active wakelocks found: {', '.join(wakelock_list)}")
-                detailed_analysis["conclusion"] = f"Root cause: Active wakelocks preventing suspend: {', '.join(wakelock_list)}"
+                detailed_analysis.conclusion = f"Root cause: Active wakelocks preventing suspend: {', '.join(wakelock_list)}"
                 return failed, reasons, detailed_analysis
             else:
                 reasons.append("Step 2: No active wakelocks found")
         else:
-            detailed_analysis["step2_wakelocks"] = {
-                "has_active": False,
-                "wakelocks": []
-            }
             reasons.append("Step 2: dumpsys_suspend.txt not available, skipping wakelock analysis")
         
         # Step 3: Analyze dmesg (if file provided)
         if has_dmesg:
-            dmesg_result = SimpleAnalyzer.analyze_dmesg(dmesg_txt)
-            detailed_analysis["step3_dmesg"] = dmesg_result
-            if not dmesg_result["has_suspend_entry"]:
+            with span("suspend:step3_dmesg", cat="analyzer", bytes=len(dmesg_txt)) as sp:
+                dmesg_result = SimpleAnalyzer.analyze_dmesg(dmesg_txt, dmesg_lines)
+                sp.set(lines=len(dmesg_lines) if dmesg_lines is not None else 0)
+            detailed_analysis.step3_dmesg = dmesg_result
+            if not dmesg_result.has_suspend_entry:
                 failed = True
                 reasons.append("Step 3: No suspend entry found in dmesg - system did not attempt to suspend")
-                detailed_analysis["conclusion"] = "Root cause: System did not attempt to enter suspend"
-            elif dmesg_result["has_suspend_failure"]:
+                detailed_analysis.conclusion = "Root cause: System did not attempt to enter suspend"
+            elif dmesg_result.has_suspend_failure:
                 failed = True
-                reasons.append(f"Step 3: Suspend entry failed - {len(dmesg_result['failure_messages'])} failure(s) found")
-                for msg in dmesg_result["failure_messages"][:3]:
+                reasons.append(f"Step 3: Suspend entry failed - {len(dmesg_result.failure_messages)} failure(s) found")
+                for msg in dmesg_result.failure_messages[:3]:
                     reasons.append(f"  - {msg}")
-                detailed_analysis["conclusion"] = "Root cause: Suspend entry failed in kernel"
+                detailed_analysis.conclusion = "Root cause: Suspend entry failed in kernel"
             else:
                 reasons.append("Step 3: Suspend entry found but no clear failure in dmesg")
                 # Only set conclusion if we haven't found a clear root cause yet
-                if not detailed_analysis["conclusion"]:
+                if not detailed_analysis.conclusion:
                     if has_suspend_stats or has_dumpsys:
-                        detailed_analysis["conclusion"] = "Suspend failed but root cause unclear from logs"
+                        detailed_analysis.conclusion = "Suspend failed but root cause unclear from logs"
                     else:
-                        detailed_analysis["conclusion"] = "Based on dmesg only: Suspend entry found but no clear failure"
+                        detailed_analysis.conclusion = "Based on dmesg only: Suspend entry found but no clear failure"
         else:
-            detailed_analysis["step3_dmesg"] = {
-                "has_suspend_entry": False,
-                "has_suspend_failure": False,
-                "failure_messages": []
-            }
             reasons.append("Step 3: dmesg.txt not available, skipping dmesg analysis")
         
         # Set final conclusion if not already set
-        if not detailed_analysis["conclusion"]:
+        if not detailed_analysis.conclusion:
             if failed:
-                detailed_analysis["conclusion"] = "Suspend analysis incomplete due to missing log files"
+                detailed_analysis.conclusion = "Suspend analysis incomplete due to missing log files"
             else:
-                detailed_analysis["conclusion"] = "No clear suspend issues found in available logs"
+                detailed_analysis.conclusion = "No clear suspend issues found in available logs"
         
         return failed, reasons, detailed_analysis
+
+    @staticmethod
+    def analyze_logs(logs: LogStore) -> Tuple[bool, List[str], SuspendAnalysis]:
+        """
+        Run the 3-step analysis on a shared ``LogStore`` and segment dmesg into
+        suspend/resume cycles.
+
+        The dmesg line split is taken from the store so it is shared with any
+        other diagnosis module running in the same process.
+
+        Args:
+            logs: Shared read-once view of the case artifacts
+
+        Returns:
+            Tuple[bool, List[str], SuspendAnalysis]: (failed, reasons, detailed_analysis)
+        """
+        failed, reasons, detailed_analysis = SimpleAnalyzer.parse_suspend_failed(
+            logs.text("dmesg.txt"),
+            logs.text("dumpsys_suspend.txt"),
+            logs.text("suspend_stats.txt"),
+            dmesg_lines=logs.lines("dmesg.txt"),
+            suspend_stats_before_txt=logs.text("suspend_stats_before.txt"),
+        )
+        # Cycle timings are reported whatever the 3-step verdict is
+        with span("suspend:cycles", cat="analyzer") as sp:
+            detailed_analysis.cycles = analyze_cycles(logs)
+            sp.set(cycles=detailed_analysis.cycles.cycle_count)
+        return failed, reasons, detailed_analysis
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Suspend/Resume Cycle Segmentation for Android Suspend Diagnosis
+
+This module splits dmesg into individual suspend/resume cycles. Each cycle is a
+compact record with its entry and exit time, the ``suspend of devices
+complete`` / ``resume of devices complete`` timings and the slow device
+callbacks reported by ``initcall_debug`` (``pm_print_times``). Callback times
+of every cycle are folded into per-driver quantile sketches, so the drivers
+adding the most resume latency can be ranked across thousands of cycles in a
+single pass.
+"""
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from common.baseline import QuantileSketch
+from common.logs import LogStore
+from common.timestamps import timestamp_index
+from common.types import CycleResult, DriverCallback, DriverLatency, SuspendCycle
+
+# Callbacks at least this slow are kept in the cycle record
+SLOW_CALLBACK_MS = 10.0
+# Drivers listed in the result (slowest total first)
+TOP_DRIVERS = 25
+
+# Cheap pre-filter: only these lines can affect cycle state
+_INTERESTING = re.compile(
+    r"PM: |returned -?\d+ after|Restarting tasks|Freezing|non-boot CPUs|Resume caused"
+)
+
+_ENTRY = re.compile(r"PM: suspend entry|PM: Syncing filesystems")
+_EXIT = re.compile(r"PM: suspend exit")
+_TASKS_RESTARTED = re.compile(r"Restarting tasks \.\.\. done")
+_RESUME_START = re.compile(r"Enabling non-boot CPUs|Resume caused by|PM: resume from suspend-to-idle|PM: Timekeeping suspended")
+_FAILURE = re.compile(
+    r"suspend entry failed|failed to suspend|Freezing of tasks failed|aborting suspend|Wakeup pending",
+    re.IGNORECASE,
+)
+
+# PM: late suspend of devices complete after 12.345 msecs / PM: resume devices took 0.120 seconds
+_PHASE_TIME = re.compile(
+    r"PM: (?P<phase>(?:late |noirq |early )?(?:suspend|resume))"
+    r"(?: of devices complete after (?P<ms>[\d.]+) msecs| devices took (?P<s>[\d.]+) seconds)"
+)
+
+# i2c 0-0050: i2c_device_resume+0x0/0x60 returned 0 after 1234 usecs
+# pci 0000:00:14.0: PM: pci_pm_resume+0x0/0xe0 returned 0 after 1234 usecs (5.x/6.x)
+# usb 1-0:1.0: PM: usb_dev_resume+0x0/0x20 [usbcore] returned 0 after 12 usecs
+# Device names may contain colons; the device ends at the first ": "
+_CALLBACK = re.compile(
+    r"^(?P<driver>\S+) (?P<device>\S+?): (?:PM: )?(?P<cb>\S+)(?: \[\S+\])? "
+    r"returned (?P<err>-?\d+) after (?P<us>\d+) usecs"
+)
+# call 0-0050+ returned 0 after 1234 usecs (older kernels)
+_CALLBACK_OLD = re.compile(r"call (?P<device>\S+?)\+ returned (?P<err>-?\d+) after (?P<us>\d+) usecs")
+
+
+def _message(line: str) -> str:
+    """Strip the ``[...]`` timestamp prefix of a dmesg line."""
+    if line.startswith("["):
+        end = line.find("]")
+        if end != -1:
+            return line[end + 1:].strip()
+    return line.strip()
+
+
+class _DriverStats:
+    """Running latency summary of one (driver, phase)."""
+
+    __slots__ = ("count", "total", "max", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sketch = QuantileSketch()
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.sketch.add(ms)
+
+
+def segment_cycles(entries: Iterable[Tuple[float, str]]) -> CycleResult:
+    """
+    Segment timestamped dmesg lines into suspend/resume cycles.
+
+    A cycle opens at ``PM: suspend entry`` (or ``PM: Syncing filesystems``
+    when no cycle is open) and closes at ``PM: suspend exit``; on kernels that
+    do not print the exit line, ``Restarting tasks ... done`` marks the exit
+    and the next entry closes the cycle.
+
+    Args:
+        entries: ``(time, line)`` pairs in log order (see ``TimestampIndex.entries``)
+
+    Returns:
+        CycleResult: Cycles, overall timing percentiles and per-driver latencies
+    """
+    result = CycleResult()
+    result.performed = True
+    drivers: Dict[Tuple[str, str], _DriverStats] = {}
+    suspend_times = QuantileSketch()
+    resume_times = QuantileSketch()
+    # Largest phase times, to clamp the sketch quantiles (bucket midpoints may exceed them)
+    suspend_max = resume_max = 0.0
+
+    cycle: Optional[SuspendCycle] = None
+    resuming = False
+
+    def close() -> None:
+        nonlocal suspend_max, resume_max
+        result.cycles.append(cycle)
+        if cycle.suspend_ms is not None:
+            suspend_times.add(cycle.suspend_ms)
+            suspend_max = max(suspend_max, cycle.suspend_ms)
+        if cycle.resume_ms is not None:
+            resume_times.add(cycle.resume_ms)
+            resume_max = max(resume_max, cycle.resume_ms)
+
+    for t, line in entries:
+        if not _INTERESTING.search(line):
+            continue
+        msg = _message(line)
+
+        # Device callbacks are the bulk of the lines with initcall_debug: test them first
+        match = (_CALLBACK.match(msg) or _CALLBACK_OLD.search(msg)) if msg.endswith("usecs") else None
+        if match:
+            # Callbacks outside a cycle (e.g. runtime PM) are ignored
+            if cycle is not None:
+                groups = match.groupdict()
+                device = groups["device"]
+                callback = groups.get("cb") or ""
+                driver = groups.get("driver") or device
+                if "resume" in callback:
+                    phase = "resume"
+                elif "suspend" in callback:
+                    phase = "suspend"
+                else:
+                    phase = "resume" if resuming else "suspend"
+                ms = int(groups["us"]) / 1000
+                stats = drivers.get((driver, phase))
+                if stats is None:
+                    stats = drivers[(driver, phase)] = _DriverStats()
+                stats.add(ms)
+                if ms >= SLOW_CALLBACK_MS:
+                    cycle.slow_callbacks.append(DriverCallback(driver, device, callback, phase, ms))
+                if groups["err"] != "0":
+                    cycle.failed = True
+                    cycle.error = cycle.error or msg
+            continue
+
+        if _FAILURE.search(msg):
+            if cycle is None:
+                cycle = SuspendCycle(t)
+            cycle.failed = True
+            cycle.error = cycle.error or msg
+            continue
+
+        if _ENTRY.search(msg):
+            if cycle is not None and (msg.startswith("PM: suspend entry") or cycle.exit is not None):
+                close()
+                cycle = None
+            if cycle is None:
+                cycle = SuspendCycle(t)
+                resuming = False
+            continue
+        if cycle is None:
+            continue
+
+        if _EXIT.search(msg):
+            cycle.exit = t
+            close()
+            cycle = None
+            continue
+        if _TASKS_RESTARTED.search(msg):
+            cycle.exit = t
+            continue
+
+        match = _PHASE_TIME.search(msg)
+        if match:
+            phase = match.group("phase")
+            ms = float(match.group("ms")) if match.group("ms") else float(match.group("s")) * 1000
+            cycle.phases[phase] = ms
+            if phase == "suspend":
+                cycle.suspend_ms = ms
+            elif phase == "resume":
+                cycle.resume_ms = ms
+            if "resume" in phase:
+                resuming = True
+            continue
+        if _RESUME_START.search(msg):
+            resuming = True
+
+    if cycle is not None:
+        close()
+
+    result.cycle_count = len(result.cycles)
+    result.failed_count = sum(1 for c in result.cycles if c.failed)
+    result.suspend_p50_ms = min(suspend_times.quantile(0.5), suspend_max)
+    result.suspend_p95_ms = min(suspend_times.quantile(0.95), suspend_max)
+    result.resume_p50_ms = min(resume_times.quantile(0.5), resume_max)
+    result.resume_p95_ms = min(resume_times.quantile(0.95), resume_max)
+    ranked = sorted(drivers.items(), key=lambda item: -item[1].total)[:TOP_DRIVERS]
+    result.drivers = [
+        DriverLatency(
+            driver, phase, stats.count, stats.total,
+            *(min(stats.sketch.quantile(q), stats.max) for q in (0.5, 0.95, 0.99)), stats.max,
+        )
+        for (driver, phase), stats in ranked
+    ]
+    return result
+
+
+def analyze_cycles(logs: LogStore) -> CycleResult:
+    """
+    Segment the ``dmesg.txt`` of a shared ``LogStore`` into suspend/resume cycles.
+
+    Uses the store's timestamp index, so ``dmesg -T`` and ``[sec.usec]`` logs
+    are both supported and the timestamps are parsed only once per run.
+
+    Args:
+        logs: Shared read-once view of the case artifacts
+
+    Returns:
+        CycleResult: Segmented cycles (``performed`` is False without dmesg)
+    """
+    if not logs.has("dmesg.txt"):
+        return CycleResult()
+    index = timestamp_index(logs, "dmesg.txt")
+    result = segment_cycles(index.entries())
+    result.clock = index.kind
+    return result
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Suspend Statistics Parser for Android Suspend Diagnosis
+
+This module parses ``/d/suspend_stats`` into a typed ``SuspendStats`` record
+and compares two snapshots. The counters only ever grow from boot, so a single
+snapshot cannot tell an old failure from a current one; the difference between
+a snapshot taken at the start of the test interval and one taken at its end
+covers exactly the suspends attempted meanwhile.
+
+Format::
+
+    success: 12
+    fail: 1
+    failed_freeze: 0
+    ...
+    failures:
+      last_failed_dev:	alarmtimer
+    			(older entries)
+      last_failed_errno:	-16
+    			0
+      last_failed_step:	suspend
+"""
+from typing import List, Optional
+
+from common.types import SuspendStats
+
+_FAILURE_LISTS = ("last_failed_dev", "last_failed_errno", "last_failed_step")
+
+
+def parse_suspend_stats(text: str) -> SuspendStats:
+    """
+    Parse the content of ``/d/suspend_stats``.
+
+    Unknown lines are ignored, so kernels printing extra fields are supported.
+
+    Args:
+        text: Content of ``suspend_stats.txt``
+
+    Returns:
+        SuspendStats: Counters and recent failures
+    """
+    stats = SuspendStats()
+    counters = set(SuspendStats.COUNTERS)
+    current: Optional[List[str]] = None
+    values = {name: [] for name in _FAILURE_LISTS}
+    # Captures saved through Windows end lines with "\r\r\n": splitlines() would
+    # see an extra blank line after each one and end the last_failed_* lists
+    for line in text.replace("\r", "").split("\n"):
+        key, sep, value = line.partition(":")
+        key = key.strip()
+        if sep and key in counters:
+            current = None
+            value = value.strip()
+            if value.lstrip("-").isdigit():
+                setattr(stats, key, int(value))
+        elif sep and key in values:
+            current = values[key]
+            current.append(value.strip())
+        elif current is not None and not sep and line[:1].isspace():
+            # Older entries of the last_failed_* list on continuation lines
+            current.append(line.strip())
+        else:
+            current = None
+
+    # Empty ring slots are printed as blank (or 0 errno) lines
+    count = max((len(v) for v in values.values()), default=0)
+    for i in range(count):
+        dev, errno, step = (values[name][i] if i < len(values[name]) else "" for name in _FAILURE_LISTS)
+        errno_value = int(errno) if errno.lstrip("-").isdigit() else 0
+        if dev or step or errno_value:
+            stats.last_failed_dev.append(dev)
+            stats.last_failed_errno.append(errno_value)
+            stats.last_failed_step.append(step)
+    return stats
+
+
+def stats_delta(after: SuspendStats, before: SuspendStats) -> Optional[SuspendStats]:
+    """
+    Return the change of the counters between two snapshots.
+
+    The recent failures kept are those of ``after`` that can have happened in
+    between (at most as many as the ``fail`` counter grew).
+
+    Returns:
+        Optional[SuspendStats]: The difference, or None if a counter went down
+        (the device rebooted between the snapshots)
+    """
+    delta = SuspendStats()
+    for name in SuspendStats.COUNTERS:
+        change = getattr(after, name) - getattr(before, name)
+        if change < 0:
+            return None
+        setattr(delta, name, change)
+    recent = min(delta.fail, len(after.last_failed_dev))
+    delta.last_failed_dev = after.last_failed_dev[:recent]
+    delta.last_failed_errno = after.last_failed_errno[:recent]
+    delta.last_failed_step = after.last_failed_step[:recent]
+    return delta
+
+
+def failure_breakdown(stats: SuspendStats) -> str:
+    """Describe the non-zero ``failed_*`` counters and the latest failure, e.g. ``failed_suspend: 2; last: suspend alarmtimer (-16)``."""
+    parts = [
+        f"{name}: {getattr(stats, name)}"
+        for name in SuspendStats.COUNTERS[2:]
+        if getattr(stats, name)
+    ]
+    if stats.last_failed_dev or stats.last_failed_step:
+        dev = stats.last_failed_dev[0] if stats.last_failed_dev else ""
+        step = stats.last_failed_step[0] if stats.last_failed_step else ""
+        errno = stats.last_failed_errno[0] if stats.last_failed_errno else 0
+        parts.append(f"last: {' '.join(p for p in (step, dev) if p) or '?'} ({errno})")
+    return "; ".join(parts)
@@ -34,7 +34,9 @@ def adb_shell(adb: str, device: str, command: str, timeout: int = 60) -> str:
     """
     Execute an ADB shell command on the specified device.
     
-    If device is empty, the default device will be used.
+    If device is empty, the default device will be used. The command is
+    passed to the device shell as one argument, so ``;``, pipes and
+    redirections run on the device.
     
     Args:
         adb: Path to ADB executable
@@ -46,4 +48,21 @@ def adb_shell(adb: str, device: str, command: str, timeout: int = 60) -> str:
         str: Command output or error message
     """
     dev = f"-s {device}" if device else ""
-    return run(f"{adb} {dev} shell {command}", timeout=timeout)
+    return run(f'{adb} {dev} shell "{command}"', timeout=timeout)
+
+
+def adb_command(adb: str, device: str, args: str, timeout: int = 60) -> str:
+    """
+    Execute a host-side ADB command (e.g. ``push`` or ``pull``) for the specified device.
+    
+    Args:
+        adb: Path to ADB executable
+        device: Target device serial number (empty for default device)
+        args: ADB arguments
+        timeout: Command timeout in seconds (default: 60)
+        
+    Returns:
+        str: Command output or error message
+    """
+    dev = f"-s {device}" if device else ""
+    return run(f"{adb} {dev} {args}", timeout=timeout)
@@ -9,14 +9,39 @@ It generates both Markdown and HTML reports with analysis results.
 import argparse
 import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-from common.collector import AdbEvidenceCollector
-from suspend_diagnosis.core.analyzer import SimpleAnalyzer
-from common.ai import QGenieReporter
-from common.report.markdown_builder import MarkdownBuilder
-from common.report.html_renderer import HtmlRenderer
+from common.collector import AdbEvidenceCollector, read_case_info
+from common.logs import LogStore
+from common.output import case_record, json_output, module_result
+from common.pipeline import run_module
+from common.registry import registry
 from suspend_diagnosis.cli import build_parser
-from common.types import LogMap
+from common.types import ArtifactMap
+
+
+def run_case(
+    case_dir: str,
+    artifacts: ArtifactMap,
+    logs: Optional[LogStore] = None,
+    enable_ai: bool = True,
+    render: bool = True,
+) -> Tuple[bool, List[str], dict, str]:
+    """
+    Analyze one case and write its Markdown and HTML reports.
+    
+    Args:
+        case_dir: Directory containing collected evidence
+        artifacts: Dictionary mapping filenames to their paths
+        logs: Shared log store (created from ``artifacts`` when omitted)
+        enable_ai: Whether to request the optional AI analysis
+        render: Whether to write the reports (``html_path`` is empty otherwise)
+        
+    Returns:
+        Tuple[bool, List[str], dict, str]: (failed, reasons, detailed_analysis, html_path)
+    """
+    return run_module(registry.get("suspend"), case_dir, artifacts, logs, enable_ai, render=render)
+
 
 def main(args):
     """
@@ -25,57 +50,40 @@ def main(args):
     Args:
         args: Command line arguments parsed by argparse
     """
+    with json_output(getattr(args, "format", "report")) as writer:
+        return _run(args, writer)
+
+
+def _run(args, writer):
+    """Collect or load the case and analyze it; ``writer`` selects JSON output."""
     # Step 1: Initialize collector
     collector = AdbEvidenceCollector(
         adb=args.adb,
         device=args.device,
         out_dir=args.out,
+        interval=args.interval,
+        compression=args.compress,
     )
+    names = registry.get("suspend").artifacts
     
     # Step 2: Determine source of evidence (ADB collection or existing logs)
     if args.case_dir:
         # Load pre‑collected logs from the specified directory
-        case_dir, artifacts = collector.load_existing(args.case_dir)
+        case_dir, artifacts = collector.load_existing(args.case_dir, names)
     else:
         # Collect evidence from the device via ADB
-        case_dir, artifacts = collector.collect()
-    
-    # Step 3: Read collected files
-    txts = {k: Path(v).read_text(encoding='utf-8', errors='ignore') 
-            for k, v in artifacts.items()}
-    
-    # Step 3: Analyze logs for suspend failures using 3-step process
-    analyzer = SimpleAnalyzer()
-    failed, reasons, detailed_analysis = analyzer.parse_suspend_failed(
-        txts.get("dmesg.txt", ""), 
-        txts.get("dumpsys_suspend.txt", ""),
-        txts.get("suspend_stats.txt", "")
-    )
-    
-    # Step 4: AI analysis using QGenieReporter (optional)
-    ai_md = None
-    try:
-        reporter = QGenieReporter()
-        logs: LogMap = {
-            "dmesg": txts.get("dmesg.txt", ""),
-            "dumpsys_suspend": txts.get("dumpsys_suspend.txt", ""),
-            "suspend_stats": txts.get("suspend_stats.txt", ""),
-        }
-        ai_md = reporter.generate(logs)
-        
-        if ai_md:
-            print("\n[AI RESPONSE]")
-            print(ai_md)
-    except Exception as e:
-        print(f"\n[WARN] AI analysis skipped: {e}")
+        case_dir, artifacts = collector.collect(names)
     
-    # Step 5: Generate Markdown report
-    md_builder = MarkdownBuilder()
-    md_path = md_builder.build(case_dir, failed, reasons, ai_md, artifacts, detailed_analysis)
+    # Step 3 (JSON output): verdict and analysis only, no AI or reports
+    if writer is not None:
+        failed, reasons, detailed, _ = run_case(case_dir, artifacts, enable_ai=False, render=False)
+        record = case_record(case_dir, {"suspend": module_result(failed, reasons, detailed)},
+                             read_case_info(case_dir))
+        writer.write(record)
+        return record
     
-    # Step 6: Generate HTML report
-    html_renderer = HtmlRenderer()
-    html_path = html_renderer.render(md_path)
+    # Step 3: Analyze, run AI and generate reports
+    _, _, _, html_path = run_case(case_dir, artifacts)
     
     print(f"\n[REPORT] Generated: {html_path}")
     return html_path
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Batterystats Checkin Module
+
+This module reads the battery cost of wakeups from ``dumpsys batterystats
+--checkin`` (``batterystats.txt``), a CSV dump where every row is
+``<version>,<uid>,<category>,<section>,<fields...>``. Only the rows covering
+the time since the last charge (category ``l``) and the UID → package map
+(``i,uid``) are used:
+
+- ``pwi``: estimated drain of a UID in mAh (``pws`` gives the total),
+- ``wl``: per-UID wakelocks (``name,full_ms,f,count,partial_ms,p,count,...``),
+- ``wua``: per-UID wakeup alarms,
+- ``kwl`` and ``wr``: kernel wakelocks and wakeup reasons with time and count.
+
+The file is streamed row by row into per-UID and per-wakelock tables, so
+memory depends on the number of UIDs and wakelocks, not on the file size. The
+UIDs are then ranked by drain, those named by a wakeup finding first.
+"""
+import csv
+from typing import Dict, Tuple
+
+from common.artifacts import open_artifact
+from common.logs import LogStore
+from common.packages import package_index
+from common.trace import span
+from common.types import BatteryStatsResult, BatteryUid, BatteryWakelock, WakeupAnalysis
+
+# Evidence file holding the ``dumpsys batterystats --checkin`` output
+BATTERYSTATS_ARTIFACT = "batterystats.txt"
+
+# Statistics since the last charge (the default of --checkin)
+_SINCE_CHARGED = "l"
+
+
+def _int(text: str) -> int:
+    """Parse a checkin integer field (0 when malformed)."""
+    try:
+        return int(text)
+    except ValueError:
+        return 0
+
+
+def _float(text: str) -> float:
+    """Parse a checkin decimal field (0 when malformed)."""
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+class BatteryTables:
+    """
+    Per-UID and per-wakelock totals of one checkin dump.
+
+    Attributes:
+        uids: Battery cost by UID
+        wakelocks: Partial wakelocks by ``(uid, name)``
+        kernel_wakelocks: Kernel wakelocks by name
+        wakeup_reasons: Kernel wakeup reasons by name
+        packages: First package of each UID (``i,uid`` rows)
+        capacity_mah: Battery capacity
+        computed_mah: Total estimated drain
+    """
+
+    __slots__ = ("uids", "wakelocks", "kernel_wakelocks", "wakeup_reasons", "packages",
+                 "capacity_mah", "computed_mah")
+
+    def __init__(self):
+        self.uids: Dict[str, BatteryUid] = {}
+        self.wakelocks: Dict[Tuple[str, str], BatteryWakelock] = {}
+        self.kernel_wakelocks: Dict[str, BatteryWakelock] = {}
+        self.wakeup_reasons: Dict[str, BatteryWakelock] = {}
+        self.packages: Dict[str, str] = {}
+        self.capacity_mah = 0.0
+        self.computed_mah = 0.0
+
+    def uid(self, uid: str) -> BatteryUid:
+        entry = self.uids.get(uid)
+        if entry is None:
+            entry = self.uids[uid] = BatteryUid(uid)
+        return entry
+
+    def add_row(self, row) -> None:
+        """Fold one checkin row into the tables."""
+        if len(row) < 5:
+            return
+        uid, category, section = row[1], row[2], row[3]
+        if category == "i":
+            if section == "uid" and len(row) >= 6:
+                self.packages.setdefault(row[4], row[5])
+            return
+        if category != _SINCE_CHARGED:
+            return
+        if section == "pwi":
+            # 9,10084,l,pwi,uid,12.3,... (other labels are screen, wifi, idle ...)
+            if row[4] == "uid" and len(row) >= 6:
+                self.uid(uid).power_mah += _float(row[5])
+        elif section == "pws":
+            self.capacity_mah = _float(row[4])
+            self.computed_mah = _float(row[5]) if len(row) > 5 else 0.0
+        elif section == "wl":
+            # Each timer is "time,type,count"; only partial ("p") wakelocks keep the CPU up
+            fields = row[5:]
+            try:
+                p = fields.index("p")
+            except ValueError:
+                return
+            if p == 0 or p + 1 >= len(fields):
+                return
+            time_ms, count = _int(fields[p - 1]), _int(fields[p + 1])
+            if not time_ms and not count:
+                return
+            key = (uid, row[4])
+            wakelock = self.wakelocks.get(key)
+            if wakelock is None:
+                wakelock = self.wakelocks[key] = BatteryWakelock(row[4], uid)
+            wakelock.time_ms += time_ms
+            wakelock.count += count
+            entry = self.uid(uid)
+            entry.wakelock_ms += time_ms
+            entry.wakelock_count += count
+        elif section == "wua":
+            # 9,10084,l,wua,<alarm name>,<count> (older releases: 9,10084,l,wua,<package>,<count>)
+            self.uid(uid).alarm_wakeups += _int(row[-1])
+        elif section in ("kwl", "wr") and len(row) >= 7:
+            table = self.kernel_wakelocks if section == "kwl" else self.wakeup_reasons
+            entry = table.get(row[4])
+            if entry is None:
+                entry = table[row[4]] = BatteryWakelock(row[4])
+            entry.time_ms += _int(row[5])
+            entry.count += _int(row[6])
+
+
+def parse_checkin(path: str) -> BatteryTables:
+    """
+    Stream a ``dumpsys batterystats --checkin`` dump into tables.
+
+    Args:
+        path: Artifact path of ``batterystats.txt`` (plain, compressed or bugreport section)
+
+    Returns:
+        BatteryTables: Totals since the last charge
+    """
+    tables = BatteryTables()
+    with span("parse:batterystats", cat="io") as sp, open_artifact(path) as f:
+        rows = 0
+        for row in csv.reader(f):
+            rows += 1
+            tables.add_row(row)
+        sp.set(rows=rows, uids=len(tables.uids))
+    return tables
+
+
+def battery_tables(logs: LogStore) -> BatteryTables:
+    """Return the batterystats tables of a case, parsed at most once per ``LogStore``."""
+    return logs.cached(BATTERYSTATS_ARTIFACT, "tables",
+                       lambda: parse_checkin(logs.artifacts[BATTERYSTATS_ARTIFACT]))
+
+
+def rank_battery_offenders(logs: LogStore, analysis: WakeupAnalysis, top: int = 15) -> BatteryStatsResult:
+    """
+    Rank UIDs by measured battery cost and link them to the wakeup findings.
+
+    A UID is linked to a correlated wakelock it holds and to the app wakeups
+    attributed to its package in logcat.
+
+    Args:
+        logs: Shared read-once view of the case artifacts
+        analysis: Wakeup analysis whose findings are linked
+        top: Number of offenders and wakelocks kept
+
+    Returns:
+        BatteryStatsResult: Ranked tables (``performed`` is False without batterystats)
+    """
+    result = BatteryStatsResult()
+    if not logs.has(BATTERYSTATS_ARTIFACT):
+        return result
+    tables = battery_tables(logs)
+    if not tables.uids and not tables.kernel_wakelocks:
+        result.issues.append("batterystats.txt holds no statistics since the last charge")
+        return result
+    result.performed = True
+    result.capacity_mah = tables.capacity_mah
+    result.computed_mah = tables.computed_mah
+
+    packages = package_index(logs)
+    for entry in tables.uids.values():
+        entry.package = tables.packages.get(entry.uid) or packages.package_for_uid(entry.uid) or ""
+        entry.findings = []
+    uid_of_package = {entry.package: entry.uid for entry in tables.uids.values() if entry.package}
+
+    for record in analysis.wakelocks.records:
+        uid = record.uid or uid_of_package.get(record.package)
+        if uid in tables.uids:
+            if record.active:
+                finding = f"wakelock '{record.name}' active for {record.hold_ms / 60000:.0f} min"
+            else:
+                finding = f"wakelock '{record.name}' held {record.total_ms / 60000:.0f} min in total"
+            tables.uids[uid].findings.append(finding)
+    for package, count in analysis.logcat_wakeups.app_counts.items():
+        uid = uid_of_package.get(package) or (package if package.isdigit() else None)
+        if uid in tables.uids:
+            tables.uids[uid].findings.append(f"{count} app wakeup events in logcat")
+
+    offenders = [e for e in tables.uids.values() if e.power_mah or e.wakelock_ms or e.alarm_wakeups]
+    offenders.sort(key=lambda e: (not e.findings, -e.power_mah, -e.wakelock_ms))
+    result.offenders = offenders[:top]
+
+    for wakelock in tables.wakelocks.values():
+        wakelock.package = tables.uids[wakelock.uid].package
+    result.wakelocks = sorted(tables.wakelocks.values(), key=lambda w: -w.time_ms)[:top]
+    result.kernel_wakelocks = sorted(tables.kernel_wakelocks.values(), key=lambda w: -w.time_ms)[:top]
+    result.wakeup_reasons = sorted(tables.wakeup_reasons.values(), key=lambda w: -w.count)[:top]
+
+    for entry in result.offenders:
+        if entry.findings:
+            share = f" ({entry.power_mah / result.computed_mah:.0%} of the drain)" if result.computed_mah else ""
+            result.issues.append(
+                f"{entry.package or 'uid ' + entry.uid} used {entry.power_mah:.1f} mAh{share} since the last charge; "
+                f"flagged by {'; '.join(entry.findings)}"
+            )
+    return result
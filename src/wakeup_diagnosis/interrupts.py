@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Wakeup IRQ Attribution Module
+
+This module names the interrupts that wake the device. Two evidence sources
+are joined through an IRQ-number-to-name table built from ``/proc/interrupts``:
+
+- ``Resume caused by IRQ N`` (and ``... N triggered name``) kernel lines give
+  the interrupt behind each resume,
+- ``/proc/interrupts`` snapshots taken before and after a test interval give
+  how often each interrupt fired meanwhile.
+
+Snapshots are collected as ``cat /proc/uptime; cat /proc/interrupts`` so the
+interval is known exactly. Resume lines are found in the shared dmesg line
+split with a substring pre-filter, so only a tiny fraction of the lines of
+very large logs reaches a regular expression.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from common.logs import LogStore
+from common.timestamps import timestamp_index
+from common.types import IrqResult, IrqWakeup
+
+# Resume caused by IRQ 45, pm8xxx_rtc_alarm
+_RESUME_CAUSED = re.compile(r"Resume caused by IRQ (\d+)(?:,\s*(.+))?")
+# gic_show_resume_irq: 200 triggered qcom,glink-smem-native-xprt-modem
+_TRIGGERED = re.compile(r"(\d+) triggered (\S+)")
+
+# Interrupt trigger types printed before the action names
+_TRIGGERS = {"Level", "Edge", "level", "edge"}
+
+
+class IrqInfo:
+    """One row of ``/proc/interrupts``."""
+
+    __slots__ = ("irq", "count", "chip", "name")
+
+    def __init__(self, irq: str, count: int, chip: str, name: str):
+        self.irq = irq
+        self.count = count
+        self.chip = chip
+        self.name = name
+
+
+def parse_interrupts(text: str) -> Tuple[Optional[float], Dict[str, IrqInfo]]:
+    """
+    Parse a ``/proc/interrupts`` snapshot, optionally preceded by ``/proc/uptime``.
+
+    Args:
+        text: Snapshot content
+
+    Returns:
+        Tuple[Optional[float], Dict[str, IrqInfo]]: Uptime in seconds (None if
+        absent) and the IRQ table keyed by IRQ number or label (``IPI0``, ``Err``)
+    """
+    uptime = None
+    cpus = 0
+    table: Dict[str, IrqInfo] = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0].startswith("CPU"):
+            cpus = sum(1 for p in parts if p.startswith("CPU"))
+            continue
+        if not parts[0].endswith(":"):
+            # /proc/uptime: "<uptime> <idle>"
+            if uptime is None and not cpus and len(parts) == 2:
+                try:
+                    uptime = float(parts[0])
+                except ValueError:
+                    pass
+            continue
+
+        irq = parts[0][:-1]
+        counts = []
+        for token in parts[1:1 + max(cpus, 1)]:
+            if not token.isdigit():
+                break
+            counts.append(int(token))
+        rest = parts[1 + len(counts):]
+        if irq.isdigit():
+            # "<chip> <hwirq> <Level|Edge> <action names>" (the columns vary by kernel)
+            chip = rest[0] if rest else ""
+            name_start = next((i + 1 for i, token in enumerate(rest) if token in _TRIGGERS), min(len(rest), 2))
+        else:
+            # IPI0, Err, ...: the rest is a description
+            chip, name_start = "", 0
+        name = " ".join(rest[name_start:]) or chip
+        table[irq] = IrqInfo(irq, sum(counts), chip, name)
+    return uptime, table
+
+
+def count_resume_irqs(lines) -> Tuple[Dict[str, int], Dict[str, str], int]:
+    """
+    Count the resumes caused by each IRQ.
+
+    Args:
+        lines: dmesg lines (any iterable)
+
+    Returns:
+        Tuple: (resumes per IRQ, IRQ names seen in the log, total resume lines)
+    """
+    counts: Dict[str, int] = {}
+    names: Dict[str, str] = {}
+    total = 0
+    for line in lines:
+        # Substring checks first: only a tiny fraction of lines can match
+        if "Resume caused by IRQ" in line:
+            match = _RESUME_CAUSED.search(line)
+        elif " triggered " in line and "resume_irq" in line:
+            match = _TRIGGERED.search(line)
+        else:
+            continue
+        if not match:
+            continue
+        irq, name = match.group(1), match.group(2)
+        counts[irq] = counts.get(irq, 0) + 1
+        if name:
+            names.setdefault(irq, name.strip())
+        total += 1
+    return counts, names, total
+
+
+def analyze_irq_wakeups(logs: LogStore, top: int = 20) -> IrqResult:
+    """
+    Join resume-causing IRQs from dmesg with ``/proc/interrupts`` deltas.
+
+    Args:
+        logs: Shared read-once view of the case artifacts
+        top: Number of IRQs kept in the result
+
+    Returns:
+        IrqResult: Per-IRQ wakeup counts and rates (``performed`` is False when
+        neither dmesg nor an interrupts snapshot is available)
+    """
+    result = IrqResult()
+    has_before = logs.has("interrupts_before.txt")
+    has_after = logs.has("interrupts_after.txt")
+    if not (logs.has("dmesg.txt") or has_before or has_after):
+        result.issues.append("Neither dmesg.txt nor /proc/interrupts snapshots available for IRQ attribution")
+        return result
+    result.performed = True
+
+    table: Dict[str, IrqInfo] = {}
+    deltas: Dict[str, int] = {}
+    if has_after:
+        after_uptime, table = parse_interrupts(logs.text("interrupts_after.txt"))
+        if has_before:
+            before_uptime, before = parse_interrupts(logs.text("interrupts_before.txt"))
+            if before_uptime is not None and after_uptime is not None and after_uptime > before_uptime:
+                result.elapsed_seconds = after_uptime - before_uptime
+            for irq, info in table.items():
+                # IRQs missing from the first snapshot were registered meanwhile
+                delta = info.count - (before[irq].count if irq in before else 0)
+                if delta > 0:
+                    deltas[irq] = delta
+    elif has_before:
+        _, table = parse_interrupts(logs.text("interrupts_before.txt"))
+
+    resumes: Dict[str, int] = {}
+    log_names: Dict[str, str] = {}
+    span_seconds = 0.0
+    if logs.has("dmesg.txt"):
+        resumes, log_names, result.resume_count = count_resume_irqs(logs.lines("dmesg.txt"))
+        index = timestamp_index(logs, "dmesg.txt")
+        if index.end is not None:
+            span_seconds = index.end - index.start
+
+    # Resume rates use the span of the dmesg log, or the snapshot interval without timestamps
+    hours = (span_seconds or result.elapsed_seconds) / 3600
+    irqs: List[IrqWakeup] = []
+    for irq in set(resumes) | set(deltas):
+        info = table.get(irq)
+        name = info.name if info is not None else log_names.get(irq, "")
+        entry = IrqWakeup(irq, name, resumes.get(irq, 0), deltas.get(irq, 0))
+        if hours > 0:
+            entry.wakeups_per_hour = entry.wakeups / hours
+        if result.elapsed_seconds:
+            entry.interrupts_per_second = entry.interrupts / result.elapsed_seconds
+        irqs.append(entry)
+    irqs.sort(key=lambda e: (-e.wakeups, -e.interrupts))
+    result.irqs = irqs[:top]
+    return result
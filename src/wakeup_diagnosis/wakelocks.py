@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Cross-source Wakelock Correlation Module
+
+Wakelock evidence is spread over four logs, each naming the same lock in its
+own way:
+
+- ``dumpsys suspend_control_internal``: native and kernel wakelocks with the
+  holding PID, state, active count, total and maximum time,
+- ``dumpsys power``: framework wake locks currently held, with tag, UID, PID
+  and acquire age,
+- ``wakeup_sources``: kernel wakeup sources with wakeup counts, the age of
+  the current activation and total time,
+- logcat: wake lock acquisitions logged by apps and PowerManagerService.
+
+Every source is parsed in one pass and joined into one record per wakelock
+through a hash index on the normalized name, plus a PID → UID index (from
+``dumpsys power``) that gives native holders a UID and, when ``packages.txt``
+was collected, the package index that names the holding app. The whole stage
+is linear in the total input size.
+
+Cumulative hold time (``total_ms``) and the current hold of an active lock
+(``hold_ms``) are kept apart: a lock held for minutes in total over many short
+acquisitions is not long-held.
+"""
+import re
+from typing import Dict, Optional
+
+from common.logs import LogStore
+from common.packages import package_index
+from common.types import WakelockCorrelationResult, WakelockRecord
+
+# PARTIAL_WAKE_LOCK   'NlpWakeLock' ON_AFTER_RELEASE ACQ=-2s59ms (uid=10084 pid=2990 ws=...)
+_POWER_LOCK = re.compile(
+    r"(?P<type>[A-Z_]*WAKE_LOCK)\s+'(?P<tag>[^']*)'.*?ACQ=(?P<acq>-?[\dhms]+)"
+    r".*?\(uid=(?P<uid>\d+)(?: pid=(?P<pid>\d+))?"
+)
+_DURATION_PART = re.compile(r"(\d+)(ms|h|m|s)")
+_DURATION_MS = {"h": 3600000, "m": 60000, "s": 1000, "ms": 1}
+
+# acquireWakeLockInternal: lock=..., flags=0x1, tag="*job*/com.foo/.Sync", ws=null, uid=10123, pid=4321
+_LOGCAT_TAG = re.compile(r"""tag=["']?(?P<tag>[^"',]+)""")
+_LOGCAT_UID = re.compile(r"uid=(\d+)")
+
+# Numeric instance suffixes (PIDs, addresses) differ between boots and sources
+_INSTANCE_SUFFIX = re.compile(r"[:_]\d{3,}$")
+
+
+def wakelock_key(name: str) -> str:
+    """
+    Normalize a wakelock name into its join key.
+
+    Quotes and case are dropped and a trailing numeric instance suffix
+    (``sscrpcd:1081``, ``rmt_storage_541074766912``) is removed.
+    """
+    return _INSTANCE_SUFFIX.sub("", name.strip().strip("'\"").lower())
+
+
+def _duration_ms(text: str) -> int:
+    """Convert a ``-1h2m3s45ms`` style duration to milliseconds (sign dropped)."""
+    return sum(int(n) * _DURATION_MS[unit] for n, unit in _DURATION_PART.findall(text))
+
+
+def _int(text: str) -> int:
+    """Parse an integer cell, treating ``---`` and blanks as 0."""
+    text = text.strip()
+    if text.endswith("ms"):
+        text = text[:-2]
+    return int(text) if text.isdigit() else 0
+
+
+class _Index:
+    """Hash index of wakelock records keyed by normalized name."""
+
+    def __init__(self):
+        self.records: Dict[str, WakelockRecord] = {}
+
+    def get(self, name: str, source: str) -> WakelockRecord:
+        key = wakelock_key(name)
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = WakelockRecord(name.strip().strip("'\""))
+        if source not in record.sources:
+            record.sources.append(source)
+        return record
+
+
+def _join_suspend_control(index: _Index, text: str) -> None:
+    """Join the WAKELOCK STATS table of ``dumpsys suspend_control_internal``."""
+    for line in text.splitlines():
+        # | NAME | PID | TYPE | STATUS | ACTIVE COUNT | TOTAL TIME | MAX TIME | EVENT COUNT | WAKEUP COUNT | ...
+        if not line.lstrip().startswith("|"):
+            continue
+        cells = [c.strip() for c in line.split("|")[1:-1]]
+        if len(cells) < 9 or not cells[0] or cells[0] == "NAME" or cells[2] not in ("Native", "Kernel"):
+            continue
+        record = index.get(cells[0], "suspend_control")
+        if cells[1].isdigit():
+            record.pid = record.pid or cells[1]
+        record.total_ms = max(record.total_ms, _int(cells[5]))
+        if cells[3] == "Active":
+            # No acquire time in this table: the longest single hold bounds the current one
+            record.active = True
+            record.hold_ms = max(record.hold_ms, _int(cells[6]))
+        record.kernel_wakeups = max(record.kernel_wakeups, _int(cells[8]))
+
+
+def _join_power(index: _Index, text: str, pid_uids: Dict[str, str]) -> None:
+    """Join the wake locks held according to ``dumpsys power``."""
+    for line in text.splitlines():
+        if "WAKE_LOCK" not in line:
+            continue
+        match = _POWER_LOCK.search(line)
+        if not match:
+            continue
+        record = index.get(match.group("tag"), "power")
+        record.active = True
+        record.lock_type = match.group("type")
+        record.uid = match.group("uid")
+        record.pid = match.group("pid") or record.pid
+        record.hold_ms = max(record.hold_ms, _duration_ms(match.group("acq")))
+        if match.group("pid"):
+            pid_uids[match.group("pid")] = match.group("uid")
+
+
+def _join_wakeup_sources(index: _Index, lines) -> None:
+    """Join kernel wakeup sources (``name active_count event_count wakeup_count expire_count active_since total_time ...``)."""
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) < 7 or not parts[3].isdigit():
+            continue
+        record = index.get(parts[0], "wakeup_sources")
+        record.kernel_wakeups = max(record.kernel_wakeups, int(parts[3]))
+        record.total_ms = max(record.total_ms, _int(parts[6]))
+        # active_since: time since the current activation (0 when inactive)
+        active_since = _int(parts[5])
+        if active_since:
+            record.active = True
+            record.hold_ms = max(record.hold_ms, active_since)
+
+
+def _join_logcat(index: _Index, lines) -> None:
+    """Count wake lock acquisitions logged in logcat."""
+    for line in lines:
+        # Substring pre-filter: only a tiny fraction of logcat mentions wake locks
+        if "akeLock" not in line and "akelock" not in line and "wake lock" not in line:
+            continue
+        if "cquir" not in line:
+            continue
+        match = _LOGCAT_TAG.search(line)
+        if not match:
+            continue
+        record = index.get(match.group("tag"), "logcat")
+        record.app_events += 1
+        uid = _LOGCAT_UID.search(line, match.end())
+        if uid and not record.uid:
+            record.uid = uid.group(1)
+
+
+def correlate_wakelocks(logs: LogStore, top: int = 30) -> WakelockCorrelationResult:
+    """
+    Join every available wakelock source into one record per wakelock.
+
+    Args:
+        logs: Shared read-once view of the case artifacts
+        top: Number of records kept in the result
+
+    Returns:
+        WakelockCorrelationResult: Records ranked by current hold, then total
+        hold time, kernel wakeups and app events (``performed`` is False without any source)
+    """
+    result = WakelockCorrelationResult()
+    index = _Index()
+    pid_uids: Dict[str, str] = {}
+    if logs.has("dumpsys_suspend.txt"):
+        _join_suspend_control(index, logs.text("dumpsys_suspend.txt"))
+        result.sources.append("suspend_control")
+    if logs.has("dumpsys_power.txt"):
+        _join_power(index, logs.text("dumpsys_power.txt"), pid_uids)
+        result.sources.append("power")
+    if logs.has("wakeup_sources.txt"):
+        _join_wakeup_sources(index, logs.lines("wakeup_sources.txt"))
+        result.sources.append("wakeup_sources")
+    if logs.has("logcat.txt"):
+        _join_logcat(index, logs.lines("logcat.txt"))
+        result.sources.append("logcat")
+    if not result.sources:
+        result.issues.append("No wakelock source available for correlation")
+        return result
+    result.performed = True
+
+    records = list(index.records.values())
+    packages = package_index(logs)
+    for record in records:
+        # Native holders only have a PID; the power service knows its UID
+        if not record.uid and record.pid:
+            record.uid = pid_uids.get(record.pid, "")
+        if packages.count:
+            record.package = packages.package_for_uid(record.uid) or packages.find(record.name) or ""
+    result.wakelock_count = len(records)
+    result.multi_source_count = sum(1 for r in records if len(r.sources) > 1)
+    records = [r for r in records if r.active or r.total_ms or r.kernel_wakeups or r.app_events]
+    records.sort(key=lambda r: (-r.hold_ms, -r.total_ms, -r.kernel_wakeups, -r.app_events))
+    result.records = records[:top]
+    return result
+
+
+def describe_holder(record: WakelockRecord) -> str:
+    """Name the holder of a wakelock: its package, else ``uid N``, else ``pid N`` (empty if unknown)."""
+    if record.package:
+        return record.package
+    if record.uid:
+        return f"uid {record.uid}"
+    return f"pid {record.pid}" if record.pid else ""
+
+
+def find_wakelock(result: WakelockCorrelationResult, name: str) -> Optional[WakelockRecord]:
+    """Return the record of ``name`` (any spelling of it), if it was kept."""
+    key = wakelock_key(name)
+    return next((r for r in result.records if wakelock_key(r.name) == key), None)
@@ -5,9 +5,32 @@ Wakeup Analyzer Module
 This module analyzes Android device wakeup patterns and identifies potential issues.
 """
 import re
-from pathlib import Path
 from typing import List, Tuple, Dict, Optional
-from datetime import datetime, timedelta
+
+from common.logs import LogStore
+from common.packages import APP_WAKEUP, package_index
+from common.sampler import decode_samples, suspend_stats_table, wakeup_sources_table
+from common.timestamps import timestamp_index
+from common.trace import span
+from common.types import (
+    DmesgWakeupsResult,
+    IrqResult,
+    LogcatWakeupsResult,
+    PowerResult,
+    SampledResult,
+    SampledSource,
+    WakelockCorrelationResult,
+    WakeupAnalysis,
+    WakeupEvent,
+    WakeupSourceStats,
+    WakeupSourcesResult,
+)
+from wakeup_diagnosis.batterystats import rank_battery_offenders
+from wakeup_diagnosis.interrupts import analyze_irq_wakeups
+from wakeup_diagnosis.wakelocks import correlate_wakelocks, describe_holder
+
+# Package name guess used when no package list was collected
+_APP_GUESS = re.compile(r"([a-z]+\.[a-z]+\.[a-z]+)")
 
 
 class WakeupAnalyzer:
@@ -19,79 +42,133 @@ class WakeupAnalyzer:
     2. Wakeup source analysis (which components are causing wakeups)
     3. Wakeup timing patterns (irregular or excessive wakeup intervals)
     4. Power consumption correlation with wakeup events
+    5. Interrupts behind resumes (``Resume caused by IRQ`` and /proc/interrupts deltas)
+    6. Wakeup source and suspend counter deltas over on-device samples (``samples.txt``)
+    7. Wakelocks joined across dumpsys, wakeup_sources and logcat (holder, hold time, wakeups)
+    8. Battery cost per UID from ``batterystats --checkin``, offenders linked to the findings above
     """
     
     def __init__(self):
         self.wakeup_threshold = 10  # wakeups per minute threshold
-        self.analysis_window = 3600  # 1 hour analysis window in seconds
+        self.analysis_window = 3600  # analyze the last hour of timestamped logs (seconds)
+        self.resume_gap = 2.0  # wakeup lines closer than this (seconds) belong to one resume
+        self.irq_wakeup_threshold = 60  # resumes per hour caused by a single IRQ
+        self.sampled_wakeup_threshold = 60  # wakeups per hour of a single source while sampling
+        self.long_wakelock_ms = 10 * 60 * 1000  # hold time of an active wakelock worth reporting
     
-    def analyze(self, artifacts: Dict[str, str]) -> Tuple[bool, List[str], Optional[Dict]]:
+    def analyze(
+        self,
+        artifacts: Dict[str, str],
+        logs: Optional[LogStore] = None,
+    ) -> Tuple[bool, List[str], WakeupAnalysis]:
         """
         Analyze wakeup patterns from collected logs.
         
         Args:
             artifacts: Dictionary mapping log file names to their paths
+            logs: Shared log store; when several diagnoses run together they pass
+                the same store so files are read and split only once
             
         Returns:
             Tuple of (has_issues, reasons, detailed_analysis)
         """
+        if logs is None:
+            logs = LogStore(artifacts)
         reasons = []
-        detailed_analysis = {}
+        detailed_analysis = WakeupAnalysis()
         
         # Step 1: Analyze wakeup sources
-        wakeup_sources_analysis = self._analyze_wakeup_sources(artifacts)
-        detailed_analysis["wakeup_sources"] = wakeup_sources_analysis
+        with span("wakeup:wakeup_sources", cat="analyzer"):
+            wakeup_sources_analysis = self._analyze_wakeup_sources(logs)
+        detailed_analysis.wakeup_sources = wakeup_sources_analysis
         
-        if wakeup_sources_analysis.get("excessive_wakeups"):
-            reasons.extend(wakeup_sources_analysis["issues"])
+        if wakeup_sources_analysis.excessive_wakeups:
+            reasons.extend(wakeup_sources_analysis.issues)
         
         # Step 2: Analyze dmesg for wakeup events
-        dmesg_analysis = self._analyze_dmesg_wakeups(artifacts)
-        detailed_analysis["dmesg_wakeups"] = dmesg_analysis
+        with span("wakeup:dmesg_wakeups", cat="analyzer"):
+            dmesg_analysis = self._analyze_dmesg_wakeups(logs)
+        detailed_analysis.dmesg_wakeups = dmesg_analysis
         
-        if dmesg_analysis.get("frequent_wakeups"):
-            reasons.extend(dmesg_analysis["issues"])
+        if dmesg_analysis.frequent_wakeups:
+            reasons.extend(dmesg_analysis.issues)
         
         # Step 3: Analyze power management logs
-        power_analysis = self._analyze_power_logs(artifacts)
-        detailed_analysis["power_management"] = power_analysis
+        with span("wakeup:power_management", cat="analyzer"):
+            power_analysis = self._analyze_power_logs(logs)
+        detailed_analysis.power_management = power_analysis
         
-        if power_analysis.get("power_issues"):
-            reasons.extend(power_analysis["issues"])
+        if power_analysis.power_issues:
+            reasons.extend(power_analysis.issues)
         
         # Step 4: Analyze logcat for app-related wakeups
-        logcat_analysis = self._analyze_logcat_wakeups(artifacts)
-        detailed_analysis["logcat_wakeups"] = logcat_analysis
+        with span("wakeup:logcat_wakeups", cat="analyzer"):
+            logcat_analysis = self._analyze_logcat_wakeups(logs)
+        detailed_analysis.logcat_wakeups = logcat_analysis
+        
+        if logcat_analysis.app_wakeup_issues:
+            reasons.extend(logcat_analysis.issues)
+        
+        # Step 5: Attribute resumes to interrupts
+        with span("wakeup:irq_wakeups", cat="analyzer"):
+            irq_analysis = self._analyze_irq_wakeups(logs)
+        detailed_analysis.irq_wakeups = irq_analysis
+        
+        if irq_analysis.excessive_irq_wakeups:
+            reasons.extend(irq_analysis.issues)
+        
+        # Step 6: Counter deltas over the on-device sampling window
+        with span("wakeup:sampled", cat="analyzer"):
+            sampled_analysis = self._analyze_samples(logs)
+        detailed_analysis.sampled = sampled_analysis
+        
+        if sampled_analysis.excessive_wakeups:
+            reasons.extend(sampled_analysis.issues)
         
-        if logcat_analysis.get("app_wakeup_issues"):
-            reasons.extend(logcat_analysis["issues"])
+        # Step 7: Correlate wakelocks across every source
+        with span("wakeup:wakelocks", cat="analyzer"):
+            wakelock_analysis = self._analyze_wakelocks(logs)
+        detailed_analysis.wakelocks = wakelock_analysis
+        
+        if wakelock_analysis.long_held:
+            reasons.extend(wakelock_analysis.issues)
+        
+        # Step 8: Rank the offenders by measured battery cost
+        with span("wakeup:battery", cat="analyzer"):
+            detailed_analysis.battery = rank_battery_offenders(logs, detailed_analysis)
         
         # Overall conclusion
         has_issues = len(reasons) > 0
         if has_issues:
-            detailed_analysis["conclusion"] = f"Detected {len(reasons)} wakeup-related issues"
+            detailed_analysis.conclusion = f"Detected {len(reasons)} wakeup-related issues"
         else:
-            detailed_analysis["conclusion"] = "No significant wakeup issues detected"
+            detailed_analysis.conclusion = "No significant wakeup issues detected"
         
         return has_issues, reasons, detailed_analysis
     
-    def _analyze_wakeup_sources(self, artifacts: Dict[str, str]) -> Dict:
+    def analyze_logs(self, logs: LogStore) -> Tuple[bool, List[str], WakeupAnalysis]:
+        """
+        Analyze wakeup patterns from a shared ``LogStore``.
+        
+        Args:
+            logs: Shared read-once view of the case artifacts
+            
+        Returns:
+            Tuple of (has_issues, reasons, detailed_analysis)
+        """
+        return self.analyze(logs.artifacts, logs)
+    
+    def _analyze_wakeup_sources(self, logs: LogStore) -> WakeupSourcesResult:
         """Analyze /sys/kernel/debug/wakeup_sources for excessive wakeup activity."""
-        analysis = {
-            "excessive_wakeups": False,
-            "active_sources": [],
-            "top_wakeup_sources": [],
-            "issues": []
-        }
-        
-        wakeup_sources_file = artifacts.get("wakeup_sources.txt")
-        if not wakeup_sources_file or not Path(wakeup_sources_file).exists():
-            analysis["issues"].append("wakeup_sources.txt not available for analysis")
+        analysis = WakeupSourcesResult()
+        
+        if not logs.has("wakeup_sources.txt"):
+            analysis.issues.append("wakeup_sources.txt not available for analysis")
             return analysis
         
+        analysis.performed = True
         try:
-            content = Path(wakeup_sources_file).read_text(encoding="utf-8", errors="ignore")
-            lines = content.strip().split('\n')
+            lines = [line for line in logs.lines("wakeup_sources.txt") if line.strip()]
             
             # Parse wakeup sources (format: name active_count event_count wakeup_count active_since total_time max_time last_change prevent_suspend_time)
             wakeup_data = []
@@ -104,123 +181,124 @@ class WakeupAnalyzer:
                         event_count = int(parts[2]) if parts[2].isdigit() else 0
                         wakeup_count = int(parts[3]) if parts[3].isdigit() else 0
                         
-                        wakeup_data.append({
-                            "name": name,
-                            "active_count": active_count,
-                            "event_count": event_count,
-                            "wakeup_count": wakeup_count
-                        })
+                        wakeup_data.append(WakeupSourceStats(name, active_count, event_count, wakeup_count))
             
             # Sort by wakeup count
-            wakeup_data.sort(key=lambda x: x["wakeup_count"], reverse=True)
-            analysis["top_wakeup_sources"] = wakeup_data[:10]
+            wakeup_data.sort(key=lambda x: x.wakeup_count, reverse=True)
+            analysis.sources = wakeup_data
+            analysis.top_wakeup_sources = wakeup_data[:10]
             
             # Check for excessive wakeups
-            total_wakeups = sum(item["wakeup_count"] for item in wakeup_data)
+            total_wakeups = sum(item.wakeup_count for item in wakeup_data)
+            analysis.total_wakeups = total_wakeups
             if total_wakeups > 1000:  # Threshold for excessive wakeups
-                analysis["excessive_wakeups"] = True
-                analysis["issues"].append(f"Excessive total wakeups detected: {total_wakeups}")
+                analysis.excessive_wakeups = True
+                analysis.issues.append(f"Excessive total wakeups detected: {total_wakeups}")
             
             # Check for individual sources with high wakeup counts
             for item in wakeup_data[:5]:  # Check top 5
-                if item["wakeup_count"] > 100:
-                    analysis["issues"].append(f"High wakeup count from '{item['name']}': {item['wakeup_count']} wakeups")
+                if item.wakeup_count > 100:
+                    analysis.issues.append(f"High wakeup count from '{item.name}': {item.wakeup_count} wakeups")
             
             # Check for active wakeup sources
-            active_sources = [item for item in wakeup_data if item["active_count"] > 0]
-            analysis["active_sources"] = active_sources
+            active_sources = [item for item in wakeup_data if item.active_count > 0]
+            analysis.active_sources = active_sources
             
             if len(active_sources) > 5:
-                analysis["issues"].append(f"Multiple active wakeup sources detected: {len(active_sources)}")
+                analysis.issues.append(f"Multiple active wakeup sources detected: {len(active_sources)}")
         
         except Exception as e:
-            analysis["issues"].append(f"Failed to parse wakeup_sources.txt: {str(e)}")
+            analysis.issues.append(f"Failed to parse wakeup_sources.txt: {str(e)}")
         
         return analysis
     
-    def _analyze_dmesg_wakeups(self, artifacts: Dict[str, str]) -> Dict:
+    def _analyze_dmesg_wakeups(self, logs: LogStore) -> DmesgWakeupsResult:
         """Analyze dmesg for wakeup-related kernel messages."""
-        analysis = {
-            "frequent_wakeups": False,
-            "wakeup_events": [],
-            "wakeup_intervals": [],
-            "issues": []
-        }
-        
-        dmesg_file = artifacts.get("dmesg.txt")
-        if not dmesg_file or not Path(dmesg_file).exists():
-            analysis["issues"].append("dmesg.txt not available for wakeup analysis")
+        analysis = DmesgWakeupsResult()
+        
+        if not logs.has("dmesg.txt"):
+            analysis.issues.append("dmesg.txt not available for wakeup analysis")
             return analysis
         
+        analysis.performed = True
         try:
-            content = Path(dmesg_file).read_text(encoding="utf-8", errors="ignore")
-            lines = content.strip().split('\n')
+            index = timestamp_index(logs, "dmesg.txt")
             
             # Look for wakeup-related messages
-            wakeup_patterns = [
-                r"PM: suspend exit",
-                r"PM: resume",
-                r"wakeup.*interrupt",
-                r"IRQ.*wakeup",
-                r"Wakeup.*source"
-            ]
+            wakeup_patterns = re.compile(
+                r"PM: suspend exit|PM: resume|wakeup.*interrupt|IRQ.*wakeup|Wakeup.*source",
+                re.IGNORECASE,
+            )
+            suspend_entry = re.compile(r"PM: suspend entry")
             
+            # Only the final analysis window of the log ([sec.usec] or dmesg -T timestamps).
+            # One resume logs several matching lines: count it once, at its first line,
+            # unless a new suspend was entered or the lines are more than resume_gap apart
+            window_start, window_end = index.last(self.analysis_window)
             wakeup_events = []
-            for line in lines:
-                for pattern in wakeup_patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        # Try to extract timestamp
-                        timestamp_match = re.search(r'\[(\d+\.\d+)\]', line)
-                        if timestamp_match:
-                            timestamp = float(timestamp_match.group(1))
-                            wakeup_events.append({
-                                "timestamp": timestamp,
-                                "message": line.strip()
-                            })
-                        break
+            suspended = False
+            last_match = None
+            for timestamp, line in index.entries(window_start, window_end):
+                if suspend_entry.search(line):
+                    suspended = True
+                    continue
+                if not wakeup_patterns.search(line):
+                    continue
+                if suspended or last_match is None or timestamp - last_match > self.resume_gap:
+                    wakeup_events.append(WakeupEvent(timestamp, line.strip()))
+                    suspended = False
+                last_match = timestamp
+            
+            analysis.wakeup_events = wakeup_events[-20:]  # Keep last 20 events
+            analysis.event_count = len(wakeup_events)
             
-            analysis["wakeup_events"] = wakeup_events[-20:]  # Keep last 20 events
+            if index.end is not None:
+                analysis.window_seconds = index.end - max(index.start, window_start)
+                minutes = max(analysis.window_seconds / 60, 1.0)
+                analysis.wakeup_rate = len(wakeup_events) / minutes
+                if analysis.wakeup_rate > self.wakeup_threshold:
+                    analysis.frequent_wakeups = True
+                    analysis.issues.append(
+                        f"Kernel wakeup rate {analysis.wakeup_rate:.1f}/min (dmesg resumes) over the last "
+                        f"{minutes:.0f} min exceeds {self.wakeup_threshold}/min"
+                    )
             
             # Calculate wakeup intervals
             if len(wakeup_events) > 1:
                 intervals = []
                 for i in range(1, len(wakeup_events)):
-                    interval = wakeup_events[i]["timestamp"] - wakeup_events[i-1]["timestamp"]
+                    interval = wakeup_events[i].timestamp - wakeup_events[i-1].timestamp
                     intervals.append(interval)
                 
-                analysis["wakeup_intervals"] = intervals
+                analysis.wakeup_intervals = intervals
                 
                 # Check for frequent wakeups (less than 30 seconds apart)
                 frequent_intervals = [i for i in intervals if i < 30]
                 if len(frequent_intervals) > len(intervals) * 0.5:  # More than 50% are frequent
-                    analysis["frequent_wakeups"] = True
-                    analysis["issues"].append(f"Frequent wakeups detected: {len(frequent_intervals)} intervals < 30s")
+                    analysis.frequent_wakeups = True
+                    analysis.issues.append(f"Frequent wakeups detected: {len(frequent_intervals)} intervals < 30s")
                 
                 # Check average interval
                 avg_interval = sum(intervals) / len(intervals)
                 if avg_interval < 60:  # Less than 1 minute average
-                    analysis["issues"].append(f"Short average wakeup interval: {avg_interval:.1f} seconds")
+                    analysis.issues.append(f"Short average wakeup interval: {avg_interval:.1f} seconds")
         
         except Exception as e:
-            analysis["issues"].append(f"Failed to analyze dmesg wakeups: {str(e)}")
+            analysis.issues.append(f"Failed to analyze dmesg wakeups: {str(e)}")
         
         return analysis
     
-    def _analyze_power_logs(self, artifacts: Dict[str, str]) -> Dict:
+    def _analyze_power_logs(self, logs: LogStore) -> PowerResult:
         """Analyze power management related logs."""
-        analysis = {
-            "power_issues": False,
-            "power_events": [],
-            "issues": []
-        }
-        
-        dumpsys_power_file = artifacts.get("dumpsys_power.txt")
-        if not dumpsys_power_file or not Path(dumpsys_power_file).exists():
-            analysis["issues"].append("dumpsys_power.txt not available for power analysis")
+        analysis = PowerResult()
+        
+        if not logs.has("dumpsys_power.txt"):
+            analysis.issues.append("dumpsys_power.txt not available for power analysis")
             return analysis
         
+        analysis.performed = True
         try:
-            content = Path(dumpsys_power_file).read_text(encoding="utf-8", errors="ignore")
+            content = logs.text("dumpsys_power.txt")
             
             # Look for power-related issues
             if "Wake Locks:" in content:
@@ -232,77 +310,146 @@ class WakeupAnalyzer:
                         active_locks.append(line.strip())
                 
                 if active_locks:
-                    analysis["power_issues"] = True
-                    analysis["issues"].append(f"Active wake locks detected: {len(active_locks)}")
-                    analysis["power_events"].extend(active_locks[:5])  # Top 5
+                    analysis.power_issues = True
+                    analysis.issues.append(f"Active wake locks detected: {len(active_locks)}")
+                    analysis.power_events.extend(active_locks[:5])  # Top 5
             
             # Check for screen wake events
             if "Screen wake locks:" in content:
                 screen_wake_section = content.split("Screen wake locks:")[1].split("\n\n")[0]
                 screen_wakes = len([line for line in screen_wake_section.split('\n') if line.strip()])
                 if screen_wakes > 10:
-                    analysis["issues"].append(f"Excessive screen wake events: {screen_wakes}")
+                    analysis.issues.append(f"Excessive screen wake events: {screen_wakes}")
         
         except Exception as e:
-            analysis["issues"].append(f"Failed to analyze power logs: {str(e)}")
+            analysis.issues.append(f"Failed to analyze power logs: {str(e)}")
         
         return analysis
     
-    def _analyze_logcat_wakeups(self, artifacts: Dict[str, str]) -> Dict:
+    def _analyze_logcat_wakeups(self, logs: LogStore) -> LogcatWakeupsResult:
         """Analyze logcat for application-related wakeup events."""
-        analysis = {
-            "app_wakeup_issues": False,
-            "app_wakeups": [],
-            "issues": []
-        }
-        
-        logcat_file = artifacts.get("logcat.txt")
-        if not logcat_file or not Path(logcat_file).exists():
-            analysis["issues"].append("logcat.txt not available for app wakeup analysis")
+        analysis = LogcatWakeupsResult()
+        
+        if not logs.has("logcat.txt"):
+            analysis.issues.append("logcat.txt not available for app wakeup analysis")
             return analysis
         
+        analysis.performed = True
         try:
-            content = Path(logcat_file).read_text(encoding="utf-8", errors="ignore")
-            lines = content.strip().split('\n')
-            
-            # Look for app wakeup patterns
-            app_wakeup_patterns = [
-                r"AlarmManager.*wakeup",
-                r"JobScheduler.*wakeup",
-                r"WakeLock.*acquired",
-                r"PowerManager.*wakeUp"
-            ]
+            lines = logs.lines("logcat.txt")
+            packages = package_index(logs)
             
             app_wakeups = []
+            app_counts = {}
             for line in lines:
-                for pattern in app_wakeup_patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        app_wakeups.append(line.strip())
-                        break
+                if not APP_WAKEUP.search(line):
+                    continue
+                app_wakeups.append(line.strip())
+                # Installed packages (and UIDs) when packages.txt was collected
+                if packages.count:
+                    app_name = packages.find(line)
+                else:
+                    app_match = _APP_GUESS.search(line)
+                    app_name = app_match.group(1) if app_match else None
+                if app_name:
+                    app_counts[app_name] = app_counts.get(app_name, 0) + 1
             
-            analysis["app_wakeups"] = app_wakeups[-10:]  # Keep last 10
+            analysis.app_wakeups = app_wakeups[-10:]  # Keep last 10
+            analysis.app_counts = dict(sorted(app_counts.items(), key=lambda x: x[1], reverse=True))
             
             # Check for excessive app wakeups
             if len(app_wakeups) > 50:
-                analysis["app_wakeup_issues"] = True
-                analysis["issues"].append(f"Excessive app wakeup events detected: {len(app_wakeups)}")
-            
-            # Check for specific problematic apps
-            app_counts = {}
-            for wakeup in app_wakeups:
-                # Try to extract app name
-                app_match = re.search(r'([a-z]+\.[a-z]+\.[a-z]+)', wakeup)
-                if app_match:
-                    app_name = app_match.group(1)
-                    app_counts[app_name] = app_counts.get(app_name, 0) + 1
+                analysis.app_wakeup_issues = True
+                analysis.issues.append(f"Excessive app wakeup events detected: {len(app_wakeups)}")
             
             # Report apps with high wakeup counts
-            for app, count in sorted(app_counts.items(), key=lambda x: x[1], reverse=True)[:3]:
+            for app, count in list(analysis.app_counts.items())[:3]:
                 if count > 5:
-                    analysis["issues"].append(f"App '{app}' has high wakeup activity: {count} events")
+                    analysis.issues.append(f"App '{app}' has high wakeup activity: {count} events")
         
         except Exception as e:
-            analysis["issues"].append(f"Failed to analyze logcat wakeups: {str(e)}")
+            analysis.issues.append(f"Failed to analyze logcat wakeups: {str(e)}")
+        
+        return analysis
+    
+    def _analyze_irq_wakeups(self, logs: LogStore) -> IrqResult:
+        """Name the interrupts behind resumes (dmesg joined with /proc/interrupts snapshots)."""
+        analysis = analyze_irq_wakeups(logs)
+        if not analysis.performed:
+            return analysis
+        
+        for irq in analysis.irqs:
+            if irq.wakeups_per_hour > self.irq_wakeup_threshold:
+                analysis.excessive_irq_wakeups = True
+                share = irq.wakeups / analysis.resume_count if analysis.resume_count else 0
+                analysis.issues.append(
+                    f"IRQ {irq.irq} ({irq.name or 'unknown'}) caused {irq.wakeups} resumes "
+                    f"({share:.0%} of all, {irq.wakeups_per_hour:.0f}/hour)"
+                )
+        
+        return analysis
+
+    
+    def _analyze_samples(self, logs: LogStore) -> SampledResult:
+        """Compare the first and last on-device samples of ``samples.txt``."""
+        analysis = SampledResult()
+        if not logs.has("samples.txt"):
+            return analysis
+        
+        samples = logs.cached("samples.txt", "samples", lambda: decode_samples(logs.text("samples.txt")))
+        if len(samples) < 2:
+            analysis.issues.append("samples.txt holds fewer than two samples")
+            return analysis
+        analysis.performed = True
+        analysis.sample_count = len(samples)
+        analysis.window_seconds = samples[-1].uptime - samples[0].uptime
+        
+        stats = suspend_stats_table([samples[0], samples[-1]])
+        first_stats, last_stats = stats[0][1], stats[-1][1]
+        analysis.suspend_success = last_stats.get("success", 0) - first_stats.get("success", 0)
+        analysis.suspend_fail = last_stats.get("fail", 0) - first_stats.get("fail", 0)
+        
+        table = wakeup_sources_table([samples[0], samples[-1]])
+        first_sources, last_sources = table[0][1], table[-1][1]
+        hours = analysis.window_seconds / 3600
+        for name, (wakeups, total_ms) in last_sources.items():
+            before_wakeups, before_ms = first_sources.get(name, (0, 0))
+            source = SampledSource(name, wakeups - before_wakeups, total_ms - before_ms)
+            if source.wakeups <= 0 and source.active_ms <= 0:
+                continue
+            if hours > 0:
+                source.wakeups_per_hour = source.wakeups / hours
+            analysis.sources.append(source)
+        analysis.sources.sort(key=lambda s: (-s.wakeups, -s.active_ms))
+        analysis.sources = analysis.sources[:20]
+        
+        for source in analysis.sources:
+            if source.wakeups_per_hour > self.sampled_wakeup_threshold:
+                analysis.excessive_wakeups = True
+                analysis.issues.append(
+                    f"Wakeup source '{source.name}' woke the device {source.wakeups} times while sampling "
+                    f"({source.wakeups_per_hour:.0f}/hour)"
+                )
+        if analysis.suspend_fail > 0:
+            analysis.issues.append(f"{analysis.suspend_fail} suspend failure(s) while sampling")
+        
+        return analysis
+    
+    def _analyze_wakelocks(self, logs: LogStore) -> WakelockCorrelationResult:
+        """Report active wakelocks whose current hold exceeds ``long_wakelock_ms``, with their holder."""
+        analysis = correlate_wakelocks(logs)
+        if not analysis.performed:
+            return analysis
+        
+        for record in analysis.records:
+            if record.active and record.hold_ms > self.long_wakelock_ms:
+                analysis.long_held = True
+                holder = describe_holder(record) or "unknown holder"
+                analysis.issues.append(
+                    f"Wakelock '{record.name}' ({holder}) has been held for {record.hold_ms / 60000:.0f} min "
+                    f"({record.total_ms / 60000:.0f} min in total, {record.kernel_wakeups} kernel wakeups, {record.app_events} app events; "
+                    f"seen in {', '.join(record.sources)})"
+                )
         
         return analysis
 
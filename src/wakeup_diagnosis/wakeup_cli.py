@@ -50,19 +50,71 @@ Examples:
         help="Output directory for reports (default: './reports/wakeup')"
     )
     
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="When collecting: wait SECONDS between the first /proc/interrupts and /d/suspend_stats "
+             "snapshots and the rest of the collection, so IRQ and suspend counts cover a test "
+             "interval (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="When collecting: run an on-device sampler of suspend_stats, wakeup_sources and "
+             "/proc/interrupts for SECONDS (whole seconds), with no ADB traffic until it finishes "
+             "(default: off)"
+    )
+    
+    parser.add_argument(
+        "--sample-period",
+        type=float,
+        default=10,
+        metavar="SECONDS",
+        help="Seconds between on-device samples (default: 10)"
+    )
+    
+    parser.add_argument(
+        "--compress",
+        choices=["gz", "zst", "none"],
+        default="gz",
+        help="When collecting: store the log files compressed (.gz, or .zst with Python 3.14+ or "
+             "the zstandard package); analysis reads them transparently (default: gz)"
+    )
+    
     parser.add_argument(
         "--case-dir",
-        help="""Path to a directory containing pre-collected log files for wakeup analysis.
-        Expected files: dmesg.txt, wakeup_sources.txt, dumpsys_power.txt, logcat.txt.
+        help="""Path to a directory containing pre-collected log files for wakeup analysis,
+        an adb bugreport zip or a .pcase case archive. Expected files: dmesg.txt, wakeup_sources.txt, dumpsys_power.txt, logcat.txt.
         Files can be partial - the tool will analyze whatever logs are available."""
     )
     
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help="Also export the power events of the case (suspend slices, wakeup IRQs and sources, "
+             "wakelock holds, app wakeups, sampler counters) as Chrome trace-event JSON to "
+             "power_timeline.json in the case directory, for ui.perfetto.dev or chrome://tracing"
+    )
+    
     parser.add_argument(
         "--enable-ai",
         action="store_true",
         help="Enable AI-powered analysis (requires QGenie configuration)"
     )
     
+    parser.add_argument(
+        "--format",
+        choices=["report", "json", "jsonl"],
+        default="report",
+        help="Output: Markdown/HTML reports (default), or the verdict and analysis as JSON on stdout "
+             "without generating reports (jsonl: one line per case)"
+    )
+    
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -4,18 +4,41 @@ Wakeup Diagnosis Main Module
 
 This module provides the main functionality for diagnosing Android device wakeup issues.
 """
-import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-# Add common modules to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "common"))
+from common.collector import AdbEvidenceCollector, read_case_info
+from common.logs import LogStore
+from common.output import case_record, json_output, module_result
+from common.pipeline import run_module
+from common.registry import registry
+from common.timeline import TIMELINE_NAME, export_timeline
+from common.types import ArtifactMap
+from wakeup_diagnosis.wakeup_cli import parse_args
 
-from wakeup_analyzer import WakeupAnalyzer
-from wakeup_cli import parse_args
-from collector import LogCollector
-from ai import AIAnalyzer
-from report.markdown_builder import MarkdownBuilder
-from report.html_renderer import HTMLRenderer
+
+def run_case(
+    case_dir: str,
+    artifacts: ArtifactMap,
+    logs: Optional[LogStore] = None,
+    enable_ai: bool = False,
+    render: bool = True,
+) -> Tuple[bool, List[str], dict, str]:
+    """
+    Analyze one case and write its Markdown and HTML reports.
+    
+    Args:
+        case_dir: Directory containing collected evidence
+        artifacts: Dictionary mapping filenames to their paths
+        logs: Shared log store (created from ``artifacts`` when omitted)
+        enable_ai: Whether to request the optional AI analysis
+        render: Whether to write the reports (``html_path`` is empty otherwise)
+        
+    Returns:
+        Tuple[bool, List[str], dict, str]: (failed, reasons, detailed_analysis, html_path)
+    """
+    print(f"📊 Analyzing wakeup patterns...")
+    return run_module(registry.get("wakeup"), case_dir, artifacts, logs, enable_ai, render=render)
 
 
 def main(args):
@@ -25,50 +48,50 @@ def main(args):
     Args:
         args: Parsed command line arguments
     """
+    with json_output(getattr(args, "format", "report")) as writer:
+        return _run(args, writer)
+
+
+def _run(args, writer):
+    """Collect or load the case and analyze it; ``writer`` selects JSON output."""
     print("🔍 Android Wakeup Diagnosis Tool")
     print("=" * 50)
     
     # Initialize components
-    collector = LogCollector(args.adb, args.device)
-    analyzer = WakeupAnalyzer()
-    ai_analyzer = AIAnalyzer() if hasattr(args, 'enable_ai') and args.enable_ai else None
+    collector = AdbEvidenceCollector(
+        adb=args.adb,
+        device=args.device or "",
+        out_dir=args.out,
+        interval=args.interval,
+        compression=args.compress,
+        sample_duration=args.sample,
+        sample_period=args.sample_period,
+    )
+    names = registry.get("wakeup").artifacts
     
     # Collect or use existing logs
     if args.case_dir:
         print(f"📁 Using existing logs from: {args.case_dir}")
-        case_dir = args.case_dir
-        artifacts = collector.discover_logs(case_dir)
+        case_dir, artifacts = collector.load_existing(args.case_dir, names)
     else:
         print("📱 Collecting fresh logs from device...")
-        case_dir, artifacts = collector.collect_wakeup_logs(args.out)
-    
-    print(f"📊 Analyzing wakeup patterns...")
-    
-    # Analyze logs
-    failed, reasons, detailed_analysis = analyzer.analyze(artifacts)
+        case_dir, artifacts = collector.collect(names, prefix="wakeup_diag")
     
-    # AI analysis (if enabled)
-    ai_md = None
-    if ai_analyzer and artifacts:
-        print("🤖 Running AI analysis...")
-        try:
-            ai_md = ai_analyzer.analyze_wakeup_logs(artifacts)
-        except Exception as e:
-            print(f"⚠️  AI analysis failed: {e}")
+    if getattr(args, "timeline", False):
+        paths, count = export_timeline(artifacts, str(Path(case_dir) / TIMELINE_NAME), read_case_info(case_dir))
+        print(f"🕒 Timeline: {count} events → {', '.join(paths)}")
     
-    # Generate reports
-    print("📝 Generating reports...")
+    if writer is not None:
+        failed, reasons, detailed, _ = run_case(case_dir, artifacts, render=False)
+        record = case_record(case_dir, {"wakeup": module_result(failed, reasons, detailed)},
+                             read_case_info(case_dir))
+        writer.write(record)
+        return record
     
-    # Markdown report
-    md_builder = MarkdownBuilder()
-    md_path = md_builder.build_wakeup_report(
-        case_dir, failed, reasons, ai_md, artifacts, detailed_analysis
+    failed, reasons, _, html_path = run_case(
+        case_dir, artifacts, enable_ai=getattr(args, "enable_ai", False)
     )
     
-    # HTML report
-    html_renderer = HTMLRenderer()
-    html_path = html_renderer.render_wakeup_report(md_path, artifacts)
-    
     # Summary
     print("\n" + "=" * 50)
     if failed:
@@ -79,7 +102,6 @@ def main(args):
         print("🟢 CONCLUSION: Wakeup Behavior Normal")
     
     print(f"\n📄 Reports generated:")
-    print(f"  • Markdown: {md_path}")
     print(f"  • HTML: {html_path}")
     print("\n✅ Analysis complete!")
 
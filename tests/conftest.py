@@ -0,0 +1,5 @@
+"""Make the ``src`` packages importable the way ``bin/`` scripts do."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,68 @@
+"""Tests for the chunked (map-reduce) analysis in common.ai."""
+from common.ai import MERGE_INSTRUCTIONS, QGenieReporter, split_chunks
+
+CYCLE = (
+    "[  10.000000] PM: suspend entry (deep)\n"
+    "[  10.100000] PM: suspend exit\n"
+)
+
+
+class FakeReporter(QGenieReporter):
+    """Answers every request locally and records the prompts."""
+
+    CHUNK_BYTES = 400
+
+    def __init__(self, reply=lambda prompt: "- finding"):
+        super().__init__()
+        self.reply = reply
+        self.prompts = []
+
+    def _chat(self, prompt):
+        self.prompts.append(prompt)
+        return self.reply(prompt)
+
+
+def test_chunks_are_cut_at_suspend_cycles():
+    text = "boot\n" + CYCLE * 10
+    chunks = split_chunks(text, 3 * len(CYCLE))
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 3 * len(CYCLE) for chunk in chunks)
+    assert all(chunk.startswith("[  10.000000] PM: suspend entry") for chunk in chunks[1:])
+
+
+def test_oversized_segment_is_cut_at_lines():
+    text = "".join(f"line {i}\n" for i in range(100))
+    chunks = split_chunks(text, 50)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 50 and chunk.endswith("\n") for chunk in chunks)
+
+
+def test_small_logs_go_out_in_one_request():
+    reporter = FakeReporter(lambda prompt: "report")
+    assert reporter.generate({"dmesg": CYCLE}) == "report"
+    assert len(reporter.prompts) == 1
+
+
+def test_large_logs_are_mapped_then_reduced():
+    reporter = FakeReporter()
+    reporter.generate({"dmesg": CYCLE * 20, "suspend_stats": "success: 3\n"})
+    maps = [p for p in reporter.prompts if "of the `dmesg` log" in p]
+    assert len(maps) > 1
+    reduce_prompt = reporter.prompts[-1]
+    assert "**Per-chunk findings:**" in reduce_prompt
+    assert "success: 3" in reduce_prompt and "PM: suspend entry" not in reduce_prompt
+
+
+def test_findings_are_merged_until_they_fit():
+    reporter = FakeReporter(lambda prompt: "- merged")
+    parts = [f"### dmesg (chunk {i}/40)\n" + "x" * 60 for i in range(40)]
+    merged = reporter._merge_findings(parts, 300)
+    assert sum(len(part) for part in merged) <= 300
+    assert all(p.startswith(MERGE_INSTRUCTIONS) for p in reporter.prompts)
+
+
+def test_failed_merges_still_shrink_to_the_budget():
+    reporter = FakeReporter(lambda prompt: None)
+    parts = ["y" * 200 for _ in range(10)]
+    merged = reporter._merge_findings(parts, 300)
+    assert sum(len(part) for part in merged) <= 300 + len("\n(truncated)")
@@ -0,0 +1,63 @@
+"""Tests for compressed artifacts in common.artifacts."""
+import gzip
+
+import pytest
+
+from common.artifacts import (
+    artifact_exists,
+    artifact_name,
+    find_artifact,
+    read_artifact,
+    source_file,
+    write_artifact,
+)
+from common.collector import AdbEvidenceCollector
+from common.logs import LogStore
+
+DMESG = "[  100.000000] PM: suspend entry (deep)\n[  105.000000] PM: suspend exit\n"
+
+
+def _has_zstd():
+    try:
+        from common.artifacts import _zstd
+        _zstd()
+        return True
+    except ImportError:
+        return False
+
+
+@pytest.mark.parametrize("compression", [
+    "none", "gz",
+    pytest.param("zst", marks=pytest.mark.skipif(not _has_zstd(), reason="needs Python 3.14+ or zstandard")),
+])
+def test_written_artifacts_read_back(tmp_path, compression):
+    path = write_artifact(tmp_path, "dmesg.txt", DMESG, compression)
+    assert artifact_name(path).endswith("dmesg.txt")
+    assert find_artifact(tmp_path, "dmesg.txt") == tmp_path / path.rsplit("/", 1)[-1]
+    assert artifact_exists(path) and source_file(path) == path
+    assert read_artifact(path) == DMESG
+
+
+def test_gzip_is_stored_compressed(tmp_path):
+    path = write_artifact(tmp_path, "dmesg.txt", DMESG * 100, "gz")
+    with open(path, "rb") as f:
+        raw = f.read()
+    assert raw[:2] == b"\x1f\x8b" and len(raw) < len(DMESG) * 2
+    assert gzip.decompress(raw).decode() == DMESG * 100
+
+
+def test_plain_file_wins_over_compressed(tmp_path):
+    write_artifact(tmp_path, "dmesg.txt", "compressed\n", "gz")
+    write_artifact(tmp_path, "dmesg.txt", DMESG)
+    assert find_artifact(tmp_path, "dmesg.txt") == tmp_path / "dmesg.txt"
+    assert find_artifact(tmp_path, "logcat.txt") is None
+
+
+def test_analyzers_read_compressed_cases(tmp_path):
+    write_artifact(tmp_path, "dmesg.txt", DMESG, "gz")
+    write_artifact(tmp_path, "suspend_stats.txt", "success: 3\nfail: 0\n", "gz")
+    _, artifacts = AdbEvidenceCollector().load_existing(str(tmp_path), ["dmesg.txt", "suspend_stats.txt"])
+    assert sorted(artifacts) == ["dmesg.txt", "suspend_stats.txt"]
+    assert artifacts["dmesg.txt"].endswith("dmesg.txt.gz")
+    logs = LogStore(artifacts)
+    assert logs.lines("dmesg.txt")[-1] == "[  105.000000] PM: suspend exit"
@@ -0,0 +1,69 @@
+"""Tests for common.baseline."""
+import statistics
+
+import pytest
+
+from common.baseline import Baseline, QuantileSketch, RunningStats
+from common.types import WakeupAnalysis
+
+
+def _stats(values):
+    stats = RunningStats()
+    for x in values:
+        stats.add(x)
+    return stats
+
+
+def test_merged_running_stats_match_one_pass():
+    left, right = [3.0, 1.0, 4.0, 1.0], [5.0, 9.0, 2.0]
+    merged = _stats(left)
+    merged.merge(_stats(right))
+    merged.merge(RunningStats())
+    assert merged.count == 7
+    assert merged.mean == pytest.approx(statistics.mean(left + right))
+    assert merged.std == pytest.approx(statistics.stdev(left + right))
+    assert (merged.min, merged.max) == (1.0, 9.0)
+    assert RunningStats.from_dict(merged.to_dict()).std == pytest.approx(merged.std)
+
+
+def test_sketch_quantile_and_rank_stay_within_relative_error():
+    sketch = QuantileSketch(alpha=0.02)
+    for x in range(0, 1001):
+        sketch.add(float(x))
+    assert sketch.quantile(0.5) == pytest.approx(500, rel=0.02)
+    assert sketch.quantile(0.95) == pytest.approx(950, rel=0.02)
+    assert sketch.quantile(0.0) == 0.0
+    # 250 shares a bucket with values up to ~4% (2 * alpha) larger
+    assert 251 / 1001 <= sketch.rank(250) <= 261 / 1001
+    assert sketch.rank(-1) == 0.0 and sketch.rank(5000) == 1.0
+
+
+def test_merged_sketches_answer_like_one_sketch():
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for x in range(1, 201):
+        whole.add(x)
+        (left if x % 2 else right).add(x)
+    left.merge(right)
+    assert left.count == whole.count
+    assert left.quantile(0.9) == whole.quantile(0.9)
+    assert QuantileSketch.from_dict(left.to_dict()).rank(100) == whole.rank(100)
+
+
+def _wakeup(total_wakeups):
+    detailed = WakeupAnalysis()
+    detailed.wakeup_sources.total_wakeups = total_wakeups
+    return detailed
+
+
+def test_compare_builds_flags_significant_regressions_only():
+    baseline = Baseline()
+    for n in (100, 104, 98, 102, 101):
+        baseline.update("wakeup", False, _wakeup(n), build="OLD")
+        baseline.update("wakeup", False, _wakeup(n * 3), build="NEW")
+        baseline.update("wakeup", False, _wakeup(n + 1), build="SAME")
+    found = baseline.compare_builds("NEW", "OLD")
+    assert [r["metric"] for r in found] == ["total_wakeups"]
+    assert found[0]["new_cases"] == found[0]["old_cases"] == 5
+    assert baseline.compare_builds("SAME", "OLD") == []
+    assert baseline.compare_builds("OLD", "NEW") == []
+    assert baseline.compare_builds("NEW", "MISSING") == []
@@ -0,0 +1,91 @@
+"""Tests for common.bugreport and reading bugreport zips through common.artifacts."""
+import json
+import zipfile
+
+import pytest
+
+from common import bugreport
+from common.artifacts import read_artifact
+from common.bugreport import INDEX_NAME, BugreportIndex, case_dir_for
+from common.collector import AdbEvidenceCollector
+
+DUMPSTATE = """\
+========================================================
+== dumpstate: 2025-10-01 12:00:00
+========================================================
+
+Build fingerprint: 'google/husky/husky:14/UQ1A/123:user/release-keys'
+------ KERNEL LOG (dmesg) ------
+[  100.000000] PM: suspend entry (deep)
+[  105.000000] PM: suspend exit
+------ 0.012s was the duration of 'KERNEL LOG (dmesg)' ------
+------ SUSPEND STATS (/d/suspend_stats) ------
+success: 3
+fail: 1
+------ 0.001s was the duration of 'SUSPEND STATS' ------
+------ SYSTEM PROPERTIES ------
+[ro.product.model]: [Pixel 8 Pro]
+------ 0.002s was the duration of 'SYSTEM PROPERTIES' ------
+DUMP OF SERVICE power:
+Wake Locks: size=1
+  PARTIAL_WAKE_LOCK 'NlpWakeLock' ACQ=-5s (uid=10100 pid=2990)
+---------------------------------------------------------------------------------
+DUMP OF SERVICE HIGH suspend_control_internal:
+ | NAME | PID | TYPE | STATUS |
+---------------------------------------------------------------------------------
+"""
+
+
+def _zip(tmp_path, compression=zipfile.ZIP_DEFLATED, text=DUMPSTATE):
+    path = tmp_path / "bugreport-husky-2025-10-01.zip"
+    with zipfile.ZipFile(path, "w", compression=compression) as archive:
+        archive.writestr("main_entry.txt", "bugreport-husky.txt")
+        archive.writestr("bugreport-husky.txt", text)
+        archive.writestr("version.txt", "2.0")
+    return str(path)
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_sections_are_served_from_the_zip(tmp_path, compression):
+    index = BugreportIndex.scan(_zip(tmp_path, compression))
+    assert index.member == "bugreport-husky.txt"
+    assert sorted(index.artifacts) == ["dmesg.txt", "dumpsys_power.txt", "dumpsys_suspend.txt", "suspend_stats.txt"]
+    with index.open("suspend_stats.txt") as f:
+        assert f.read() == b"success: 3\nfail: 1\n"
+    with index.open("dmesg.txt") as f:
+        assert f.read().decode().splitlines()[-1] == "[  105.000000] PM: suspend exit"
+    with index.open("dumpsys_power.txt") as f:
+        assert b"NlpWakeLock" in f.read()
+    assert index.info == {
+        "Collection Time": "2025-10-01 12:00:00",
+        "Build Fingerprint": "google/husky/husky:14/UQ1A/123:user/release-keys",
+        "Device Model": "Pixel 8 Pro",
+    }
+
+
+def test_markers_split_across_scan_chunks(tmp_path, monkeypatch):
+    expected = BugreportIndex.scan(_zip(tmp_path)).sections
+    for chunk in (7, 64, 100):
+        monkeypatch.setattr(bugreport, "_CHUNK", chunk)
+        assert BugreportIndex.scan(_zip(tmp_path)).sections == expected
+
+
+def test_saved_index_is_reused_until_the_zip_changes(tmp_path):
+    zip_path = _zip(tmp_path)
+    index_path = tmp_path / INDEX_NAME
+    first = BugreportIndex.load(zip_path, index_path)
+    saved = json.loads(index_path.read_text())
+    saved["info"]["Device Model"] = "from the saved index"
+    index_path.write_text(json.dumps(saved))
+    assert BugreportIndex.load(zip_path, index_path).info["Device Model"] == "from the saved index"
+    _zip(tmp_path, text=DUMPSTATE + "\n")
+    assert BugreportIndex.load(zip_path, index_path).info == first.info
+
+
+def test_load_existing_reads_a_bugreport_in_place(tmp_path):
+    zip_path = _zip(tmp_path)
+    case_dir, artifacts = AdbEvidenceCollector().load_existing(zip_path, ["suspend_stats.txt", "logcat.txt"])
+    assert case_dir == str(case_dir_for(zip_path))
+    assert list(artifacts) == ["suspend_stats.txt"]
+    assert read_artifact(artifacts["suspend_stats.txt"]) == "success: 3\nfail: 1\n"
+    assert (case_dir_for(zip_path) / INDEX_NAME).is_file()
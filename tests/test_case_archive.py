@@ -0,0 +1,96 @@
+"""Tests for common.case_archive and indexing archived results."""
+import io
+import os
+
+import pytest
+
+from common import case_archive as archives
+from common.case_archive import CaseArchive, case_archive, write_case_archive
+from common.store import ResultStore
+from power_diagnosis.query import index_cases
+
+DMESG = "".join(f"[{i:6d}.000000] line {i}\n" for i in range(1, 2001))
+STATS = "success: 3\nfail: 1\n"
+
+
+def _archive(tmp_path, dmesg=DMESG):
+    path = str(tmp_path / "case1.pcase")
+    artifacts = [("dmesg.txt", io.BytesIO(dmesg.encode())), ("suspend_stats.txt", io.BytesIO(STATS.encode()))]
+    return write_case_archive(path, artifacts, {"Device Model": "Pixel 8"}, source="case1")
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(archives, "_BLOCK_BYTES", 4096)
+
+
+def test_blocks_are_cut_at_line_ends(tmp_path, small_blocks):
+    archive = CaseArchive.load(_archive(tmp_path).path)
+    entry = archive.artifacts["dmesg.txt"]
+    assert (entry["size"], entry["lines"]) == (len(DMESG), 2000)
+    assert len(entry["blocks"]) > 5
+    with archive.open("dmesg.txt") as f:
+        assert f.read().decode() == DMESG
+    for _, _, first, start in entry["blocks"]:
+        assert DMESG[start:].startswith(f"[{first:6d}.000000]")
+
+
+def test_line_ranges_read_only_their_blocks(tmp_path, small_blocks):
+    archive = _archive(tmp_path)
+    lines = DMESG.splitlines()
+    assert archive.lines("dmesg.txt", 1, 3) == lines[:3]
+    assert archive.lines("dmesg.txt", 999, 200) == lines[998:1198]
+    assert archive.lines("dmesg.txt", 1995) == lines[1994:]
+    assert archive.lines("suspend_stats.txt") == ["success: 3", "fail: 1"]
+    with pytest.raises(KeyError):
+        archive.lines("logcat.txt")
+
+
+def test_unterminated_last_line_is_counted(tmp_path):
+    archive = _archive(tmp_path, dmesg="[ 1.000000] a\n[ 2.000000] b")
+    assert archive.artifacts["dmesg.txt"]["lines"] == 2
+    assert archive.lines("dmesg.txt", 2) == ["[ 2.000000] b"]
+
+
+def test_results_round_trip(tmp_path, small_blocks):
+    archive = _archive(tmp_path)
+    os.utime(archive.path, (1_700_000_000, 1_700_000_000))
+    archive.add_results({"suspend": {"failed": True}, "wakeup": {"failed": False}})
+    archive.add_results({"suspend": {"failed": False, "reasons": ["replaced"]}})
+    assert not os.path.exists(f"{archive.path}.partial")
+    assert os.stat(archive.path).st_mtime == 1_700_000_000
+    for loaded in (archive, CaseArchive.load(archive.path), case_archive(archive.path)):
+        assert loaded.result("suspend") == {"failed": False, "reasons": ["replaced"]}
+        assert loaded.result("wakeup") == {"failed": False}
+        assert loaded.result("battery") is None
+        assert loaded.lines("dmesg.txt", 1500, 2) == DMESG.splitlines()[1499:1501]
+        assert loaded.info == {"Device Model": "Pixel 8"}
+
+
+def test_failed_rewrite_keeps_the_archive(tmp_path, monkeypatch):
+    archive = _archive(tmp_path)
+    archive.add_results({"suspend": {"failed": True}})
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(archives.os, "replace", fail)
+    with pytest.raises(OSError):
+        archive.add_results({"suspend": {"failed": False}})
+    assert not os.path.exists(f"{archive.path}.partial")
+    assert archive.result("suspend") == {"failed": True}
+
+
+def test_index_uses_stored_results(tmp_path):
+    archive = _archive(tmp_path)
+    detailed = {"conclusion": "stored", "step2_wakelocks": {"wakelocks": ["NlpWakeLock"]},
+                "step3_dmesg": {"failure_messages": []}}
+    archive.add_results({"suspend": {"failed": True, "reasons": [], "detailed_analysis": detailed}})
+    store = ResultStore(str(tmp_path / "results.db"))
+    assert index_cases(store, [archive.path], "suspend") == 1
+    _, rows = store.query("SELECT module, failed, conclusion FROM results")
+    assert rows == [("suspend", 1, "stored")]
+    assert store.top_wakelocks() == [("NlpWakeLock", 1)]
+    index_cases(store, [archive.path], "suspend", reanalyze=True)
+    _, rows = store.query("SELECT conclusion FROM results")
+    assert rows[0][0] != "stored"
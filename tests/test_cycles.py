@@ -0,0 +1,81 @@
+"""Tests for suspend_diagnosis.core.cycles."""
+from suspend_diagnosis.core.cycles import segment_cycles
+
+# 6.x kernel with pm_print_times: dev_fmt adds "PM: ", PCI and USB names contain colons
+CYCLE_6X = """\
+[  100.000000] PM: suspend entry (deep)
+[  100.010000] Freezing user space processes
+[  100.200000] pci 0000:00:14.0: PM: pci_pm_suspend+0x0/0x160 returned 0 after 15000 usecs
+[  100.210000] usb 1-0:1.0: PM: usb_dev_suspend+0x0/0x20 [usbcore] returned 0 after 120 usecs
+[  100.300000] PM: suspend of devices complete after 250.000 msecs
+[  105.000000] Resume caused by IRQ 200, qcom,smp2p-modem
+[  105.100000] pci 0000:00:14.0: PM: pci_pm_resume+0x0/0xe0 returned 0 after 30000 usecs
+[  105.200000] PM: resume of devices complete after 80.000 msecs
+[  105.300000] Restarting tasks ... done.
+[  105.310000] PM: suspend exit
+"""
+
+# 5.x kernel without the PM: prefix on device lines
+CYCLE_5X = """\
+[  200.000000] PM: suspend entry (s2idle)
+[  200.100000] i2c 0-0050: i2c_device_suspend+0x0/0x60 returned -16 after 2000 usecs
+[  200.110000] PM: Device 0-0050 failed to suspend: error -16
+[  200.200000] PM: suspend exit
+"""
+
+# Older kernels: "call <device>+ returned"
+CYCLE_OLD = """\
+[  300.000000] PM: Syncing filesystems ... done.
+[  300.100000] call 0000:00:02.0+ returned 0 after 12000 usecs
+[  300.200000] PM: suspend of devices complete after 120.000 msecs
+[  300.500000] Enabling non-boot CPUs ...
+[  300.600000] call 0000:00:02.0+ returned 0 after 40000 usecs
+[  300.700000] PM: resume devices took 0.200 seconds
+[  300.800000] Restarting tasks ... done.
+"""
+
+
+def _segment(text):
+    return segment_cycles((float(line[1:line.index("]")]), line) for line in text.splitlines())
+
+
+def test_colon_device_names_and_pm_prefix():
+    result = _segment(CYCLE_6X)
+    assert result.cycle_count == 1
+    cycle = result.cycles[0]
+    assert (cycle.entry, cycle.exit, cycle.suspend_ms, cycle.resume_ms) == (100.0, 105.31, 250.0, 80.0)
+    slow = [(c.driver, c.device, c.callback, c.phase, c.ms) for c in cycle.slow_callbacks]
+    assert slow == [
+        ("pci", "0000:00:14.0", "pci_pm_suspend+0x0/0x160", "suspend", 15.0),
+        ("pci", "0000:00:14.0", "pci_pm_resume+0x0/0xe0", "resume", 30.0),
+    ]
+    drivers = {(d.driver, d.phase): d for d in result.drivers}
+    assert drivers[("usb", "suspend")].count == 1
+    assert drivers[("usb", "suspend")].total_ms == 0.12
+
+
+def test_failed_callback_fails_the_cycle():
+    result = _segment(CYCLE_5X)
+    assert result.failed_count == 1
+    assert result.cycles[0].error.startswith("i2c 0-0050: i2c_device_suspend")
+
+
+def test_older_call_lines_use_the_resume_state():
+    result = _segment(CYCLE_OLD)
+    cycle = result.cycles[0]
+    assert [(c.device, c.phase) for c in cycle.slow_callbacks] == [
+        ("0000:00:02.0", "suspend"), ("0000:00:02.0", "resume"),
+    ]
+    assert cycle.resume_ms == 200.0 and cycle.exit == 300.8
+
+
+def test_percentiles_never_exceed_the_slowest_cycle():
+    # 250 ms falls low in its sketch bucket, whose midpoint is ~255 ms
+    single = _segment(CYCLE_6X)
+    assert single.suspend_p50_ms == single.suspend_p95_ms == 250.0
+    result = _segment(CYCLE_6X + CYCLE_5X + CYCLE_OLD)
+    assert result.cycle_count == 3
+    assert result.suspend_p95_ms <= 250.0 and result.resume_p95_ms <= 200.0
+    assert result.resume_p50_ms > 0
+    for driver in result.drivers:
+        assert driver.p50_ms <= driver.p95_ms <= driver.max_ms
@@ -0,0 +1,62 @@
+"""Tests for wakeup_diagnosis.interrupts."""
+import pytest
+
+from common.logs import LogStore
+from wakeup_diagnosis.interrupts import analyze_irq_wakeups, count_resume_irqs, parse_interrupts
+
+BEFORE = """\
+1000.00 3500.00
+           CPU0       CPU1       CPU2       CPU3
+ 45:         10          0          0          0     GICv3  222 Level     pm8xxx_rtc_alarm
+200:        100         20          0          0     GICv3  451 Edge      qcom,smp2p-modem
+IPI0:      5000       4000       3000       2000       Rescheduling interrupts
+Err:          0
+"""
+
+AFTER = """\
+1100.00 3900.00
+           CPU0       CPU1       CPU2       CPU3
+ 45:         12          0          0          0     GICv3  222 Level     pm8xxx_rtc_alarm
+200:        160         20          0          0     GICv3  451 Edge      qcom,smp2p-modem
+301:          7          0          0          0     msmgpio  12 Edge      gpio-keys
+IPI0:      5100       4000       3000       2000       Rescheduling interrupts
+Err:          0
+"""
+
+DMESG = """\
+[ 1000.000000] PM: suspend entry (deep)
+[ 1010.000000] Resume caused by IRQ 200, qcom,smp2p-modem
+[ 1020.000000] Resume caused by IRQ 200, qcom,smp2p-modem
+[ 1030.000000] gic_show_resume_irq: 45 triggered pm8xxx_rtc_alarm
+[ 3700.000000] PM: suspend exit
+"""
+
+
+def test_snapshot_parsing():
+    uptime, table = parse_interrupts(BEFORE)
+    assert uptime == 1000.0
+    assert (table["200"].count, table["200"].chip, table["200"].name) == (120, "GICv3", "qcom,smp2p-modem")
+    assert table["IPI0"].count == 14000 and table["IPI0"].name == "Rescheduling interrupts"
+    assert table["Err"].count == 0
+
+
+def test_resume_lines_are_counted_per_irq():
+    counts, names, total = count_resume_irqs(DMESG.splitlines())
+    assert counts == {"200": 2, "45": 1} and total == 3
+    assert names == {"200": "qcom,smp2p-modem", "45": "pm8xxx_rtc_alarm"}
+
+
+def test_resumes_and_snapshot_deltas_are_joined(tmp_path):
+    files = {"interrupts_before.txt": BEFORE, "interrupts_after.txt": AFTER, "dmesg.txt": DMESG}
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    result = analyze_irq_wakeups(LogStore({name: str(tmp_path / name) for name in files}))
+    assert result.elapsed_seconds == 100.0 and result.resume_count == 3
+    irqs = {e.irq: e for e in result.irqs}
+    assert [e.irq for e in result.irqs[:2]] == ["200", "45"]
+    assert (irqs["200"].wakeups, irqs["200"].interrupts) == (2, 60)
+    assert irqs["200"].interrupts_per_second == pytest.approx(0.6)
+    # Rates over the 2700 s span of dmesg
+    assert irqs["200"].wakeups_per_hour == pytest.approx(2 / 0.75)
+    # Registered between the snapshots: its whole count is the delta
+    assert (irqs["301"].wakeups, irqs["301"].interrupts, irqs["301"].name) == (0, 7, "gpio-keys")
@@ -0,0 +1,37 @@
+"""Tests for common.report.markdown_builder."""
+import pytest
+
+from common.report.markdown_builder import MarkdownBuilder
+
+SUSPEND_STATS = "success: 12\nfail: 0\nfailed_freeze: 0\n"
+DMESG = "[  100.000000] PM: suspend entry (deep)\n[  101.000000] PM: suspend exit\n"
+
+
+def _case(tmp_path):
+    artifacts = {}
+    for name, text in (("suspend_stats.txt", SUSPEND_STATS), ("dmesg.txt", DMESG)):
+        (tmp_path / name).write_text(text)
+        artifacts[name] = str(tmp_path / name)
+    return artifacts
+
+
+def _report(tmp_path, sections):
+    path = MarkdownBuilder().build(str(tmp_path), False, [], None, _case(tmp_path), sections=sections)
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_sections_render_in_manifest_order(tmp_path):
+    text = _report(tmp_path, ["Step 3: Kernel Log Analysis", "Step 1: Suspend Statistics Check"])
+    assert 0 < text.index("## Step 3") < text.index("## Step 1")
+    assert "## Step 2" not in text
+
+
+def test_every_section_renders_by_default(tmp_path):
+    text = _report(tmp_path, None)
+    assert text.index("## Step 1") < text.index("## Step 3")
+
+
+def test_unknown_section_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Findings"):
+        _report(tmp_path, ["Findings"])
@@ -0,0 +1,61 @@
+"""Tests for common.output and the --format json|jsonl paths."""
+import io
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from common.output import SCHEMA, SCHEMA_VERSION, JsonWriter, case_record, json_output, module_result
+from common.types import SuspendAnalysis
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def test_records_serialize_result_objects():
+    detailed = SuspendAnalysis()
+    detailed.step2_wakelocks.wakelocks = ["NlpWakeLock"]
+    record = case_record("/cases/a", {"suspend": module_result(True, ["Step 2: wakelock"], detailed)},
+                         {"Device Model": "Pixel 8"})
+    stream = io.StringIO()
+    JsonWriter(stream).write(record)
+    JsonWriter(stream).write(case_record("/cases/b", {}))
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    first = json.loads(lines[0])
+    assert (first["schema"], first["schema_version"]) == (SCHEMA, SCHEMA_VERSION)
+    assert first["case_info"] == {"Device Model": "Pixel 8"}
+    suspend = first["results"]["suspend"]
+    assert suspend["failed"] is True
+    assert suspend["detailed_analysis"]["step2_wakelocks"]["wakelocks"] == ["NlpWakeLock"]
+
+
+def test_json_output_keeps_stdout_for_records(capsys):
+    with json_output("json") as writer:
+        print("[INFO] progress")
+        writer.write(case_record("/cases/a", {}, {"tags": {"a"}}))
+    out, err = capsys.readouterr()
+    assert "[INFO] progress" in err and "[INFO]" not in out
+    assert json.loads(out)["case_info"] == {"tags": ["a"]}
+    assert out.startswith("{\n  ")
+    with json_output("report") as writer:
+        assert writer is None
+
+
+def test_json_format_skips_report_generation(tmp_path):
+    case = tmp_path / "case"
+    shutil.copytree(REPO / "cases" / "suspend" / "test_case1", case,
+                    ignore=shutil.ignore_patterns("*_report.*"))
+    code = (
+        "import sys; sys.path.insert(0, 'src')\n"
+        "from suspend_diagnosis.cli import build_parser\n"
+        "from suspend_diagnosis.main import main\n"
+        f"main(build_parser().parse_args(['--case-dir', {str(case)!r}, '--format', 'jsonl']))\n"
+        "print(sorted(m for m in sys.modules if m.startswith('common.report')), file=sys.stderr)\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True)
+    record = json.loads(proc.stdout)
+    assert record["case_dir"] == str(case)
+    assert "suspend" in record["results"]
+    assert proc.stderr.strip().splitlines()[-1] == "[]"
+    assert not list(case.glob("*_report.*"))
@@ -0,0 +1,27 @@
+"""Tests for common.packages."""
+from common.packages import PackageIndex
+
+PACKAGES = (
+    "package:android uid:1000\n"
+    "package:com.google.android.gms uid:10146\n"
+    "package:com.google.android.gms.persistent uid:10146\n"
+    "package:com.example.app uid:10200\n"
+)
+
+
+def test_longest_package_wins_over_an_earlier_bare_one():
+    index = PackageIndex.parse(PACKAGES)
+    line = "android wakelock held by com.google.android.gms.persistent:location"
+    assert index.find(line) == "com.google.android.gms.persistent"
+
+
+def test_uid_is_preferred_to_a_bare_system_package():
+    index = PackageIndex.parse(PACKAGES)
+    assert index.find("alarm android.intent.action.TIME_TICK uid=10200") == "com.example.app"
+    assert index.find("alarm android.intent.action.TIME_TICK") == "android"
+
+
+def test_component_and_job_names():
+    index = PackageIndex.parse(PACKAGES)
+    assert index.find('tag="*job*/com.example.app/.SyncService"') == "com.example.app"
+    assert index.find("nothing here uid=99999") is None
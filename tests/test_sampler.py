@@ -0,0 +1,88 @@
+"""Tests for common.sampler and the sampler settings of the collector."""
+import shutil
+import subprocess
+
+import pytest
+
+from common.collector import AdbEvidenceCollector
+from common.sampler import (
+    decode_samples,
+    derived_artifacts,
+    sampler_script,
+    suspend_stats_table,
+    wakeup_sources_table,
+)
+
+SAMPLES = """\
+### sample 0 1000.50
+### file suspend_stats
+success: 10
+fail: 1
+last_failed_dev: alarmtimer
+### file wakeup_sources
+name\tactive_count\tevent_count\twakeup_count\texpire_count\tactive_since\ttotal_time\tmax_time
+alarmtimer\t5\t5\t4\t0\t0\t120\t30
+### file interrupts
+           CPU0
+200:        100     GICv3  451 Edge      qcom,smp2p-modem
+### sample 1 1600.25
+### file suspend_stats
+success: 14
+fail: 1
+### file wakeup_sources
+name\tactive_count\tevent_count\twakeup_count\texpire_count\tactive_since\ttotal_time\tmax_time
+alarmtimer\t9\t9\t8\t0\t0\t200\t30
+### file interrupts
+           CPU0
+200:        160     GICv3  451 Edge      qcom,smp2p-modem
+### end 2
+### sample 2 1700.00
+### file suspend_stats
+success: 15
+"""
+
+
+def test_samples_decode_with_an_incomplete_tail():
+    samples = decode_samples(SAMPLES)
+    assert [(s.index, s.uptime) for s in samples] == [(0, 1000.5), (1, 1600.25), (2, 1700.0)]
+    assert samples[0].wall is None
+    assert samples[0].files["suspend_stats"] == "success: 10\nfail: 1\nlast_failed_dev: alarmtimer\n"
+    assert sorted(samples[1].files) == ["interrupts", "suspend_stats", "wakeup_sources"]
+    assert samples[2].files == {"suspend_stats": "success: 15\n"}
+
+
+def test_counter_tables():
+    samples = decode_samples(SAMPLES)[:2]
+    assert suspend_stats_table(samples) == [
+        (1000.5, {"success": 10, "fail": 1}), (1600.25, {"success": 14, "fail": 1}),
+    ]
+    assert wakeup_sources_table(samples) == [(1000.5, {"alarmtimer": (4, 120)}), (1600.25, {"alarmtimer": (8, 200)})]
+
+
+def test_derived_artifacts_span_the_sampled_window():
+    files = derived_artifacts(decode_samples(SAMPLES)[:2])
+    assert files["suspend_stats_before.txt"].startswith("success: 10")
+    assert files["suspend_stats.txt"].startswith("success: 14")
+    assert files["interrupts_before.txt"].startswith("1000.50 0.00\n")
+    assert files["interrupts_after.txt"].splitlines()[-1].split()[1] == "160"
+    assert derived_artifacts([]) == {}
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+def test_script_runs_and_writes_decodable_samples(tmp_path):
+    script = tmp_path / "sampler.sh"
+    script.write_text(sampler_script())
+    out = tmp_path / "samples.txt"
+    subprocess.run(["sh", str(script), "0", "0", str(out)], check=True, timeout=30)
+    text = out.read_text()
+    assert text.rstrip().endswith("### end 1")
+    samples = decode_samples(text)
+    assert len(samples) == 1 and sorted(samples[0].files) == ["interrupts", "suspend_stats", "wakeup_sources"]
+    # The device epoch is read right after the uptime
+    assert samples[0].wall is not None and samples[0].wall > 1e9
+
+
+def test_sample_duration_must_be_whole_seconds():
+    assert AdbEvidenceCollector(sample_duration=30.0).sample_duration == 30
+    with pytest.raises(ValueError, match="whole seconds"):
+        AdbEvidenceCollector(sample_duration=2.5)
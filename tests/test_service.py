@@ -0,0 +1,76 @@
+"""Tests for power_diagnosis.service."""
+import http.client
+import io
+import json
+import tarfile
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from power_diagnosis.service import DiagnosisService, _Handler
+
+
+def _tarball(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, text in files.items():
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def server(tmp_path):
+    service = DiagnosisService(work_dir=str(tmp_path / "work"), workers=1, queue_size=0, max_upload=4096)
+    handler = type("TestHandler", (_Handler,), {"service": service, "log_message": lambda *a: None})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+    service.shutdown()
+
+
+def _post(port, path, body, content_type):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+def test_upload_is_analyzed_and_removed(server):
+    service, port = server
+    body = _tarball({"case/suspend_stats.txt": "success: 3\nfail: 0\n"})
+    status, payload = _post(port, "/analyze?modules=suspend", body, "application/gzip")
+    assert status == 200 and "suspend" in payload["results"]
+    assert list(service.work_dir.iterdir()) == []
+
+
+def test_kept_upload_stays_on_disk(server):
+    service, port = server
+    body = _tarball({"suspend_stats.txt": "success: 3\nfail: 0\n"})
+    status, payload = _post(port, "/analyze?modules=suspend&keep=1&render=0", body, "application/x-tar")
+    assert status == 200
+    assert [p.name for p in service.work_dir.iterdir()] == [payload["case_dir"].rsplit("/", 1)[-1]]
+
+
+def test_bad_uploads_leave_nothing_behind(server):
+    service, port = server
+    assert _post(port, "/analyze", b"not a tarball", "application/gzip")[0] == 400
+    assert _post(port, "/analyze", b"x" * 5000, "application/gzip")[0] == 413
+    assert _post(port, "/analyze", b"<xml/>", "text/xml")[0] == 415
+    assert list(service.work_dir.iterdir()) == []
+
+
+def test_full_queue_is_refused_before_reading(server):
+    service, port = server
+    with service.slot():
+        status, payload = _post(port, "/analyze", _tarball({"dmesg.txt": ""}), "application/gzip")
+    assert status == 503 and "queue full" in payload["error"]
+    assert list(service.work_dir.iterdir()) == []
@@ -0,0 +1,51 @@
+"""Tests for common.store."""
+import sqlite3
+
+from common.store import ResultStore
+from common.types import SuspendAnalysis, WakelockRecord, WakeupAnalysis, WakeupSourceStats
+
+
+def _suspend(*wakelocks):
+    detailed = SuspendAnalysis()
+    detailed.step2_wakelocks.wakelocks = list(wakelocks)
+    detailed.step3_dmesg.failure_messages = ["[  12.345678] PM: Device 1-1 failed to suspend: error -16"]
+    return detailed
+
+
+def _wakeup():
+    detailed = WakeupAnalysis()
+    detailed.wakeup_sources.sources = [WakeupSourceStats("alarmtimer", 5, 5, 4)]
+    held, released = WakelockRecord("'NlpWakeLock'"), WakelockRecord("AudioMix")
+    held.active = True
+    released.total_ms = 90000
+    detailed.wakelocks.records = [held, released]
+    return detailed
+
+
+def test_results_aggregate_across_cases(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.record(str(tmp_path / "a"), "suspend", True, _suspend("PowerManagerService.Display"))
+    store.record(str(tmp_path / "b"), "suspend", True, _suspend("powermanagerservice.display", "sscrpcd:1081"))
+    store.record(str(tmp_path / "b"), "wakeup", False, _wakeup())
+    assert store.top_wakelocks()[0] == ("PowerManagerService.Display", 2)
+    assert store.top_failures() == [("PM: Device 1-1 failed to suspend: error -16", 2)]
+    assert store.top_wakeup_sources() == [("alarmtimer", 4, 1)]
+    assert store.summary() == [("suspend", 2, 2), ("wakeup", 1, 0)]
+
+
+def test_wakeup_rows_are_keyed_and_only_held_wakelocks(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.record(str(tmp_path / "a"), "wakeup", True, _wakeup())
+    store.record(str(tmp_path / "a"), "wakeup", True, _wakeup())
+    _, rows = store.query("SELECT name, display_name FROM wakelocks WHERE source = 'wakeup'")
+    assert rows == [("nlpwakelock", "'NlpWakeLock'")]
+
+
+def test_old_database_gains_new_columns(tmp_path):
+    path = str(tmp_path / "results.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE wakelocks (case_id INTEGER NOT NULL, source TEXT NOT NULL, name TEXT NOT NULL)")
+    conn.close()
+    store = ResultStore(path)
+    columns, _ = store.query("SELECT * FROM wakelocks")
+    assert columns == ["case_id", "source", "name", "display_name"]
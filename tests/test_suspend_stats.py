@@ -0,0 +1,38 @@
+"""Tests for suspend_diagnosis.core.suspend_stats."""
+from suspend_diagnosis.core.suspend_stats import parse_suspend_stats
+
+SUSPEND_STATS = (
+    "success: 12\n"
+    "fail: 2\n"
+    "failed_freeze: 0\n"
+    "failed_prepare: 0\n"
+    "failed_suspend: 2\n"
+    "failed_suspend_late: 0\n"
+    "failed_suspend_noirq: 0\n"
+    "failed_resume: 0\n"
+    "failed_resume_early: 0\n"
+    "failed_resume_noirq: 0\n"
+    "failures:\n"
+    "  last_failed_dev:\tdevA\n"
+    "\t\t\tdevB\n"
+    "  last_failed_errno:\t-16\n"
+    "\t\t\t-11\n"
+    "  last_failed_step:\tsuspend\n"
+    "\t\t\tsuspend\n"
+)
+
+
+def test_parse_suspend_stats():
+    stats = parse_suspend_stats(SUSPEND_STATS)
+    assert (stats.success, stats.fail, stats.failed_suspend) == (12, 2, 2)
+    assert stats.last_failed_dev == ["devA", "devB"]
+    assert stats.last_failed_errno == [-16, -11]
+    assert stats.last_failed_step == ["suspend", "suspend"]
+
+
+def test_parse_suspend_stats_with_crlf_line_ends():
+    for line_end in ("\r\n", "\r\r\n"):
+        stats = parse_suspend_stats(SUSPEND_STATS.replace("\n", line_end))
+        assert stats == parse_suspend_stats(SUSPEND_STATS)
+        assert stats.last_failed_dev == ["devA", "devB"]
+        assert stats.last_failed_errno == [-16, -11]
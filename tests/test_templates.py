@@ -0,0 +1,28 @@
+"""Tests for common.templates."""
+from common.templates import WILDCARD, TemplateMiner
+
+
+def test_repeated_numeric_lines_collapse_into_one_template():
+    miner = TemplateMiner()
+    for i in range(20):
+        miner.add(f"[{i}.5] healthd: {80 + i} {4000 + i} {300 + i} 0x{i:x}")
+    assert len(miner.templates) == 1
+    template = miner.ranked()[0]
+    assert template.count == 20
+    assert template.text == f"healthd: {WILDCARD} {WILDCARD} {WILDCARD} {WILDCARD}"
+
+
+def test_differing_tokens_become_parameters():
+    miner = TemplateMiner()
+    miner.add("[    1.000000] wlan: suspend blocked by rx_wake")
+    miner.add("[    2.000000] wlan: suspend blocked by tx_wake")
+    miner.add("[    3.000000] wlan: suspend blocked by scan_wake")
+    assert len(miner.templates) == 1
+    assert miner.ranked()[0].text == f"wlan: suspend blocked by {WILDCARD}"
+
+
+def test_dissimilar_lines_stay_apart():
+    miner = TemplateMiner()
+    miner.add("PM: suspend entry (deep)")
+    miner.add("PM: resume from suspend failed")
+    assert len(miner.templates) == 2
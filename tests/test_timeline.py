@@ -0,0 +1,98 @@
+"""Tests for common.timeline."""
+import datetime
+import json
+
+import pytest
+
+from common.timeline import export_timeline
+
+# Android kernel: the [sec.usec] clock stops for the 3600 s spent suspended
+DMESG = """\
+[  100.000000] PM: suspend entry 2025-10-01 10:00:00.000000000 UTC
+[  100.100000] PM: suspend of devices complete after 50.000 msecs
+[  100.200000] Resume caused by IRQ 200, qcom,smp2p-modem
+[  100.300000] PM: suspend exit 2025-10-01 11:00:00.200000000 UTC
+[  101.300000] PM: suspend entry 2025-10-01 11:00:01.200000000 UTC
+[  101.500000] PM: suspend exit 2025-10-01 11:00:01.400000000 UTC
+"""
+
+# Samples 600 s apart; the device epoch of each is read with its uptime
+SAMPLES = """\
+### sample 0 1000.00 1759312800.000000000
+### file suspend_stats
+success: 10
+fail: 0
+### file wakeup_sources
+name\tactive_count\tevent_count\twakeup_count\texpire_count\tactive_since\ttotal_time\tmax_time
+alarmtimer\t5\t5\t4\t0\t0\t120\t30
+### sample 1 1600.00 1759313400.000000000
+### file suspend_stats
+success: 12
+fail: 0
+### file wakeup_sources
+name\tactive_count\tevent_count\twakeup_count\texpire_count\tactive_since\ttotal_time\tmax_time
+alarmtimer\t7\t7\t6\t0\t0\t150\t30
+### end 2
+"""
+
+LOGCAT = "10-01 11:00:02.000 D/PowerManagerService( 1000): acquireWakeLockInternal: lock=1, flags=0x1, tag=\"Sync\"\n"
+
+
+def _case(tmp_path, **files):
+    artifacts = {}
+    for name, text in files.items():
+        path = tmp_path / f"{name}.txt"
+        path.write_text(text)
+        artifacts[f"{name}.txt"] = str(path)
+    return artifacts
+
+
+def _events(path):
+    with open(path, encoding="utf-8") as f:
+        return [e for e in json.load(f)["traceEvents"] if e["ph"] != "M"]
+
+
+def _utc(text):
+    return datetime.datetime.fromisoformat(text).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def test_kernel_times_are_anchored_across_suspend(tmp_path):
+    artifacts = _case(tmp_path, dmesg=DMESG)
+    paths, _ = export_timeline(artifacts, str(tmp_path / "power_timeline.json"))
+    assert paths == [str(tmp_path / "power_timeline.json")]
+    events = _events(paths[0])
+    slices = [e for e in events if e["name"] == "suspend"]
+    assert [e["ts"] / 1e6 for e in slices] == [_utc("2025-10-01 10:00:00"), _utc("2025-10-01 11:00:01.2")]
+    # Entry and exit are anchored separately, so the slice covers the time suspended
+    assert slices[0]["dur"] / 1e6 == pytest.approx(3600.2)
+    assert slices[1]["dur"] / 1e6 == pytest.approx(0.2)
+    # Before the exit line, still on the offset of the entry line
+    resume = next(e for e in events if e["name"] == "resume")
+    assert resume["ts"] / 1e6 == pytest.approx(_utc("2025-10-01 10:00:00.2"))
+
+
+def test_samples_use_the_device_clock(tmp_path):
+    artifacts = _case(tmp_path, samples=SAMPLES)
+    paths, _ = export_timeline(artifacts, str(tmp_path / "power_timeline.json"))
+    counters = _events(paths[0])
+    assert {e["ts"] / 1e6 for e in counters} == {1759313400.0}
+    assert {e["name"]: e["args"] for e in counters} == {
+        "suspend": {"success": 2, "fail": 0}, "alarmtimer": {"wakeups": 2},
+    }
+
+
+def test_unanchored_tracks_go_to_the_uptime_trace(tmp_path):
+    dmesg = "[  100.000000] PM: suspend entry (deep)\n[  105.000000] PM: suspend exit\n"
+    samples = SAMPLES.replace(" 1759312800.000000000", "").replace(" 1759313400.000000000", "")
+    artifacts = _case(tmp_path, dmesg=dmesg, samples=samples, logcat=LOGCAT)
+    main = tmp_path / "power_timeline.json"
+    paths, count = export_timeline(artifacts, str(main), {"Collection Time": "2025-10-01T11:10:00"})
+    assert paths == [str(main), str(tmp_path / "power_timeline_uptime.json")]
+    assert [(e["name"], e["ph"]) for e in _events(main)] == [("Sync", "b"), ("Sync", "e")]
+    since_boot = _events(paths[1])
+    assert [e["ts"] / 1e6 for e in since_boot if e["name"] == "suspend" and e["ph"] == "X"] == [100.0]
+    assert count == len(json.loads(main.read_text())["traceEvents"]) + \
+        len(json.loads((tmp_path / "power_timeline_uptime.json").read_text())["traceEvents"])
+    # Once every track is aligned the leftover uptime trace is removed
+    export_timeline(_case(tmp_path, dmesg=DMESG, logcat=LOGCAT), str(main))
+    assert not (tmp_path / "power_timeline_uptime.json").exists()
@@ -0,0 +1,22 @@
+"""Tests for common.timestamps."""
+import pytest
+
+from common.timestamps import MONOTONIC, WALL, parse_collection_time, parse_time
+
+
+def test_parse_time_accepts_the_log_clock():
+    assert parse_time("123.5", MONOTONIC) == 123.5
+    assert parse_time("2025-11-15 08:30:00", WALL) > 1e9
+
+
+@pytest.mark.parametrize("value, kind", [("123.5", WALL), ("2025-11-15 08:30:00", MONOTONIC)])
+def test_parse_time_rejects_the_other_clock(value, kind):
+    with pytest.raises(ValueError):
+        parse_time(value, kind)
+
+
+def test_parse_collection_time_formats():
+    expected = "2025-11-15T08:22:58"
+    for value in ("Sat Nov 15 08:22:58 UTC 2025", "Sat 11/15/2025  8:22:58.12", "2025-11-15 08:22:58"):
+        assert parse_collection_time(value).isoformat() == expected
+    assert parse_collection_time("unknown") is None
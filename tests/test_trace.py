@@ -0,0 +1,46 @@
+"""Tests for common.trace."""
+import json
+
+from common import trace
+
+
+def test_span_is_a_no_op_while_disabled():
+    trace.disable()
+    with trace.span("read:dmesg.txt", cat="io") as sp:
+        sp.set(bytes=10)
+    assert sp is trace._NULL_SPAN
+
+
+def test_spans_export_as_chrome_trace_and_summary(tmp_path):
+    tracer = trace.enable(track_memory=False)
+    try:
+        with trace.span("analyze", lines=3):
+            for _ in range(2):
+                with trace.span("read", cat="io") as sp:
+                    sp.set(bytes=100)
+    finally:
+        trace.disable()
+    path = tracer.write_chrome_trace(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events] == ["analyze", "read", "read"]
+    outer, inner = events[0], events[1]
+    assert outer["ph"] == "X" and outer["cat"] == "stage" and inner["cat"] == "io"
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    rows = {line.split()[0]: line.split() for line in tracer.summary().splitlines()[2:]}
+    assert rows["read"][1] == "2" and rows["read"][4] == "200"
+    assert rows["analyze"][5] == "3"
+
+
+def test_writer_names_each_track_once(tmp_path):
+    path = str(tmp_path / "events.json")
+    with trace.TraceEventWriter(path) as writer:
+        writer.process(1, "kernel", sort_index=0)
+        first = writer.track(1, "dmesg")
+        assert writer.track(1, "dmesg") == first
+        assert writer.track(1, "logcat") != first
+        writer.write({"name": "x", "ph": "i", "pid": 1, "tid": first, "ts": 0})
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events].count("thread_name") == 2
+    assert writer.count == len(events) == 5
@@ -0,0 +1,41 @@
+"""Tests for wakeup_diagnosis.wakelocks."""
+from common.logs import LogStore
+from wakeup_diagnosis.wakelocks import correlate_wakelocks, find_wakelock
+
+SUSPEND_CONTROL = (
+    " | NAME | PID | TYPE | STATUS | ACTIVE COUNT | TOTAL TIME | MAX TIME | EVENT COUNT | WAKEUP COUNT "
+    "| EXPIRE COUNT | PREVENT SUSPEND TIME | LAST CHANGE | \n"
+    " | PowerManagerService.Display | 1922 | Native | Active | 1 | 941874ms | 653247ms | --- | --- "
+    "| --- | --- | 1099043ms | \n"
+    " | NlpWakeLock | 2990 | Native | Inactive | 400 | 900000ms | 3000ms | --- | --- "
+    "| --- | --- | 1099043ms | \n"
+)
+
+WAKEUP_SOURCES = (
+    "name\tactive_count\tevent_count\twakeup_count\texpire_count\tactive_since\ttotal_time\tmax_time\t"
+    "last_change\tprevent_suspend_time\n"
+    "qcom_rx_wakelock\t120\t130\t95\t0\t0\t700000\t9000\t5\t0\n"
+    "alarmtimer\t50\t50\t48\t0\t1500\t2000\t1500\t5\t0\n"
+)
+
+
+def _logs(tmp_path):
+    (tmp_path / "dumpsys_suspend.txt").write_text(SUSPEND_CONTROL)
+    (tmp_path / "wakeup_sources.txt").write_text(WAKEUP_SOURCES)
+    return LogStore({name: str(tmp_path / name) for name in ("dumpsys_suspend.txt", "wakeup_sources.txt")})
+
+
+def test_current_hold_is_kept_apart_from_total_time(tmp_path):
+    result = correlate_wakelocks(_logs(tmp_path))
+    display = find_wakelock(result, "PowerManagerService.Display")
+    assert (display.active, display.hold_ms, display.total_ms) == (True, 653247, 941874)
+    nlp = find_wakelock(result, "NlpWakeLock")
+    assert (nlp.active, nlp.hold_ms, nlp.total_ms) == (False, 0, 900000)
+
+
+def test_wakeup_source_hold_is_its_active_since(tmp_path):
+    result = correlate_wakelocks(_logs(tmp_path))
+    rx = find_wakelock(result, "qcom_rx_wakelock")
+    assert (rx.active, rx.hold_ms, rx.total_ms) == (False, 0, 700000)
+    alarm = find_wakelock(result, "alarmtimer")
+    assert (alarm.active, alarm.hold_ms) == (True, 1500)
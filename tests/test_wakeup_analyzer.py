@@ -0,0 +1,34 @@
+"""Tests for wakeup_diagnosis.wakeup_analyzer."""
+import pytest
+
+from common.logs import LogStore
+from wakeup_diagnosis.wakeup_analyzer import WakeupAnalyzer
+
+
+def _resume(t):
+    return (
+        f"[{t:>10.6f}] PM: suspend entry (deep)\n"
+        f"[{t + 5:>10.6f}] Resume caused by IRQ 200, qcom,smp2p-modem wakeup interrupt\n"
+        f"[{t + 5.1:>10.6f}] PM: resume of devices complete after 40.000 msecs\n"
+        f"[{t + 5.2:>10.6f}] PM: suspend exit\n"
+    )
+
+
+def _dmesg(tmp_path, text):
+    (tmp_path / "dmesg.txt").write_text(text)
+    return WakeupAnalyzer()._analyze_dmesg_wakeups(LogStore({"dmesg.txt": str(tmp_path / "dmesg.txt")}))
+
+
+def test_each_resume_counts_once(tmp_path):
+    result = _dmesg(tmp_path, "".join(_resume(100.0 + 60 * i) for i in range(5)))
+    assert result.event_count == 5
+    assert [e.timestamp for e in result.wakeup_events] == [105.0 + 60 * i for i in range(5)]
+    assert result.wakeup_intervals == [60.0] * 4
+
+
+def test_resumes_without_suspend_entries_split_on_gaps(tmp_path):
+    text = "".join(_resume(100.0 + 30 * i).split("\n", 1)[1] for i in range(4))
+    result = _dmesg(tmp_path, text)
+    assert result.event_count == 4
+    assert result.wakeup_rate == pytest.approx(4 / (result.window_seconds / 60))
+    assert result.window_seconds == pytest.approx(90.2)